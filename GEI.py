@@ -42,26 +42,25 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from scipy import stats
 from datetime import datetime
 from sqlalchemy import create_engine
 import warnings
 import ssl
-import openpyxl
 from io import BytesIO
-from reportlab.lib.pagesizes import A4, letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
 import os
-from sklearn.cluster import KMeans, DBSCAN
-from sklearn.preprocessing import StandardScaler
-from sklearn.decomposition import PCA
-from sklearn.metrics import silhouette_score, davies_bouldin_score, calinski_harabasz_score
-from sklearn.ensemble import IsolationForest
-import numpy as np
+# scikit-learn (src.ml) e ReportLab (PDFs) são importados nas funções que os usam
+from src.data.armazem_features import carregar_armazem_features
+from src.data.servico_dados import carregar_do_servico_dados
+from src.config.settings import (
+    ML_FEATURES, ESCALA_ML_CONFIG, formatar_serie_numerica, formatar_numero_serie,
+    classificar_risco, classificar_risco_serie, limites_risco
+)
+from src.config.database import Queries
+from src.components.distribuicoes import figura_histograma, figura_boxplot
+from src.reports.export import exportar_para_excel, construir_documento
+from src.reports.artefatos import botao_download_sob_demanda
+from src.reports.fila import chave_dossie, exibir_relatorio_em_segundo_plano
+from src.reports.extracao import exibir_extracao_completa
 
 os.environ['PYTHONWARNINGS'] = 'ignore::DeprecationWarning'
 
@@ -178,9 +177,16 @@ def get_impala_engine():
         st.error(f"Erro ao conectar ao Impala: {e}")
         return None
 
-@st.cache_data(ttl=3600, show_spinner="Carregando dados principais...")
 def carregar_todos_os_dados(_engine):
-    """Carrega datasets principais do Sistema GEI"""
+    """Carrega datasets principais do Sistema GEI (do serviço de dados compartilhado, se ativo)"""
+    dados = carregar_do_servico_dados()
+    if dados is not None:
+        return dados
+    return carregar_todos_os_dados_banco(_engine)
+
+@st.cache_data(ttl=3600, show_spinner="Carregando dados principais...")
+def carregar_todos_os_dados_banco(_engine):
+    """Carrega datasets principais do Sistema GEI diretamente do banco"""
     dados = {}
     
     if _engine is None:
@@ -531,8 +537,157 @@ def formatar_moeda(valor):
     else:
         return f"R$ {valor:.2f}"
 
+def formatar_moeda_coluna(serie, valor_ausente="N/A"):
+    """
+    Versão vetorizada de formatar_moeda para uma coluna inteira
+
+    Cada faixa (B, M, K e valores menores) é formatada de uma vez, sem chamar
+    formatar_moeda linha a linha.
+    """
+    valores = pd.to_numeric(serie, errors='coerce')
+    resultado = pd.Series(valor_ausente, index=serie.index, name=serie.name, dtype=object)
+
+    faixas = [
+        (valores >= 1e9, 1e9, 1, 'B'),
+        ((valores >= 1e6) & (valores < 1e9), 1e6, 1, 'M'),
+        ((valores >= 1e3) & (valores < 1e6), 1e3, 1, 'K'),
+        (valores < 1e3, 1, 2, ''),
+    ]
+    for mascara, divisor, casas, sufixo in faixas:
+        if mascara.any():
+            resultado[mascara] = formatar_serie_numerica(
+                valores[mascara] / divisor, casas,
+                separador_milhar='', separador_decimal='.', prefixo='R$ ', sufixo=sufixo
+            )
+
+    return resultado
+
+def montar_query_grupos_ml(limite=10000):
+    """
+    Query das features agregadas por grupo (gei_percent) usadas nos modelos de ML
+    
+    Com limite, retorna os grupos de maior score_final_ccs; com limite=None,
+    retorna todos os grupos (leitura em lotes no modo em escala).
+    """
+    return Queries.get_features_ml(limite)
+
+def contar_estratos_e_lotes_banco(engine):
+    """
+    Contagem de grupos por faixa de score e leitor de lotes direto do banco
+    (usado quando o armazém de features não está disponível)
+    """
+    largura = ESCALA_ML_CONFIG['largura_estrato']
+    query_estratos = f"""
+        SELECT
+            CAST(LEAST(GREATEST(FLOOR(COALESCE(score_final_ccs, 0) / {largura}), 0), {int(100 / largura) - 1}) AS INT) as estrato,
+            COUNT(*) as qtd
+        FROM gessimples.gei_percent
+        WHERE qntd_cnpj > 1
+        GROUP BY 1
+    """
+    df_estratos = pd.read_sql(query_estratos, engine)
+    contagens = dict(zip(df_estratos['estrato'].astype(int), df_estratos['qtd'].astype(int)))
+    
+    query_todos = montar_query_grupos_ml(limite=None)
+    
+    def ler_lotes():
+        for lote in pd.read_sql(query_todos, engine, chunksize=ESCALA_ML_CONFIG['tamanho_lote']):
+            yield lote.fillna(0)
+    
+    return contagens, ler_lotes
+
+def analise_ml_em_escala(engine, filtros, tamanho_amostra, n_clusters, contamination):
+    """
+    Modo em escala: ajusta os modelos em amostra estratificada da gei_percent
+    e pontua todos os grupos em lotes, sem o corte de LIMIT 10000
+    """
+    from src.ml.escala import ajustar_e_pontuar_em_escala, calcular_estratos
+    
+    if st.button("🚀 Ajustar em Amostra e Pontuar Todos os Grupos", type="primary"):
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        
+        status_text.text("Contando grupos por faixa de score...")
+        
+        armazem = carregar_armazem_features(engine)
+        if armazem is not None:
+            # Lotes lidos do memory-map, sem novas queries
+            estratos = calcular_estratos(armazem.como_dataframe(['score_final_ccs'])['score_final_ccs'])
+            contagens = pd.Series(estratos).value_counts().to_dict()
+            ler_lotes = lambda: (lote.fillna(0) for lote in armazem.lotes())
+        else:
+            contagens, ler_lotes = contar_estratos_e_lotes_banco(engine)
+        
+        total_grupos = sum(contagens.values())
+        
+        if total_grupos == 0:
+            st.error("Nenhum grupo encontrado com múltiplos CNPJs.")
+            progress_bar.empty()
+            status_text.empty()
+            return
+        
+        def ao_progresso(mensagem, processados):
+            status_text.text(f"{mensagem} ({processados:,}/{total_grupos:,})")
+            progress_bar.progress(min(processados / total_grupos, 1.0))
+        
+        pipeline, df_scores = ajustar_e_pontuar_em_escala(
+            ler_lotes,
+            contagens,
+            ML_FEATURES,
+            tamanho_amostra=tamanho_amostra,
+            n_components_pca=3,
+            n_clusters=n_clusters,
+            contamination=contamination,
+            ao_progresso=ao_progresso
+        )
+        
+        progress_bar.empty()
+        status_text.empty()
+        
+        st.session_state['df_scores_ml_escala'] = df_scores
+        st.session_state['pipeline_ml_escala'] = pipeline
+        st.success(f"✅ {len(df_scores):,} grupos pontuados (modelos ajustados em {pipeline.metadados['tamanho_amostra']:,} grupos)")
+    
+    if 'df_scores_ml_escala' not in st.session_state:
+        st.info("👆 Clique no botão para ajustar os modelos e pontuar todos os grupos.")
+        return
+    
+    df_scores = st.session_state['df_scores_ml_escala']
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Grupos Pontuados", f"{len(df_scores):,}")
+    with col2:
+        st.metric("Na Amostra de Ajuste", f"{int(df_scores['na_amostra'].sum()):,}")
+    with col3:
+        st.metric("Anomalias (Isolation Forest)", f"{int(df_scores['iforest_eh_grupo'].sum()):,}")
+    with col4:
+        st.metric("Consenso (2/2)", f"{int((df_scores['votos_eh_grupo'] == 2).sum()):,}")
+    
+    fig = figura_histograma(df_scores, 'iforest_score', bins=50, coluna_cor='kmeans_eh_grupo',
+                            titulo="Distribuição do Score de Anomalia (quanto menor, mais anômalo)",
+                            rotulo_x='Score Isolation Forest', template=filtros['tema'])
+    fig.update_layout(legend_title_text='K-Means: Grupo')
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.subheader("Grupos Mais Suspeitos")
+    df_top = df_scores.sort_values(['votos_eh_grupo', 'iforest_score'], ascending=[False, True]).head(500)
+    st.dataframe(df_top, use_container_width=True, hide_index=True, height=400)
+    
+    botao_download_sob_demanda(
+        label="📥 Download Scores de Todos os Grupos (CSV)",
+        gerar=lambda: df_scores.to_csv(index=False).encode('utf-8'),
+        entradas=df_scores,
+        file_name=f"grupos_ml_escala_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+        mime="text/csv"
+    )
+
 def analise_machine_learning(engine, dados, filtros):
     """Análise de Machine Learning para identificação de grupos econômicos"""
+    from sklearn.cluster import KMeans, DBSCAN
+    from sklearn.metrics import silhouette_score
+    from sklearn.ensemble import IsolationForest
+    from src.ml.registro import obter_registro_modelos, ajustar_pipeline
     
     st.markdown("<h1 class='main-header'>🤖 Machine Learning - Identificação de Grupos Econômicos</h1>", unsafe_allow_html=True)
     
@@ -547,8 +702,10 @@ def analise_machine_learning(engine, dados, filtros):
     # ADICIONAR OPÇÃO DE MODO
     modo_analise = st.radio(
         "Modo de Análise:",
-        ["Individual (escolher algoritmo)", "Consenso (executar todos os 3 modelos)"],
-        help="Individual: executa apenas 1 algoritmo | Consenso: executa os 3 e compara resultados"
+        ["Individual (escolher algoritmo)", "Consenso (executar todos os 3 modelos)",
+         "Escala (ajustar em amostra e pontuar todos os grupos)"],
+        help="Individual: executa apenas 1 algoritmo | Consenso: executa os 3 e compara resultados | "
+             "Escala: ajusta K-Means e Isolation Forest em amostra estratificada e pontua toda a gei_percent"
     )
     
     if modo_analise == "Individual (escolher algoritmo)":
@@ -572,6 +729,23 @@ def analise_machine_learning(engine, dados, filtros):
             usar_pca = st.checkbox("Usar PCA (Redução de Dimensionalidade)", value=True)
             if usar_pca:
                 n_components_pca = st.slider("Componentes PCA", 2, 10, 3)
+    elif modo_analise == "Escala (ajustar em amostra e pontuar todos os grupos)":
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            tamanho_amostra = st.slider(
+                "Tamanho da amostra de ajuste", 5000, 100000, ESCALA_ML_CONFIG['tamanho_amostra'], 5000,
+                help="Amostra estratificada por faixa de score_final_ccs"
+            )
+        
+        with col2:
+            n_clusters = st.slider("Número de Clusters (K-Means)", 2, 5, 2)
+        
+        with col3:
+            contamination_escala = st.slider("Contaminação (Isolation Forest)", 0.05, 0.5, 0.3, 0.05)
+        
+        analise_ml_em_escala(engine, filtros, tamanho_amostra, n_clusters, contamination_escala)
+        return
     else:
         # Modo consenso - configurações fixas otimizadas
         st.info("""
@@ -582,6 +756,18 @@ def analise_machine_learning(engine, dados, filtros):
         """)
         usar_pca = True
         n_components_pca = 3
+        
+        n_jobs_consenso = st.slider(
+            "Processos paralelos (n_jobs)",
+            1, max(1, os.cpu_count() or 1), min(3, os.cpu_count() or 1),
+            help="K-Means, DBSCAN e Isolation Forest são ajustados ao mesmo tempo em processos separados"
+        )
+    
+    reutilizar_modelo = st.checkbox(
+        "Reutilizar último modelo salvo com a mesma configuração (pontuar sem reajustar)",
+        value=False,
+        help="Se os dados mudaram, novos grupos são pontuados pelo modelo já ajustado em vez de treinar novamente"
+    )
     
     # Botão para carregar dados
     if st.button("🔄 Carregar Dados dos Grupos", type="primary"):
@@ -593,94 +779,19 @@ def analise_machine_learning(engine, dados, filtros):
             status_text.text("Carregando dados agregados da tabela gei_percent...")
             progress_bar.progress(30)
             
-            query_grupos = """
-            SELECT 
-                num_grupo,
-                qntd_cnpj as qtd_cnpjs,
-                
-                -- Scores já calculados
-                COALESCE(score_final_ccs, 0) as score_final_ccs,
-                COALESCE(score_final_avancado, 0) as score_final_avancado,
-                COALESCE(total, 0) as score_inconsistencias_nfe,
-                
-                -- Métricas Cadastrais
-                CASE WHEN nm_razao_social = 'S' THEN 1 ELSE 0 END as razao_social_identica,
-                CASE WHEN nm_fantasia = 'S' THEN 1 ELSE 0 END as fantasia_identica,
-                CASE WHEN cd_cnae = 'S' THEN 1 ELSE 0 END as cnae_identico,
-                CASE WHEN nm_contador = 'S' THEN 1 ELSE 0 END as contador_identico,
-                CASE WHEN endereco = 'S' THEN 1 ELSE 0 END as endereco_identico,
-                qntd_sn + qntd_normal + qntd_s as total_regimes,
-                
-                -- Métricas Financeiras
-                COALESCE(valor_max, 0) as receita_maxima,
-                CASE WHEN valor_max > 4800000 THEN 1 ELSE 0 END as acima_limite_sn,
-                
-                -- Vínculos Societários
-                COALESCE(qtd_socios_compartilhados, 0) as socios_compartilhados,
-                COALESCE(max_empresas_por_socio, 0) as max_empresas_socio,
-                COALESCE(indice_interconexao, 0) as indice_interconexao,
-                COALESCE(perc_cnpjs_com_socios, 0) as perc_cnpjs_com_socios,
-                
-                -- Convênio 115
-                COALESCE(indice_risco_grupo_economico, 0) as indice_risco_c115,
-                COALESCE(perc_cnpjs_relacionados, 0) as perc_cnpjs_relacionados_c115,
-                COALESCE(total_compartilhamentos, 0) as total_compartilhamentos_c115,
-                CASE 
-                    WHEN nivel_risco_grupo_economico = 'CRÍTICO' THEN 3
-                    WHEN nivel_risco_grupo_economico = 'ALTO' THEN 2
-                    WHEN nivel_risco_grupo_economico = 'MÉDIO' THEN 1
-                    ELSE 0
-                END as nivel_risco_c115_num,
-                
-                -- Indícios Fiscais
-                COALESCE(qtd_total_indicios, 0) as total_indicios,
-                COALESCE(qtd_tipos_indicios_distintos, 0) as tipos_indicios_distintos,
-                COALESCE(perc_cnpjs_com_indicios, 0) as perc_cnpjs_com_indicios,
-                COALESCE(indice_risco_indicios, 0) as indice_risco_indicios,
-                
-                -- Meios de Pagamento
-                COALESCE(valor_meios_pagamento_empresas, 0) as pagamentos_empresas,
-                COALESCE(valor_meios_pagamento_socios, 0) as pagamentos_socios,
-                COALESCE(indice_risco_pagamentos, 0) as indice_risco_pagamentos,
-                
-                -- Funcionários
-                COALESCE(total_funcionarios, 0) as total_funcionarios,
-                COALESCE(indice_risco_fat_func, 0) as indice_risco_fat_func,
-                
-                -- CCS (Contas Bancárias)
-                COALESCE(ccs_qtd_contas_compartilhadas, 0) as contas_compartilhadas,
-                COALESCE(ccs_perc_contas_compartilhadas, 0) as perc_contas_compartilhadas,
-                COALESCE(ccs_max_cnpjs_por_conta, 0) as max_cnpjs_por_conta,
-                COALESCE(ccs_qtd_sobreposicoes_responsaveis, 0) as sobreposicoes_responsaveis,
-                COALESCE(indice_risco_ccs, 0) as indice_risco_ccs,
-                CASE 
-                    WHEN nivel_risco_ccs = 'CRÍTICO' THEN 3
-                    WHEN nivel_risco_ccs = 'ALTO' THEN 2
-                    WHEN nivel_risco_ccs = 'MÉDIO' THEN 1
-                    ELSE 0
-                END as nivel_risco_ccs_num,
-                
-                -- Inconsistências NFe (detalhadas)
-                COALESCE(perc_cliente, 0) as perc_cliente_incons,
-                COALESCE(perc_email, 0) as perc_email_incons,
-                COALESCE(perc_tel_dest, 0) as perc_tel_dest_incons,
-                COALESCE(perc_tel_emit, 0) as perc_tel_emit_incons,
-                COALESCE(perc_codigo_produto, 0) as perc_codigo_produto_incons,
-                COALESCE(perc_fornecedor, 0) as perc_fornecedor_incons,
-                COALESCE(perc_end_emit, 0) as perc_end_emit_incons,
-                COALESCE(perc_end_dest, 0) as perc_end_dest_incons,
-                COALESCE(perc_descricao_produto, 0) as perc_descricao_produto_incons,
-                COALESCE(perc_ip_transmissao, 0) as perc_ip_transmissao_incons,
-                COALESCE(distinct_nfe, 0) as total_nfe_analisadas
-                
-            FROM gessimples.gei_percent
-            WHERE qntd_cnpj > 1
-            ORDER BY score_final_ccs DESC
-            LIMIT 10000
-            """
+            # Armazém de features (float32, memory-map) evita repetir a query a cada carga
+            armazem = carregar_armazem_features(engine)
             
             progress_bar.progress(60)
-            df_grupos = pd.read_sql(query_grupos, engine)
+            if armazem is not None:
+                df_grupos = (
+                    armazem.como_dataframe()
+                    .sort_values('score_final_ccs', ascending=False, kind='stable')
+                    .head(10000)
+                    .reset_index(drop=True)
+                )
+            else:
+                df_grupos = pd.read_sql(montar_query_grupos_ml(limite=10000), engine)
             
             if df_grupos.empty:
                 st.error("Nenhum grupo encontrado com múltiplos CNPJs.")
@@ -806,10 +917,9 @@ def analise_machine_learning(engine, dados, filtros):
     col1, col2 = st.columns(2)
     
     with col1:
-        fig = px.histogram(df_grupos, x='score_ml_percentual', nbins=20,
-                          title="Distribuição de Scores ML",
-                          labels={'score_ml_percentual': 'Score ML (%)', 'count': 'Frequência'},
-                          template=filtros['tema'])
+        fig = figura_histograma(df_grupos, 'score_ml_percentual', bins=20,
+                                titulo="Distribuição de Scores ML",
+                                rotulo_x='Score ML (%)', template=filtros['tema'])
         st.plotly_chart(fig, use_container_width=True)
     
     with col2:
@@ -863,16 +973,42 @@ def analise_machine_learning(engine, dados, filtros):
             
             with st.spinner("Treinando modelo..."):
                 
-                X = df_grupos[features_para_modelo].fillna(0)
+                # Modelo escolhido (não ajustado)
+                if algoritmo == "K-Means":
+                    estimador = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+                    hiperparametros = {'algoritmo': 'kmeans', 'n_clusters': n_clusters}
+                elif algoritmo == "DBSCAN":
+                    estimador = DBSCAN(eps=eps, min_samples=min_samples)
+                    hiperparametros = {'algoritmo': 'dbscan', 'eps': eps, 'min_samples': min_samples}
+                else:
+                    estimador = IsolationForest(contamination=0.3, random_state=42)
+                    hiperparametros = {'algoritmo': 'iforest', 'contamination': 0.3}
+                
+                hiperparametros['n_components_pca'] = n_components_pca if usar_pca else None
+                
+                # Registro de modelos: reaproveita pipeline já ajustado para os mesmos dados/parâmetros
+                pipeline, labels_modelos, origem = obter_registro_modelos().obter_ou_ajustar(
+                    df_grupos,
+                    features_para_modelo,
+                    hiperparametros,
+                    lambda: ajustar_pipeline(
+                        df_grupos, features_para_modelo, {'modelo': estimador},
+                        n_components_pca if usar_pca else None
+                    ),
+                    reutilizar_compativel=reutilizar_modelo
+                )
+                
+                if origem == 'registro':
+                    st.info("♻️ Modelo carregado do registro (mesmos dados e parâmetros) - sem reajuste")
+                elif origem == 'compativel':
+                    st.info("♻️ Grupos pontuados com o último modelo salvo - sem reajuste")
                 
-                # Normalização
-                scaler = StandardScaler()
-                X_scaled = scaler.fit_transform(X)
+                scaler = pipeline.scaler
+                modelo = pipeline.modelos['modelo']
                 
                 # PCA (opcional)
                 if usar_pca:
-                    pca = PCA(n_components=n_components_pca)
-                    X_transformed = pca.fit_transform(X_scaled)
+                    pca = pipeline.pca
                     
                     variancia_explicada = pca.explained_variance_ratio_.sum() * 100
                     st.info(f"✅ PCA aplicado: {n_components_pca} componentes explicam {variancia_explicada:.1f}% da variância")
@@ -903,22 +1039,11 @@ def analise_machine_learning(engine, dados, filtros):
                                 feature_name = features_para_modelo[idx]
                                 peso = loadings[idx]
                                 st.write(f"  • {feature_name}: {peso:.3f}")
-                else:
-                    X_transformed = X_scaled
                 
-                # Aplicar algoritmo escolhido
-                if algoritmo == "K-Means":
-                    modelo = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-                    labels = modelo.fit_predict(X_transformed)
-                    
-                elif algoritmo == "DBSCAN":
-                    modelo = DBSCAN(eps=eps, min_samples=min_samples)
-                    labels = modelo.fit_predict(X_transformed)
-                    
-                elif algoritmo == "Isolation Forest":
-                    modelo = IsolationForest(contamination=0.3, random_state=42)
-                    predictions = modelo.fit_predict(X_transformed)
-                    labels = (predictions == -1).astype(int)
+                # Labels do algoritmo escolhido
+                labels = labels_modelos['modelo']
+                if algoritmo == "Isolation Forest":
+                    labels = (labels == -1).astype(int)
                 
                 # Adicionar labels ao dataframe
                 df_grupos['cluster'] = labels
@@ -950,43 +1075,76 @@ def analise_machine_learning(engine, dados, filtros):
             
             with st.spinner("Executando análise com 3 algoritmos..."):
                 
-                X = df_grupos[features_para_modelo].fillna(0)
+                progress_bar = st.progress(0)
+                status_text = st.empty()
                 
-                # Normalização
-                scaler = StandardScaler()
-                X_scaled = scaler.fit_transform(X)
+                # Registro de modelos: reaproveita pipeline já ajustado para os mesmos dados/parâmetros
+                status_text.text(f"Treinando 3 modelos em {n_jobs_consenso} processo(s) (ou carregando do registro)...")
+                progress_bar.progress(5)
+                
+                nomes_modelos = {'kmeans': 'K-Means', 'dbscan': 'DBSCAN', 'iforest': 'Isolation Forest'}
+                modelos_concluidos = []
+                
+                def ao_concluir_modelo(nome, _resultado):
+                    # Chamado à medida que cada modelo termina no pool (ou sai do cache de etapas)
+                    modelos_concluidos.append(nome)
+                    status_text.text(f"✅ {nomes_modelos[nome]} concluído ({len(modelos_concluidos)}/3)")
+                    progress_bar.progress(5 + 80 * len(modelos_concluidos) // 3)
+                
+                hiperparametros_consenso = {
+                    'modo': 'consenso',
+                    'n_components_pca': n_components_pca,
+                    'kmeans': {'n_clusters': 2},
+                    'dbscan': {'eps': 0.5, 'min_samples': 3},
+                    'iforest': {'contamination': 0.3}
+                }
                 
-                # PCA
-                pca = PCA(n_components=n_components_pca)
-                X_transformed = pca.fit_transform(X_scaled)
+                pipeline, labels_modelos, origem = obter_registro_modelos().obter_ou_ajustar(
+                    df_grupos,
+                    features_para_modelo,
+                    hiperparametros_consenso,
+                    lambda: ajustar_pipeline(
+                        df_grupos,
+                        features_para_modelo,
+                        {
+                            'kmeans': KMeans(n_clusters=2, random_state=42, n_init=10),
+                            'dbscan': DBSCAN(eps=0.5, min_samples=3),
+                            'iforest': IsolationForest(contamination=0.3, random_state=42)
+                        },
+                        n_components_pca,
+                        n_jobs=n_jobs_consenso,
+                        ao_concluir=ao_concluir_modelo
+                    ),
+                    reutilizar_compativel=reutilizar_modelo
+                )
                 
-                progress_bar = st.progress(0)
-                status_text = st.empty()
+                if origem == 'registro':
+                    st.info("♻️ Modelos carregados do registro (mesmos dados e parâmetros) - sem reajuste")
+                elif origem == 'compativel':
+                    st.info("♻️ Grupos pontuados com os últimos modelos salvos - sem reajuste")
+                
+                scaler = pipeline.scaler
+                pca = pipeline.pca
+                
+                status_text.text("Classificando grupos pelos 3 modelos...")
+                progress_bar.progress(85)
                 
                 # ============================================================
                 # MODELO 1: K-MEANS
                 # ============================================================
-                status_text.text("1/3 - Treinando K-Means...")
-                progress_bar.progress(10)
-                
-                modelo_kmeans = KMeans(n_clusters=2, random_state=42, n_init=10)
-                labels_kmeans = modelo_kmeans.fit_predict(X_transformed)
+                modelo_kmeans = pipeline.modelos['kmeans']
+                labels_kmeans = labels_modelos['kmeans']
                 
                 # Determinar qual cluster é "Grupo Econômico"
                 score_por_cluster_km = df_grupos.groupby(labels_kmeans)['score_ml_percentual'].mean()
                 cluster_ge_km = score_por_cluster_km.idxmax()
                 df_grupos['kmeans_eh_grupo'] = (labels_kmeans == cluster_ge_km).astype(int)
                 
-                progress_bar.progress(35)
-                
                 # ============================================================
                 # MODELO 2: DBSCAN
                 # ============================================================
-                status_text.text("2/3 - Treinando DBSCAN...")
-                progress_bar.progress(40)
-                
-                modelo_dbscan = DBSCAN(eps=0.5, min_samples=3)
-                labels_dbscan = modelo_dbscan.fit_predict(X_transformed)
+                modelo_dbscan = pipeline.modelos['dbscan']
+                labels_dbscan = labels_modelos['dbscan']
                 
                 # DBSCAN: -1 são outliers, determinar qual cluster tem maior score
                 if len(np.unique(labels_dbscan[labels_dbscan != -1])) > 0:
@@ -1004,16 +1162,11 @@ def analise_machine_learning(engine, dados, filtros):
                 else:
                     df_grupos['dbscan_eh_grupo'] = 0
                 
-                progress_bar.progress(65)
-                
                 # ============================================================
                 # MODELO 3: ISOLATION FOREST
                 # ============================================================
-                status_text.text("3/3 - Treinando Isolation Forest...")
-                progress_bar.progress(70)
-                
-                modelo_iforest = IsolationForest(contamination=0.3, random_state=42)
-                predictions_if = modelo_iforest.fit_predict(X_transformed)
+                modelo_iforest = pipeline.modelos['iforest']
+                predictions_if = labels_modelos['iforest']
                 
                 # -1 = anomalia (grupo econômico suspeito), 1 = normal
                 df_grupos['iforest_eh_grupo'] = (predictions_if == -1).astype(int)
@@ -1032,20 +1185,18 @@ def analise_machine_learning(engine, dados, filtros):
                 )
                 
                 # Classificação por consenso
-                df_grupos['consenso_classificacao'] = df_grupos['votos_eh_grupo'].apply(
-                    lambda x: 'CONSENSO FORTE (3/3)' if x == 3 else
-                             'CONSENSO MODERADO (2/3)' if x == 2 else
-                             'CONSENSO FRACO (1/3)' if x == 1 else
-                             'NÃO É GRUPO (0/3)'
-                )
+                df_grupos['consenso_classificacao'] = df_grupos['votos_eh_grupo'].map({
+                    3: 'CONSENSO FORTE (3/3)',
+                    2: 'CONSENSO MODERADO (2/3)',
+                    1: 'CONSENSO FRACO (1/3)'
+                }).fillna('NÃO É GRUPO (0/3)')
                 
                 # Nível de confiança
-                df_grupos['nivel_confianca'] = df_grupos['votos_eh_grupo'].apply(
-                    lambda x: 'Muito Alto' if x == 3 else
-                             'Alto' if x == 2 else
-                             'Moderado' if x == 1 else
-                             'Baixo'
-                )
+                df_grupos['nivel_confianca'] = df_grupos['votos_eh_grupo'].map({
+                    3: 'Muito Alto',
+                    2: 'Alto',
+                    1: 'Moderado'
+                }).fillna('Baixo')
                 
                 progress_bar.progress(100)
                 status_text.text("Concluído!")
@@ -1139,13 +1290,13 @@ def analise_machine_learning(engine, dados, filtros):
         # Comparação Score ML vs Votos
         st.subheader("Análise: Score ML vs Consenso dos Algoritmos")
         
-        fig = px.box(
+        fig = figura_boxplot(
             df_grupos,
-            x='votos_eh_grupo',
-            y='score_ml_percentual',
-            color='votos_eh_grupo',
-            title="Distribuição de Score ML por Número de Votos",
-            labels={'votos_eh_grupo': 'Votos (Grupo Econômico)', 'score_ml_percentual': 'Score ML (%)'},
+            'score_ml_percentual',
+            'votos_eh_grupo',
+            titulo="Distribuição de Score ML por Número de Votos",
+            cor=None,
+            rotulos={'votos_eh_grupo': 'Votos (Grupo Econômico)', 'score_ml_percentual': 'Score ML (%)'},
             template=filtros['tema']
         )
         st.plotly_chart(fig, use_container_width=True)
@@ -1209,7 +1360,7 @@ def analise_machine_learning(engine, dados, filtros):
                 ]
                 
                 df_display = grupos_3votos[colunas_exibir].copy()
-                df_display['receita_maxima'] = df_display['receita_maxima'].apply(formatar_moeda)
+                df_display['receita_maxima'] = formatar_moeda_coluna(df_display['receita_maxima'])
                 df_display = df_display.rename(columns={
                     'kmeans_eh_grupo': 'K-Means',
                     'dbscan_eh_grupo': 'DBSCAN',
@@ -1372,11 +1523,12 @@ def analise_machine_learning(engine, dados, filtros):
                 'contas_compartilhadas', 'acima_limite_sn'
             ]
             
-            csv_resultados = df_grupos[colunas_export].to_csv(index=False)
+            df_export = df_grupos[colunas_export]
             
-            st.download_button(
+            botao_download_sob_demanda(
                 label="📥 Download Resultados Consenso (CSV)",
-                data=csv_resultados,
+                gerar=lambda: df_export.to_csv(index=False).encode('utf-8'),
+                entradas=df_export,
                 file_name=f"grupos_ml_consenso_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
                 mime="text/csv"
             )
@@ -1384,17 +1536,18 @@ def analise_machine_learning(engine, dados, filtros):
         with col2:
             # Excel com resultados detalhados por nível de consenso
             try:
-                output = BytesIO()
-                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                    df_grupos.to_excel(writer, sheet_name='Todos os Grupos', index=False)
-                    grupos_3votos.to_excel(writer, sheet_name='Consenso Forte (3-3)', index=False)
-                    grupos_2votos.to_excel(writer, sheet_name='Consenso Moderado (2-3)', index=False)
-                    grupos_1voto.to_excel(writer, sheet_name='Consenso Fraco (1-3)', index=False)
-                    grupos_0votos.to_excel(writer, sheet_name='Não é Grupo (0-3)', index=False)
-                
-                st.download_button(
+                abas = {
+                    'Todos os Grupos': df_grupos,
+                    'Consenso Forte (3-3)': grupos_3votos,
+                    'Consenso Moderado (2-3)': grupos_2votos,
+                    'Consenso Fraco (1-3)': grupos_1voto,
+                    'Não é Grupo (0-3)': grupos_0votos
+                }
+                
+                botao_download_sob_demanda(
                     label="📊 Download Completo (Excel)",
-                    data=output.getvalue(),
+                    gerar=lambda: exportar_para_excel(abas),
+                    entradas=abas,
                     file_name=f"grupos_ml_consenso_completo_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                 )
@@ -1436,15 +1589,14 @@ def analise_machine_learning(engine, dados, filtros):
                         st.metric("Silhouette Score", "N/A")
         
         # Comparação de scores
-        fig = px.box(df_grupos, x='eh_grupo_economico', y='score_ml_percentual',
-                    color='eh_grupo_economico',
-                    title="Distribuição de Scores ML por Classificação",
-                    labels={'score_ml_percentual': 'Score ML (%)', 'eh_grupo_economico': 'Classificação'},
-                    template=filtros['tema'],
-                    color_discrete_map={
-                        'Grupo Econômico': '#EF553B',
-                        'Não é Grupo': '#00CC96'
-                    })
+        fig = figura_boxplot(df_grupos, 'score_ml_percentual', 'eh_grupo_economico',
+                             titulo="Distribuição de Scores ML por Classificação",
+                             rotulos={'score_ml_percentual': 'Score ML (%)', 'eh_grupo_economico': 'Classificação'},
+                             template=filtros['tema'],
+                             mapa_cores={
+                                 'Grupo Econômico': '#EF553B',
+                                 'Não é Grupo': '#00CC96'
+                             })
         st.plotly_chart(fig, use_container_width=True)
         
         # Tabelas
@@ -1465,7 +1617,7 @@ def analise_machine_learning(engine, dados, filtros):
                 ]
                 
                 df_display = grupos_eco[colunas_exibir].copy()
-                df_display['receita_maxima'] = df_display['receita_maxima'].apply(formatar_moeda)
+                df_display['receita_maxima'] = formatar_moeda_coluna(df_display['receita_maxima'])
                 
                 st.dataframe(df_display.head(50), width='stretch', hide_index=True)
             else:
@@ -1497,26 +1649,28 @@ def analise_machine_learning(engine, dados, filtros):
                 'total_indicios', 'contas_compartilhadas', 'acima_limite_sn'
             ]
             
-            csv_resultados = df_grupos[colunas_export].to_csv(index=False)
+            df_export = df_grupos[colunas_export]
             
-            st.download_button(
+            botao_download_sob_demanda(
                 label="📥 Download Resultados (CSV)",
-                data=csv_resultados,
+                gerar=lambda: df_export.to_csv(index=False).encode('utf-8'),
+                entradas=df_export,
                 file_name=f"grupos_ml_classificacao_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
                 mime="text/csv"
             )
         
         with col2:
             try:
-                output = BytesIO()
-                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                    df_grupos.to_excel(writer, sheet_name='Todos os Grupos', index=False)
-                    grupos_eco.to_excel(writer, sheet_name='Grupos Econômicos', index=False)
-                    nao_grupos_df.to_excel(writer, sheet_name='Não é Grupo', index=False)
+                abas = {
+                    'Todos os Grupos': df_grupos,
+                    'Grupos Econômicos': grupos_eco,
+                    'Não é Grupo': nao_grupos_df
+                }
                 
-                st.download_button(
+                botao_download_sob_demanda(
                     label="📊 Download Completo (Excel)",
-                    data=output.getvalue(),
+                    gerar=lambda: exportar_para_excel(abas),
+                    entradas=abas,
                     file_name=f"grupos_ml_analise_completa_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                 )
@@ -1720,22 +1874,58 @@ def mostrar_detalhes_grupo(engine, num_grupo, df_grupos, filtros):
         except Exception as e:
             st.warning(f"Não foi possível carregar CCS: {e}")
     
+def _juntar_linhas_pdf(principal, secundaria):
+    """Célula de duas linhas (a segunda só quando não vazia)"""
+    return np.where(secundaria.str.strip() != '', principal + '\n' + secundaria, principal)
+
+def tabela_cnpjs_pdf(df, coluna_municipio='nm_municipio'):
+    """
+    Tabela de CNPJs com dados cadastrais para os PDFs (uma linha por CNPJ,
+    montada coluna a coluna e dividida entre páginas quando longa)
+    """
+    from reportlab.lib.units import inch
+    from src.reports.tabelas_pdf import criar_tabela_pdf, dataframe_para_tabela, texto_coluna
+
+    def coluna(nome, max_caracteres):
+        serie = df[nome] if nome in df.columns else pd.Series('', index=df.index)
+        return texto_coluna(serie, max_caracteres)
+
+    # Nomes inteiros, com quebra de linha na largura da coluna
+    tabela = pd.DataFrame({
+        'cnpj': coluna('cnpj', 18),
+        'empresa': _juntar_linhas_pdf(coluna('nm_razao_social', None), coluna('nm_fantasia', None)),
+        'cnae': coluna('cd_cnae', 10),
+        'local': _juntar_linhas_pdf(coluna(coluna_municipio, None), coluna('nm_reg_apuracao', None)),
+        'contador': _juntar_linhas_pdf(coluna('nm_contador', None), coluna('dt_constituicao_empresa', 10)),
+    })
+    return criar_tabela_pdf(
+        dataframe_para_tabela(tabela, {
+            'CNPJ': 'cnpj',
+            'Razão Social / Fantasia': 'empresa',
+            'CNAE': 'cnae',
+            'Município / Regime': 'local',
+            'Contador / Constituição': 'contador'
+        }, quebrar=['empresa', 'local', 'contador'], tamanho_fonte=7),
+        larguras=[1.0*inch, 2.4*inch, 0.55*inch, 1.2*inch, 1.1*inch],
+        tamanho_fonte=7,
+        comandos_extras=[('VALIGN', (0, 0), (-1, -1), 'TOP')]
+    )
+
 def gerar_pdf_analise_pontual(cnpjs_validos, resultados):
     """Gera PDF completo da análise pontual"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
+    from src.reports.tabelas_pdf import estilos_pdf, criar_tabela_pdf, dataframe_para_tabela
+
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    styles = getSampleStyleSheet()
+    styles = estilos_pdf()
     story = []
     
     # Título
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=20,
-        textColor=colors.HexColor('#1f77b4'),
-        spaceAfter=20,
-        alignment=TA_CENTER
-    )
+    title_style = styles['TituloRelatorio']
     story.append(Paragraph("ANÁLISE PONTUAL DE CNPJs", title_style))
     story.append(Paragraph("Sistema GEI - Receita Estadual de Santa Catarina", styles['Normal']))
     story.append(Paragraph(f"Data de Geração: {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
@@ -1757,17 +1947,7 @@ def gerar_pdf_analise_pontual(cnpjs_validos, resultados):
         ['Em Grupos GEI Existentes', str(len(resultados.get('grupos_existentes', pd.DataFrame())))]
     ]
     
-    table = Table(dados_resumo, colWidths=[3*inch, 3*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    table = criar_tabela_pdf(dados_resumo, larguras=[3*inch, 3*inch], estilo='cinza_destaque')
     story.append(table)
     story.append(Spacer(1, 0.3*inch))
     
@@ -1801,26 +1981,11 @@ def gerar_pdf_analise_pontual(cnpjs_validos, resultados):
     # SEÇÃO 2: CNPJs ANALISADOS E DADOS CADASTRAIS
     story.append(Paragraph(f"<b>2. CNPJs ANALISADOS ({len(cnpjs_validos)})</b>", styles['Heading2']))
     
-    for cnpj in cnpjs_validos:
-        story.append(Paragraph(f"<b>CNPJ: {cnpj}</b>", styles['Normal']))
-        
-        if not resultados.get('cadastro', pd.DataFrame()).empty:
-            cadastro = resultados['cadastro'][resultados['cadastro']['cnpj'] == cnpj]
-            if not cadastro.empty:
-                info = cadastro.iloc[0]
-                story.append(Paragraph(f"Razão Social: {info.get('nm_razao_social', 'N/A')}", styles['Normal']))
-                if pd.notna(info.get('nm_fantasia')):
-                    story.append(Paragraph(f"Nome Fantasia: {info.get('nm_fantasia')}", styles['Normal']))
-                if pd.notna(info.get('cd_cnae')):
-                    story.append(Paragraph(f"CNAE: {info.get('cd_cnae')}", styles['Normal']))
-                if pd.notna(info.get('nm_reg_apuracao')):
-                    story.append(Paragraph(f"Regime: {info.get('nm_reg_apuracao')}", styles['Normal']))
-                if pd.notna(info.get('municipio')):
-                    story.append(Paragraph(f"Município: {info.get('municipio')}", styles['Normal']))
-                if pd.notna(info.get('nm_contador')):
-                    story.append(Paragraph(f"Contador: {info.get('nm_contador')}", styles['Normal']))
-        
-        story.append(Spacer(1, 0.15*inch))
+    df_cnpjs = pd.DataFrame({'cnpj': list(cnpjs_validos)})
+    if not resultados.get('cadastro', pd.DataFrame()).empty:
+        df_cnpjs = df_cnpjs.merge(resultados['cadastro'].drop_duplicates('cnpj'), on='cnpj', how='left')
+    
+    story.append(tabela_cnpjs_pdf(df_cnpjs, coluna_municipio='municipio'))
     
     story.append(PageBreak())
     
@@ -1891,16 +2056,8 @@ def gerar_pdf_analise_pontual(cnpjs_validos, resultados):
             cadastro_dados.append(['Município', 'MESMO', '1', '+0.5', 'Leve'])
             score_similaridade += 0.5
         
-        table = Table([['Atributo', 'Status', 'Qtd', 'Pontos', 'Nível']] + cadastro_dados,
-                     colWidths=[1.5*inch, 1.3*inch, 0.8*inch, 0.9*inch, 1*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table = criar_tabela_pdf([['Atributo', 'Status', 'Qtd', 'Pontos', 'Nível']] + cadastro_dados,
+                     larguras=[1.5*inch, 1.3*inch, 0.8*inch, 0.9*inch, 1*inch], tamanho_fonte=8)
         story.append(table)
         story.append(Spacer(1, 0.2*inch))
     
@@ -1924,20 +2081,12 @@ def gerar_pdf_analise_pontual(cnpjs_validos, resultados):
             story.append(Paragraph("Sócios que participam de múltiplos CNPJs:", styles['Normal']))
             for cpf, qtd in list(socios_compartilhados.items())[:10]:
                 story.append(Paragraph(f"• CPF {cpf}: Presente em {qtd} CNPJs", 
-                                      ParagraphStyle('Indent', parent=styles['Normal'], leftIndent=20)))
+                                      styles['Recuo']))
         else:
             socios_dados.append(['Sócios Compartilhados', '0', 'NÃO DETECTADO', '0.0', '-'])
         
-        table = Table([['Indicador', 'Quantidade', 'Status', 'Pontos', 'Nível']] + socios_dados,
-                     colWidths=[2*inch, 1*inch, 1.5*inch, 0.8*inch, 0.7*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table = criar_tabela_pdf([['Indicador', 'Quantidade', 'Status', 'Pontos', 'Nível']] + socios_dados,
+                     larguras=[2*inch, 1*inch, 1.5*inch, 0.8*inch, 0.7*inch], tamanho_fonte=8)
         story.append(table)
         story.append(Spacer(1, 0.2*inch))
     
@@ -1976,16 +2125,8 @@ def gerar_pdf_analise_pontual(cnpjs_validos, resultados):
             receitas_dados.append(['Distribuição', f'CV: {coef_variacao:.2f}',
                                    'VARIADA', '-', '0.0', '-'])
         
-        table = Table([['Indicador', 'Valor', 'Status', 'Detalhe', 'Pontos', 'Nível']] + receitas_dados,
-                     colWidths=[1.2*inch, 1.3*inch, 1.2*inch, 1*inch, 0.6*inch, 0.7*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 7),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table = criar_tabela_pdf([['Indicador', 'Valor', 'Status', 'Detalhe', 'Pontos', 'Nível']] + receitas_dados,
+                     larguras=[1.2*inch, 1.3*inch, 1.2*inch, 1*inch, 0.6*inch, 0.7*inch], tamanho_fonte=7)
         story.append(table)
         story.append(Spacer(1, 0.2*inch))
     
@@ -2077,16 +2218,8 @@ def gerar_pdf_analise_pontual(cnpjs_validos, resultados):
         # >>> FIM DA ADIÇÃO <
         
         if nfe_dados:
-            table = Table([['Indicador', 'Quantidade', 'Status', 'Pontos', 'Nível']] + nfe_dados,
-                         colWidths=[1.8*inch, 1.2*inch, 1.3*inch, 0.8*inch, 0.9*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            table = criar_tabela_pdf([['Indicador', 'Quantidade', 'Status', 'Pontos', 'Nível']] + nfe_dados,
+                         larguras=[1.8*inch, 1.2*inch, 1.3*inch, 0.8*inch, 0.9*inch], tamanho_fonte=8)
             story.append(table)
             story.append(Spacer(1, 0.2*inch))
     
@@ -2123,16 +2256,8 @@ def gerar_pdf_analise_pontual(cnpjs_validos, resultados):
                 score_similaridade += pontos_tel
         
         if c115_dados:
-            table = Table([['Indicador', 'Quantidade', 'Status', 'Pontos', 'Nível']] + c115_dados,
-                         colWidths=[1.8*inch, 1.2*inch, 1.3*inch, 0.8*inch, 0.9*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            table = criar_tabela_pdf([['Indicador', 'Quantidade', 'Status', 'Pontos', 'Nível']] + c115_dados,
+                         larguras=[1.8*inch, 1.2*inch, 1.3*inch, 0.8*inch, 0.9*inch], tamanho_fonte=8)
             story.append(table)
             story.append(Spacer(1, 0.2*inch))
     
@@ -2157,21 +2282,13 @@ def gerar_pdf_analise_pontual(cnpjs_validos, resultados):
             story.append(Paragraph("CPFs com acesso a múltiplas contas:", styles['Normal']))
             for cpf, qtd in list(cpfs_compart.items())[:5]:
                 story.append(Paragraph(f"• CPF {cpf}: {qtd} CNPJs",
-                                      ParagraphStyle('Indent', parent=styles['Normal'], leftIndent=20)))
+                                      styles['Recuo']))
         else:
             ccs_dados.append(['CPFs Múltiplas Contas', '0', 'NÃO DETECTADOS', '0.0', '-'])
         
         if ccs_dados:
-            table = Table([['Indicador', 'Quantidade', 'Status', 'Pontos', 'Nível']] + ccs_dados,
-                         colWidths=[1.8*inch, 1.2*inch, 1.3*inch, 0.8*inch, 0.9*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
+            table = criar_tabela_pdf([['Indicador', 'Quantidade', 'Status', 'Pontos', 'Nível']] + ccs_dados,
+                         larguras=[1.8*inch, 1.2*inch, 1.3*inch, 0.8*inch, 0.9*inch], tamanho_fonte=8)
             story.append(table)
             story.append(Spacer(1, 0.2*inch))
     
@@ -2185,18 +2302,9 @@ def gerar_pdf_analise_pontual(cnpjs_validos, resultados):
     total_evidencias = len([v for v in evidencias_pdf.values() if v])
     
     # Determinar nível de risco
-    if score_similaridade >= 15:
-        nivel_risco = "CRÍTICO"
-        cor_nivel = colors.red
-    elif score_similaridade >= 10:
-        nivel_risco = "ALTO"
-        cor_nivel = colors.orange
-    elif score_similaridade >= 5:
-        nivel_risco = "MODERADO"
-        cor_nivel = colors.yellow
-    else:
-        nivel_risco = "BAIXO"
-        cor_nivel = colors.green
+    risco = classificar_risco(score_similaridade, 'similaridade')
+    nivel_risco = risco['nivel']
+    cor_nivel = colors.HexColor(risco['cor'])
     
     dados_score = [
         ['Métrica', 'Valor'],
@@ -2207,15 +2315,8 @@ def gerar_pdf_analise_pontual(cnpjs_validos, resultados):
         ['Nível de Risco', nivel_risco]
     ]
     
-    table = Table(dados_score, colWidths=[3*inch, 3*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('BACKGROUND', (0, -1), (-1, -1), cor_nivel)
-    ]))
+    table = criar_tabela_pdf(dados_score, larguras=[3*inch, 3*inch],
+                             comandos_extras=[('BACKGROUND', (0, -1), (-1, -1), cor_nivel)])
     story.append(table)
     story.append(Spacer(1, 0.2*inch))
     
@@ -2291,24 +2392,13 @@ def gerar_pdf_analise_pontual(cnpjs_validos, resultados):
     if not resultados.get('socios', pd.DataFrame()).empty:
         story.append(Paragraph(f"<b>4. VÍNCULOS SOCIETÁRIOS ({len(resultados['socios'])} vínculos)</b>", styles['Heading2']))
         
-        dados_socios = [['CNPJ', 'CPF Sócio', 'Qualificação', 'Relação Ativa']]
-        for _, row in resultados['socios'].head(50).iterrows():
-            dados_socios.append([
-                str(row.get('cnpj', '')),
-                str(row.get('cpf_socio', '')),
-                str(row.get('nm_qualificacao', ''))[:25],
-                str(row.get('sn_relacao_ativa', ''))
-            ])
+        dados_socios = dataframe_para_tabela(
+            resultados['socios'].head(50),
+            {'CNPJ': 'cnpj', 'CPF Sócio': 'cpf_socio', 'Qualificação': 'nm_qualificacao', 'Relação Ativa': 'sn_relacao_ativa'},
+            truncar={'nm_qualificacao': 25}
+        )
         
-        table = Table(dados_socios, colWidths=[1.5*inch, 1.5*inch, 2*inch, 1*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table = criar_tabela_pdf(dados_socios, larguras=[1.5*inch, 1.5*inch, 2*inch, 1*inch], tamanho_fonte=8)
         story.append(table)
         story.append(PageBreak())
     
@@ -2317,24 +2407,15 @@ def gerar_pdf_analise_pontual(cnpjs_validos, resultados):
         story.append(Paragraph("<b>5. RECEITAS DECLARADAS (PGDAS)</b>", styles['Heading2']))
         
         receita_max = resultados['pgdas'].groupby('cnpj')['receita_12m'].max().reset_index()
+        receita_max['acima_limite'] = np.where(receita_max['receita_12m'] > 4800000, 'SIM', 'NÃO')
         
-        dados_receita = [['CNPJ', 'Receita Máxima (12m)', 'Acima Limite SN']]
-        for _, row in receita_max.iterrows():
-            receita = row['receita_12m']
-            dados_receita.append([
-                str(row['cnpj']),
-                formatar_moeda(receita),
-                'SIM' if receita > 4800000 else 'NÃO'
-            ])
+        dados_receita = dataframe_para_tabela(
+            receita_max,
+            {'CNPJ': 'cnpj', 'Receita Máxima (12m)': 'receita_12m', 'Acima Limite SN': 'acima_limite'},
+            formatos={'receita_12m': formatar_moeda_coluna}
+        )
         
-        table = Table(dados_receita, colWidths=[2*inch, 2.5*inch, 1.5*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table = criar_tabela_pdf(dados_receita, larguras=[2*inch, 2.5*inch, 1.5*inch])
         story.append(table)
         story.append(PageBreak())
     
@@ -2345,45 +2426,38 @@ def gerar_pdf_analise_pontual(cnpjs_validos, resultados):
         resumo_indicios = resultados['indicios']['tx_descricao_indicio'].value_counts().reset_index()
         resumo_indicios.columns = ['Tipo', 'Quantidade']
         
-        dados_indicios_resumo = [['Tipo de Indício', 'Quantidade']]
-        for _, row in resumo_indicios.iterrows():
-            dados_indicios_resumo.append([
-                str(row['Tipo'])[:50],
-                str(row['Quantidade'])
-            ])
+        dados_indicios_resumo = dataframe_para_tabela(
+            resumo_indicios,
+            {'Tipo de Indício': 'Tipo', 'Quantidade': 'Quantidade'},
+            truncar={'Tipo': 50}
+        )
         
-        table = Table(dados_indicios_resumo, colWidths=[4.5*inch, 1.5*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table = criar_tabela_pdf(dados_indicios_resumo, larguras=[4.5*inch, 1.5*inch], tamanho_fonte=8)
         story.append(table)
         story.append(PageBreak())
     
     # Rodapé
     story.append(Spacer(1, 0.5*inch))
-    story.append(Paragraph(
-        "Sistema GEI v3.0 - Receita Estadual de Santa Catarina",
-        ParagraphStyle('Footer', parent=styles['Normal'], fontSize=10, alignment=TA_CENTER)
-    ))
+    story.append(Paragraph("Sistema GEI v3.0 - Receita Estadual de Santa Catarina", styles['Rodape']))
     story.append(Paragraph(
         "Documento de caráter sigiloso - Uso restrito à fiscalização tributária",
-        ParagraphStyle('Footer2', parent=styles['Normal'], fontSize=9, alignment=TA_CENTER, textColor=colors.grey)
+        styles['RodapeDiscreto']
     ))
     
     doc.build(story)
     buffer.seek(0)
     return buffer
     
-def gerar_pdf_dossie(dossie, num_grupo):
-    """Gera PDF completo com todas as informações do grupo"""
+def gerar_pdf_dossie(dossie, num_grupo, ao_progredir=None):
+    """Gera PDF completo com todas as informações do grupo (ao_progredir: callback(fração, mensagem))"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
+    from src.reports.tabelas_pdf import estilos_pdf, criar_tabela_pdf, dataframe_para_tabela
+
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    styles = getSampleStyleSheet()
+    styles = estilos_pdf()
     story = []
     
     # Função auxiliar para valores seguros
@@ -2408,14 +2482,7 @@ def gerar_pdf_dossie(dossie, num_grupo):
             return f"{default:.{decimals}f}"
     
     # Título
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=20,
-        textColor=colors.HexColor('#1f77b4'),
-        spaceAfter=20,
-        alignment=TA_CENTER
-    )
+    title_style = styles['TituloRelatorio']
     story.append(Paragraph(f"DOSSIÊ COMPLETO - GRUPO ECONÔMICO {num_grupo}", title_style))
     story.append(Paragraph("Receita Estadual de Santa Catarina", styles['Normal']))
     story.append(Paragraph(f"Data de Geração: {datetime.now().strftime('%d/%m/%Y %H:%M')}", styles['Normal']))
@@ -2444,17 +2511,7 @@ def gerar_pdf_dossie(dossie, num_grupo):
             ['Score Inconsistências NFe', safe_float(info.get('total'), 2)]
         ]
         
-        table = Table(dados_principais, colWidths=[3*inch, 3*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table = criar_tabela_pdf(dados_principais, larguras=[3*inch, 3*inch], estilo='cinza_destaque')
         story.append(table)
         story.append(Spacer(1, 0.3*inch))
     
@@ -2462,24 +2519,7 @@ def gerar_pdf_dossie(dossie, num_grupo):
     if not dossie['cnpjs'].empty:
         story.append(Paragraph(f"<b>2. CNPJs DO GRUPO ({len(dossie['cnpjs'])} empresas)</b>", styles['Heading2']))
         
-        for idx, row in dossie['cnpjs'].iterrows():
-            story.append(Paragraph(f"<b>CNPJ:</b> {safe_value(row.get('cnpj'))}", styles['Normal']))
-            story.append(Paragraph(f"<b>Razão Social:</b> {safe_value(row.get('nm_razao_social'))}", styles['Normal']))
-            
-            if pd.notna(row.get('nm_fantasia')) and str(row.get('nm_fantasia')).strip():
-                story.append(Paragraph(f"<b>Nome Fantasia:</b> {row.get('nm_fantasia')}", styles['Normal']))
-            if pd.notna(row.get('cd_cnae')):
-                story.append(Paragraph(f"<b>CNAE:</b> {row.get('cd_cnae')}", styles['Normal']))
-            if pd.notna(row.get('nm_municipio')):
-                story.append(Paragraph(f"<b>Município:</b> {row.get('nm_municipio')}", styles['Normal']))
-            if pd.notna(row.get('nm_contador')) and str(row.get('nm_contador')).strip():
-                story.append(Paragraph(f"<b>Contador:</b> {row.get('nm_contador')}", styles['Normal']))
-            if pd.notna(row.get('dt_constituicao_empresa')):
-                story.append(Paragraph(f"<b>Data Constituição:</b> {row.get('dt_constituicao_empresa')}", styles['Normal']))
-            if pd.notna(row.get('nm_reg_apuracao')):
-                story.append(Paragraph(f"<b>Regime Apuração:</b> {row.get('nm_reg_apuracao')}", styles['Normal']))
-            
-            story.append(Spacer(1, 0.15*inch))
+        story.append(tabela_cnpjs_pdf(dossie['cnpjs']))
     
     story.append(PageBreak())
     
@@ -2491,20 +2531,15 @@ def gerar_pdf_dossie(dossie, num_grupo):
         story.append(Paragraph(f"<b>Total de sócios únicos:</b> {socios_unicos}", styles['Normal']))
         story.append(Spacer(1, 0.2*inch))
         
-        # Mapear CNPJs para razões sociais
-        cnpj_para_razao = {}
-        if not dossie['cnpjs'].empty:
-            for _, row in dossie['cnpjs'].iterrows():
-                cnpj_para_razao[safe_value(row.get('cnpj'))] = safe_value(row.get('nm_razao_social'))
-        
-        for idx, row in dossie['socios'].head(50).iterrows():
-            cpf = safe_value(row.get('cpf_socio'))
-            qtd_empresas = safe_value(row.get('qtd_empresas'), 'N/A')
-            
-            story.append(Paragraph(f"<b>• CPF:</b> {cpf}", styles['Normal']))
-            story.append(Paragraph(f"  <b>Participa de {qtd_empresas} empresas do grupo</b>", styles['Normal']))
-            story.append(Spacer(1, 0.1*inch))
-        
+        story.append(criar_tabela_pdf(
+            dataframe_para_tabela(
+                dossie['socios'].head(50),
+                {'CPF do Sócio': 'cpf_socio', 'Empresas do Grupo': 'qtd_empresas'},
+                vazio='N/A'
+            ),
+            larguras=[3*inch, 3*inch],
+            tamanho_fonte=8
+        ))
         story.append(Spacer(1, 0.2*inch))
     
     # SEÇÃO 4: INDÍCIOS FISCAIS
@@ -2519,13 +2554,18 @@ def gerar_pdf_dossie(dossie, num_grupo):
         story.append(Spacer(1, 0.2*inch))
         story.append(Paragraph("<b>Lista Completa de Indícios:</b>", styles['Heading3']))
         
-        for idx, row in dossie['indicios'].head(100).iterrows():
-            story.append(Paragraph(f"• {safe_value(row.get('tx_descricao_indicio'))}", styles['Normal']))
-            if pd.notna(row.get('cnpj')):
-                story.append(Paragraph(f"  CNPJ: {row.get('cnpj')}", styles['Normal']))
-            if pd.notna(row.get('tx_descricao_complemento')):
-                complemento = str(row.get('tx_descricao_complemento'))[:100]
-                story.append(Paragraph(f"  Complemento: {complemento}", styles['Normal']))
+        story.append(criar_tabela_pdf(
+            dataframe_para_tabela(
+                dossie['indicios'].head(100),
+                {'Indício': 'tx_descricao_indicio', 'CNPJ': 'cnpj', 'Complemento': 'tx_descricao_complemento'},
+                truncar={'tx_descricao_complemento': 100},
+                quebrar=['tx_descricao_indicio', 'tx_descricao_complemento'],
+                tamanho_fonte=7
+            ),
+            larguras=[2.6*inch, 1.05*inch, 2.6*inch],
+            tamanho_fonte=7,
+            comandos_extras=[('VALIGN', (0, 0), (-1, -1), 'TOP')]
+        ))
         
         story.append(Spacer(1, 0.2*inch))
     
@@ -2546,14 +2586,7 @@ def gerar_pdf_dossie(dossie, num_grupo):
             ['Índice Risco Faturamento/Funcionários', safe_float(info.get('indice_risco_fat_func'), 3)]
         ]
         
-        table = Table(dados_financeiros, colWidths=[3*inch, 3*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table = criar_tabela_pdf(dados_financeiros, larguras=[3*inch, 3*inch])
         story.append(table)
         story.append(Spacer(1, 0.3*inch))
     
@@ -2568,14 +2601,7 @@ def gerar_pdf_dossie(dossie, num_grupo):
             ['CNPJs com Funcionários', str(safe_int(info_func.get('cnpjs_com_funcionarios')))]
         ]
         
-        table = Table(dados_funcionarios, colWidths=[3*inch, 3*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table = criar_tabela_pdf(dados_funcionarios, larguras=[3*inch, 3*inch])
         story.append(table)
         story.append(Spacer(1, 0.2*inch))
     
@@ -2590,14 +2616,7 @@ def gerar_pdf_dossie(dossie, num_grupo):
             ['Pagamentos dos Sócios', formatar_moeda(safe_value(info_pag.get('valor_meios_pagamento_socios'), 0))]
         ]
         
-        table = Table(dados_pagamentos, colWidths=[3*inch, 3*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table = criar_tabela_pdf(dados_pagamentos, larguras=[3*inch, 3*inch])
         story.append(table)
         story.append(Spacer(1, 0.2*inch))
     
@@ -2615,14 +2634,7 @@ def gerar_pdf_dossie(dossie, num_grupo):
             ['% CNPJs Relacionados', safe_float(info_c115.get('perc_cnpjs_relacionados'), 1) + '%']
         ]
         
-        table = Table(dados_c115, colWidths=[3*inch, 3*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table = criar_tabela_pdf(dados_c115, larguras=[3*inch, 3*inch])
         story.append(table)
         story.append(Spacer(1, 0.2*inch))
     
@@ -2647,30 +2659,32 @@ def gerar_pdf_dossie(dossie, num_grupo):
             ['Encerramentos Coordenados', str(safe_int(info.get('ccs_qtd_datas_encerramento_coordenado')))]
         ]
         
-        table = Table(dados_ccs, colWidths=[3*inch, 3*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        table = criar_tabela_pdf(dados_ccs, larguras=[3*inch, 3*inch])
         story.append(table)
         story.append(Spacer(1, 0.2*inch))
         
         # Detalhamento de contas compartilhadas
         if not dossie['ccs_compartilhadas'].empty:
             story.append(Paragraph("<b>Contas Compartilhadas (Top 20):</b>", styles['Heading3']))
-            for idx, row in dossie['ccs_compartilhadas'].head(20).iterrows():
-                cpf = safe_value(row.get('nr_cpf'))
-                banco = safe_value(row.get('nm_banco'))
-                agencia = safe_value(row.get('cd_agencia'))
-                conta = safe_value(row.get('nr_conta'))
-                qtd_cnpjs = safe_int(row.get('qtd_cnpjs_usando_conta'))
-                qtd_vinculos = safe_int(row.get('qtd_vinculos_ativos'))
-                
-                story.append(Paragraph(f"• CPF: {cpf} | Banco: {banco} | Agência: {agencia} | Conta: {conta}", styles['Normal']))
-                story.append(Paragraph(f"  CNPJs usando: {qtd_cnpjs} | Vínculos ativos: {qtd_vinculos}", styles['Normal']))
+            story.append(criar_tabela_pdf(
+                dataframe_para_tabela(
+                    dossie['ccs_compartilhadas'].head(20),
+                    {
+                        'CPF': 'nr_cpf', 'Banco': 'nm_banco', 'Agência': 'cd_agencia', 'Conta': 'nr_conta',
+                        'CNPJs Usando': 'qtd_cnpjs_usando_conta', 'Vínculos Ativos': 'qtd_vinculos_ativos'
+                    },
+                    formatos={
+                        'qtd_cnpjs_usando_conta': formatar_numero_serie,
+                        'qtd_vinculos_ativos': formatar_numero_serie
+                    },
+                    vazio='N/A',
+                    quebrar=['nm_banco', 'nr_conta'],
+                    tamanho_fonte=7
+                ),
+                larguras=[1.0*inch, 1.6*inch, 0.7*inch, 1.0*inch, 0.9*inch, 1.0*inch],
+                tamanho_fonte=7,
+                comandos_extras=[('VALIGN', (0, 0), (-1, -1), 'TOP')]
+            ))
     
     story.append(PageBreak())
     
@@ -2685,12 +2699,11 @@ def gerar_pdf_dossie(dossie, num_grupo):
         
         story.append(Paragraph("<b>Resumo por Tipo de Inconsistência:</b>", styles['Heading3']))
         
-        for tipo in tipos_incons:
-            if tipo in dossie['inconsistencias'].columns:
-                total = len(dossie['inconsistencias'][dossie['inconsistencias'][tipo] == 'S'])
-                if total > 0:
-                    nome_tipo = tipo.replace('_incons', '').replace('_', ' ').title()
-                    story.append(Paragraph(f"• {nome_tipo}: {total} ocorrências", styles['Normal']))
+        presentes = [tipo for tipo in tipos_incons if tipo in dossie['inconsistencias'].columns]
+        totais = (dossie['inconsistencias'][presentes] == 'S').sum()
+        for tipo, total in totais[totais > 0].items():
+            nome_tipo = tipo.replace('_incons', '').replace('_', ' ').title()
+            story.append(Paragraph(f"• {nome_tipo}: {total} ocorrências", styles['Normal']))
     
     # Rodapé final
     story.append(PageBreak())
@@ -2698,10 +2711,9 @@ def gerar_pdf_dossie(dossie, num_grupo):
     story.append(Paragraph("Este dossiê foi gerado automaticamente pelo Sistema GEI (Grupos Econômicos Interconectados) da Receita Estadual de Santa Catarina.", styles['Normal']))
     story.append(Paragraph("As informações contidas neste relatório são de caráter sigiloso e destinam-se exclusivamente ao uso da fiscalização tributária.", styles['Normal']))
     story.append(Spacer(1, 0.5*inch))
-    story.append(Paragraph("Sistema GEI v3.0 - Receita Estadual de Santa Catarina", 
-                          ParagraphStyle('Footer', parent=styles['Normal'], fontSize=10, alignment=TA_CENTER)))
+    story.append(Paragraph("Sistema GEI v3.0 - Receita Estadual de Santa Catarina", styles['Rodape']))
     
-    doc.build(story)
+    construir_documento(doc, story, ao_progredir)
     buffer.seek(0)
     return buffer
 
@@ -3197,7 +3209,7 @@ def analise_pontual(engine, dados, filtros):
                 receita_max = resultados['pgdas'].groupby('cnpj')['receita_12m'].max().reset_index()
                 receita_max.columns = ['CNPJ', 'Receita_Maxima_12m']
                 receita_max['Acima_Limite_SN'] = receita_max['Receita_Maxima_12m'] > 4800000
-                receita_max['Receita_Maxima_12m'] = receita_max['Receita_Maxima_12m'].apply(formatar_moeda)
+                receita_max['Receita_Maxima_12m'] = formatar_moeda_coluna(receita_max['Receita_Maxima_12m'])
                 
                 st.write("**Receita Máxima por CNPJ:**")
                 st.dataframe(receita_max, width='stretch', hide_index=True)
@@ -3293,7 +3305,7 @@ def analise_pontual(engine, dados, filtros):
                 st.write("**Total por Tipo:**")
                 resumo_tipo = resultados['pagamentos'].groupby('tipo_identificador')['valor_total'].sum().reset_index()
                 resumo_tipo.columns = ['Tipo', 'Valor_Total']
-                resumo_tipo['Valor_Total'] = resumo_tipo['Valor_Total'].apply(formatar_moeda)
+                resumo_tipo['Valor_Total'] = formatar_moeda_coluna(resumo_tipo['Valor_Total'])
                 st.dataframe(resumo_tipo, width='stretch', hide_index=True)
                 
                 # Resumo por identificador (CNPJ/CPF)
@@ -3301,7 +3313,7 @@ def analise_pontual(engine, dados, filtros):
                 resumo_ident = resultados['pagamentos'].groupby(['identificador', 'tipo_identificador'])['valor_total'].sum().reset_index()
                 resumo_ident.columns = ['Identificador', 'Tipo', 'Valor_Total']
                 resumo_ident = resumo_ident.sort_values('Valor_Total', ascending=False)
-                resumo_ident['Valor_Total'] = resumo_ident['Valor_Total'].apply(formatar_moeda)
+                resumo_ident['Valor_Total'] = formatar_moeda_coluna(resumo_ident['Valor_Total'])
                 st.dataframe(resumo_ident, width='stretch', hide_index=True)
                 
                 # Gráfico de evolução
@@ -3870,7 +3882,7 @@ def analise_pontual(engine, dados, filtros):
                     pivot_display['TOTAL GRUPO'] = pivot_display.sum(axis=1)
                     
                     # Formatar valores
-                    pivot_display = pivot_display.applymap(lambda x: formatar_moeda(x) if pd.notna(x) else '-')
+                    pivot_display = pivot_display.apply(formatar_moeda_coluna, valor_ausente='-')
                     
                     st.dataframe(pivot_display)
                 
@@ -4675,7 +4687,7 @@ def dashboard_executivo(dados, filtros):
         st.metric("Score Médio", f"{df[score_col].mean():.2f}")
     with col4:
         score_col = 'score_final_ccs' if 'score_final_ccs' in df.columns else 'score_final_avancado'
-        st.metric("Grupos Críticos", f"{len(df[df[score_col] >= 20]):,}")
+        st.metric("Grupos Críticos", f"{int((df[score_col] >= limites_risco('score_ccs')['CRÍTICO']).sum()):,}")
     
     # Análises gráficas
     st.subheader("Análises")
@@ -4683,8 +4695,8 @@ def dashboard_executivo(dados, filtros):
     
     with col1:
         score_col = 'score_final_ccs' if 'score_final_ccs' in df.columns else 'score_final_avancado'
-        fig = px.histogram(df, x=score_col, nbins=20, 
-                          title="Distribuição de Scores", template=filtros['tema'])
+        fig = figura_histograma(df, score_col, bins=20,
+                                titulo="Distribuição de Scores", template=filtros['tema'])
         fig.update_layout(height=300)
         st.plotly_chart(fig)
     
@@ -4710,7 +4722,7 @@ def dashboard_executivo(dados, filtros):
     df_top = df.nlargest(15, score_col).copy()
     
     if 'valor_max' in df_top.columns:
-        df_top['Receita'] = df_top['valor_max'].apply(formatar_moeda)
+        df_top['Receita'] = formatar_moeda_coluna(df_top['valor_max'])
     
     colunas = ['num_grupo', score_col, 'qntd_cnpj', 
                'Receita', 'qtd_total_indicios', 'nivel_risco_grupo_economico']
@@ -4747,11 +4759,22 @@ def ranking_grupos(dados, filtros):
     
     df_pag = df_sorted.iloc[inicio:fim].copy()
     
+    if score_col in df_pag.columns:
+        df_pag.insert(2, 'Nível de Risco', classificar_risco_serie(df_pag[score_col], 'score_ccs')['nivel'])
+    
     if 'valor_max' in df_pag.columns:
-        df_pag['valor_max'] = df_pag['valor_max'].apply(formatar_moeda)
+        df_pag['valor_max'] = formatar_moeda_coluna(df_pag['valor_max'])
     
     st.dataframe(df_pag, width='stretch', hide_index=True)
     st.info(f"Mostrando {inicio+1} a {fim} de {len(df_sorted)}")
+    
+    with st.expander("📦 Extração completa de gei_percent"):
+        exibir_extracao_completa(
+            get_impala_engine(),
+            Queries.get_extracao_percent(),
+            "gei_percent_completo",
+            chave="extracao_percent"
+        )
 
 # ====================================================================================
 # FUNÇÕES PARA O MENU CONTADORES - ADICIONAR APÓS AS OUTRAS FUNÇÕES DE CONSULTA
@@ -5113,10 +5136,10 @@ def renderizar_detalhe_contador(engine, nm_contador, nm_gerfe, filtros):
     st.dataframe(df_display, use_container_width=True, hide_index=True)
     
     # Download
-    csv = df_display.to_csv(index=False).encode('utf-8-sig')
-    st.download_button(
+    botao_download_sob_demanda(
         label="📥 Baixar dados em CSV",
-        data=csv,
+        gerar=lambda: df_display.to_csv(index=False).encode('utf-8-sig'),
+        entradas=df_display,
         file_name=f"grupos_{nm_contador.replace(' ', '_')}.csv",
         mime="text/csv"
     )
@@ -5215,10 +5238,10 @@ def menu_contadores(engine, dados, filtros):
                 st.rerun()
     
     # Download
-    csv = df_filtrado.to_csv(index=False).encode('utf-8-sig')
-    st.download_button(
+    botao_download_sob_demanda(
         label="📥 Download CSV",
-        data=csv,
+        gerar=lambda: df_filtrado.to_csv(index=False).encode('utf-8-sig'),
+        entradas=df_filtrado,
         file_name="contadores_analise.csv",
         mime="text/csv"
     )
@@ -5263,9 +5286,9 @@ def menu_pagamentos(engine, dados, filtros):
     
     with col1:
         # Distribuição do índice de risco
-        fig = px.histogram(df_pag, x='indice_risco_pagamentos', nbins=30,
-                          title="Distribuição do Índice de Risco Pagamentos",
-                          template=filtros['tema'])
+        fig = figura_histograma(df_pag, 'indice_risco_pagamentos', bins=30,
+                                titulo="Distribuição do Índice de Risco Pagamentos",
+                                template=filtros['tema'])
         st.plotly_chart(fig)
     
     with col2:
@@ -5280,8 +5303,8 @@ def menu_pagamentos(engine, dados, filtros):
     st.subheader("Top 20 Grupos - Maior Risco de Confusão Patrimonial")
     
     df_top = df_pag[df_pag['valor_meios_pagamento_empresas'] > 0].nlargest(20, 'indice_risco_pagamentos').copy()
-    df_top['Valor Empresas'] = df_top['valor_meios_pagamento_empresas'].apply(formatar_moeda)
-    df_top['Valor Sócios'] = df_top['valor_meios_pagamento_socios'].apply(formatar_moeda)
+    df_top['Valor Empresas'] = formatar_moeda_coluna(df_top['valor_meios_pagamento_empresas'])
+    df_top['Valor Sócios'] = formatar_moeda_coluna(df_top['valor_meios_pagamento_socios'])
     
     st.dataframe(df_top[['num_grupo', 'indice_risco_pagamentos', 'Valor Empresas', 'Valor Sócios', 
                          'qntd_cnpj', score_col]], 
@@ -5327,9 +5350,9 @@ def menu_funcionarios(engine, dados, filtros):
     
     with col1:
         # Distribuição de funcionários
-        fig = px.histogram(df_func, x='total_funcionarios', nbins=30,
-                          title="Distribuição de Funcionários por Grupo",
-                          template=filtros['tema'])
+        fig = figura_histograma(df_func, 'total_funcionarios', bins=30,
+                                titulo="Distribuição de Funcionários por Grupo",
+                                template=filtros['tema'])
         st.plotly_chart(fig)
     
     with col2:
@@ -5350,7 +5373,7 @@ def menu_funcionarios(engine, dados, filtros):
             (df_func['total_funcionarios'] <= 10)
         ].nlargest(20, 'indice_risco_fat_func').copy()
         
-        df_top['Faturamento'] = df_top['valor_max'].apply(formatar_moeda)
+        df_top['Faturamento'] = formatar_moeda_coluna(df_top['valor_max'])
         
         st.dataframe(df_top[['num_grupo', 'indice_risco_fat_func', 'Faturamento', 
                              'total_funcionarios', 'qntd_cnpj', score_col]], 
@@ -5362,7 +5385,7 @@ def menu_funcionarios(engine, dados, filtros):
             (df_func['total_funcionarios'] <= 10)
         ].nlargest(20, 'valor_max').copy()
         
-        df_top['Faturamento'] = df_top['valor_max'].apply(formatar_moeda)
+        df_top['Faturamento'] = formatar_moeda_coluna(df_top['valor_max'])
         df_top['Receita_por_Funcionario'] = df_top['valor_max'] / df_top['total_funcionarios']
         
         st.dataframe(df_top[['num_grupo', 'Faturamento', 'total_funcionarios', 
@@ -5408,9 +5431,9 @@ def menu_c115(engine, dados, filtros):
         st.plotly_chart(fig)
     
     with col2:
-        fig = px.histogram(df_c115, x='indice_risco_grupo_economico', nbins=30,
-                          title="Distribuição do Índice de Risco",
-                          template=filtros['tema'])
+        fig = figura_histograma(df_c115, 'indice_risco_grupo_economico', bins=30,
+                                titulo="Distribuição do Índice de Risco",
+                                template=filtros['tema'])
         st.plotly_chart(fig)
     
     # Top 30 Grupos por Risco C115
@@ -5488,9 +5511,9 @@ def menu_ccs(engine, dados, filtros):
     
     with col1:
         # Distribuição do índice de risco CCS
-        fig = px.histogram(df_ccs, x='indice_risco_ccs', nbins=30,
-                          title="Distribuição do Índice de Risco CCS",
-                          template=filtros['tema'])
+        fig = figura_histograma(df_ccs, 'indice_risco_ccs', bins=30,
+                                titulo="Distribuição do Índice de Risco CCS",
+                                template=filtros['tema'])
         st.plotly_chart(fig)
     
     with col2:
@@ -5517,9 +5540,9 @@ def menu_ccs(engine, dados, filtros):
     
     with col2:
         # Max CNPJs por conta
-        fig = px.histogram(df_ccs, x='max_cnpjs_por_conta', nbins=20,
-                          title="Distribuição - Máx CNPJs por Conta",
-                          template=filtros['tema'])
+        fig = figura_histograma(df_ccs, 'max_cnpjs_por_conta', bins=20,
+                                titulo="Distribuição - Máx CNPJs por Conta",
+                                template=filtros['tema'])
         st.plotly_chart(fig)
     
     # Top Grupos por Risco CCS
@@ -5736,7 +5759,7 @@ def menu_financeiro(engine, dados, filtros):
     # Top Grupos Financeiros
     st.subheader("Top 30 Grupos por Receita")
     df_top = df.nlargest(30, 'valor_max').copy()
-    df_top['Receita'] = df_top['valor_max'].apply(formatar_moeda)
+    df_top['Receita'] = formatar_moeda_coluna(df_top['valor_max'])
     
     st.dataframe(df_top[['num_grupo', 'Receita', 'qntd_cnpj', 'total_funcionarios',
                          score_col, 'nivel_risco_grupo_economico']], 
@@ -5958,14 +5981,22 @@ def inconsistencias_nfe(engine, dados, filtros):
                                 st.divider()
             
             # Download
-            csv = df_incons.to_csv(index=False).encode('utf-8')
-            st.download_button(
+            botao_download_sob_demanda(
                 label="Download CSV Completo",
-                data=csv,
+                gerar=lambda: df_incons.to_csv(index=False).encode('utf-8'),
+                entradas=df_incons,
                 file_name=f"inconsistencias_grupo_{grupo_selecionado}.csv",
                 mime="text/csv"
             )
             
+            with st.expander("📦 Extração completa do grupo (sem limite de linhas)"):
+                exibir_extracao_completa(
+                    engine,
+                    Queries.get_extracao_nfe(str(grupo_selecionado)),
+                    f"nfe_completo_grupo_{grupo_selecionado}",
+                    chave=f"extracao_nfe_{grupo_selecionado}"
+                )
+            
         except Exception as e:
             st.error(f"Erro ao carregar inconsistências: {e}")
 
@@ -6144,10 +6175,10 @@ def dossie_grupo(engine, dados, filtros):
             st.dataframe(df_display, hide_index=True, width='stretch')
             
             # Download
-            csv = df_display.to_csv(index=False).encode('utf-8')
-            st.download_button(
+            botao_download_sob_demanda(
                 label="📥 Download CNPJs (CSV)",
-                data=csv,
+                gerar=lambda: df_display.to_csv(index=False).encode('utf-8'),
+                entradas=df_display,
                 file_name=f"cnpjs_grupo_{grupo_selecionado}.csv",
                 mime="text/csv"
             )
@@ -6220,10 +6251,10 @@ def dossie_grupo(engine, dados, filtros):
             st.dataframe(df_display, width='stretch', hide_index=True)
             
             # Download
-            csv = df_display.to_csv(index=False).encode('utf-8')
-            st.download_button(
+            botao_download_sob_demanda(
                 label="Download Indícios (CSV)",
-                data=csv,
+                gerar=lambda: df_display.to_csv(index=False).encode('utf-8'),
+                entradas=df_display,
                 file_name=f"indicios_grupo_{grupo_selecionado}.csv",
                 mime="text/csv"
             )
@@ -6335,9 +6366,7 @@ def dossie_grupo(engine, dados, filtros):
                                         # Formatar valores
                                         for col in df_display.columns:
                                             if col == 'vl_total_nf':
-                                                df_display[col] = df_display[col].apply(
-                                                    lambda x: formatar_moeda(x) if pd.notna(x) else 'N/A'
-                                                )
+                                                df_display[col] = formatar_moeda_coluna(df_display[col])
                                             elif 'dt_' in col:
                                                 df_display[col] = pd.to_datetime(df_display[col], errors='coerce').dt.strftime('%d/%m/%Y')
                                             else:
@@ -6569,57 +6598,14 @@ def dossie_grupo(engine, dados, filtros):
         col1, col2, col3 = st.columns([1, 1, 1])
         
         with col2:
-            if st.button("📄 Gerar PDF do Dossiê", type="primary", key="gerar_pdf"):
-                # Container para o progresso
-                progress_container = st.container()
-                
-                with progress_container:
-                    # Barra de progresso
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
-                    
-                    try:
-                        status_text.text("Iniciando geração do PDF...")
-                        progress_bar.progress(10)
-                        
-                        status_text.text("Coletando dados do grupo...")
-                        progress_bar.progress(30)
-                        
-                        status_text.text("Organizando informações...")
-                        progress_bar.progress(50)
-                        
-                        status_text.text("Gerando documento PDF...")
-                        progress_bar.progress(70)
-                        
-                        pdf_buffer = gerar_pdf_dossie(dossie, grupo_selecionado)
-                        
-                        progress_bar.progress(90)
-                        status_text.text("Finalizando...")
-                        
-                        progress_bar.progress(100)
-                        status_text.text("PDF gerado com sucesso!")
-                        
-                        st.success("✅ PDF gerado com sucesso!")
-                        
-                        # Botão de download automático
-                        st.download_button(
-                            label="⬇️ Download PDF",
-                            data=pdf_buffer,
-                            file_name=f"dossie_grupo_{grupo_selecionado}_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf",
-                            mime="application/pdf",
-                            key="download_pdf"
-                        )
-                        
-                        # Limpar progresso após sucesso
-                        import time
-                        time.sleep(2)
-                        progress_bar.empty()
-                        status_text.empty()
-                        
-                    except Exception as e:
-                        st.error(f"Erro ao gerar PDF: {e}")
-                        progress_bar.empty()
-                        status_text.empty()
+            # Gerado em segundo plano; reaproveitado enquanto os dados do grupo não mudarem
+            exibir_relatorio_em_segundo_plano(
+                chave=chave_dossie(grupo_selecionado, dossie),
+                gerar=lambda ao_progredir: gerar_pdf_dossie(dossie, grupo_selecionado, ao_progredir),
+                label="⬇️ Download PDF",
+                file_name=f"dossie_grupo_{grupo_selecionado}_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf",
+                descricao="PDF do Dossiê"
+            )
         
         st.divider()
         
@@ -6642,6 +6628,7 @@ def menu_analises(engine, dados, filtros):
     st.info("Consultas analíticas e insights estratégicos do sistema GEI")
     
     score_col = 'score_final_ccs' if 'score_final_ccs' in dados['percent'].columns else 'score_final_avancado'
+    limites = limites_risco('score_ccs')
     
     # ==========================================================================
     # SEÇÃO 1: PANORAMA GERAL DO SISTEMA
@@ -6655,10 +6642,10 @@ def menu_analises(engine, dados, filtros):
             COUNT(DISTINCT num_grupo) AS total_grupos_monitorados,
             COUNT(DISTINCT CASE WHEN qntd_cnpj >= 2 THEN num_grupo END) AS grupos_multiplas_empresas,
             SUM(qntd_cnpj) AS total_cnpjs_monitorados,
-            COUNT(DISTINCT CASE WHEN {score_col} >= 20 THEN num_grupo END) AS grupos_risco_critico,
-            COUNT(DISTINCT CASE WHEN {score_col} >= 15 AND {score_col} < 20 THEN num_grupo END) AS grupos_risco_alto,
-            COUNT(DISTINCT CASE WHEN {score_col} >= 10 AND {score_col} < 15 THEN num_grupo END) AS grupos_risco_medio,
-            ROUND(COUNT(DISTINCT CASE WHEN {score_col} >= 15 THEN num_grupo END) * 100.0 / 
+            COUNT(DISTINCT CASE WHEN {score_col} >= {limites['CRÍTICO']} THEN num_grupo END) AS grupos_risco_critico,
+            COUNT(DISTINCT CASE WHEN {score_col} >= {limites['ALTO']} AND {score_col} < {limites['CRÍTICO']} THEN num_grupo END) AS grupos_risco_alto,
+            COUNT(DISTINCT CASE WHEN {score_col} >= {limites['MÉDIO']} AND {score_col} < {limites['ALTO']} THEN num_grupo END) AS grupos_risco_medio,
+            ROUND(COUNT(DISTINCT CASE WHEN {score_col} >= {limites['ALTO']} THEN num_grupo END) * 100.0 / 
                   COUNT(DISTINCT num_grupo), 2) AS perc_grupos_alto_risco,
             SUM(COALESCE(valor_max, 0)) AS receita_bruta_total_monitorada,
             COUNT(DISTINCT CASE WHEN valor_max >= 4800000 THEN num_grupo END) AS grupos_acima_limite_sn,
@@ -6782,7 +6769,7 @@ def menu_analises(engine, dados, filtros):
             
             # Formatar receita_media_faixa
             df_display = df_result.copy()
-            df_display['receita_media_faixa'] = df_display['receita_media_faixa'].apply(formatar_moeda)
+            df_display['receita_media_faixa'] = formatar_moeda_coluna(df_display['receita_media_faixa'])
             
             st.dataframe(df_display, width='stretch', hide_index=True)
     
@@ -6830,8 +6817,8 @@ def menu_analises(engine, dados, filtros):
             MAX(p.{score_col}) AS score_maximo_setor,
             AVG(p.valor_max) AS receita_media_setor,
             AVG(p.qntd_cnpj) AS media_empresas_por_grupo,
-            COUNT(CASE WHEN p.{score_col} >= 15 THEN 1 END) AS grupos_alto_risco,
-            ROUND(COUNT(CASE WHEN p.{score_col} >= 15 THEN 1 END) * 100.0 / COUNT(DISTINCT p.num_grupo), 2) AS perc_alto_risco_setor
+            COUNT(CASE WHEN p.{score_col} >= {limites['ALTO']} THEN 1 END) AS grupos_alto_risco,
+            ROUND(COUNT(CASE WHEN p.{score_col} >= {limites['ALTO']} THEN 1 END) * 100.0 / COUNT(DISTINCT p.num_grupo), 2) AS perc_alto_risco_setor
         FROM grupos_cnae_principal gcp
         JOIN gessimples.gei_percent p ON gcp.num_grupo = p.num_grupo
         WHERE gcp.rn = 1
@@ -6871,7 +6858,7 @@ def menu_analises(engine, dados, filtros):
             
             # Formatar receita_media_setor
             df_display = df_result.copy()
-            df_display['receita_media_setor'] = df_display['receita_media_setor'].apply(formatar_moeda)
+            df_display['receita_media_setor'] = formatar_moeda_coluna(df_display['receita_media_setor'])
             
             st.dataframe(df_display, width='stretch', hide_index=True)
 
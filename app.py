@@ -4,6 +4,7 @@ Dashboard de Monitoramento Fiscal v4.0 - Refatorado e Otimizado
 Receita Estadual de Santa Catarina
 """
 
+import os
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -13,9 +14,10 @@ from plotly.subplots import make_subplots
 
 # Importações dos módulos do sistema
 from src.config import (
-    get_impala_engine, CORES, PALETAS,
+    get_impala_engine, Queries, CORES, PALETAS,
     formatar_moeda, formatar_numero, formatar_percentual,
-    classificar_risco, NIVEIS_RISCO
+    classificar_risco, classificar_risco_serie, NIVEIS_RISCO, PERFIS_RISCO, ML_FEATURES, ML_N_JOBS_PADRAO,
+    VISUALIZACAO_CLUSTERS_CONFIG
 )
 from src.data import (
     carregar_todos_os_dados,
@@ -25,7 +27,10 @@ from src.data import (
     buscar_grupo_por_cnpj,
     aplicar_filtros,
     filtrar_por_score,
-    filtrar_por_nivel_risco
+    filtrar_por_nivel_risco,
+    carregar_indice_similaridade,
+    buscar_cnpjs_semelhantes,
+    carregar_armazem_features
 )
 from src.components import (
     criar_kpi, criar_grid_kpis, criar_kpi_colorido,
@@ -34,16 +39,14 @@ from src.components import (
     criar_heatmap, criar_matriz_correlacao, criar_dispersao_3d,
     criar_gauge, exibir_tabela_formatada, criar_grafico_rede,
     gerar_insights_grupo, gerar_insights_gerais, exibir_insights,
+    calcular_insights_grupos, resumir_insights_por_grupo, insights_do_grupo,
     calcular_correlacoes, identificar_outliers
 )
-from src.ml import (
-    preparar_dados_ml, aplicar_pca, executar_consenso,
-    encontrar_melhor_k, visualizar_clusters_2d, visualizar_clusters_3d,
-    grafico_elbow, comparar_algoritmos
-)
+# src.ml (scikit-learn) é importado só na página de Machine Learning; os
+# pacotes src.reports e src.ml carregam cada submódulo no primeiro uso
 from src.reports import (
     criar_botao_download_excel, criar_botao_download_csv,
-    criar_botao_download_pdf
+    criar_botao_download_pdf, exibir_extracao_completa, exibir_lote_dossies
 )
 from src.utils import check_password, logout
 
@@ -163,13 +166,15 @@ with st.sidebar:
     # Filtro de nível de risco
     niveis_selecionados = st.multiselect(
         "Níveis de Risco",
-        options=['CRÍTICO', 'ALTO', 'MÉDIO', 'BAIXO'],
+        options=list(PERFIS_RISCO['percentual']),
         default=['CRÍTICO', 'ALTO'],
         help="Filtrar por níveis de risco"
     )
 
     # Aplicar filtros
     df_filtrado = dados['percent'].copy()
+    if 'nivel_risco_final' not in df_filtrado.columns and 'score_final_percent' in df_filtrado.columns:
+        df_filtrado['nivel_risco_final'] = classificar_risco_serie(df_filtrado['score_final_percent'], 'percentual')['nivel']
     if 'score_final_percent' in df_filtrado.columns:
         df_filtrado = filtrar_por_score(df_filtrado, score_range[0], score_range[1], 'score_final_percent')
     if 'nivel_risco_final' in df_filtrado.columns and niveis_selecionados:
@@ -446,6 +451,32 @@ elif pagina == "🎯 Análise Pontual":
 
                 st.markdown("---")
 
+                # CNPJs de outros grupos com cadastro semelhante
+                st.markdown("### 🔎 CNPJs com Cadastro Semelhante")
+                if cnpj_input:
+                    cnpjs_referencia = [cnpj_input]
+                elif not dossie.get('cnpjs', pd.DataFrame()).empty:
+                    cnpjs_referencia = dossie['cnpjs']['cnpj'].astype(str).head(50).tolist()
+                else:
+                    cnpjs_referencia = []
+
+                df_semelhantes = buscar_cnpjs_semelhantes(
+                    carregar_indice_similaridade(engine),
+                    cnpjs_referencia,
+                    excluir_grupo=num_grupo_buscar
+                )
+
+                if not df_semelhantes.empty:
+                    st.caption("Razão social, nome fantasia ou endereço parecidos em CNPJs fora deste grupo")
+                    exibir_tabela_formatada(
+                        df_semelhantes,
+                        altura=300
+                    )
+                else:
+                    st.info("Nenhum CNPJ semelhante encontrado fora do grupo")
+
+                st.markdown("---")
+
                 # Exportar Dossiê
                 st.markdown("### 📥 Exportar Dossiê")
 
@@ -492,9 +523,16 @@ elif pagina == "📈 Ranking de Grupos":
         # Adicionar ranking
         top_grupos['ranking'] = range(1, len(top_grupos) + 1)
 
+        # Selos de insights (tabela calculada uma vez por versão dos dados)
+        top_grupos = top_grupos.merge(
+            resumir_insights_por_grupo(calcular_insights_grupos(dados['percent']))[['num_grupo', 'insights']],
+            on='num_grupo', how='left'
+        )
+        top_grupos['insights'] = top_grupos['insights'].fillna('')
+
         # Selecionar colunas relevantes
         colunas_exibir = ['ranking', 'num_grupo', 'qtd_cnpjs', 'score_final_percent',
-                         'nivel_risco_final', 'receita_maxima', 'socios_compartilhados',
+                         'nivel_risco_final', 'insights', 'receita_maxima', 'socios_compartilhados',
                          'contas_compartilhadas', 'total_indicios']
 
         colunas_disponiveis = [col for col in colunas_exibir if col in top_grupos.columns]
@@ -541,6 +579,14 @@ elif pagina == "📈 Ranking de Grupos":
                 label='📥 Download Ranking (CSV)'
             )
 
+        with st.expander("📦 Extração completa de gei_percent"):
+            exibir_extracao_completa(
+                engine,
+                Queries.get_extracao_percent(),
+                'gei_percent_completo',
+                chave='extracao_percent'
+            )
+
     else:
         st.info("Dados não disponíveis para gerar ranking")
 
@@ -549,6 +595,12 @@ elif pagina == "📈 Ranking de Grupos":
 # =============================================================================
 
 elif pagina == "🤖 Machine Learning":
+    from src.ml import (
+        preparar_dados_ml, aplicar_pca, executar_consenso,
+        encontrar_melhor_k, visualizar_clusters_2d, visualizar_clusters_3d,
+        grafico_elbow, comparar_algoritmos, estimar_memoria_hierarquico
+    )
+
     st.markdown("<h1 class='main-header'>🤖 Análise de Machine Learning</h1>", unsafe_allow_html=True)
 
     st.markdown("""
@@ -572,9 +624,66 @@ elif pagina == "🤖 Machine Learning":
     with col_ml3:
         contamination = st.slider("Contaminação (Isolation Forest)", 0.05, 0.5, 0.1, step=0.05)
 
+    n_jobs_ml = st.slider(
+        "Processos paralelos (n_jobs)",
+        1, max(1, os.cpu_count() or 1), ML_N_JOBS_PADRAO,
+        help="Os algoritmos do consenso são independentes e rodam em processos separados"
+    )
+
+    col_viz1, col_viz2 = st.columns(2)
+
+    with col_viz1:
+        backend_vizinhos = st.selectbox(
+            "Busca de vizinhos (DBSCAN)",
+            ['auto', 'exato', 'aproximado'],
+            help="Exato: KD/Ball tree | Aproximado: floresta de projeções aleatórias, "
+                 "para bases grandes | Auto: aproximado acima de 20 mil grupos"
+        )
+
+    with col_viz2:
+        n_arvores = st.slider(
+            "Árvores da busca aproximada",
+            2, 16, 8,
+            help="Mais árvores aumentam o recall dos vizinhos e o tempo de execução",
+            disabled=backend_vizinhos == 'exato'
+        )
+
+    # Estimativa de memória do clustering hierárquico (antes de executar)
+    n_features_ml = len([f for f in ML_FEATURES if f in df_filtrado.columns])
+    memoria_hierarquico = estimar_memoria_hierarquico(len(df_filtrado), n_features_ml)
+    modo_hierarquico = memoria_hierarquico['modo_automatico']
+
+    st.caption(
+        f"🧮 Hierárquico em {len(df_filtrado):,} grupos: modo direto ≈ "
+        f"{memoria_hierarquico['bytes_direto'] / 1024**2:,.0f} MB | micro-clusters ≈ "
+        f"{memoria_hierarquico['bytes_escalavel'] / 1024**2:,.1f} MB → será usado o modo "
+        f"**{'direto' if modo_hierarquico == 'direto' else 'por micro-clusters'}**"
+    )
+
+    modo_grafico = st.selectbox(
+        "Renderização dos gráficos de clusters",
+        ['auto', 'webgl', 'svg'],
+        help="WebGL: um trace por gráfico e amostra por densidade acima de "
+             f"{VISUALIZACAO_CLUSTERS_CONFIG['max_pontos']:,} pontos (anomalias sempre exibidas) | "
+             "SVG: todos os pontos, um trace por cluster | Auto: WebGL em bases grandes"
+    )
+
+    sugerir_k = st.checkbox(
+        "📈 Sugerir número de clusters (varredura rápida de K)",
+        value=False,
+        help="Ajusta K de 2 a 10 em paralelo, com silhouette calculado em amostra estratificada"
+    )
+
     if st.button("🚀 Executar Análise de ML", type="primary"):
         with st.spinner("Preparando dados..."):
-            df_clean, X_scaled, scaler = preparar_dados_ml(df_filtrado)
+            # Features do armazém (float32, memory-map): sem nova query ao trocar parâmetros
+            armazem = carregar_armazem_features(engine)
+            if armazem is not None and 'num_grupo' in df_filtrado.columns:
+                df_ml = armazem.como_dataframe(ML_FEATURES, num_grupos=df_filtrado['num_grupo'])
+            else:
+                df_ml = df_filtrado
+
+            df_clean, X_scaled, scaler = preparar_dados_ml(df_ml)
 
             if len(df_clean) < 10:
                 st.error("Dados insuficientes para análise de ML (mínimo 10 registros)")
@@ -587,11 +696,30 @@ elif pagina == "🤖 Machine Learning":
 
                 st.success(f"✅ PCA aplicado com sucesso! Variância explicada: {var_explicada:.2f}%")
 
+                if sugerir_k:
+                    st.markdown("---")
+                    st.markdown("### 📈 Seleção do Número de Clusters")
+
+                    with st.spinner("Avaliando valores de K..."):
+                        melhor_k, metricas_por_k = encontrar_melhor_k(X_scaled, rapido=True, n_jobs=n_jobs_ml)
+
+                    st.plotly_chart(grafico_elbow(metricas_por_k, melhor_k), use_container_width=True)
+
+                    metrica_melhor = metricas_por_k[melhor_k]
+                    st.info(
+                        f"💡 K sugerido: **{melhor_k}** (silhouette {metrica_melhor['silhouette']:.3f} "
+                        f"± {metrica_melhor['silhouette_ic']:.3f}, amostra de "
+                        f"{metrica_melhor['silhouette_amostra']:,} grupos)"
+                    )
+
                 # Executar consenso
                 st.markdown("---")
                 st.markdown("### 🔬 Análise de Consenso - Múltiplos Algoritmos")
 
-                resultados = executar_consenso(X_scaled, n_clusters, eps_dbscan, contamination)
+                resultados = executar_consenso(
+                    X_scaled, n_clusters, eps_dbscan, contamination, n_jobs=n_jobs_ml,
+                    backend_vizinhos=backend_vizinhos, n_arvores=n_arvores
+                )
 
                 # Exibir métricas
                 st.markdown("#### 📊 Métricas de Qualidade")
@@ -612,7 +740,7 @@ elif pagina == "🤖 Machine Learning":
                 st.markdown("---")
                 st.markdown("### 📊 Visualização Comparativa")
 
-                fig_comp = comparar_algoritmos(resultados, X_pca)
+                fig_comp = comparar_algoritmos(resultados, X_pca, modo=modo_grafico)
                 st.plotly_chart(fig_comp, use_container_width=True)
 
                 # Visualização 3D
@@ -620,7 +748,7 @@ elif pagina == "🤖 Machine Learning":
                 st.markdown("### 🎨 Visualização 3D (K-Means)")
 
                 labels_km = resultados['kmeans']['labels']
-                fig_3d = visualizar_clusters_3d(X_pca, labels_km, df_clean, "Clusters K-Means em 3D")
+                fig_3d = visualizar_clusters_3d(X_pca, labels_km, df_clean, "Clusters K-Means em 3D", modo=modo_grafico)
                 st.plotly_chart(fig_3d, use_container_width=True)
 
     else:
@@ -789,14 +917,11 @@ elif pagina == "💡 Insights Automáticos":
 
     if not df_filtrado.empty and 'score_final_percent' in df_filtrado.columns:
         top_investigacao = df_filtrado.nlargest(10, 'score_final_percent')
+        insights_todos = calcular_insights_grupos(dados['percent'])
 
         for idx, (_, grupo) in enumerate(top_investigacao.iterrows(), 1):
             with st.expander(f"#{idx} - Grupo {grupo['num_grupo']} (Score: {grupo['score_final_percent']:.1f}%)"):
-                # Carregar dossiê resumido
-                dossie_resumo = {'cnpjs': pd.DataFrame(), 'socios': pd.DataFrame()}
-
-                insights_grupo = gerar_insights_grupo(grupo, dossie_resumo)
-                exibir_insights(insights_grupo)
+                exibir_insights(insights_do_grupo(insights_todos, grupo['num_grupo']))
 
 # =============================================================================
 # PÁGINA 8: DOSSIÊ COMPLETO
@@ -817,6 +942,11 @@ elif pagina == "📋 Dossiê Completo":
     )
 
     if num_grupo_dossie and st.button("📄 Gerar Dossiê Completo", type="primary"):
+        st.session_state['grupo_dossie_completo'] = num_grupo_dossie
+
+    # O dossiê fica aberto nas próximas execuções da página (p.ex. ao clicar em
+    # gerar o PDF ou ao terminar a geração), enquanto o grupo digitado for o mesmo
+    if num_grupo_dossie and st.session_state.get('grupo_dossie_completo') == num_grupo_dossie:
         with st.spinner("Gerando dossiê completo..."):
             # Buscar dados
             dados_grupo_dossie = dados['percent'][dados['percent']['num_grupo'] == num_grupo_dossie]
@@ -829,6 +959,18 @@ elif pagina == "📋 Dossiê Completo":
 
                 st.success("✅ Dossiê gerado com sucesso!")
 
+                # CNPJs de outros grupos com cadastro semelhante
+                if not dossie_completo.get('cnpjs', pd.DataFrame()).empty:
+                    df_semelhantes_dossie = buscar_cnpjs_semelhantes(
+                        carregar_indice_similaridade(engine),
+                        dossie_completo['cnpjs']['cnpj'].astype(str).head(50).tolist(),
+                        excluir_grupo=num_grupo_dossie
+                    )
+
+                    if not df_semelhantes_dossie.empty:
+                        with st.expander(f"🔎 {len(df_semelhantes_dossie)} CNPJs com cadastro semelhante fora do grupo"):
+                            exibir_tabela_formatada(df_semelhantes_dossie, altura=300)
+
                 # Botão de download
                 criar_botao_download_pdf(
                     num_grupo_dossie,
@@ -837,6 +979,15 @@ elif pagina == "📋 Dossiê Completo":
                     label='📥 Download Dossiê Completo (PDF)'
                 )
 
+    st.markdown("---")
+    st.markdown("### 📦 Dossiês em Lote")
+    st.markdown("""
+    Gere de uma vez os dossiês de todos os grupos que atendem ao filtro, em um arquivo ZIP
+    com um PDF por grupo e a planilha de índice.
+    """)
+
+    exibir_lote_dossies(engine, dados.get('percent', pd.DataFrame()))
+
 # =============================================================================
 # PÁGINA 9: CONFIGURAÇÕES
 # =============================================================================
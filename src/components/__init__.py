@@ -4,6 +4,14 @@ Pacote de Componentes Visuais e Insights
 
 from .visual import *
 from .insights import *
+from .distribuicoes import (
+    calcular_histograma, calcular_box, calcular_kde, dados_distribuicao,
+    figura_histograma, figura_boxplot, figura_violino
+)
+from .rede import rede_para_arrays, reduzir_rede, calcular_layout
+from .estatisticas import (
+    estatisticas_por_grupo, quantis_por_grupo, SketchEstatisticasGrupos, estatisticas_por_grupo_em_lotes
+)
 
 __all__ = [
     # Visual
@@ -21,8 +29,30 @@ __all__ = [
     'criar_dispersao_3d',
     'criar_gauge',
     'exibir_tabela_formatada',
+    'configurar_colunas_numericas',
     'criar_grafico_rede',
+    # Distribuições agregadas
+    'calcular_histograma',
+    'calcular_box',
+    'calcular_kde',
+    'dados_distribuicao',
+    'figura_histograma',
+    'figura_boxplot',
+    'figura_violino',
+    # Redes
+    'rede_para_arrays',
+    'reduzir_rede',
+    'calcular_layout',
+    # Estatísticas por grupo
+    'estatisticas_por_grupo',
+    'quantis_por_grupo',
+    'SketchEstatisticasGrupos',
+    'estatisticas_por_grupo_em_lotes',
     # Insights
+    'avaliar_regras_insights',
+    'calcular_insights_grupos',
+    'resumir_insights_por_grupo',
+    'insights_do_grupo',
     'gerar_insights_grupo',
     'gerar_insights_gerais',
     'calcular_correlacoes',
@@ -0,0 +1,412 @@
+"""
+Módulo de Dados Agregados para Gráficos de Distribuição
+Calcula no servidor (NumPy) bins de histograma, quartis de boxplot e curvas KDE,
+em cache por (versão dos dados, coluna, parâmetros), e monta as figuras Plotly
+apenas com os arrays agregados, sem serializar cada linha para o navegador
+"""
+
+import hashlib
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from typing import Any, Dict, Optional, Tuple
+
+from ..config.settings import CORES, PALETAS, PLOTLY_LAYOUT, DISTRIBUICOES_CONFIG
+
+# =============================================================================
+# AGREGAÇÕES (NumPy)
+# =============================================================================
+
+def _valores_finitos(valores) -> np.ndarray:
+    """Converte para float e remove NaN/infinitos"""
+    valores = pd.to_numeric(pd.Series(valores), errors='coerce').to_numpy(dtype=float)
+    return valores[np.isfinite(valores)]
+
+def calcular_histograma(valores, bins: int = 30, intervalo: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
+    """
+    Bins de histograma e estatísticas de posição
+
+    Args:
+        valores: Valores numéricos (NaN são ignorados)
+        bins: Número de bins
+        intervalo: (mínimo, máximo) dos bins, para alinhar histogramas de grupos
+
+    Returns:
+        Dicionário com bordas, contagens, n, media e mediana
+    """
+    valores = _valores_finitos(valores)
+    if len(valores) == 0:
+        return {'bordas': np.array([]), 'contagens': np.array([]), 'n': 0, 'media': None, 'mediana': None}
+
+    contagens, bordas = np.histogram(valores, bins=bins, range=intervalo)
+    return {
+        'bordas': bordas,
+        'contagens': contagens,
+        'n': len(valores),
+        'media': float(valores.mean()),
+        'mediana': float(np.median(valores))
+    }
+
+def calcular_box(valores, max_outliers: int = DISTRIBUICOES_CONFIG['max_outliers']) -> Dict[str, Any]:
+    """
+    Estatísticas de boxplot (regra de 1,5 x IQR), como no px.box
+
+    Args:
+        valores: Valores numéricos
+        max_outliers: Máximo de outliers devolvidos (amostra, extremos incluídos)
+
+    Returns:
+        Dicionário com q1, mediana, q3, cercas, média, n e outliers
+    """
+    valores = _valores_finitos(valores)
+    if len(valores) == 0:
+        return {'n': 0}
+
+    q1, mediana, q3 = np.percentile(valores, [25, 50, 75])
+    iqr = q3 - q1
+    dentro = valores[(valores >= q1 - 1.5 * iqr) & (valores <= q3 + 1.5 * iqr)]
+    outliers = valores[(valores < q1 - 1.5 * iqr) | (valores > q3 + 1.5 * iqr)]
+
+    if len(outliers) > max_outliers:
+        ordenados = np.sort(outliers)
+        outliers = ordenados[np.unique(np.linspace(0, len(ordenados) - 1, max_outliers).astype(int))]
+
+    return {
+        'q1': float(q1),
+        'mediana': float(mediana),
+        'q3': float(q3),
+        'cerca_inferior': float(dentro.min()) if len(dentro) else float(q1),
+        'cerca_superior': float(dentro.max()) if len(dentro) else float(q3),
+        'media': float(valores.mean()),
+        'n': len(valores),
+        'outliers': outliers
+    }
+
+def calcular_kde(valores, n_pontos: int = DISTRIBUICOES_CONFIG['pontos_kde']) -> Dict[str, Any]:
+    """
+    Densidade (KDE gaussiano) em grade, por binning linear e convolução
+
+    Custo O(n + n_pontos log n_pontos), independente de n ao desenhar.
+    Largura de banda pela regra de Silverman.
+
+    Args:
+        valores: Valores numéricos
+        n_pontos: Pontos da grade
+
+    Returns:
+        Dicionário com grade x e densidade y
+    """
+    valores = _valores_finitos(valores)
+    if len(valores) < 2 or np.ptp(valores) == 0:
+        return {'x': np.unique(valores), 'y': np.ones(min(len(valores), 1))}
+
+    desvio = min(valores.std(ddof=1), (np.percentile(valores, 75) - np.percentile(valores, 25)) / 1.34)
+    largura = 0.9 * (desvio if desvio > 0 else valores.std(ddof=1)) * len(valores) ** -0.2
+
+    inicio, fim = valores.min() - 3 * largura, valores.max() + 3 * largura
+    grade = np.linspace(inicio, fim, n_pontos)
+    passo = grade[1] - grade[0]
+
+    # Binning linear: cada valor divide o peso entre os dois pontos vizinhos da grade
+    posicao = (valores - inicio) / passo
+    esquerda = np.clip(np.floor(posicao).astype(int), 0, n_pontos - 2)
+    fracao = posicao - esquerda
+    pesos = (
+        np.bincount(esquerda, weights=1 - fracao, minlength=n_pontos)
+        + np.bincount(esquerda + 1, weights=fracao, minlength=n_pontos)
+    )
+
+    raio = int(np.ceil(4 * largura / passo))
+    nucleo = np.exp(-0.5 * (np.arange(-raio, raio + 1) * passo / largura) ** 2)
+    densidade = np.convolve(pesos, nucleo)[raio:raio + n_pontos]
+    densidade /= densidade.sum() * passo
+
+    return {'x': grade, 'y': densidade}
+
+# =============================================================================
+# CACHE POR VERSÃO DOS DADOS
+# =============================================================================
+
+def versao_dados(*series: pd.Series) -> str:
+    """Hash do conteúdo das séries (muda com os dados e com os filtros aplicados)"""
+    hash_conteudo = hashlib.sha256()
+    for serie in series:
+        hash_conteudo.update(str(serie.name).encode())
+        hash_conteudo.update(pd.util.hash_pandas_object(serie, index=False).to_numpy().tobytes())
+    return hash_conteudo.hexdigest()[:16]
+
+@st.cache_data(max_entries=DISTRIBUICOES_CONFIG['max_entradas_cache'], show_spinner=False)
+def _agregar_em_cache(versao: str, tipo: str, parametros: Tuple, _valores: pd.Series, _grupos: Optional[pd.Series]):
+    """Agregação em cache; a chave é (versao, tipo, parametros) e os dados ficam fora do hash"""
+    calcular = {'histograma': calcular_histograma, 'box': calcular_box, 'kde': calcular_kde}[tipo]
+
+    if _grupos is None:
+        return calcular(_valores, *parametros)
+
+    return {
+        grupo: calcular(parte, *parametros)
+        for grupo, parte in _valores.groupby(_grupos.to_numpy(), sort=True)
+    }
+
+def dados_distribuicao(
+    df: pd.DataFrame,
+    coluna: str,
+    tipo: str,
+    coluna_grupo: Optional[str] = None,
+    **parametros
+):
+    """
+    Agregação de uma coluna (opcionalmente por grupo), em cache
+
+    Args:
+        df: DataFrame já filtrado
+        coluna: Coluna numérica
+        tipo: 'histograma', 'box' ou 'kde'
+        coluna_grupo: Coluna de agrupamento (opcional)
+        **parametros: Parâmetros da agregação (bins, max_outliers, n_pontos)
+
+    Returns:
+        Resultado da agregação ou dicionário {grupo: resultado}
+    """
+    valores = df[coluna]
+    grupos = df[coluna_grupo] if coluna_grupo else None
+    versao = versao_dados(valores) if grupos is None else versao_dados(valores, grupos)
+
+    return _agregar_em_cache(versao, tipo, tuple(parametros.values()), valores, grupos)
+
+# =============================================================================
+# FIGURAS
+# =============================================================================
+
+def figura_histograma(
+    df: pd.DataFrame,
+    coluna: str,
+    titulo: str = "",
+    bins: int = 30,
+    cor: str = CORES['primaria'],
+    mostrar_estatisticas: bool = False,
+    coluna_cor: Optional[str] = None,
+    rotulo_x: Optional[str] = None,
+    template: Optional[str] = None
+) -> go.Figure:
+    """
+    Histograma a partir dos bins calculados no servidor
+
+    Args:
+        df: DataFrame com dados
+        coluna: Coluna do histograma
+        titulo: Título do gráfico
+        bins: Número de bins
+        cor: Cor das barras
+        mostrar_estatisticas: Se True, exibe média e mediana
+        coluna_cor: Coluna de agrupamento; gera barras sobrepostas com bins comuns
+        rotulo_x: Rótulo do eixo X (padrão: nome da coluna)
+        template: Template Plotly (padrão: PLOTLY_LAYOUT)
+
+    Returns:
+        Figura Plotly
+    """
+    fig = go.Figure()
+    hist = dados_distribuicao(df, coluna, 'histograma', bins=bins, intervalo=None)
+
+    if coluna_cor:
+        bordas = hist['bordas']
+        intervalo = (float(bordas[0]), float(bordas[-1])) if len(bordas) else None
+        series = dados_distribuicao(df, coluna, 'histograma', coluna_grupo=coluna_cor, bins=bins, intervalo=intervalo)
+        paleta = PALETAS['categorica']
+        cores = [paleta[i % len(paleta)] for i in range(len(series))]
+    else:
+        series, cores = {coluna: hist}, [cor]
+
+    for (grupo, serie), cor_serie in zip(series.items(), cores):
+        bordas = serie['bordas']
+        fig.add_trace(go.Bar(
+            x=(bordas[:-1] + bordas[1:]) / 2,
+            y=serie['contagens'],
+            width=np.diff(bordas),
+            marker_color=cor_serie,
+            opacity=0.7 if coluna_cor else 1,
+            name=str(grupo),
+            customdata=np.column_stack([bordas[:-1], bordas[1:]]) if len(bordas) else None,
+            hovertemplate='%{customdata[0]:.2f} – %{customdata[1]:.2f}<br>Frequência: %{y:,}<extra></extra>'
+        ))
+
+    if mostrar_estatisticas and hist['n'] > 0:
+        fig.add_vline(x=hist['media'], line_dash="dash", line_color="red",
+                     annotation_text=f"Média: {hist['media']:.2f}")
+        fig.add_vline(x=hist['mediana'], line_dash="dash", line_color="green",
+                     annotation_text=f"Mediana: {hist['mediana']:.2f}")
+
+    fig.update_layout(**PLOTLY_LAYOUT)
+    fig.update_layout(
+        title=titulo,
+        bargap=0,
+        barmode='overlay',
+        showlegend=bool(coluna_cor),
+        legend_title_text=coluna_cor,
+        xaxis_title=rotulo_x or coluna,
+        yaxis_title='Frequência'
+    )
+    if template:
+        fig.update_layout(template=template)
+
+    return fig
+
+def figura_boxplot(
+    df: pd.DataFrame,
+    coluna_y: str,
+    coluna_x: Optional[str] = None,
+    titulo: str = "",
+    cor: Optional[str] = CORES['primaria'],
+    mapa_cores: Optional[Dict[Any, str]] = None,
+    rotulos: Optional[Dict[str, str]] = None,
+    template: Optional[str] = None
+) -> go.Figure:
+    """
+    Boxplot com quartis e cercas calculados no servidor
+
+    Os outliers enviados são limitados a DISTRIBUICOES_CONFIG['max_outliers']
+    por caixa (amostra que inclui os extremos).
+
+    Args:
+        df: DataFrame com dados
+        coluna_y: Coluna numérica
+        coluna_x: Coluna de agrupamento (opcional)
+        titulo: Título do gráfico
+        cor: Cor única das caixas (None usa a paleta categórica por grupo)
+        mapa_cores: Cor por grupo (opcional, tem precedência sobre cor)
+        rotulos: Rótulos dos eixos {coluna: rótulo}
+        template: Template Plotly (padrão: PLOTLY_LAYOUT)
+
+    Returns:
+        Figura Plotly
+    """
+    rotulos = rotulos or {}
+    estatisticas = dados_distribuicao(df, coluna_y, 'box', coluna_grupo=coluna_x)
+    if not coluna_x:
+        estatisticas = {coluna_y: estatisticas}
+
+    fig = go.Figure()
+    paleta = PALETAS['categorica']
+
+    for i, (grupo, caixa) in enumerate(estatisticas.items()):
+        if caixa.get('n', 0) == 0:
+            continue
+
+        cor_grupo = (mapa_cores or {}).get(grupo) or cor or paleta[i % len(paleta)]
+        nome = str(grupo)
+
+        fig.add_trace(go.Box(
+            x=[nome],
+            q1=[caixa['q1']],
+            median=[caixa['mediana']],
+            q3=[caixa['q3']],
+            lowerfence=[caixa['cerca_inferior']],
+            upperfence=[caixa['cerca_superior']],
+            mean=[caixa['media']],
+            name=nome,
+            marker_color=cor_grupo,
+            boxpoints=False
+        ))
+
+        if len(caixa['outliers']):
+            fig.add_trace(go.Scatter(
+                x=[nome] * len(caixa['outliers']),
+                y=caixa['outliers'],
+                mode='markers',
+                marker=dict(color=cor_grupo, size=4),
+                name=f'{nome} (outliers)',
+                showlegend=False
+            ))
+
+    fig.update_layout(**PLOTLY_LAYOUT)
+    fig.update_layout(
+        title=titulo,
+        showlegend=bool(coluna_x) and len(estatisticas) > 1,
+        xaxis_title=rotulos.get(coluna_x, coluna_x) if coluna_x else None,
+        yaxis_title=rotulos.get(coluna_y, coluna_y)
+    )
+    if not coluna_x:
+        fig.update_xaxes(showticklabels=False)
+    if template:
+        fig.update_layout(template=template)
+
+    return fig
+
+def figura_violino(
+    df: pd.DataFrame,
+    coluna_y: str,
+    coluna_x: Optional[str] = None,
+    titulo: str = "",
+    cor: Optional[str] = CORES['primaria'],
+    template: Optional[str] = None
+) -> go.Figure:
+    """
+    Violin plot a partir de KDE e quartis calculados no servidor
+
+    Args:
+        df: DataFrame com dados
+        coluna_y: Coluna numérica
+        coluna_x: Coluna de agrupamento (opcional)
+        titulo: Título do gráfico
+        cor: Cor (None usa a paleta categórica por grupo)
+        template: Template Plotly (padrão: PLOTLY_LAYOUT)
+
+    Returns:
+        Figura Plotly
+    """
+    densidades = dados_distribuicao(df, coluna_y, 'kde', coluna_grupo=coluna_x)
+    caixas = dados_distribuicao(df, coluna_y, 'box', coluna_grupo=coluna_x)
+    if not coluna_x:
+        densidades, caixas = {coluna_y: densidades}, {coluna_y: caixas}
+
+    fig = go.Figure()
+    paleta = PALETAS['categorica']
+
+    for i, grupo in enumerate(densidades):
+        kde, caixa = densidades[grupo], caixas[grupo]
+        if caixa.get('n', 0) == 0:
+            continue
+
+        cor_grupo = cor or paleta[i % len(paleta)]
+        meia_largura = 0.4 * kde['y'] / kde['y'].max()
+
+        # Contorno espelhado em torno da posição i
+        fig.add_trace(go.Scatter(
+            x=np.concatenate([i - meia_largura, (i + meia_largura)[::-1]]),
+            y=np.concatenate([kde['x'], kde['x'][::-1]]),
+            fill='toself',
+            mode='lines',
+            line=dict(color=cor_grupo, width=1),
+            name=str(grupo),
+            hoverinfo='skip'
+        ))
+
+        # Caixa interna (q1-q3) e mediana
+        fig.add_trace(go.Scatter(
+            x=[i, i, None, i - 0.05, i + 0.05],
+            y=[caixa['q1'], caixa['q3'], None, caixa['mediana'], caixa['mediana']],
+            mode='lines',
+            line=dict(color='black', width=3),
+            showlegend=False,
+            hovertext=f"Q1: {caixa['q1']:.2f} | Mediana: {caixa['mediana']:.2f} | Q3: {caixa['q3']:.2f}",
+            hoverinfo='text'
+        ))
+
+    fig.update_layout(**PLOTLY_LAYOUT)
+    fig.update_layout(
+        title=titulo,
+        showlegend=False,
+        xaxis=dict(
+            tickmode='array',
+            tickvals=list(range(len(densidades))),
+            ticktext=[str(g) for g in densidades] if coluna_x else [''],
+            title=coluna_x
+        ),
+        yaxis_title=coluna_y
+    )
+    if template:
+        fig.update_layout(template=template)
+
+    return fig
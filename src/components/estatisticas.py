@@ -0,0 +1,417 @@
+"""
+Módulo de Estatísticas por Grupo
+Média, mediana, desvio padrão, mínimo, máximo, quartis e contagem por grupo
+(contador, CNAE, município...) calculados de uma vez com NumPy: os valores são
+ordenados por (grupo, valor) e os quantis lidos por posição, sem função Python
+por grupo. Para tabelas que não cabem em memória, SketchEstatisticasGrupos
+acumula lotes em momentos exatos e em sketches de quantis mescláveis
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Optional, Tuple
+
+from ..config.settings import ESTATISTICAS_CONFIG
+
+# Quantis calculados além da mediana: {coluna do resultado: quantil}
+QUANTIS_PADRAO = {'q1': 0.25, 'q3': 0.75}
+
+COLUNAS_ESTATISTICAS = ['media', 'mediana', 'desvio_padrao', 'minimo', 'maximo', 'q1', 'q3', 'contagem']
+
+# =============================================================================
+# FUNÇÕES AUXILIARES
+# =============================================================================
+
+def _codificar_grupos(chaves: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """Códigos inteiros dos grupos (ordenados como no groupby; nulos = -1)"""
+    codigos, rotulos = pd.factorize(chaves, sort=True)
+    return codigos, pd.Index(rotulos, name=chaves.name)
+
+def _interpolar(inferior: np.ndarray, superior: np.ndarray, fracao: np.ndarray) -> np.ndarray:
+    """Interpolação linear com a mesma fórmula do NumPy (estável nas pontas)"""
+    diferenca = superior - inferior
+    return np.where(fracao >= 0.5, superior - diferenca * (1 - fracao), inferior + diferenca * fracao)
+
+def _momentos(codigos: np.ndarray, valores: np.ndarray, n_grupos: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Contagem, média e soma dos quadrados dos desvios (M2) por grupo, em duas passadas"""
+    contagem = np.bincount(codigos, minlength=n_grupos).astype(float)
+    soma = np.bincount(codigos, weights=valores, minlength=n_grupos)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = soma / contagem
+    desvios = valores - media[codigos]
+    m2 = np.bincount(codigos, weights=desvios * desvios, minlength=n_grupos)
+    return contagem, media, m2
+
+def _desvio_padrao(contagem: np.ndarray, m2: np.ndarray) -> np.ndarray:
+    """Desvio padrão amostral (ddof=1, como o pandas); NaN para grupos com menos de 2 valores"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(contagem > 1, np.sqrt(m2 / (contagem - 1)), np.nan)
+
+# =============================================================================
+# ESTATÍSTICAS EXATAS
+# =============================================================================
+
+def quantis_por_grupo(
+    codigos: np.ndarray,
+    valores: np.ndarray,
+    quantis: Iterable[float],
+    n_grupos: Optional[int] = None
+) -> np.ndarray:
+    """
+    Quantis exatos de cada grupo (interpolação linear, como Series.quantile)
+
+    Uma única ordenação por (grupo, valor); o quantil q do grupo com n valores
+    está na posição início + q * (n - 1) do vetor ordenado.
+
+    Args:
+        codigos: Código inteiro do grupo de cada valor (0..n_grupos-1)
+        valores: Valores numéricos sem NaN
+        quantis: Quantis entre 0 e 1
+        n_grupos: Número de grupos (None = maior código + 1)
+
+    Returns:
+        Matriz (n_grupos x len(quantis)); NaN para grupos sem valores
+    """
+    quantis = np.asarray(list(quantis), dtype=float)
+    n_grupos = int(codigos.max()) + 1 if n_grupos is None and len(codigos) else (n_grupos or 0)
+
+    ordem = np.lexsort((valores, codigos))
+    ordenados = valores[ordem]
+    contagem = np.bincount(codigos, minlength=n_grupos)
+    inicio = np.concatenate(([0], np.cumsum(contagem)[:-1]))
+
+    resultado = np.full((n_grupos, len(quantis)), np.nan)
+    com_valores = contagem > 0
+    if not com_valores.any():
+        return resultado
+
+    inicio = inicio[com_valores, None]
+    posicao = (contagem[com_valores, None] - 1) * quantis[None, :]
+    abaixo = np.floor(posicao).astype(np.int64)
+    acima = np.minimum(abaixo + 1, contagem[com_valores, None] - 1)
+    resultado[com_valores] = _interpolar(
+        ordenados[inicio + abaixo], ordenados[inicio + acima], posicao - abaixo
+    )
+    return resultado
+
+def estatisticas_por_grupo(
+    df: pd.DataFrame,
+    coluna_grupo: str,
+    coluna_metrica: str,
+    quantis: Optional[Dict[str, float]] = None
+) -> pd.DataFrame:
+    """
+    Estatísticas descritivas exatas de uma métrica por grupo
+
+    Equivale a df.groupby(coluna_grupo)[coluna_metrica].agg(mean, median, std,
+    min, max, quantile(0.25), quantile(0.75), count), mas vetorizado.
+
+    Args:
+        df: DataFrame com dados
+        coluna_grupo: Coluna de agrupamento (nulos são descartados, como no groupby)
+        coluna_metrica: Coluna numérica (nulos são ignorados nas estatísticas)
+        quantis: {coluna: quantil} adicionais (padrão QUANTIS_PADRAO)
+
+    Returns:
+        DataFrame com coluna_grupo e as colunas de COLUNAS_ESTATISTICAS, ordenado pelo grupo
+    """
+    quantis = QUANTIS_PADRAO if quantis is None else quantis
+    codigos, rotulos = _codificar_grupos(df[coluna_grupo])
+    valores = pd.to_numeric(df[coluna_metrica], errors='coerce').to_numpy(dtype=float)
+
+    validos = (codigos >= 0) & ~np.isnan(valores)
+    codigos, valores = codigos[validos], valores[validos]
+    n_grupos = len(rotulos)
+
+    contagem, media, m2 = _momentos(codigos, valores, n_grupos)
+    posicoes = quantis_por_grupo(codigos, valores, [0.0, 0.5, 1.0] + list(quantis.values()), n_grupos)
+
+    resultado = pd.DataFrame({
+        coluna_grupo: rotulos,
+        'media': media,
+        'mediana': posicoes[:, 1],
+        'desvio_padrao': _desvio_padrao(contagem, m2),
+        'minimo': posicoes[:, 0],
+        'maximo': posicoes[:, 2],
+        **{nome: posicoes[:, 3 + i] for i, nome in enumerate(quantis)},
+        'contagem': contagem.astype(np.int64)
+    })
+    return resultado
+
+# =============================================================================
+# ESTATÍSTICAS EM LOTES (SKETCHES MESCLÁVEIS)
+# =============================================================================
+
+class SketchEstatisticasGrupos:
+    """
+    Estatísticas por grupo acumuladas lote a lote, com memória limitada
+
+    Contagem, média, desvio padrão, mínimo e máximo são exatos (momentos
+    combinados pela fórmula de Chan). Os quantis vêm de um sketch de
+    centróides por grupo no estilo t-digest: cada grupo guarda no máximo
+    ~compressao/2 centróides (valor médio, peso), mais finos nas caudas.
+    Grupos com poucos valores não são comprimidos e dão quantis exatos.
+
+    Dois sketches podem ser combinados (combinar), então partes da tabela
+    podem ser processadas em paralelo ou em momentos diferentes.
+    """
+
+    def __init__(self, compressao: int = ESTATISTICAS_CONFIG['compressao_sketch']):
+        self.compressao = compressao
+        self.grupos = pd.Index([])
+        self._contagem = np.zeros(0)
+        self._media = np.zeros(0)
+        self._m2 = np.zeros(0)
+        self._minimo = np.zeros(0)
+        self._maximo = np.zeros(0)
+        # Centróides ordenados por (grupo, valor)
+        self._codigos = np.zeros(0, dtype=np.int64)
+        self._valores = np.zeros(0)
+        self._pesos = np.zeros(0)
+
+    # -------------------------------------------------------------------------
+    # Acumulação
+    # -------------------------------------------------------------------------
+
+    def _codigos_de(self, chaves: pd.Index) -> np.ndarray:
+        """Códigos dos grupos no sketch, registrando os grupos novos"""
+        novos = chaves.unique()
+        novos = novos[~novos.isin(self.grupos)]
+        if len(novos):
+            self.grupos = novos if len(self.grupos) == 0 else self.grupos.append(novos)
+            extra = len(novos)
+            self._contagem = np.concatenate([self._contagem, np.zeros(extra)])
+            self._media = np.concatenate([self._media, np.zeros(extra)])
+            self._m2 = np.concatenate([self._m2, np.zeros(extra)])
+            self._minimo = np.concatenate([self._minimo, np.full(extra, np.inf)])
+            self._maximo = np.concatenate([self._maximo, np.full(extra, -np.inf)])
+        return self.grupos.get_indexer(chaves)
+
+    def _mesclar(
+        self,
+        codigos: np.ndarray,
+        contagem: np.ndarray,
+        media: np.ndarray,
+        m2: np.ndarray,
+        minimo: np.ndarray,
+        maximo: np.ndarray,
+        centroides: Tuple[np.ndarray, np.ndarray, np.ndarray]
+    ) -> None:
+        """Combina momentos (por grupo, alinhados a `codigos`) e centróides no sketch"""
+        n_a = self._contagem[codigos]
+        total = n_a + contagem
+        delta = np.where(contagem > 0, media - self._media[codigos], 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fator = np.where(total > 0, contagem / total, 0.0)
+            self._media[codigos] += delta * fator
+            self._m2[codigos] += m2 + delta * delta * n_a * fator
+        self._contagem[codigos] = total
+        self._minimo[codigos] = np.minimum(self._minimo[codigos], minimo)
+        self._maximo[codigos] = np.maximum(self._maximo[codigos], maximo)
+
+        self._codigos = np.concatenate([self._codigos, centroides[0]])
+        self._valores = np.concatenate([self._valores, centroides[1]])
+        self._pesos = np.concatenate([self._pesos, centroides[2]])
+        self._comprimir()
+
+    def atualizar(self, chaves, valores) -> 'SketchEstatisticasGrupos':
+        """
+        Acrescenta um lote de valores
+
+        Args:
+            chaves: Grupo de cada valor (nulos são descartados)
+            valores: Valores numéricos (nulos são ignorados)
+
+        Returns:
+            O próprio sketch
+        """
+        codigos_lote, rotulos_lote = pd.factorize(pd.Series(chaves))
+        valores = pd.to_numeric(pd.Series(valores), errors='coerce').to_numpy(dtype=float)
+        n_lote = len(rotulos_lote)
+        if n_lote == 0:
+            return self
+
+        # Grupos só com valores nulos entram no resultado com contagem 0, como no groupby
+        validos = (codigos_lote >= 0) & ~np.isnan(valores)
+        codigos_lote, valores = codigos_lote[validos], valores[validos]
+
+        contagem, media, m2 = _momentos(codigos_lote, valores, n_lote)
+        minimo = np.full(n_lote, np.inf)
+        maximo = np.full(n_lote, -np.inf)
+        np.minimum.at(minimo, codigos_lote, valores)
+        np.maximum.at(maximo, codigos_lote, valores)
+
+        codigos = self._codigos_de(pd.Index(rotulos_lote))
+        self._mesclar(
+            codigos, contagem, media, m2, minimo, maximo,
+            (codigos[codigos_lote], valores, np.ones(len(valores)))
+        )
+        return self
+
+    def combinar(self, outro: 'SketchEstatisticasGrupos') -> 'SketchEstatisticasGrupos':
+        """
+        Incorpora outro sketch (p.ex. de outra parte da tabela)
+
+        Args:
+            outro: Sketch a combinar (não é alterado)
+
+        Returns:
+            O próprio sketch
+        """
+        if len(outro.grupos) == 0:
+            return self
+        codigos = self._codigos_de(outro.grupos)
+        self._mesclar(
+            codigos, outro._contagem, outro._media, outro._m2, outro._minimo, outro._maximo,
+            (codigos[outro._codigos], outro._valores, outro._pesos)
+        )
+        return self
+
+    def _comprimir(self) -> None:
+        """
+        Ordena os centróides e funde os de grupos com mais de `compressao`
+
+        Cada centróide vai para o intervalo da função de escala do t-digest
+        k(q) = compressao / (2 pi) * asin(2q - 1) que contém o seu quantil
+        central; centróides consecutivos no mesmo intervalo viram um só.
+        """
+        ordem = np.lexsort((self._valores, self._codigos))
+        codigos, valores, pesos = self._codigos[ordem], self._valores[ordem], self._pesos[ordem]
+
+        por_grupo = np.bincount(codigos, minlength=len(self.grupos))
+        comprimir = (por_grupo > self.compressao)[codigos]
+        if comprimir.any():
+            cod_c, val_c, peso_c = codigos[comprimir], valores[comprimir], pesos[comprimir]
+
+            acumulado = np.cumsum(peso_c)
+            total_grupo = np.bincount(cod_c, weights=peso_c)
+            fim_grupo = np.cumsum(total_grupo)
+            inicio_grupo = fim_grupo - total_grupo
+            quantil = (acumulado - peso_c / 2 - inicio_grupo[cod_c]) / total_grupo[cod_c]
+
+            intervalo = np.floor(
+                self.compressao / (2 * np.pi) * np.arcsin(np.clip(2 * quantil - 1, -1, 1)) + self.compressao / 4
+            ).astype(np.int64)
+            nova = np.ones(len(cod_c), dtype=bool)
+            nova[1:] = (cod_c[1:] != cod_c[:-1]) | (intervalo[1:] != intervalo[:-1])
+            inicios = np.flatnonzero(nova)
+
+            peso_fundido = np.add.reduceat(peso_c, inicios)
+            valor_fundido = np.add.reduceat(val_c * peso_c, inicios) / peso_fundido
+
+            mantidos = ~comprimir
+            codigos = np.concatenate([codigos[mantidos], cod_c[inicios]])
+            valores = np.concatenate([valores[mantidos], valor_fundido])
+            pesos = np.concatenate([pesos[mantidos], peso_fundido])
+            ordem = np.lexsort((valores, codigos))
+            codigos, valores, pesos = codigos[ordem], valores[ordem], pesos[ordem]
+
+        self._codigos, self._valores, self._pesos = codigos, valores, pesos
+
+    # -------------------------------------------------------------------------
+    # Consulta
+    # -------------------------------------------------------------------------
+
+    def quantis(self, quantis: Iterable[float]) -> np.ndarray:
+        """
+        Quantis aproximados de cada grupo (exatos em grupos não comprimidos)
+
+        Cada centróide de peso w ocupa as posições do seu intervalo e é lido
+        no centro; entre centróides (e até o mínimo e o máximo) interpola-se
+        linearmente. Com pesos unitários coincide com Series.quantile.
+
+        Args:
+            quantis: Quantis entre 0 e 1
+
+        Returns:
+            Matriz (grupos x quantis); NaN para grupos sem valores
+        """
+        quantis = np.asarray(list(quantis), dtype=float)
+        n_grupos = len(self.grupos)
+        resultado = np.full((n_grupos, len(quantis)), np.nan)
+        if len(self._codigos) == 0:
+            return resultado
+
+        # Pontos de cada grupo: mínimo, centros dos centróides e máximo, em
+        # posições normalizadas 0..1, deslocadas por 2 * código do grupo
+        total = self._contagem
+        por_grupo = np.bincount(self._codigos, minlength=n_grupos)
+        acumulado = np.cumsum(self._pesos)
+        inicio_peso = np.concatenate(([0.0], np.cumsum(np.bincount(self._codigos, weights=self._pesos, minlength=n_grupos))[:-1]))
+        centro = (acumulado - self._pesos / 2 - inicio_peso[self._codigos]) / total[self._codigos]
+
+        com_valores = np.flatnonzero(por_grupo > 0)
+        chaves = np.concatenate([2.0 * com_valores, 2.0 * self._codigos + centro, 2.0 * com_valores + 1])
+        pontos = np.concatenate([self._minimo[com_valores], self._valores, self._maximo[com_valores]])
+        ordem = np.argsort(chaves, kind='stable')
+        chaves, pontos = chaves[ordem], pontos[ordem]
+
+        # Posição do quantil q: 0,5 + q * (n - 1), a mesma de Series.quantile com pesos unitários
+        posicao = (0.5 + quantis[None, :] * (total[com_valores, None] - 1)) / total[com_valores, None]
+        alvo = 2.0 * com_valores[:, None] + posicao
+        direita = np.clip(np.searchsorted(chaves, alvo, side='left'), 1, len(chaves) - 1)
+        esquerda = direita - 1
+        largura = chaves[direita] - chaves[esquerda]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fracao = np.where(largura > 0, (alvo - chaves[esquerda]) / largura, 0.0)
+        resultado[com_valores] = _interpolar(pontos[esquerda], pontos[direita], np.clip(fracao, 0, 1))
+        return resultado
+
+    def resultado(self, coluna_grupo: str = 'grupo', quantis: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+        """
+        Estatísticas acumuladas, no formato de estatisticas_por_grupo
+
+        Args:
+            coluna_grupo: Nome da coluna de grupo no resultado
+            quantis: {coluna: quantil} adicionais (padrão QUANTIS_PADRAO)
+
+        Returns:
+            DataFrame com coluna_grupo e as colunas de COLUNAS_ESTATISTICAS
+        """
+        quantis = QUANTIS_PADRAO if quantis is None else quantis
+        posicoes = self.quantis([0.5] + list(quantis.values()))
+        vazios = self._contagem == 0
+
+        resultado = pd.DataFrame({
+            coluna_grupo: self.grupos,
+            'media': np.where(vazios, np.nan, self._media),
+            'mediana': posicoes[:, 0],
+            'desvio_padrao': _desvio_padrao(self._contagem, self._m2),
+            'minimo': np.where(vazios, np.nan, self._minimo),
+            'maximo': np.where(vazios, np.nan, self._maximo),
+            **{nome: posicoes[:, 1 + i] for i, nome in enumerate(quantis)},
+            'contagem': self._contagem.astype(np.int64)
+        })
+        try:
+            return resultado.sort_values(coluna_grupo, kind='stable').reset_index(drop=True)
+        except TypeError:
+            return resultado
+
+def estatisticas_por_grupo_em_lotes(
+    lotes: Iterable[pd.DataFrame],
+    coluna_grupo: str,
+    coluna_metrica: str,
+    compressao: int = ESTATISTICAS_CONFIG['compressao_sketch'],
+    quantis: Optional[Dict[str, float]] = None
+) -> pd.DataFrame:
+    """
+    Estatísticas por grupo de uma tabela lida em lotes (p.ex. iterar_lotes_query)
+
+    Só um lote e os sketches ficam em memória. Contagem, média, desvio,
+    mínimo e máximo são exatos; mediana e quartis são aproximados nos grupos
+    com mais de `compressao` valores.
+
+    Args:
+        lotes: Iterador de DataFrames com coluna_grupo e coluna_metrica
+        coluna_grupo: Coluna de agrupamento
+        coluna_metrica: Coluna numérica
+        compressao: Tamanho do sketch (maior = mais preciso e mais memória)
+        quantis: {coluna: quantil} adicionais (padrão QUANTIS_PADRAO)
+
+    Returns:
+        DataFrame no formato de estatisticas_por_grupo
+    """
+    sketch = SketchEstatisticasGrupos(compressao)
+    for lote in lotes:
+        sketch.atualizar(lote[coluna_grupo], lote[coluna_metrica])
+    return sketch.resultado(coluna_grupo, quantis)
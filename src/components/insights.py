@@ -5,153 +5,274 @@ Gera insights automáticos baseados em análise de dados e regras de negócio
 
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Tuple, Optional
-from scipy import stats
+import streamlit as st
+from typing import Any, List, Dict, Tuple, Optional
 from datetime import datetime
 
-from ..config.settings import NIVEIS_RISCO, formatar_moeda, formatar_numero, formatar_percentual
+from ..config.settings import (
+    NIVEIS_RISCO, INSIGHTS_CONFIG, formatar_moeda, formatar_numero, formatar_percentual,
+    classificar_risco_serie, formatar_serie_numerica, formatar_moeda_serie
+)
+from .distribuicoes import versao_dados
+from .estatisticas import estatisticas_por_grupo
 
 # =============================================================================
-# GERAÇÃO DE INSIGHTS AUTOMÁTICOS
+# MOTOR DE REGRAS DE INSIGHTS (VETORIZADO)
 # =============================================================================
 
-def gerar_insights_grupo(dados_grupo: pd.Series, dossie: Dict[str, pd.DataFrame]) -> List[Dict[str, str]]:
-    """
-    Gera insights automáticos para um grupo específico
+COLUNAS_INSIGHTS = ['num_grupo', 'tipo', 'severidade', 'titulo', 'descricao']
+
+# Colunas de gei_percent usadas pelas regras e valor assumido quando ausentes
+COLUNAS_REGRAS = {
+    'score_final_percent': 0,
+    'qtd_cnpjs': 0,
+    'socios_compartilhados': 0,
+    'indice_interconexao': 0,
+    'razao_social_identica': 0,
+    'fantasia_identica': 0,
+    'endereco_identico': 0,
+    'acima_limite_sn': 0,
+    'receita_maxima': 0,
+    'indice_risco_c115': 0,
+    'contas_compartilhadas': 0,
+    'total_indicios': 0,
+    'score_inconsistencias_nfe': 0
+}
+
+def _decimal(serie: pd.Series, casas: int = 1) -> pd.Series:
+    """Equivalente vetorizado de f'{valor:.{casas}f}'"""
+    return pd.Series(
+        formatar_serie_numerica(serie, casas, separador_milhar='', separador_decimal='.'),
+        index=serie.index
+    )
 
-    Args:
-        dados_grupo: Série com dados principais do grupo
-        dossie: Dicionário com dados completos do dossiê
+def _inteiro(serie: pd.Series) -> pd.Series:
+    return serie.round().astype('int64').astype(str)
 
-    Returns:
-        Lista de dicionários com insights {'tipo': str, 'titulo': str, 'descricao': str, 'severidade': str}
+def _preparar_colunas_regras(df: pd.DataFrame) -> pd.DataFrame:
+    """Colunas numéricas das regras (ausentes ou nulas = valor padrão) e níveis de risco"""
+    v = pd.DataFrame(index=df.index)
+    for coluna, padrao in COLUNAS_REGRAS.items():
+        v[coluna] = pd.to_numeric(df[coluna], errors='coerce') if coluna in df.columns else np.nan
+        v[coluna] = v[coluna].fillna(padrao)
+
+    v['nivel_risco'] = classificar_risco_serie(v['score_final_percent'], 'percentual')['nivel'].astype(str)
+    v['nivel_risco_c115'] = (
+        df['nivel_risco_c115'].fillna('BAIXO').astype(str) if 'nivel_risco_c115' in df.columns else 'BAIXO'
+    )
+    return v
+
+# Cada regra: condição (máscara sobre todas as linhas) e descrição (só das linhas
+# que atendem à condição), ambas recebendo o DataFrame de _preparar_colunas_regras
+REGRAS_INSIGHTS: List[Dict[str, Any]] = [
+    {
+        'tipo': 'risco',
+        'severidade': 'critico',
+        'titulo': '🔴 Grupo de Risco Crítico',
+        'condicao': lambda v: v['nivel_risco'] == 'CRÍTICO',
+        'descricao': lambda v: 'Score de risco de ' + _decimal(v['score_final_percent']) + '% indica necessidade de '
+                               'investigação urgente. Este grupo apresenta múltiplos indicadores de risco fiscal.'
+    },
+    {
+        'tipo': 'risco',
+        'severidade': 'alto',
+        'titulo': '🟠 Grupo de Alto Risco',
+        'condicao': lambda v: v['nivel_risco'] == 'ALTO',
+        'descricao': lambda v: 'Score de risco de ' + _decimal(v['score_final_percent']) + '% requer monitoramento '
+                               'próximo e análise detalhada.'
+    },
+    {
+        'tipo': 'estrutura',
+        'severidade': 'medio',
+        'titulo': '🏢 Grupo Econômico Extenso',
+        'condicao': lambda v: v['qtd_cnpjs'] >= 10,
+        'descricao': lambda v: 'Grupo possui ' + _inteiro(v['qtd_cnpjs']) + ' CNPJs, indicando estrutura organizacional '
+                               'complexa que pode facilitar planejamento tributário abusivo.'
+    },
+    {
+        'tipo': 'vinculos',
+        'severidade': 'alto',
+        'titulo': '👥 Alta Interconexão Societária',
+        'condicao': lambda v: (v['socios_compartilhados'] >= 5) & (v['indice_interconexao'] >= 0.7),
+        'descricao': lambda v: _inteiro(v['socios_compartilhados']) + ' sócios compartilhados com índice de interconexão de '
+                               + _decimal(v['indice_interconexao'] * 100) + '%. Forte indício de grupo econômico coordenado.'
+    },
+    {
+        'tipo': 'cadastro',
+        'severidade': 'alto',
+        'titulo': '📋 Anomalia Cadastral',
+        'condicao': lambda v: v['razao_social_identica'] + v['fantasia_identica'] + v['endereco_identico'] >= 2,
+        'descricao': lambda v: 'Múltiplas empresas compartilham dados cadastrais idênticos (razão social: '
+                               + _inteiro(v['razao_social_identica']) + ', fantasia: ' + _inteiro(v['fantasia_identica'])
+                               + ', endereço: ' + _inteiro(v['endereco_identico']) + '). Possível confusão patrimonial.'
+    },
+    {
+        'tipo': 'financeiro',
+        'severidade': 'critico',
+        'titulo': '💰 Possível Pulverização de Receita',
+        'condicao': lambda v: (v['acima_limite_sn'] > 0) & (v['qtd_cnpjs'] >= 3),
+        'descricao': lambda v: _inteiro(v['acima_limite_sn']) + ' empresas acima do limite do Simples Nacional com receita '
+                               'máxima de ' + formatar_moeda_serie(v['receita_maxima']) + '. Indício de estratégia para '
+                               'manter-se no regime simplificado.'
+    },
+    {
+        'tipo': 'c115',
+        'severidade': 'alto',
+        'titulo': '📊 Risco Elevado no Convênio 115',
+        'condicao': lambda v: v['nivel_risco_c115'].isin(['ALTO', 'CRÍTICO']),
+        'descricao': lambda v: 'Índice de risco de ' + _decimal(v['indice_risco_c115'] * 100) + '% no Convênio 115. '
+                               'Múltiplos tomadores compartilhados entre empresas do grupo.'
+    },
+    {
+        'tipo': 'ccs',
+        'severidade': 'critico',
+        'titulo': '🏦 Contas Bancárias Compartilhadas',
+        'condicao': lambda v: v['contas_compartilhadas'] >= 3,
+        'descricao': lambda v: _inteiro(v['contas_compartilhadas']) + ' contas bancárias compartilhadas entre empresas. '
+                               'Forte indício de confusão patrimonial e movimentação financeira coordenada.'
+    },
+    {
+        'tipo': 'indicios',
+        'severidade': 'alto',
+        'titulo': '⚠️ Múltiplos Indícios Fiscais',
+        'condicao': lambda v: v['total_indicios'] >= 10,
+        'descricao': lambda v: _inteiro(v['total_indicios']) + ' indícios fiscais identificados. '
+                               'Padrão consistente sugere coordenação entre empresas.'
+    },
+    {
+        'tipo': 'nfe',
+        'severidade': 'medio',
+        'titulo': '📄 Inconsistências em Notas Fiscais',
+        'condicao': lambda v: v['score_inconsistencias_nfe'] >= 50,
+        'descricao': lambda v: 'Score de inconsistências NFe de ' + _decimal(v['score_inconsistencias_nfe']) + ' pontos. '
+                               'Dados duplicados ou anômalos em documentos fiscais eletrônicos.'
+    },
+]
+
+def avaliar_regras_insights(df: pd.DataFrame, regras: Optional[List[Dict[str, Any]]] = None) -> pd.DataFrame:
     """
-    insights = []
+    Avalia todas as regras de insight sobre todos os grupos de uma vez
 
-    # Insight 1: Score de Risco
-    score = dados_grupo.get('score_final_percent', 0)
-    nivel_risco = dados_grupo.get('nivel_risco_final', 'INDETERMINADO')
+    Cada regra é uma máscara booleana sobre o DataFrame inteiro; a descrição
+    é montada só para as linhas que atendem à regra.
 
-    if score >= 80:
-        insights.append({
-            'tipo': 'risco',
-            'titulo': '🔴 Grupo de Risco Crítico',
-            'descricao': f'Score de risco de {score:.1f}% indica necessidade de investigação urgente. '
-                        f'Este grupo apresenta múltiplos indicadores de risco fiscal.',
-            'severidade': 'critico'
-        })
-    elif score >= 60:
-        insights.append({
-            'tipo': 'risco',
-            'titulo': '🟠 Grupo de Alto Risco',
-            'descricao': f'Score de risco de {score:.1f}% requer monitoramento próximo e análise detalhada.',
-            'severidade': 'alto'
-        })
+    Args:
+        df: DataFrame de gei_percent (uma linha por grupo)
+        regras: Regras a avaliar (None = REGRAS_INSIGHTS)
 
-    # Insight 2: Quantidade de CNPJs
-    qtd_cnpjs = dados_grupo.get('qtd_cnpjs', 0)
-    if qtd_cnpjs >= 10:
-        insights.append({
-            'tipo': 'estrutura',
-            'titulo': '🏢 Grupo Econômico Extenso',
-            'descricao': f'Grupo possui {qtd_cnpjs} CNPJs, indicando estrutura organizacional complexa '
-                        f'que pode facilitar planejamento tributário abusivo.',
-            'severidade': 'medio'
-        })
+    Returns:
+        Tabela longa (num_grupo, tipo, severidade, titulo, descricao), com os
+        grupos na ordem de df e, em cada grupo, as regras na ordem da lista
+    """
+    regras = REGRAS_INSIGHTS if regras is None else regras
+    if df.empty:
+        return pd.DataFrame(columns=COLUNAS_INSIGHTS)
+
+    v = _preparar_colunas_regras(df)
+    num_grupo = df['num_grupo'].to_numpy() if 'num_grupo' in df.columns else df.index.to_numpy()
+    partes = []
+
+    for ordem, regra in enumerate(regras):
+        mascara = regra['condicao'](v).to_numpy(dtype=bool)
+        if not mascara.any():
+            continue
+
+        posicoes = np.flatnonzero(mascara)
+        partes.append(pd.DataFrame({
+            'num_grupo': num_grupo[posicoes],
+            'tipo': regra['tipo'],
+            'severidade': regra['severidade'],
+            'titulo': regra['titulo'],
+            'descricao': regra['descricao'](v.iloc[posicoes]).to_numpy(dtype=object),
+            '_posicao': posicoes,
+            '_regra': ordem
+        }))
+
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_INSIGHTS)
+
+    return (
+        pd.concat(partes, ignore_index=True)
+        .sort_values(['_posicao', '_regra'], kind='stable')
+        .drop(columns=['_posicao', '_regra'])
+        .reset_index(drop=True)
+    )
 
-    # Insight 3: Sócios Compartilhados
-    socios_comp = dados_grupo.get('socios_compartilhados', 0)
-    indice_interconexao = dados_grupo.get('indice_interconexao', 0)
+@st.cache_data(max_entries=INSIGHTS_CONFIG['max_entradas_cache'], show_spinner=False)
+def _insights_em_cache(versao: str, _df: pd.DataFrame) -> pd.DataFrame:
+    """Tabela de insights em cache; a chave é a versão dos dados e o DataFrame fica fora do hash"""
+    return avaliar_regras_insights(_df)
 
-    if socios_comp >= 5 and indice_interconexao >= 0.7:
-        insights.append({
-            'tipo': 'vinculos',
-            'titulo': '👥 Alta Interconexão Societária',
-            'descricao': f'{socios_comp} sócios compartilhados com índice de interconexão de {indice_interconexao:.1%}. '
-                        f'Forte indício de grupo econômico coordenado.',
-            'severidade': 'alto'
-        })
+def calcular_insights_grupos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Insights de todos os grupos, calculados uma vez por versão dos dados
 
-    # Insight 4: Dados Cadastrais Idênticos
-    razao_identica = dados_grupo.get('razao_social_identica', 0)
-    fantasia_identica = dados_grupo.get('fantasia_identica', 0)
-    endereco_identico = dados_grupo.get('endereco_identico', 0)
+    A versão é o hash das colunas usadas pelas regras: trocar de página ou
+    reaplicar os mesmos filtros reaproveita a tabela já calculada.
 
-    total_identicos = razao_identica + fantasia_identica + endereco_identico
-    if total_identicos >= 2:
-        insights.append({
-            'tipo': 'cadastro',
-            'titulo': '📋 Anomalia Cadastral',
-            'descricao': f'Múltiplas empresas compartilham dados cadastrais idênticos '
-                        f'(razão social: {razao_identica}, fantasia: {fantasia_identica}, endereço: {endereco_identico}). '
-                        f'Possível confusão patrimonial.',
-            'severidade': 'alto'
-        })
+    Args:
+        df: DataFrame de gei_percent
 
-    # Insight 5: Limite Simples Nacional
-    acima_limite = dados_grupo.get('acima_limite_sn', 0)
-    receita_maxima = dados_grupo.get('receita_maxima', 0)
+    Returns:
+        Tabela longa de avaliar_regras_insights
+    """
+    colunas = [c for c in ['num_grupo', 'nivel_risco_c115', *COLUNAS_REGRAS] if c in df.columns]
+    if df.empty or not colunas:
+        return pd.DataFrame(columns=COLUNAS_INSIGHTS)
+    return _insights_em_cache(versao_dados(*(df[c] for c in colunas)), df)
 
-    if acima_limite > 0 and qtd_cnpjs >= 3:
-        insights.append({
-            'tipo': 'financeiro',
-            'titulo': '💰 Possível Pulverização de Receita',
-            'descricao': f'{acima_limite} empresas acima do limite do Simples Nacional com receita máxima de {formatar_moeda(receita_maxima)}. '
-                        f'Indício de estratégia para manter-se no regime simplificado.',
-            'severidade': 'critico'
-        })
+def resumir_insights_por_grupo(insights: pd.DataFrame) -> pd.DataFrame:
+    """
+    Uma linha por grupo com os selos (emoji de cada insight) e a contagem
 
-    # Insight 6: Convênio 115
-    c115_risco = dados_grupo.get('indice_risco_c115', 0)
-    c115_nivel = dados_grupo.get('nivel_risco_c115', 'BAIXO')
+    Args:
+        insights: Tabela de calcular_insights_grupos
 
-    if c115_nivel in ['ALTO', 'CRÍTICO']:
-        insights.append({
-            'tipo': 'c115',
-            'titulo': '📊 Risco Elevado no Convênio 115',
-            'descricao': f'Índice de risco de {c115_risco:.1%} no Convênio 115. '
-                        f'Múltiplos tomadores compartilhados entre empresas do grupo.',
-            'severidade': 'alto'
-        })
+    Returns:
+        DataFrame (num_grupo, insights, qtd_insights, qtd_criticos)
+    """
+    if insights.empty:
+        return pd.DataFrame(columns=['num_grupo', 'insights', 'qtd_insights', 'qtd_criticos'])
 
-    # Insight 7: Contas Compartilhadas (CCS)
-    contas_comp = dados_grupo.get('contas_compartilhadas', 0)
-    ccs_risco = dados_grupo.get('indice_risco_ccs', 0)
+    selos = insights.assign(
+        selo=insights['titulo'].str.split(' ', n=1).str[0],
+        critico=insights['severidade'].eq('critico')
+    )
+    return selos.groupby('num_grupo', sort=False).agg(
+        insights=('selo', ' '.join),
+        qtd_insights=('selo', 'size'),
+        qtd_criticos=('critico', 'sum')
+    ).reset_index()
+
+def insights_do_grupo(insights: pd.DataFrame, num_grupo) -> List[Dict[str, str]]:
+    """Insights de um grupo como lista de dicionários (formato de exibir_insights)"""
+    if insights.empty:
+        return []
+    linhas = insights[insights['num_grupo'].astype(str) == str(num_grupo)]
+    return linhas[['tipo', 'titulo', 'descricao', 'severidade']].to_dict('records')
 
-    if contas_comp >= 3:
-        insights.append({
-            'tipo': 'ccs',
-            'titulo': '🏦 Contas Bancárias Compartilhadas',
-            'descricao': f'{contas_comp} contas bancárias compartilhadas entre empresas. '
-                        f'Forte indício de confusão patrimonial e movimentação financeira coordenada.',
-            'severidade': 'critico'
-        })
+# =============================================================================
+# GERAÇÃO DE INSIGHTS AUTOMÁTICOS
+# =============================================================================
 
-    # Insight 8: Indícios Fiscais
-    total_indicios = dados_grupo.get('total_indicios', 0)
+def gerar_insights_grupo(dados_grupo: pd.Series, dossie: Dict[str, pd.DataFrame]) -> List[Dict[str, str]]:
+    """
+    Gera insights automáticos para um grupo específico
 
-    if total_indicios >= 10:
-        insights.append({
-            'tipo': 'indicios',
-            'titulo': '⚠️ Múltiplos Indícios Fiscais',
-            'descricao': f'{total_indicios} indícios fiscais identificados. '
-                        f'Padrão consistente sugere coordenação entre empresas.',
-            'severidade': 'alto'
-        })
+    Aplica as mesmas regras de avaliar_regras_insights à linha do grupo e
+    acrescenta as que dependem do dossiê (pagamentos a sócios).
 
-    # Insight 9: Inconsistências NFe
-    score_nfe = dados_grupo.get('score_inconsistencias_nfe', 0)
+    Args:
+        dados_grupo: Série com dados principais do grupo
+        dossie: Dicionário com dados completos do dossiê
 
-    if score_nfe >= 50:
-        insights.append({
-            'tipo': 'nfe',
-            'titulo': '📄 Inconsistências em Notas Fiscais',
-            'descricao': f'Score de inconsistências NFe de {score_nfe:.1f} pontos. '
-                        f'Dados duplicados ou anômalos em documentos fiscais eletrônicos.',
-            'severidade': 'medio'
-        })
+    Returns:
+        Lista de dicionários com insights {'tipo': str, 'titulo': str, 'descricao': str, 'severidade': str}
+    """
+    tabela = avaliar_regras_insights(dados_grupo.to_frame().T)
+    insights = tabela[['tipo', 'titulo', 'descricao', 'severidade']].to_dict('records')
 
-    # Insight 10: Pagamentos a Sócios
+    # Insight do dossiê: Pagamentos a Sócios
     if not dossie.get('pagamentos', pd.DataFrame()).empty:
         pagamentos_socios = dossie['pagamentos'].get('valor_meios_pagamento_socios', [0])[0]
         if pagamentos_socios > 0:
@@ -282,6 +403,8 @@ def identificar_outliers(df: pd.DataFrame, coluna: str, metodo: str = 'iqr') ->
         }
 
     else:  # zscore
+        from scipy import stats
+
         z_scores = np.abs(stats.zscore(df[coluna].dropna()))
         outliers = df[z_scores > 3]
 
@@ -305,6 +428,8 @@ def testar_normalidade(df: pd.DataFrame, coluna: str) -> Dict:
     Returns:
         Dicionário com resultados do teste
     """
+    from scipy import stats
+
     dados = df[coluna].dropna()
 
     # Limitar amostra para performance (Shapiro-Wilk limitado a 5000 obs)
@@ -333,6 +458,8 @@ def calcular_tendencia(df: pd.DataFrame, coluna_x: str, coluna_y: str) -> Dict:
     Returns:
         Dicionário com parâmetros da regressão
     """
+    from scipy import stats
+
     df_clean = df[[coluna_x, coluna_y]].dropna()
 
     slope, intercept, r_value, p_value, std_err = stats.linregress(
@@ -388,16 +515,7 @@ def calcular_metricas_comparativas(df: pd.DataFrame, coluna_grupo: str, coluna_m
     Returns:
         DataFrame com métricas comparativas
     """
-    resultado = df.groupby(coluna_grupo)[coluna_metrica].agg([
-        ('media', 'mean'),
-        ('mediana', 'median'),
-        ('desvio_padrao', 'std'),
-        ('minimo', 'min'),
-        ('maximo', 'max'),
-        ('q1', lambda x: x.quantile(0.25)),
-        ('q3', lambda x: x.quantile(0.75)),
-        ('contagem', 'count')
-    ]).reset_index()
+    resultado = estatisticas_por_grupo(df, coluna_grupo, coluna_metrica)
 
     # Adicionar ranking
     resultado['ranking'] = resultado['media'].rank(ascending=False)
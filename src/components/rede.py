@@ -0,0 +1,256 @@
+"""
+Módulo de Layout e Redução de Redes
+Calcula posições de nós (espectral e força-dirigida, com matrizes esparsas) e
+limita redes grandes agregando nós e arestas excedentes
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from ..config.settings import REDE_CONFIG
+
+# scipy.sparse é importado no primeiro cálculo de layout, não na carga do app
+if TYPE_CHECKING:
+    from scipy.sparse import csr_matrix
+
+ID_AGREGADO = '__outros__'
+
+# =============================================================================
+# CONVERSÃO
+# =============================================================================
+
+def rede_para_arrays(nos: List[Dict], arestas: List[Dict]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Converte listas de nós e arestas em tabelas indexadas
+
+    Args:
+        nos: Lista {'id', 'label', 'value'}
+        arestas: Lista {'source', 'target', 'value'}
+
+    Returns:
+        Tupla (df_nos, df_arestas); as arestas usam posições ('origem', 'destino')
+        e arestas com nós desconhecidos são descartadas. Ids repetidos ficam
+        com a última ocorrência, como no dicionário de nós anterior
+    """
+    df_nos = pd.DataFrame(nos, columns=['id', 'label', 'value'])
+    df_nos = df_nos.drop_duplicates('id', keep='last')
+    df_nos['value'] = df_nos['value'].fillna(10).astype(float)
+    df_nos['label'] = df_nos['label'].fillna(df_nos['id'])
+
+    df_arestas = pd.DataFrame(arestas, columns=['source', 'target', 'value'])
+    indice = pd.Index(df_nos['id'])
+    origem = indice.get_indexer(df_arestas['source'])
+    destino = indice.get_indexer(df_arestas['target'])
+    validas = (origem >= 0) & (destino >= 0)
+
+    df_arestas = pd.DataFrame({
+        'origem': origem[validas],
+        'destino': destino[validas],
+        'peso': df_arestas['value'].fillna(1).astype(float).to_numpy()[validas]
+    })
+
+    return df_nos.reset_index(drop=True), df_arestas
+
+# =============================================================================
+# REDUÇÃO DE REDES GRANDES
+# =============================================================================
+
+def reduzir_rede(
+    df_nos: pd.DataFrame,
+    df_arestas: pd.DataFrame,
+    max_nos: int = REDE_CONFIG['max_nos'],
+    max_arestas: int = REDE_CONFIG['max_arestas']
+) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, int]]:
+    """
+    Limita nós e arestas, agregando o excedente
+
+    Ficam os max_nos - 1 nós de maior grau ponderado; os demais viram um único
+    nó "Outros (N)", ligado a cada nó mantido com o peso somado das arestas
+    removidas. Depois, ficam as max_arestas arestas de maior peso.
+
+    Args:
+        df_nos: Tabela de nós (saída de rede_para_arrays)
+        df_arestas: Tabela de arestas com posições
+        max_nos: Máximo de nós exibidos
+        max_arestas: Máximo de arestas exibidas
+
+    Returns:
+        Tupla (df_nos, df_arestas, resumo) com as contagens omitidas
+    """
+    resumo = {'nos_agregados': 0, 'arestas_omitidas': 0}
+    n = len(df_nos)
+
+    if n > max_nos:
+        grau = (
+            np.bincount(df_arestas['origem'], weights=df_arestas['peso'], minlength=n)
+            + np.bincount(df_arestas['destino'], weights=df_arestas['peso'], minlength=n)
+        )
+        mantidos = np.sort(np.argsort(-grau, kind='stable')[:max_nos - 1])
+
+        # Posição nova de cada nó; agregados apontam para o último (nó "Outros")
+        nova_posicao = np.full(n, len(mantidos), dtype=np.int64)
+        nova_posicao[mantidos] = np.arange(len(mantidos))
+        resumo['nos_agregados'] = n - len(mantidos)
+
+        agregado = pd.DataFrame([{
+            'id': ID_AGREGADO,
+            'label': f"Outros ({resumo['nos_agregados']:,})",
+            'value': float(df_nos['value'].drop(index=mantidos).mean())
+        }])
+        df_nos = pd.concat([df_nos.iloc[mantidos], agregado], ignore_index=True)
+
+        df_arestas = df_arestas.assign(
+            origem=nova_posicao[df_arestas['origem']],
+            destino=nova_posicao[df_arestas['destino']]
+        )
+        df_arestas = df_arestas[df_arestas['origem'] != df_arestas['destino']]
+
+        # Arestas paralelas (em especial as ligadas ao nó agregado) são somadas
+        df_arestas = df_arestas.groupby(['origem', 'destino'], as_index=False, sort=False)['peso'].sum()
+
+    if len(df_arestas) > max_arestas:
+        resumo['arestas_omitidas'] = len(df_arestas) - max_arestas
+        df_arestas = df_arestas.nlargest(max_arestas, 'peso')
+
+    return df_nos, df_arestas.reset_index(drop=True), resumo
+
+# =============================================================================
+# LAYOUT
+# =============================================================================
+
+def _matriz_adjacencia(n: int, origem: np.ndarray, destino: np.ndarray, pesos: np.ndarray) -> 'csr_matrix':
+    """Adjacência esparsa simétrica"""
+    from scipy.sparse import csr_matrix
+
+    A = csr_matrix((pesos, (origem, destino)), shape=(n, n))
+    return (A + A.T).tocsr()
+
+def layout_circular(n: int) -> np.ndarray:
+    """Nós igualmente espaçados em um círculo"""
+    angulos = 2 * np.pi * np.arange(n) / max(n, 1)
+    return np.column_stack([np.cos(angulos), np.sin(angulos)])
+
+def layout_espectral(A: 'csr_matrix', random_state: int = 42) -> np.ndarray:
+    """
+    Posições pelos 2 autovetores não triviais do Laplaciano normalizado
+
+    Args:
+        A: Adjacência esparsa simétrica
+        random_state: Seed (ruído para desempatar e vetor inicial do ARPACK)
+
+    Returns:
+        Matriz (n, 2) de posições normalizadas
+    """
+    from scipy.sparse import identity
+    from scipy.sparse.csgraph import laplacian
+    from scipy.sparse.linalg import eigsh, ArpackNoConvergence
+
+    n = A.shape[0]
+    rng = np.random.default_rng(random_state)
+    if n <= 3:
+        return layout_circular(n)
+
+    L = laplacian(A.astype(float), normed=True)
+
+    if n <= 500:
+        _, vetores = np.linalg.eigh(L.toarray())
+        posicoes = vetores[:, 1:3]
+    else:
+        # Menores autovalores de L = maiores de (2I - L), que convergem rápido no ARPACK
+        try:
+            valores, vetores = eigsh(2 * identity(n) - L, k=3, which='LA', v0=rng.random(n), tol=1e-4)
+            posicoes = vetores[:, np.argsort(-valores)[1:3]]
+        except ArpackNoConvergence:
+            posicoes = layout_circular(n)
+
+    posicoes = posicoes + rng.normal(0, 1e-4, posicoes.shape)
+    return _normalizar(posicoes)
+
+def layout_forca(
+    A: 'csr_matrix',
+    posicoes: np.ndarray,
+    iteracoes: int = REDE_CONFIG['iteracoes']
+) -> np.ndarray:
+    """
+    Refina posições com Fruchterman-Reingold vetorizado
+
+    Repulsão entre todos os pares (matriz densa, viável após reduzir_rede) e
+    atração só nas arestas (matriz esparsa), com temperatura decrescente.
+
+    Args:
+        A: Adjacência esparsa simétrica
+        posicoes: Posições iniciais (n, 2)
+        iteracoes: Número de iterações
+
+    Returns:
+        Matriz (n, 2) de posições normalizadas
+    """
+    n = A.shape[0]
+    if n <= 2:
+        return _normalizar(posicoes)
+
+    posicoes = posicoes.astype(float).copy()
+    k = 1.0 / np.sqrt(n)
+    A = A.tocoo()
+    linhas, colunas = A.row, A.col
+    pesos = A.data / A.data.max()
+
+    for temperatura in np.linspace(0.1, 0.001, iteracoes):
+        # Repulsão k²/d em todos os pares: sum_j w_ij (p_i - p_j) = p_i * sum_j w_ij - W @ p
+        quadrados = (posicoes ** 2).sum(axis=1)
+        distancia2 = np.maximum(quadrados[:, None] + quadrados[None, :] - 2 * posicoes @ posicoes.T, 1e-6)
+        W = k * k / distancia2
+        np.fill_diagonal(W, 0)
+        deslocamento = posicoes * W.sum(axis=1)[:, None] - W @ posicoes
+
+        # Atração d²/k ao longo das arestas
+        delta_arestas = posicoes[linhas] - posicoes[colunas]
+        dist_arestas = np.maximum(np.sqrt((delta_arestas ** 2).sum(axis=1)), 1e-3)
+        atracao = delta_arestas * (pesos * dist_arestas / k)[:, None]
+        np.subtract.at(deslocamento, linhas, atracao)
+
+        comprimento = np.maximum(np.sqrt((deslocamento ** 2).sum(axis=1)), 1e-9)
+        posicoes += deslocamento / comprimento[:, None] * np.minimum(comprimento, temperatura)[:, None]
+
+    return _normalizar(posicoes)
+
+def _normalizar(posicoes: np.ndarray) -> np.ndarray:
+    """Centraliza e escala as posições para o intervalo [-1, 1]"""
+    posicoes = posicoes - posicoes.mean(axis=0)
+    escala = np.abs(posicoes).max()
+    return posicoes / escala if escala > 0 else posicoes
+
+@st.cache_data(max_entries=REDE_CONFIG['max_layouts_cache'], show_spinner=False)
+def calcular_layout(
+    ids: Tuple[str, ...],
+    origem: np.ndarray,
+    destino: np.ndarray,
+    pesos: np.ndarray,
+    metodo: str = 'forca',
+    random_state: int = 42
+) -> np.ndarray:
+    """
+    Posições dos nós, em cache por (nós do grupo, versão das arestas, método)
+
+    Args:
+        ids: Identificadores dos nós (definem o grupo)
+        origem, destino, pesos: Arestas por posição (o conteúdo é a versão dos dados)
+        metodo: 'forca' (espectral + Fruchterman-Reingold), 'espectral' ou 'circular'
+        random_state: Seed
+
+    Returns:
+        Matriz (n, 2) de posições
+    """
+    n = len(ids)
+    if metodo == 'circular' or len(origem) == 0:
+        return layout_circular(n)
+
+    A = _matriz_adjacencia(n, origem, destino, pesos)
+    posicoes = layout_espectral(A, random_state)
+
+    if metodo == 'forca':
+        posicoes = layout_forca(A, posicoes)
+
+    return posicoes
@@ -14,8 +14,11 @@ import numpy as np
 from ..config.settings import (
     CORES, PALETAS, PLOTLY_CONFIG, PLOTLY_LAYOUT,
     NIVEIS_RISCO, formatar_moeda, formatar_numero,
-    formatar_percentual, classificar_risco
+    formatar_percentual, classificar_risco, REDE_CONFIG,
+    formatar_moeda_serie, formatar_numero_serie, formatar_percentual_serie
 )
+from .distribuicoes import figura_histograma, figura_boxplot, figura_violino
+from .rede import ID_AGREGADO, calcular_layout, reduzir_rede, rede_para_arrays
 
 # =============================================================================
 # COMPONENTES DE KPI
@@ -131,25 +134,8 @@ def criar_histograma(
     Returns:
         Figura Plotly
     """
-    fig = px.histogram(
-        df,
-        x=coluna,
-        nbins=bins,
-        title=titulo,
-        color_discrete_sequence=[cor]
-    )
-
-    if mostrar_estatisticas and not df[coluna].isna().all():
-        media = df[coluna].mean()
-        mediana = df[coluna].median()
-
-        fig.add_vline(x=media, line_dash="dash", line_color="red",
-                     annotation_text=f"Média: {media:.2f}")
-        fig.add_vline(x=mediana, line_dash="dash", line_color="green",
-                     annotation_text=f"Mediana: {mediana:.2f}")
-
-    fig.update_layout(**PLOTLY_LAYOUT)
-    return fig
+    # Bins calculados no servidor: a figura leva só as contagens, não as linhas
+    return figura_histograma(df, coluna, titulo, bins, cor, mostrar_estatisticas)
 
 def criar_boxplot(
     df: pd.DataFrame,
@@ -171,15 +157,7 @@ def criar_boxplot(
     Returns:
         Figura Plotly
     """
-    if coluna_x:
-        fig = px.box(df, x=coluna_x, y=coluna_y, title=titulo,
-                    color_discrete_sequence=[cor])
-    else:
-        fig = px.box(df, y=coluna_y, title=titulo,
-                    color_discrete_sequence=[cor])
-
-    fig.update_layout(**PLOTLY_LAYOUT)
-    return fig
+    return figura_boxplot(df, coluna_y, coluna_x, titulo, cor)
 
 def criar_violinplot(
     df: pd.DataFrame,
@@ -201,15 +179,7 @@ def criar_violinplot(
     Returns:
         Figura Plotly
     """
-    if coluna_x:
-        fig = px.violin(df, x=coluna_x, y=coluna_y, title=titulo,
-                       color_discrete_sequence=[cor], box=True)
-    else:
-        fig = px.violin(df, y=coluna_y, title=titulo,
-                       color_discrete_sequence=[cor], box=True)
-
-    fig.update_layout(**PLOTLY_LAYOUT)
-    return fig
+    return figura_violino(df, coluna_y, coluna_x, titulo, cor)
 
 # =============================================================================
 # GRÁFICOS DE BARRAS E COLUNAS
@@ -692,32 +662,81 @@ def criar_subplots(
 # TABELAS FORMATADAS
 # =============================================================================
 
+def configurar_colunas_numericas(
+    colunas_moeda: Optional[List[str]] = None,
+    colunas_percentual: Optional[List[str]] = None,
+    colunas_numero: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Formatos de exibição aplicados no navegador (st.column_config)
+
+    Os valores continuam numéricos: nada é convertido em texto no servidor e a
+    ordenação da tabela segue a ordem numérica. Os formatos printf não trocam
+    os separadores, então a exibição fica no padrão 1234.56.
+
+    Args:
+        colunas_moeda: Colunas exibidas como moeda
+        colunas_percentual: Colunas exibidas como percentual
+        colunas_numero: Colunas exibidas como inteiro
+
+    Returns:
+        Dicionário para o parâmetro column_config de st.dataframe
+    """
+    config = {}
+    for col in colunas_moeda or []:
+        config[col] = st.column_config.NumberColumn(col, format="R$ %.2f")
+    for col in colunas_percentual or []:
+        config[col] = st.column_config.NumberColumn(col, format="%.2f%%")
+    for col in colunas_numero or []:
+        config[col] = st.column_config.NumberColumn(col, format="%d")
+    return config
+
 def exibir_tabela_formatada(
     df: pd.DataFrame,
     colunas_moeda: Optional[List[str]] = None,
     colunas_percentual: Optional[List[str]] = None,
-    altura: int = 400
+    altura: int = 400,
+    colunas_numero: Optional[List[str]] = None,
+    formatar_no_cliente: bool = False
 ) -> None:
     """
     Exibe DataFrame com formatação
 
+    Por padrão, as colunas são convertidas no padrão brasileiro (1.234,56) de
+    forma vetorizada; com formatar_no_cliente=True, os valores seguem numéricos
+    e o navegador aplica o formato.
+
     Args:
         df: DataFrame a exibir
         colunas_moeda: Lista de colunas a formatar como moeda
         colunas_percentual: Lista de colunas a formatar como percentual
         altura: Altura da tabela em pixels
-    """
+        colunas_numero: Lista de colunas a formatar como inteiro
+        formatar_no_cliente: Usa st.column_config em vez de converter em texto
+    """
+    colunas_moeda = [c for c in colunas_moeda or [] if c in df.columns]
+    colunas_percentual = [c for c in colunas_percentual or [] if c in df.columns]
+    colunas_numero = [c for c in colunas_numero or [] if c in df.columns]
+
+    if formatar_no_cliente:
+        st.dataframe(
+            df,
+            height=altura,
+            use_container_width=True,
+            column_config=configurar_colunas_numericas(colunas_moeda, colunas_percentual, colunas_numero)
+        )
+        return
+
     df_exibir = df.copy()
 
-    if colunas_moeda:
-        for col in colunas_moeda:
-            if col in df_exibir.columns:
-                df_exibir[col] = df_exibir[col].apply(formatar_moeda)
+    for col in colunas_moeda:
+        df_exibir[col] = formatar_moeda_serie(df_exibir[col])
+
+    for col in colunas_percentual:
+        df_exibir[col] = formatar_percentual_serie(df_exibir[col])
 
-    if colunas_percentual:
-        for col in colunas_percentual:
-            if col in df_exibir.columns:
-                df_exibir[col] = df_exibir[col].apply(formatar_percentual)
+    for col in colunas_numero:
+        df_exibir[col] = formatar_numero_serie(df_exibir[col])
 
     st.dataframe(df_exibir, height=altura, use_container_width=True)
 
@@ -728,70 +747,91 @@ def exibir_tabela_formatada(
 def criar_grafico_rede(
     nos: List[Dict],
     arestas: List[Dict],
-    titulo: str
+    titulo: str,
+    layout: str = 'forca',
+    max_nos: int = REDE_CONFIG['max_nos'],
+    max_arestas: int = REDE_CONFIG['max_arestas']
 ) -> go.Figure:
     """
     Cria gráfico de rede (network graph)
 
+    As arestas são agrupadas em um trace por espessura (segmentos separados
+    por lacunas), o layout é calculado com matrizes esparsas e fica em cache
+    por grupo e versão das arestas, e redes acima dos limites têm o excedente
+    agregado em um nó "Outros".
+
     Args:
         nos: Lista de dicionários com nós {'id': str, 'label': str, 'value': float}
         arestas: Lista de dicionários com arestas {'source': str, 'target': str, 'value': float}
         titulo: Título do gráfico
+        layout: 'forca' (espectral + força-dirigida), 'espectral' ou 'circular'
+        max_nos: Máximo de nós exibidos
+        max_arestas: Máximo de arestas exibidas
 
     Returns:
         Figura Plotly
     """
-    # Criar posições usando algoritmo de layout circular
-    n_nos = len(nos)
-    posicoes = {}
-    for i, no in enumerate(nos):
-        angulo = 2 * np.pi * i / n_nos
-        posicoes[no['id']] = (np.cos(angulo), np.sin(angulo))
-
-    # Criar traces para arestas
-    edge_traces = []
-    for aresta in arestas:
-        x0, y0 = posicoes[aresta['source']]
-        x1, y1 = posicoes[aresta['target']]
-
-        edge_trace = go.Scatter(
-            x=[x0, x1, None],
-            y=[y0, y1, None],
+    df_nos, df_arestas = rede_para_arrays(nos, arestas)
+    df_nos, df_arestas, resumo = reduzir_rede(df_nos, df_arestas, max_nos, max_arestas)
+
+    posicoes = calcular_layout(
+        tuple(df_nos['id'].astype(str)),
+        df_arestas['origem'].to_numpy(),
+        df_arestas['destino'].to_numpy(),
+        df_arestas['peso'].to_numpy(),
+        metodo=layout
+    )
+
+    # Arestas: um trace por espessura, com NaN separando os segmentos
+    Scatter = go.Scattergl if len(df_arestas) >= REDE_CONFIG['webgl_a_partir_de'] else go.Scatter
+    traces = []
+    espessuras = df_arestas['peso'].round().clip(1, 5)
+
+    for espessura, grupo in df_arestas.groupby(espessuras, sort=True):
+        origem = posicoes[grupo['origem'].to_numpy()]
+        destino = posicoes[grupo['destino'].to_numpy()]
+        lacuna = np.full(len(grupo), np.nan)
+
+        traces.append(Scatter(
+            x=np.column_stack([origem[:, 0], destino[:, 0], lacuna]).ravel(),
+            y=np.column_stack([origem[:, 1], destino[:, 1], lacuna]).ravel(),
             mode='lines',
-            line=dict(width=aresta.get('value', 1), color='#888'),
+            line=dict(width=espessura, color='#888'),
             hoverinfo='none',
             showlegend=False
-        )
-        edge_traces.append(edge_trace)
-
-    # Criar trace para nós
-    node_x = [posicoes[no['id']][0] for no in nos]
-    node_y = [posicoes[no['id']][1] for no in nos]
-    node_text = [no['label'] for no in nos]
-    node_size = [no.get('value', 10) for no in nos]
-
-    node_trace = go.Scatter(
-        x=node_x,
-        y=node_y,
-        mode='markers+text',
+        ))
+
+    # Nós: rótulos fixos apenas em redes pequenas (nas demais, só no hover)
+    com_rotulo = len(df_nos) <= REDE_CONFIG['max_rotulos']
+    cores_nos = np.where(df_nos['id'] == ID_AGREGADO, CORES['neutro'], CORES['primaria'])
+
+    traces.append(go.Scatter(
+        x=posicoes[:, 0],
+        y=posicoes[:, 1],
+        mode='markers+text' if com_rotulo else 'markers',
         hoverinfo='text',
-        text=node_text,
+        text=df_nos['label'],
         textposition="top center",
         marker=dict(
-            size=node_size,
-            color=CORES['primaria'],
-            line=dict(width=2, color='white')
+            size=df_nos['value'],
+            color=cores_nos,
+            line=dict(width=2 if com_rotulo else 0.5, color='white')
         ),
         showlegend=False
-    )
+    ))
 
     # Criar figura
-    fig = go.Figure(data=edge_traces + [node_trace])
+    fig = go.Figure(data=traces)
+
+    if resumo['nos_agregados'] or resumo['arestas_omitidas']:
+        titulo = (
+            f"{titulo}<br><sup>{resumo['nos_agregados']:,} nós agregados em \"Outros\" | "
+            f"{resumo['arestas_omitidas']:,} arestas de menor peso omitidas</sup>"
+        )
 
     fig.update_layout(
         title=titulo,
         showlegend=False,
-        hovermode='closest',
         xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
         yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
         **PLOTLY_LAYOUT
@@ -14,11 +14,20 @@ __all__ = [
     'DATABASE',
     'DIMENSOES_SCORE',
     'NIVEIS_RISCO',
+    'PERFIS_RISCO',
     'ML_FEATURES',
+    'ML_N_JOBS_PADRAO',
+    'VISUALIZACAO_CLUSTERS_CONFIG',
     'CORES',
     'PALETAS',
     'formatar_moeda',
     'formatar_numero',
     'formatar_percentual',
-    'classificar_risco'
+    'formatar_serie_numerica',
+    'formatar_moeda_serie',
+    'formatar_numero_serie',
+    'formatar_percentual_serie',
+    'classificar_risco',
+    'classificar_risco_serie',
+    'limites_risco'
 ]
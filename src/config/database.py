@@ -7,7 +7,7 @@ import streamlit as st
 import pandas as pd
 from sqlalchemy import create_engine
 import ssl
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from .settings import (
     IMPALA_HOST, IMPALA_PORT, DATABASE,
     get_credentials, MENSAGENS
@@ -286,6 +286,180 @@ class Queries:
         ORDER BY qtd_grupos DESC
         """
 
+    @staticmethod
+    def get_base_similaridade() -> str:
+        """Query para a base cadastral usada no índice de similaridade"""
+        return f"""
+        SELECT
+            cad.nu_cnpj as cnpj,
+            g.num_grupo,
+            c.nm_razao_social,
+            c.nm_fantasia,
+            c.nm_logradouro,
+            c.nu_logradouro,
+            c.nm_bairro,
+            c.nm_munic as nm_municipio
+        FROM {DATABASE}.gei_cadastro cad
+        JOIN usr_sat_ods.vw_ods_contrib c ON cad.nu_cnpj = c.nu_cnpj
+        LEFT JOIN {DATABASE}.gei_cnpj g ON g.cnpj = cad.nu_cnpj
+        """
+
+    @staticmethod
+    def get_features_ml(limite: Optional[int] = None) -> str:
+        """
+        Query das features agregadas por grupo usadas nos modelos de ML
+        (superconjunto de ML_FEATURES)
+
+        Com limite, retorna os grupos de maior score_final_ccs
+        """
+        ordenacao = f"ORDER BY score_final_ccs DESC LIMIT {limite}" if limite else ""
+        return f"""
+        SELECT
+            num_grupo,
+            qntd_cnpj as qtd_cnpjs,
+
+            -- Scores já calculados
+            COALESCE(score_final_ccs, 0) as score_final_ccs,
+            COALESCE(score_final_avancado, 0) as score_final_avancado,
+            COALESCE(total, 0) as score_inconsistencias_nfe,
+
+            -- Métricas Cadastrais
+            CASE WHEN nm_razao_social = 'S' THEN 1 ELSE 0 END as razao_social_identica,
+            CASE WHEN nm_fantasia = 'S' THEN 1 ELSE 0 END as fantasia_identica,
+            CASE WHEN cd_cnae = 'S' THEN 1 ELSE 0 END as cnae_identico,
+            CASE WHEN nm_contador = 'S' THEN 1 ELSE 0 END as contador_identico,
+            CASE WHEN endereco = 'S' THEN 1 ELSE 0 END as endereco_identico,
+            qntd_sn + qntd_normal + qntd_s as total_regimes,
+
+            -- Métricas Financeiras
+            COALESCE(valor_max, 0) as receita_maxima,
+            CASE WHEN valor_max > 4800000 THEN 1 ELSE 0 END as acima_limite_sn,
+
+            -- Vínculos Societários
+            COALESCE(qtd_socios_compartilhados, 0) as socios_compartilhados,
+            COALESCE(max_empresas_por_socio, 0) as max_empresas_socio,
+            COALESCE(indice_interconexao, 0) as indice_interconexao,
+            COALESCE(perc_cnpjs_com_socios, 0) as perc_cnpjs_com_socios,
+
+            -- Convênio 115
+            COALESCE(indice_risco_grupo_economico, 0) as indice_risco_c115,
+            COALESCE(perc_cnpjs_relacionados, 0) as perc_cnpjs_relacionados_c115,
+            COALESCE(total_compartilhamentos, 0) as total_compartilhamentos_c115,
+            CASE
+                WHEN nivel_risco_grupo_economico = 'CRÍTICO' THEN 3
+                WHEN nivel_risco_grupo_economico = 'ALTO' THEN 2
+                WHEN nivel_risco_grupo_economico = 'MÉDIO' THEN 1
+                ELSE 0
+            END as nivel_risco_c115_num,
+
+            -- Indícios Fiscais
+            COALESCE(qtd_total_indicios, 0) as total_indicios,
+            COALESCE(qtd_tipos_indicios_distintos, 0) as tipos_indicios_distintos,
+            COALESCE(perc_cnpjs_com_indicios, 0) as perc_cnpjs_com_indicios,
+            COALESCE(indice_risco_indicios, 0) as indice_risco_indicios,
+
+            -- Meios de Pagamento
+            COALESCE(valor_meios_pagamento_empresas, 0) as pagamentos_empresas,
+            COALESCE(valor_meios_pagamento_socios, 0) as pagamentos_socios,
+            COALESCE(indice_risco_pagamentos, 0) as indice_risco_pagamentos,
+
+            -- Funcionários
+            COALESCE(total_funcionarios, 0) as total_funcionarios,
+            COALESCE(indice_risco_fat_func, 0) as indice_risco_fat_func,
+
+            -- CCS (Contas Bancárias)
+            COALESCE(ccs_qtd_contas_compartilhadas, 0) as contas_compartilhadas,
+            COALESCE(ccs_perc_contas_compartilhadas, 0) as perc_contas_compartilhadas,
+            COALESCE(ccs_max_cnpjs_por_conta, 0) as max_cnpjs_por_conta,
+            COALESCE(ccs_qtd_sobreposicoes_responsaveis, 0) as sobreposicoes_responsaveis,
+            COALESCE(indice_risco_ccs, 0) as indice_risco_ccs,
+            CASE
+                WHEN nivel_risco_ccs = 'CRÍTICO' THEN 3
+                WHEN nivel_risco_ccs = 'ALTO' THEN 2
+                WHEN nivel_risco_ccs = 'MÉDIO' THEN 1
+                ELSE 0
+            END as nivel_risco_ccs_num,
+
+            -- Inconsistências NFe (detalhadas)
+            COALESCE(perc_cliente, 0) as perc_cliente_incons,
+            COALESCE(perc_email, 0) as perc_email_incons,
+            COALESCE(perc_tel_dest, 0) as perc_tel_dest_incons,
+            COALESCE(perc_tel_emit, 0) as perc_tel_emit_incons,
+            COALESCE(perc_codigo_produto, 0) as perc_codigo_produto_incons,
+            COALESCE(perc_fornecedor, 0) as perc_fornecedor_incons,
+            COALESCE(perc_end_emit, 0) as perc_end_emit_incons,
+            COALESCE(perc_end_dest, 0) as perc_end_dest_incons,
+            COALESCE(perc_descricao_produto, 0) as perc_descricao_produto_incons,
+            COALESCE(perc_ip_transmissao, 0) as perc_ip_transmissao_incons,
+            COALESCE(distinct_nfe, 0) as total_nfe_analisadas
+
+        FROM {DATABASE}.gei_percent
+        WHERE qntd_cnpj > 1
+        {ordenacao}
+        """
+
+    @staticmethod
+    def get_extracao_percent() -> str:
+        """Query para extração completa de gei_percent (sem limite)"""
+        return f"""
+        SELECT *
+        FROM {DATABASE}.gei_percent
+        """
+
+    @staticmethod
+    def get_extracao_nfe(num_grupo: Optional[str] = None) -> str:
+        """Query para extração completa de gei_nfe_completo (todo o grupo ou toda a tabela)"""
+        filtro = f"WHERE grupo_emit = '{num_grupo}' OR grupo_dest = '{num_grupo}'" if num_grupo else ""
+        return f"""
+        SELECT *
+        FROM {DATABASE}.gei_nfe_completo
+        {filtro}
+        """
+
+    @staticmethod
+    def get_dossie_lote(num_grupos: List[str]) -> Dict[str, str]:
+        """
+        Queries das seções do dossiê em PDF para vários grupos de uma vez
+        (uma query por seção, com num_grupo no resultado para separar os grupos)
+        """
+        lista = ", ".join(f"'{g}'" for g in num_grupos)
+        return {
+            'cnpjs': f"""
+            SELECT
+                g.num_grupo,
+                g.cnpj,
+                c.nm_razao_social,
+                c.nm_munic as nm_municipio
+            FROM {DATABASE}.gei_cnpj g
+            LEFT JOIN usr_sat_ods.vw_ods_contrib c ON g.cnpj = c.nu_cnpj
+            WHERE g.num_grupo IN ({lista})
+            """,
+            'socios': f"""
+            SELECT num_grupo, cpf_socio, qtd_empresas
+            FROM {DATABASE}.gei_socios_compartilhados
+            WHERE num_grupo IN ({lista})
+            ORDER BY num_grupo, qtd_empresas DESC
+            """,
+            'indicios': f"""
+            SELECT num_grupo, tx_descricao_indicio, cnpj, tx_descricao_complemento
+            FROM {DATABASE}.gei_indicios
+            WHERE num_grupo IN ({lista})
+            """,
+            'ccs_compartilhadas': f"""
+            SELECT
+                num_grupo, nr_cpf, nm_banco, cd_agencia, nr_conta,
+                qtd_cnpjs_usando_conta, qtd_vinculos_ativos, status_conta
+            FROM {DATABASE}.gei_ccs_cpf_compartilhado
+            WHERE num_grupo IN ({lista})
+            ORDER BY num_grupo, qtd_cnpjs_usando_conta DESC
+            """
+        }
+
+    @staticmethod
+    def get_contagem(query: str) -> str:
+        """Query para contar as linhas de outra query"""
+        return f"SELECT COUNT(*) AS total FROM ({query}) t"
+
     @staticmethod
     def get_estatisticas_gerais() -> str:
         """Query para estatísticas gerais do sistema"""
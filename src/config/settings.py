@@ -3,8 +3,14 @@ Módulo de Configurações do Sistema GEI
 Contém todas as configurações e constantes do sistema
 """
 
+import os
+import bisect
+import multiprocessing
+import numpy as np
+import pandas as pd
 import streamlit as st
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
 
 # =============================================================================
 # CONFIGURAÇÕES DE CONEXÃO COM BANCO DE DADOS
@@ -28,6 +34,19 @@ CACHE_TTL_DADOS_PRINCIPAIS = 3600  # 1 hora
 CACHE_TTL_DOSSIE = 300  # 5 minutos
 CACHE_TTL_ANALISES = 1800  # 30 minutos
 
+# =============================================================================
+# CONFIGURAÇÕES DE PERSISTÊNCIA LOCAL
+# =============================================================================
+
+# Diretório para artefatos persistidos em disco (índices, modelos, relatórios)
+DIRETORIO_CACHE = os.environ.get(
+    'GEI_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.gei_cache')
+)
+
+CACHE_TTL_INDICE_SIMILARIDADE = 86400  # 24 horas
+CACHE_TTL_ARMAZEM_FEATURES = 86400  # 24 horas
+
 # =============================================================================
 # LIMITES DE QUERIES
 # =============================================================================
@@ -116,6 +135,28 @@ NIVEIS_RISCO = {
     'BAIXO': {'min': 0, 'max': 39.99, 'cor': '#388e3c', 'valor_num': 0}
 }
 
+# Perfis de limiares por escala de score (mesmo formato de NIVEIS_RISCO)
+# - percentual: score_final_percent (0-100)
+# - score_ccs: score_final_ccs/score_final_avancado (faixas de menu_analises)
+# - similaridade: score da análise pontual de CNPJs
+PERFIS_RISCO = {
+    'percentual': NIVEIS_RISCO,
+    'score_ccs': {
+        'CRÍTICO': {'min': 20, 'max': float('inf'), 'cor': '#d32f2f', 'valor_num': 3},
+        'ALTO': {'min': 15, 'max': 19.99, 'cor': '#f57c00', 'valor_num': 2},
+        'MÉDIO': {'min': 10, 'max': 14.99, 'cor': '#fbc02d', 'valor_num': 1},
+        'BAIXO': {'min': 0, 'max': 9.99, 'cor': '#388e3c', 'valor_num': 0}
+    },
+    'similaridade': {
+        'CRÍTICO': {'min': 15, 'max': float('inf'), 'cor': '#d32f2f', 'valor_num': 3},
+        'ALTO': {'min': 10, 'max': 14.99, 'cor': '#f57c00', 'valor_num': 2},
+        'MODERADO': {'min': 5, 'max': 9.99, 'cor': '#fbc02d', 'valor_num': 1},
+        'BAIXO': {'min': 0, 'max': 4.99, 'cor': '#388e3c', 'valor_num': 0}
+    }
+}
+
+NIVEL_INDETERMINADO = {'nivel': 'INDETERMINADO', 'cor': '#999999', 'valor_num': -1}
+
 # =============================================================================
 # CONFIGURAÇÕES DE MACHINE LEARNING
 # =============================================================================
@@ -133,6 +174,67 @@ ML_FEATURES = [
     'indice_risco_pagamentos', 'indice_risco_fat_func'
 ]
 
+# Processos usados para ajustar modelos independentes em paralelo
+ML_N_JOBS_PADRAO = max(1, min(4, os.cpu_count() or 1))
+
+# Início dos processos dos pools (modelos e dossiês em lote): o servidor do
+# Streamlit tem várias threads, e um fork pode copiar travas mantidas por elas
+METODO_INICIO_PROCESSOS = (
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+# Registro de modelos ajustados (pipelines persistidos em disco)
+REGISTRO_MODELOS_CONFIG = {
+    'max_modelos': 20
+}
+
+# Cache por etapa do pipeline (padronização, PCA e cada modelo), em disco
+CACHE_ETAPAS_CONFIG = {
+    'bytes_limite': 2 * 1024 ** 3
+}
+
+# Varredura de K (seleção do número de clusters) no modo rápido
+SELECAO_K_CONFIG = {
+    'tamanho_amostra_silhouette': 3000,
+    'minibatch_a_partir_de': 5000,
+    'batch_size': 2048,
+    'n_init_rapido': 3
+}
+
+# Clustering hierárquico: acima de limite_direto, compacta em micro-clusters antes do linkage
+HIERARQUICO_CONFIG = {
+    'limite_direto': 10000,
+    'n_microclusters': 500,
+    'compressao': 'kmeans',
+    'threshold_birch': 2.0
+}
+
+# Busca de vizinhos (LOF/DBSCAN): exata (KD/Ball tree) ou aproximada (floresta de
+# projeções aleatórias); n_arvores controla o compromisso recall/velocidade
+VIZINHANCA_CONFIG = {
+    'backend': 'auto',
+    'limite_exato': 20000,
+    'n_arvores': 4,
+    'tamanho_folha': 64,
+    'n_refinamentos': 1
+}
+
+# Modo em escala: ajuste em amostra estratificada e pontuação de todos os grupos
+ESCALA_ML_CONFIG = {
+    'tamanho_amostra': 20000,
+    'tamanho_lote': 50000,
+    'coluna_estrato': 'score_final_ccs',
+    'largura_estrato': 10
+}
+
+# Gráficos de clusters: WebGL (Scattergl, trace único) a partir de webgl_a_partir_de
+# pontos e redução por densidade (grade n_bins x n_bins) acima de max_pontos
+VISUALIZACAO_CLUSTERS_CONFIG = {
+    'webgl_a_partir_de': 5000,
+    'max_pontos': 20000,
+    'n_bins': 100
+}
+
 ML_ALGORITHMS = {
     'kmeans': {
         'nome': 'K-Means',
@@ -151,6 +253,20 @@ ML_ALGORITHMS = {
     }
 }
 
+# =============================================================================
+# CONFIGURAÇÕES DE SIMILARIDADE CADASTRAL
+# =============================================================================
+
+# Índice MinHash + LSH sobre razão social, nome fantasia e endereço.
+# Com 16 bandas de 4 linhas, pares com Jaccard >= ~0.5 viram candidatos.
+SIMILARIDADE_CONFIG = {
+    'n_permutacoes': 64,
+    'n_bandas': 16,
+    'tamanho_ngram': 3,
+    'similaridade_minima': 0.6,
+    'limite_resultados': 20
+}
+
 # =============================================================================
 # CONFIGURAÇÕES DE VISUALIZAÇÃO
 # =============================================================================
@@ -196,6 +312,33 @@ PLOTLY_LAYOUT = {
     'margin': {'l': 50, 'r': 50, 't': 80, 'b': 50}
 }
 
+# Gráficos de distribuição agregados no servidor (histograma, boxplot, KDE)
+DISTRIBUICOES_CONFIG = {
+    'max_outliers': 500,
+    'pontos_kde': 200,
+    'max_entradas_cache': 256
+}
+
+# Insights de todos os grupos (regras vetorizadas), em cache por versão dos dados
+INSIGHTS_CONFIG = {
+    'max_entradas_cache': 8
+}
+
+# Estatísticas por grupo: centróides por grupo do sketch de quantis (modo em lotes)
+ESTATISTICAS_CONFIG = {
+    'compressao_sketch': 200
+}
+
+# Gráficos de rede: limites de nós/arestas (excedente agregado) e layout
+REDE_CONFIG = {
+    'max_nos': 500,
+    'max_arestas': 3000,
+    'max_rotulos': 60,
+    'iteracoes': 50,
+    'webgl_a_partir_de': 1000,
+    'max_layouts_cache': 64
+}
+
 # =============================================================================
 # TIPOS DE INDÍCIOS FISCAIS
 # =============================================================================
@@ -226,10 +369,83 @@ PDF_CONFIG = {
     'table_font_size': 8
 }
 
+# Excel em modo write-only (streaming): linhas convertidas em lotes, largura das
+# colunas estimada por amostra; abas acima do limite do Excel são divididas
 EXCEL_CONFIG = {
     'engine': 'openpyxl',
     'freeze_panes': (1, 0),
-    'column_width': 15
+    'column_width': 15,
+    'linhas_por_lote': 20000,
+    'amostra_largura': 10000,
+    'largura_maxima': 50,
+    'max_linhas_aba': 1048575
+}
+
+# Extração de tabelas grandes: cursor do Impala em lotes direto para arquivo
+# comprimido em disco (memória constante); arquivos expiram após max_idade.
+# O st.download_button guarda o arquivo inteiro na memória do servidor durante
+# a sessão, então só arquivos até max_bytes_download são oferecidos no navegador
+EXTRACAO_CONFIG = {
+    'linhas_por_lote': 50000,
+    'compressao_csv': 'gzip',
+    'compressao_parquet': 'snappy',
+    'max_idade': 86400,  # 24 horas
+    'max_bytes_download': 200 * 1024 ** 2  # 200 MiB
+}
+
+# Arquivos de download (Excel/CSV/PDF) gerados sob demanda e guardados em disco
+# pelo hash dos dados; os mais antigos saem por idade e por tamanho total
+ARTEFATOS_CONFIG = {
+    'bytes_limite': 512 * 1024 ** 2,  # 512 MiB
+    'max_idade': 86400  # 24 horas
+}
+
+# Fila de relatórios em segundo plano (dossiês em PDF): workers por processo,
+# estado de cada tarefa persistido em disco
+FILA_RELATORIOS_CONFIG = {
+    'n_workers': 2,
+    'intervalo_atualizacao': 1.0,  # segundos entre atualizações do progresso
+    'max_idade_estado': 86400  # 24 horas
+}
+
+# Dossiês em lote: seções buscadas em blocos de grupos (WHERE num_grupo IN) e
+# PDFs renderizados em um pool de processos, reunidos em um zip com índice
+LOTE_DOSSIES_CONFIG = {
+    'grupos_por_consulta': 500,
+    'n_workers': max(1, os.cpu_count() or 1),
+    'max_grupos_interface': 1000
+}
+
+# =============================================================================
+# TEMPO DE INICIALIZAÇÃO
+# =============================================================================
+
+# Orçamento das importações feitas no topo do app.py, pagas por todo worker do
+# Streamlit (python -m src.utils.tempo_importacao); scikit-learn, SciPy,
+# ReportLab e openpyxl só podem ser carregados pelas páginas que os usam
+TEMPO_IMPORTACAO_CONFIG = {
+    'orcamento_ms': 2000,
+    'modulos_sob_demanda': ['sklearn', 'scipy', 'reportlab', 'openpyxl', 'src.ml'],
+    'tolerancia_regressao': 0.25,  # aumento aceito frente ao relatório base
+    'repeticoes': 3
+}
+
+# =============================================================================
+# SERVIÇO DE DADOS COMPARTILHADO
+# =============================================================================
+
+# Publicações do serviço de dados (python -m src.data.servico_dados): as
+# TABELAS_PRINCIPAIS em arquivos Arrow IPC abertos com memory-map por todos os
+# workers. /dev/shm mantém os arquivos em memória; em disco, o cache de páginas
+# do sistema operacional também é compartilhado
+SERVICO_DADOS_CONFIG = {
+    'diretorio': os.environ.get(
+        'GEI_SERVICO_DADOS_DIR',
+        '/dev/shm/gei_dados' if os.path.isdir('/dev/shm') else os.path.join(DIRETORIO_CACHE, 'servico_dados')
+    ),
+    'intervalo_atualizacao': CACHE_TTL_DADOS_PRINCIPAIS,
+    'idade_maxima': 2 * CACHE_TTL_DADOS_PRINCIPAIS,  # publicação mais antiga volta a ler do banco
+    'n_versoes': 2
 }
 
 # =============================================================================
@@ -261,20 +477,84 @@ def get_credentials() -> Dict[str, str]:
         st.error("Configure as credenciais no arquivo .streamlit/secrets.toml")
         st.stop()
 
-def classificar_risco(score: float) -> Dict[str, Any]:
-    """Classifica o nível de risco baseado no score"""
-    for nivel, config in NIVEIS_RISCO.items():
-        if config['min'] <= score <= config['max']:
-            return {
-                'nivel': nivel,
-                'cor': config['cor'],
-                'valor_num': config['valor_num']
-            }
-    return {
-        'nivel': 'INDETERMINADO',
-        'cor': '#999999',
-        'valor_num': -1
-    }
+def obter_diretorio_cache(subdiretorio: str) -> str:
+    """Retorna (e cria, se necessário) um subdiretório do cache local"""
+    caminho = os.path.join(DIRETORIO_CACHE, subdiretorio)
+    os.makedirs(caminho, exist_ok=True)
+    return caminho
+
+def limites_risco(perfil: str = 'percentual') -> Dict[str, float]:
+    """Limite inferior de cada nível do perfil ({nível: min})"""
+    return {nivel: config['min'] for nivel, config in PERFIS_RISCO[perfil].items()}
+
+@lru_cache(maxsize=None)
+def _tabela_risco(perfil: str) -> Tuple[List[float], float, List[Dict[str, Any]]]:
+    """
+    Limites, máximo e classificações de um perfil (montados uma vez por perfil)
+
+    Returns:
+        Tupla (limites crescentes, maior 'max', classificações); a posição 0
+        das classificações é INDETERMINADO e as demais seguem os limites
+    """
+    niveis = sorted(PERFIS_RISCO[perfil].items(), key=lambda item: item[1]['min'])
+    limites = [float(config['min']) for _, config in niveis]
+    maximo = max(config['max'] for _, config in niveis)
+    classificacoes = [dict(NIVEL_INDETERMINADO)] + [
+        {'nivel': nivel, 'cor': config['cor'], 'valor_num': config['valor_num']}
+        for nivel, config in niveis
+    ]
+    return limites, maximo, classificacoes
+
+def classificar_risco_serie(scores, perfil: str = 'percentual') -> pd.DataFrame:
+    """
+    Classifica uma coluna inteira de scores em uma única passada (np.digitize)
+
+    Cada nível vale de seu 'min' até o 'min' do nível seguinte; scores abaixo
+    do menor 'min', acima do maior 'max' ou ausentes ficam INDETERMINADO.
+
+    Args:
+        scores: Série/array de scores
+        perfil: Nome do perfil em PERFIS_RISCO
+
+    Returns:
+        DataFrame (mesmo índice da série) com 'nivel' (categórico ordenado por
+        gravidade), 'cor' e 'valor_num'
+    """
+    limites, maximo, classificacoes = _tabela_risco(perfil)
+
+    indice = scores.index if isinstance(scores, pd.Series) else None
+    valores = pd.to_numeric(pd.Series(np.asarray(scores).ravel()), errors='coerce').to_numpy(dtype=float)
+
+    # Posição 0 = INDETERMINADO; 1..n = níveis em ordem crescente de gravidade
+    codigos = np.digitize(valores, limites)
+    codigos[~(valores <= maximo)] = 0
+
+    nomes = [c['nivel'] for c in classificacoes]
+    cores = np.array([c['cor'] for c in classificacoes], dtype=object)
+    valores_num = np.array([c['valor_num'] for c in classificacoes])
+
+    return pd.DataFrame({
+        'nivel': pd.Categorical.from_codes(codigos, categories=nomes, ordered=True),
+        'cor': cores[codigos],
+        'valor_num': valores_num[codigos]
+    }, index=indice)
+
+def classificar_risco(score: float, perfil: str = 'percentual') -> Dict[str, Any]:
+    """
+    Classifica o nível de risco de um único score
+
+    Mesmas regras de classificar_risco_serie, sem montar uma série: usado nos
+    caminhos que classificam linha a linha.
+    """
+    try:
+        valor = float(score)
+    except (TypeError, ValueError):
+        valor = float('nan')
+
+    limites, maximo, classificacoes = _tabela_risco(perfil)
+    # bisect_right equivale a np.digitize; NaN falha em valor <= maximo
+    codigo = bisect.bisect_right(limites, valor) if valor <= maximo else 0
+    return dict(classificacoes[codigo])
 
 def formatar_moeda(valor: float) -> str:
     """Formata valor como moeda brasileira"""
@@ -296,6 +576,117 @@ def formatar_percentual(valor: float, casas_decimais: int = 2) -> str:
         return "0,00%"
     return f"{valor:.{casas_decimais}f}%".replace('.', ',')
 
-# Importações necessárias
-import pandas as pd
-import numpy as np
+# =============================================================================
+# FORMATAÇÃO DE COLUNAS INTEIRAS (VETORIZADA)
+# =============================================================================
+
+def formatar_serie_numerica(
+    valores,
+    casas_decimais: int = 2,
+    separador_milhar: str = '.',
+    separador_decimal: str = ',',
+    prefixo: str = '',
+    sufixo: str = ''
+) -> np.ndarray:
+    """
+    Formata uma coluna inteira de números como texto, sem laço por valor
+
+    Os caracteres são escritos com aritmética inteira em uma matriz de bytes
+    (uma linha por valor, já alinhada à esquerda) e convertidos de uma vez.
+
+    Args:
+        valores: Série/array numérico (NaN é tratado como 0)
+        casas_decimais: Casas decimais (arredondamento)
+        separador_milhar: Separador de milhares ('' para nenhum)
+        separador_decimal: Separador decimal
+        prefixo: Texto antes do número (ex.: 'R$ ')
+        sufixo: Texto depois do número (ex.: '%')
+
+    Returns:
+        Array de strings
+    """
+    numeros = pd.to_numeric(pd.Series(np.asarray(valores).ravel()), errors='coerce').fillna(0).to_numpy(dtype=float)
+    n = len(numeros)
+    if n == 0:
+        return np.array([], dtype=str)
+
+    # Meio para cima, como o format do Python; valores a um erro de ponto
+    # flutuante de um empate (p.ex. 0.005, 0.125) são arredondados pelo próprio
+    # format, que decide pelo valor binário exato
+    escalado = np.abs(numeros) * 10 ** casas_decimais
+    unidades = np.floor(escalado + 0.5).astype(np.int64)
+    empate = np.abs(escalado - np.floor(escalado) - 0.5) < 1e-6
+    if empate.any():
+        unidades[empate] = [
+            int(f"{valor:.{casas_decimais}f}".replace('.', '')) for valor in np.abs(numeros[empate])
+        ]
+    inteiro = unidades // 10 ** casas_decimais
+    n_digitos = np.floor(np.log10(np.maximum(inteiro, 1))).astype(np.int64) + 1
+    negativo = np.signbit(numeros)
+
+    prefixo_b, sufixo_b = prefixo.encode(), sufixo.encode()
+    n_separadores = (n_digitos - 1) // 3 if separador_milhar else np.zeros(n, dtype=np.int64)
+    comprimento = (
+        len(prefixo_b) + negativo + n_digitos + n_separadores
+        + (casas_decimais + 1 if casas_decimais else 0) + len(sufixo_b)
+    )
+
+    linhas = np.arange(n)
+    matriz = np.zeros((n, int(comprimento.max())), dtype=np.uint8)
+
+    # Prefixo e sinal à esquerda, sufixo à direita
+    for i, byte in enumerate(prefixo_b):
+        matriz[:, i] = byte
+    matriz[linhas[negativo], len(prefixo_b)] = ord('-')
+    direita = comprimento - 1
+    for i, byte in enumerate(reversed(sufixo_b)):
+        matriz[linhas, direita - i] = byte
+    direita = direita - len(sufixo_b)
+
+    # Casas decimais e separador decimal
+    resto = unidades.copy()
+    for _ in range(casas_decimais):
+        matriz[linhas, direita] = resto % 10 + 48
+        resto //= 10
+        direita = direita - 1
+    if casas_decimais:
+        matriz[linhas, direita] = ord(separador_decimal)
+        direita = direita - 1
+
+    # Dígitos inteiros, com separador a cada 3
+    for j in range(int(n_digitos.max())):
+        ativos = n_digitos > j
+        if j and j % 3 == 0 and separador_milhar:
+            matriz[linhas[ativos], direita[ativos]] = ord(separador_milhar)
+            direita = direita - ativos
+        matriz[linhas[ativos], direita[ativos]] = (resto[ativos] % 10 + 48)
+        resto //= 10
+        direita = direita - ativos
+
+    return matriz.view(f'S{matriz.shape[1]}').ravel().astype(str)
+
+def _como_serie(texto: np.ndarray, serie) -> pd.Series:
+    """Mantém o índice (e o nome) da série original"""
+    return pd.Series(texto, index=getattr(serie, 'index', None), name=getattr(serie, 'name', None), dtype=object)
+
+def formatar_moeda_serie(serie: pd.Series) -> pd.Series:
+    """Versão vetorizada de formatar_moeda para uma coluna inteira"""
+    return _como_serie(formatar_serie_numerica(serie, 2, prefixo='R$ '), serie)
+
+def formatar_numero_serie(serie: pd.Series, casas_decimais: int = 0) -> pd.Series:
+    """Versão vetorizada de formatar_numero para uma coluna inteira"""
+    valores = pd.to_numeric(serie, errors='coerce')
+    if casas_decimais == 0:
+        # Mesmo comportamento de int(valor): trunca a parte fracionária (sem -0)
+        valores = np.trunc(valores) + 0.0
+    texto = formatar_serie_numerica(valores.fillna(0), casas_decimais)
+    # Nulos viram "0", sem casas decimais, como em formatar_numero
+    texto[valores.isna().to_numpy()] = '0'
+    return _como_serie(texto, serie)
+
+def formatar_percentual_serie(serie: pd.Series, casas_decimais: int = 2) -> pd.Series:
+    """Versão vetorizada de formatar_percentual para uma coluna inteira"""
+    return _como_serie(
+        formatar_serie_numerica(serie, casas_decimais, separador_milhar='', sufixo='%'),
+        serie
+    )
@@ -6,6 +6,7 @@ from .loader import (
     carregar_todos_os_dados,
     carregar_tabela,
     carregar_dossie_completo,
+    carregar_dossies_em_lote,
     carregar_ranking_geral,
     carregar_estatisticas_gerais,
     carregar_distribuicao_cnae,
@@ -17,11 +18,29 @@ from .loader import (
     agregar_por_coluna,
     calcular_estatisticas
 )
+from .similaridade import (
+    IndiceSimilaridade,
+    normalizar_texto,
+    normalizar_grupo,
+    carregar_indice_similaridade,
+    buscar_cnpjs_semelhantes
+)
+from .armazem_features import (
+    ArmazemFeatures,
+    carregar_armazem_features
+)
+from .servico_dados import (
+    publicar_tabelas,
+    abrir_versao,
+    carregar_do_servico_dados,
+    estado_servico_dados
+)
 
 __all__ = [
     'carregar_todos_os_dados',
     'carregar_tabela',
     'carregar_dossie_completo',
+    'carregar_dossies_em_lote',
     'carregar_ranking_geral',
     'carregar_estatisticas_gerais',
     'carregar_distribuicao_cnae',
@@ -31,5 +50,16 @@ __all__ = [
     'filtrar_por_score',
     'filtrar_por_nivel_risco',
     'agregar_por_coluna',
-    'calcular_estatisticas'
+    'calcular_estatisticas',
+    'IndiceSimilaridade',
+    'normalizar_texto',
+    'normalizar_grupo',
+    'carregar_indice_similaridade',
+    'buscar_cnpjs_semelhantes',
+    'ArmazemFeatures',
+    'carregar_armazem_features',
+    'publicar_tabelas',
+    'abrir_versao',
+    'carregar_do_servico_dados',
+    'estado_servico_dados'
 ]
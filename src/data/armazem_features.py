@@ -0,0 +1,269 @@
+"""
+Módulo de Armazém de Features
+Materializa a matriz de features de ML (float32) em disco, versionada e indexada
+por num_grupo, e a abre com memory-map somente leitura, compartilhada entre
+sessões e processos
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+import streamlit as st
+from typing import Iterable, Iterator, List, Optional
+
+from ..config.settings import (
+    CACHE_TTL_ARMAZEM_FEATURES, ESCALA_ML_CONFIG, obter_diretorio_cache
+)
+from ..config.database import Queries
+
+COLUNA_INDICE = 'num_grupo'
+
+# =============================================================================
+# ARMAZÉM DE FEATURES
+# =============================================================================
+
+class ArmazemFeatures:
+    """
+    Matriz de features float32 (linhas = grupos) com índice num_grupo
+
+    A matriz é aberta com mmap_mode='r': trocar de algoritmo ou de
+    hiperparâmetros não faz I/O no banco, e as páginas do arquivo são
+    compartilhadas pelo sistema operacional entre todos os processos.
+    """
+
+    def __init__(self, matriz: np.ndarray, num_grupo: np.ndarray, colunas: List[str], versao: str, caminho: str = ''):
+        self.matriz = matriz
+        self.num_grupo = num_grupo
+        self.colunas = list(colunas)
+        self.versao = versao
+        self.caminho = caminho
+        self._posicao_coluna = {coluna: i for i, coluna in enumerate(self.colunas)}
+        self._indice = pd.Index(num_grupo)
+
+    def __len__(self) -> int:
+        return len(self.num_grupo)
+
+    @property
+    def nbytes(self) -> int:
+        """Tamanho da matriz em bytes"""
+        return self.matriz.nbytes
+
+    # -------------------------------------------------------------------------
+    # Materialização e carga
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def materializar(cls, lotes: Iterable[pd.DataFrame], diretorio: str) -> 'ArmazemFeatures':
+        """
+        Converte lotes da query de features em matriz float32 versionada
+
+        A versão é o hash do conteúdo; se já existir, a versão em disco é reutilizada.
+
+        Args:
+            lotes: Iterador de DataFrames com num_grupo e colunas numéricas
+            diretorio: Diretório raiz do armazém
+
+        Returns:
+            ArmazemFeatures aberto com memory-map
+        """
+        blocos, indices, colunas = [], [], None
+
+        for lote in lotes:
+            if colunas is None:
+                colunas = [c for c in lote.columns if c != COLUNA_INDICE]
+            indices.append(lote[COLUNA_INDICE].to_numpy())
+            blocos.append(lote[colunas].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float32))
+
+        if colunas is None:
+            raise ValueError("Nenhum dado para materializar")
+
+        matriz = np.ascontiguousarray(np.concatenate(blocos))
+        num_grupo = np.concatenate(indices)
+        num_grupo = num_grupo if np.issubdtype(num_grupo.dtype, np.number) else num_grupo.astype(str)
+
+        hash_conteudo = hashlib.sha256()
+        hash_conteudo.update(json.dumps(colunas).encode())
+        hash_conteudo.update(num_grupo.tobytes())
+        hash_conteudo.update(matriz.tobytes())
+        versao = hash_conteudo.hexdigest()[:16]
+
+        caminho = os.path.join(diretorio, versao)
+        if not os.path.exists(caminho):
+            # Grava em diretório temporário e renomeia para não expor versão incompleta
+            caminho_tmp = f"{caminho}.tmp{os.getpid()}"
+            os.makedirs(caminho_tmp, exist_ok=True)
+            np.save(os.path.join(caminho_tmp, 'matriz.npy'), matriz)
+            np.save(os.path.join(caminho_tmp, 'num_grupo.npy'), num_grupo)
+            with open(os.path.join(caminho_tmp, 'metadados.json'), 'w', encoding='utf-8') as f:
+                json.dump({'versao': versao, 'colunas': colunas, 'n_linhas': len(matriz)}, f)
+
+            try:
+                os.rename(caminho_tmp, caminho)
+            except OSError:
+                # Outro processo materializou a mesma versão ao mesmo tempo
+                shutil.rmtree(caminho_tmp, ignore_errors=True)
+
+        _gravar_versao_atual(diretorio, versao)
+        _limpar_versoes_antigas(diretorio, manter=versao)
+
+        return cls.carregar(caminho)
+
+    @classmethod
+    def carregar(cls, caminho: str) -> 'ArmazemFeatures':
+        """Abre uma versão materializada (matriz com memory-map somente leitura)"""
+        with open(os.path.join(caminho, 'metadados.json'), encoding='utf-8') as f:
+            metadados = json.load(f)
+
+        return cls(
+            matriz=np.load(os.path.join(caminho, 'matriz.npy'), mmap_mode='r'),
+            num_grupo=np.load(os.path.join(caminho, 'num_grupo.npy')),
+            colunas=metadados['colunas'],
+            versao=metadados['versao'],
+            caminho=caminho
+        )
+
+    # -------------------------------------------------------------------------
+    # Consulta
+    # -------------------------------------------------------------------------
+
+    def posicoes(self, num_grupos) -> np.ndarray:
+        """Linhas dos grupos informados (grupos ausentes são ignorados)"""
+        valores = np.asarray(num_grupos)
+        if np.issubdtype(self.num_grupo.dtype, np.number):
+            valores = pd.to_numeric(pd.Series(valores), errors='coerce').to_numpy()
+        else:
+            valores = valores.astype(str)
+
+        posicoes = self._indice.get_indexer(valores)
+        return posicoes[posicoes >= 0]
+
+    def selecionar(self, features: Optional[List[str]] = None, num_grupos=None) -> np.ndarray:
+        """
+        Submatriz float32 de features e grupos
+
+        Args:
+            features: Colunas (None = todas)
+            num_grupos: Grupos (None = todos)
+
+        Returns:
+            Matriz float32 (visão do memory-map, sem cópia, quando nada é filtrado)
+        """
+        matriz = self.matriz
+        if num_grupos is not None:
+            matriz = matriz[self.posicoes(num_grupos)]
+        if features is not None:
+            matriz = matriz[:, [self._posicao_coluna[f] for f in features]]
+        return matriz
+
+    def como_dataframe(self, features: Optional[List[str]] = None, num_grupos=None) -> pd.DataFrame:
+        """
+        DataFrame float32 com num_grupo e as features pedidas
+
+        Args:
+            features: Colunas (None = todas)
+            num_grupos: Grupos (None = todos)
+
+        Returns:
+            DataFrame com uma linha por grupo
+        """
+        features = [f for f in (features or self.colunas) if f in self._posicao_coluna]
+        linhas = slice(None) if num_grupos is None else self.posicoes(num_grupos)
+
+        df = pd.DataFrame(self.matriz[linhas][:, [self._posicao_coluna[f] for f in features]], columns=features)
+        df.insert(0, COLUNA_INDICE, self.num_grupo[linhas])
+        return df
+
+    def lotes(self, tamanho: int = ESCALA_ML_CONFIG['tamanho_lote']) -> Iterator[pd.DataFrame]:
+        """Percorre todos os grupos em DataFrames de até `tamanho` linhas"""
+        for inicio in range(0, len(self), tamanho):
+            fim = min(inicio + tamanho, len(self))
+            df = pd.DataFrame(self.matriz[inicio:fim], columns=self.colunas)
+            df.insert(0, COLUNA_INDICE, self.num_grupo[inicio:fim])
+            yield df
+
+# =============================================================================
+# CONTROLE DE VERSÕES
+# =============================================================================
+
+def _caminho_versao_atual(diretorio: str) -> str:
+    return os.path.join(diretorio, 'atual.json')
+
+def _gravar_versao_atual(diretorio: str, versao: str) -> None:
+    """Aponta a versão atual (gravação atômica)"""
+    caminho = _caminho_versao_atual(diretorio)
+    caminho_tmp = f"{caminho}.tmp{os.getpid()}"
+    with open(caminho_tmp, 'w', encoding='utf-8') as f:
+        json.dump({'versao': versao, 'atualizado_em': time.time()}, f)
+    os.replace(caminho_tmp, caminho)
+
+def _ler_versao_atual(diretorio: str) -> Optional[dict]:
+    try:
+        with open(_caminho_versao_atual(diretorio), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _limpar_versoes_antigas(diretorio: str, manter: str, n_versoes: int = 2) -> None:
+    """
+    Remove versões antigas, mantendo as n_versoes mais recentes
+
+    Em Linux, processos que já abriram uma versão removida continuam lendo
+    o mapeamento até fechá-lo.
+    """
+    versoes = [
+        os.path.join(diretorio, nome) for nome in os.listdir(diretorio)
+        if os.path.isdir(os.path.join(diretorio, nome)) and '.tmp' not in nome and nome != manter
+    ]
+    versoes.sort(key=os.path.getmtime, reverse=True)
+
+    for caminho in versoes[n_versoes - 1:]:
+        shutil.rmtree(caminho, ignore_errors=True)
+
+# =============================================================================
+# CARGA COM CACHE
+# =============================================================================
+
+@st.cache_resource(ttl=CACHE_TTL_ARMAZEM_FEATURES, show_spinner="📦 Abrindo armazém de features...")
+def carregar_armazem_features(_engine, forcar_reconstrucao: bool = False) -> Optional[ArmazemFeatures]:
+    """
+    Abre o armazém de features do disco ou o materializa a partir do banco
+
+    A matriz é rematerializada quando não existe, quando a versão atual é mais
+    antiga que CACHE_TTL_ARMAZEM_FEATURES ou quando forcar_reconstrucao=True.
+
+    Args:
+        _engine: Engine SQLAlchemy
+        forcar_reconstrucao: Ignora a versão persistida
+
+    Returns:
+        ArmazemFeatures ou None se a base não puder ser carregada
+    """
+    diretorio = obter_diretorio_cache('features')
+    atual = _ler_versao_atual(diretorio)
+    caminho_atual = os.path.join(diretorio, atual['versao']) if atual else None
+
+    if (
+        not forcar_reconstrucao
+        and caminho_atual
+        and os.path.exists(caminho_atual)
+        and time.time() - atual['atualizado_em'] < CACHE_TTL_ARMAZEM_FEATURES
+    ):
+        return ArmazemFeatures.carregar(caminho_atual)
+
+    if _engine is None:
+        return ArmazemFeatures.carregar(caminho_atual) if caminho_atual and os.path.exists(caminho_atual) else None
+
+    try:
+        lotes = pd.read_sql(Queries.get_features_ml(), _engine, chunksize=ESCALA_ML_CONFIG['tamanho_lote'])
+        return ArmazemFeatures.materializar(
+            (lote.rename(columns=str.lower) for lote in lotes),
+            diretorio
+        )
+    except Exception:
+        if caminho_atual and os.path.exists(caminho_atual):
+            return ArmazemFeatures.carregar(caminho_atual)
+        return None
@@ -5,22 +5,43 @@ Gerencia carregamento e cache de dados do sistema GEI
 
 import streamlit as st
 import pandas as pd
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional
 from ..config.settings import (
     TABELAS_PRINCIPAIS, CACHE_TTL_DADOS_PRINCIPAIS,
-    CACHE_TTL_DOSSIE, DATABASE, MENSAGENS
+    CACHE_TTL_DOSSIE, DATABASE, MENSAGENS, LOTE_DOSSIES_CONFIG
 )
 from ..config.database import executar_query, Queries
+from .servico_dados import carregar_do_servico_dados
 
 # =============================================================================
 # CARREGAMENTO DE DADOS PRINCIPAIS
 # =============================================================================
 
-@st.cache_data(ttl=CACHE_TTL_DADOS_PRINCIPAIS, show_spinner="⏳ Carregando dados principais...")
 def carregar_todos_os_dados(_engine) -> Dict[str, pd.DataFrame]:
     """
     Carrega todos os datasets principais do sistema GEI
 
+    Com o serviço de dados em execução (python -m src.data.servico_dados), as
+    tabelas vêm da publicação em memória compartilhada, sem cópia por worker;
+    caso contrário, são lidas do banco e guardadas no cache do processo.
+
+    Args:
+        _engine: Engine SQLAlchemy (com _ para não fazer hash no cache)
+
+    Returns:
+        Dicionário com DataFrames de todas as tabelas principais
+    """
+    dados = carregar_do_servico_dados()
+    if dados is not None:
+        return dados
+
+    return carregar_todos_os_dados_banco(_engine)
+
+@st.cache_data(ttl=CACHE_TTL_DADOS_PRINCIPAIS, show_spinner="⏳ Carregando dados principais...")
+def carregar_todos_os_dados_banco(_engine) -> Dict[str, pd.DataFrame]:
+    """
+    Carrega todos os datasets principais diretamente do banco
+
     Args:
         _engine: Engine SQLAlchemy (com _ para não fazer hash no cache)
 
@@ -203,6 +224,44 @@ def carregar_dossie_completo(_engine, num_grupo: str) -> Dict[str, pd.DataFrame]
 
     return dossie
 
+def carregar_dossies_em_lote(
+    _engine,
+    num_grupos: List[str],
+    grupos_por_consulta: int = LOTE_DOSSIES_CONFIG['grupos_por_consulta']
+) -> Iterator[Dict[str, Dict[str, pd.DataFrame]]]:
+    """
+    Carrega as seções do dossiê em PDF de vários grupos com poucas queries
+
+    Em vez de 4 queries por grupo, faz 4 queries por bloco de grupos
+    (WHERE num_grupo IN ...) e separa o resultado com groupby. Os blocos são
+    entregues à medida que chegam, para o processamento começar antes do fim.
+
+    Args:
+        _engine: Engine SQLAlchemy
+        num_grupos: Números dos grupos
+        grupos_por_consulta: Grupos por bloco (tamanho da lista IN)
+
+    Returns:
+        Iterador de dicionários {num_grupo: {seção: DataFrame}}
+    """
+    num_grupos = [str(g) for g in num_grupos]
+
+    for inicio in range(0, len(num_grupos), grupos_por_consulta):
+        bloco = num_grupos[inicio:inicio + grupos_por_consulta]
+        dossies = {g: {} for g in bloco}
+
+        for secao, query in Queries.get_dossie_lote(bloco).items():
+            df = executar_query(_engine, query, show_error=False)
+            vazio = df.iloc[0:0].drop(columns='num_grupo', errors='ignore')
+            partes = (
+                {str(g): parte.drop(columns='num_grupo') for g, parte in df.groupby('num_grupo', sort=False)}
+                if 'num_grupo' in df.columns else {}
+            )
+            for g in bloco:
+                dossies[g][secao] = partes.get(g, vazio).reset_index(drop=True)
+
+        yield dossies
+
 # =============================================================================
 # CARREGAMENTO DE ANÁLISES ESPECÍFICAS
 # =============================================================================
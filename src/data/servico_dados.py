@@ -0,0 +1,287 @@
+"""
+Módulo de Serviço de Dados Compartilhado
+Um único processo (python -m src.data.servico_dados) carrega as tabelas
+principais do banco e as publica, versionadas, como arquivos Arrow IPC sem
+compressão em memória compartilhada (/dev/shm). Os workers do Streamlit abrem
+a versão atual com memory-map: as colunas apontam para as mesmas páginas em
+todos os processos, então a memória não cresce com o número de workers.
+Sem o serviço em execução (ou sem pyarrow), os dados são lidos do banco.
+
+Uso:
+    python -m src.data.servico_dados              # publica e atualiza a cada intervalo
+    python -m src.data.servico_dados --uma-vez    # publica uma vez e sai
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import importlib.util
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from ..config.settings import TABELAS_PRINCIPAIS, DATABASE, SERVICO_DADOS_CONFIG
+from ..config.database import get_impala_engine
+from .armazem_features import _gravar_versao_atual, _ler_versao_atual, _limpar_versoes_antigas
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+EXTENSAO = '.arrow'
+
+def _ativar_copy_on_write() -> None:
+    """
+    Liga o copy-on-write do pandas (padrão, e sempre ativo, a partir do pandas 3)
+
+    Sem ele, cópias rasas das tabelas mapeadas em memória apontam para buffers
+    somente leitura e qualquer escrita in-place (ex.: .loc[...] =) falha.
+    """
+    if int(pd.__version__.split('.')[0]) < 3:
+        pd.options.mode.copy_on_write = True
+
+def servico_disponivel() -> bool:
+    """Indica se o pyarrow (necessário para o serviço de dados) está instalado"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+# =============================================================================
+# PUBLICAÇÃO (processo do serviço)
+# =============================================================================
+
+def _tabela_arrow(df: pd.DataFrame) -> 'pa.Table':
+    """
+    Converte o DataFrame em tabela Arrow pronta para leitura sem cópia
+
+    NaN de colunas float é gravado como valor, e não como nulo: assim o
+    to_pandas dos workers usa o buffer do arquivo diretamente. Colunas object
+    com tipos mistos (p.ex. texto e número) são gravadas como texto.
+    """
+    import pyarrow as pa
+
+    try:
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        mistas = [c for c in df.columns if df[c].dtype == object and df[c].dropna().map(type).nunique() > 1]
+        df = df.assign(**{c: df[c].astype(str).where(df[c].notna(), None) for c in mistas})
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+
+    for i, campo in enumerate(tabela.schema):
+        serie = df[campo.name]
+        if isinstance(serie.dtype, np.dtype) and serie.dtype.kind == 'f' and tabela.column(i).null_count:
+            tabela = tabela.set_column(i, campo, pa.array(serie.to_numpy(), from_pandas=False))
+
+    return tabela
+
+def publicar_tabelas(
+    tabelas: Iterable[Tuple[str, pd.DataFrame]],
+    diretorio: str = SERVICO_DADOS_CONFIG['diretorio'],
+    n_versoes: int = SERVICO_DADOS_CONFIG['n_versoes']
+) -> str:
+    """
+    Grava as tabelas como uma nova versão e a torna a versão atual
+
+    As tabelas são convertidas e gravadas uma a uma (dados.items() serve), de
+    modo que o serviço não precisa manter todas em memória ao mesmo tempo.
+
+    Args:
+        tabelas: Pares (chave, DataFrame)
+        diretorio: Diretório raiz das publicações
+        n_versoes: Versões mantidas (as anteriores ainda abertas por workers continuam legíveis)
+
+    Returns:
+        Identificador da versão publicada
+    """
+    import pyarrow as pa
+
+    os.makedirs(diretorio, exist_ok=True)
+    versao = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    caminho = os.path.join(diretorio, versao)
+
+    # Grava em diretório temporário e renomeia para não expor versão incompleta
+    caminho_tmp = f"{caminho}.tmp{os.getpid()}"
+    os.makedirs(caminho_tmp)
+    try:
+        metadados = {}
+        for chave, df in tabelas:
+            tabela = _tabela_arrow(df)
+            with pa.OSFile(os.path.join(caminho_tmp, chave + EXTENSAO), 'wb') as arquivo:
+                with pa.ipc.new_file(arquivo, tabela.schema) as escritor:
+                    escritor.write_table(tabela)
+            metadados[chave] = {'linhas': tabela.num_rows, 'bytes': tabela.nbytes}
+
+        if not any(info['linhas'] for info in metadados.values()):
+            raise ValueError("Nenhuma tabela com dados para publicar")
+
+        with open(os.path.join(caminho_tmp, 'metadados.json'), 'w', encoding='utf-8') as f:
+            json.dump({'versao': versao, 'tabelas': metadados}, f)
+
+        os.rename(caminho_tmp, caminho)
+    finally:
+        shutil.rmtree(caminho_tmp, ignore_errors=True)
+
+    _gravar_versao_atual(diretorio, versao)
+    _limpar_versoes_antigas(diretorio, manter=versao, n_versoes=n_versoes)
+
+    return versao
+
+def ler_tabelas_principais(engine) -> Iterable[Tuple[str, pd.DataFrame]]:
+    """
+    Lê as TABELAS_PRINCIPAIS do banco, uma por vez, como pares (chave, DataFrame)
+
+    Diferente de executar_query, erros de consulta não viram DataFrame vazio:
+    a exceção interrompe publicar_tabelas e a versão anterior continua valendo.
+    """
+    for chave, (tablename, limit) in TABELAS_PRINCIPAIS.items():
+        if limit:
+            query = f"SELECT * FROM {DATABASE}.{tablename} LIMIT {limit}"
+        else:
+            query = f"SELECT * FROM {DATABASE}.{tablename}"
+
+        inicio = time.time()
+        df = pd.read_sql(query, engine)
+        df.columns = [col.lower() for col in df.columns]
+        print(f"  {tablename}: {len(df):,} registros ({time.time() - inicio:.1f}s)", flush=True)
+        yield chave, df
+
+# =============================================================================
+# LEITURA (workers do Streamlit)
+# =============================================================================
+
+def abrir_versao(caminho: str) -> Dict[str, pd.DataFrame]:
+    """
+    Abre uma versão publicada com memory-map
+
+    Colunas numéricas, de datas e de texto sem nulos a preencher apontam para as
+    páginas do arquivo (somente leitura), compartilhadas entre os processos.
+
+    Args:
+        caminho: Diretório da versão
+
+    Returns:
+        Dicionário {chave: DataFrame}
+    """
+    import pyarrow as pa
+
+    with open(os.path.join(caminho, 'metadados.json'), encoding='utf-8') as f:
+        metadados = json.load(f)
+
+    dados = {}
+    for chave in metadados['tabelas']:
+        with pa.memory_map(os.path.join(caminho, chave + EXTENSAO)) as origem:
+            tabela = pa.ipc.open_file(origem).read_all()
+        dados[chave] = tabela.to_pandas(split_blocks=True)
+
+    return dados
+
+@st.cache_resource(max_entries=SERVICO_DADOS_CONFIG['n_versoes'], show_spinner=False)
+def _abrir_versao_em_cache(caminho: str) -> Dict[str, pd.DataFrame]:
+    # Os DataFrames em cache mantêm as referências que fazem o copy-on-write
+    # copiar a coluna (somente leitura) antes de uma alteração pelas sessões
+    return abrir_versao(caminho)
+
+def carregar_do_servico_dados(
+    diretorio: str = SERVICO_DADOS_CONFIG['diretorio'],
+    idade_maxima: float = SERVICO_DADOS_CONFIG['idade_maxima']
+) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    Tabelas principais publicadas pelo serviço de dados
+
+    Args:
+        diretorio: Diretório raiz das publicações
+        idade_maxima: Idade máxima (s) da publicação atual
+
+    Returns:
+        Dicionário {chave: DataFrame} ou None se não houver publicação recente
+        (o chamador deve ler do banco)
+    """
+    atual = _ler_versao_atual(diretorio)
+    if atual is None or time.time() - atual['atualizado_em'] > idade_maxima or not servico_disponivel():
+        return None
+
+    try:
+        compartilhados = _abrir_versao_em_cache(os.path.join(diretorio, atual['versao']))
+    except (OSError, ValueError):
+        # Versão removida entre a leitura de atual.json e a abertura
+        return None
+
+    # Cópias rasas: as colunas continuam nas páginas compartilhadas. O
+    # copy-on-write (ligado aqui no pandas 2) faz uma escrita copiar a coluna
+    # antes de alterá-la, então a sessão não altera as páginas somente leitura
+    # nem as tabelas das demais sessões
+    _ativar_copy_on_write()
+    return {chave: df.copy(deep=False) for chave, df in compartilhados.items()}
+
+def estado_servico_dados(diretorio: str = SERVICO_DADOS_CONFIG['diretorio']) -> Optional[Dict]:
+    """
+    Versão atual publicada: versao, atualizado_em, idade (s) e tabelas ({chave: linhas, bytes})
+
+    Returns:
+        Dicionário ou None se não houver publicação
+    """
+    atual = _ler_versao_atual(diretorio)
+    if atual is None:
+        return None
+
+    try:
+        with open(os.path.join(diretorio, atual['versao'], 'metadados.json'), encoding='utf-8') as f:
+            tabelas = json.load(f)['tabelas']
+    except (OSError, ValueError):
+        return None
+
+    return {**atual, 'idade': time.time() - atual['atualizado_em'], 'tabelas': tabelas}
+
+# =============================================================================
+# LINHA DE COMANDO
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Executa o serviço: publica as tabelas e as republica a cada intervalo
+
+    Returns:
+        0 ao encerrar normalmente, 1 em caso de erro
+    """
+    parser = argparse.ArgumentParser(description="Serviço de dados compartilhado entre os workers do Streamlit")
+    parser.add_argument('--diretorio', default=SERVICO_DADOS_CONFIG['diretorio'],
+                        help="Diretório das publicações (de preferência em /dev/shm)")
+    parser.add_argument('--intervalo', type=float, default=SERVICO_DADOS_CONFIG['intervalo_atualizacao'],
+                        help="Segundos entre as atualizações")
+    parser.add_argument('--uma-vez', action='store_true', help="Publica uma vez e encerra")
+    args = parser.parse_args(argv)
+
+    if not servico_disponivel():
+        print("pyarrow não está instalado; o serviço de dados não pode ser usado.", file=sys.stderr)
+        return 1
+
+    engine = get_impala_engine()
+    if engine is None:
+        print("Erro ao conectar ao banco de dados.", file=sys.stderr)
+        return 1
+
+    try:
+        while True:
+            inicio = time.time()
+            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Carregando tabelas principais...", flush=True)
+            try:
+                versao = publicar_tabelas(ler_tabelas_principais(engine), args.diretorio)
+                estado = estado_servico_dados(args.diretorio) or {'tabelas': {}}
+                tamanho = sum(info['bytes'] for info in estado['tabelas'].values())
+                print(f"Versão {versao} publicada em {args.diretorio} "
+                      f"({tamanho / 1024 ** 2:,.0f} MB, {time.time() - inicio:.1f}s)", flush=True)
+            except Exception as e:
+                print(f"Falha na publicação (a versão anterior continua valendo): {e}", file=sys.stderr, flush=True)
+                if args.uma_vez:
+                    return 1
+
+            if args.uma_vez:
+                return 0
+            time.sleep(max(0.0, args.intervalo - (time.time() - inicio)))
+    except KeyboardInterrupt:
+        return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
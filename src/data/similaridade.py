@@ -0,0 +1,472 @@
+"""
+Módulo de Similaridade Cadastral
+Índice aproximado (MinHash + LSH) para localizar CNPJs com razão social,
+nome fantasia ou endereço semelhantes sem comparar todos os pares
+"""
+
+import os
+import re
+import time
+import threading
+import unicodedata
+import joblib
+import numpy as np
+import pandas as pd
+import streamlit as st
+from typing import Dict, Iterable, List, Optional
+
+from ..config.settings import (
+    SIMILARIDADE_CONFIG, CACHE_TTL_INDICE_SIMILARIDADE, obter_diretorio_cache
+)
+from ..config.database import executar_query, Queries
+
+# =============================================================================
+# NORMALIZAÇÃO DE TEXTO
+# =============================================================================
+
+# Termos societários que não diferenciam empresas ("LTDA" vs "LTDA ME")
+SUFIXOS_SOCIETARIOS = {
+    'LTDA', 'ME', 'EPP', 'EIRELI', 'SA', 'S/A', 'MEI', 'SS', 'SLU',
+    'CIA', 'COMERCIO', 'COM', 'IND', 'INDUSTRIA', 'E', 'DE', 'DA', 'DO',
+    'DOS', 'DAS'
+}
+
+# Abreviações usuais de logradouro e títulos
+ABREVIACOES_ENDERECO = {
+    'R': 'RUA',
+    'AV': 'AVENIDA',
+    'AVD': 'AVENIDA',
+    'ROD': 'RODOVIA',
+    'TV': 'TRAVESSA',
+    'TRAV': 'TRAVESSA',
+    'AL': 'ALAMEDA',
+    'EST': 'ESTRADA',
+    'PC': 'PRACA',
+    'PCA': 'PRACA',
+    'SERV': 'SERVIDAO',
+    'LOT': 'LOTEAMENTO',
+    'CJ': 'CONJUNTO',
+    'STA': 'SANTA',
+    'STO': 'SANTO',
+    'DR': 'DOUTOR',
+    'PROF': 'PROFESSOR',
+    'CEL': 'CORONEL',
+    'GAL': 'GENERAL',
+    'GOV': 'GOVERNADOR',
+    'PRES': 'PRESIDENTE',
+    'VER': 'VEREADOR'
+}
+
+# Campos indexados: nome lógico -> colunas concatenadas
+CAMPOS_SIMILARIDADE = {
+    'razao_social': ['nm_razao_social'],
+    'fantasia': ['nm_fantasia'],
+    'endereco': ['nm_logradouro', 'nu_logradouro', 'nm_bairro', 'nm_municipio']
+}
+
+_RE_NAO_ALFANUMERICO = re.compile(r'[^A-Z0-9 ]+')
+_RE_ESPACOS = re.compile(r'\s+')
+
+def normalizar_texto(texto, tipo: str = 'nome') -> str:
+    """
+    Normaliza texto cadastral para comparação aproximada
+
+    Args:
+        texto: Texto original (razão social, fantasia ou endereço)
+        tipo: 'nome' remove sufixos societários, 'endereco' expande abreviações
+
+    Returns:
+        Texto em maiúsculas, sem acentos, pontuação ou termos irrelevantes
+    """
+    if texto is None or (isinstance(texto, float) and np.isnan(texto)):
+        return ''
+
+    texto = unicodedata.normalize('NFKD', str(texto).upper())
+    texto = texto.encode('ascii', 'ignore').decode('ascii')
+    texto = _RE_NAO_ALFANUMERICO.sub(' ', texto)
+
+    tokens = texto.split()
+    if tipo == 'endereco':
+        tokens = [ABREVIACOES_ENDERECO.get(t, t) for t in tokens]
+    else:
+        tokens = [t for t in tokens if t not in SUFIXOS_SOCIETARIOS]
+
+    return _RE_ESPACOS.sub(' ', ' '.join(tokens)).strip()
+
+def normalizar_grupo(valores) -> pd.Series:
+    """
+    Número do grupo como texto canônico para comparação
+
+    O LEFT JOIN da base cadastral torna num_grupo float quando há CNPJs sem
+    grupo: 10.0 e '10.0' viram '10', e nulos (NaN, None, 'nan') viram ''.
+
+    Args:
+        valores: Escalar, lista ou série de números de grupo
+
+    Returns:
+        Série de textos
+    """
+    serie = pd.Series(np.atleast_1d(np.asarray(valores, dtype=object)))
+    numeros = pd.to_numeric(serie, errors='coerce')
+    inteiros = (numeros.notna() & (numeros % 1 == 0)).to_numpy()
+
+    texto = serie.fillna('').astype(str).str.strip()
+    texto[texto.str.lower().isin(['nan', 'none', '<na>'])] = ''
+    texto[inteiros] = numeros[inteiros].astype('int64').astype(str)
+    return texto
+
+def _ngramas_vetorizados(textos: List[str], n: int):
+    """
+    Calcula hashes de n-gramas de caracteres para uma lista de textos
+
+    Os textos (ASCII) são concatenados em um único buffer e cada n-grama é
+    codificado de forma exata em um inteiro (n <= 4), sem loop por linha.
+
+    Returns:
+        Tupla (hashes, contagem_por_texto)
+    """
+    textos_pad = [f' {t} ' if t else '' for t in textos]
+    tamanhos = np.fromiter((len(t) for t in textos_pad), dtype=np.int64, count=len(textos_pad))
+    buffer = np.frombuffer(''.join(textos_pad).encode('ascii'), dtype=np.uint8).astype(np.uint64)
+
+    contagens = np.maximum(tamanhos - n + 1, 0)
+    if buffer.size < n or contagens.sum() == 0:
+        return np.empty(0, dtype=np.uint64), contagens
+
+    inicios = np.concatenate(([0], np.cumsum(tamanhos)[:-1]))
+
+    # Posições iniciais válidas (n-gramas que não cruzam a fronteira entre textos)
+    posicoes = np.repeat(inicios, contagens) + (
+        np.arange(contagens.sum()) - np.repeat(np.cumsum(contagens) - contagens, contagens)
+    )
+
+    hashes = np.zeros(posicoes.size, dtype=np.uint64)
+    for j in range(n):
+        hashes = (hashes << np.uint64(8)) | buffer[posicoes + j]
+
+    return hashes, contagens
+
+# =============================================================================
+# ÍNDICE MINHASH + LSH
+# =============================================================================
+
+_PRIMO_MERSENNE = np.uint64((1 << 31) - 1)
+_VALOR_VAZIO = np.uint32(np.iinfo(np.uint32).max)
+
+class IndiceSimilaridade:
+    """Índice aproximado de similaridade cadastral (MinHash + LSH por bandas)"""
+
+    def __init__(
+        self,
+        n_permutacoes: int = SIMILARIDADE_CONFIG['n_permutacoes'],
+        n_bandas: int = SIMILARIDADE_CONFIG['n_bandas'],
+        tamanho_ngram: int = SIMILARIDADE_CONFIG['tamanho_ngram'],
+        seed: int = 42
+    ):
+        if n_permutacoes % n_bandas != 0:
+            raise ValueError("n_permutacoes deve ser múltiplo de n_bandas")
+        if not 1 <= tamanho_ngram <= 4:
+            raise ValueError("tamanho_ngram deve estar entre 1 e 4")
+
+        self.n_permutacoes = n_permutacoes
+        self.n_bandas = n_bandas
+        self.tamanho_ngram = tamanho_ngram
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(_PRIMO_MERSENNE), size=n_permutacoes).astype(np.uint64)
+        self._b = rng.randint(0, int(_PRIMO_MERSENNE), size=n_permutacoes).astype(np.uint64)
+        self._mult_bandas = (rng.randint(1, 2**62, size=n_permutacoes // n_bandas, dtype=np.int64)
+                             .astype(np.uint64) | np.uint64(1))
+
+        self.registros = pd.DataFrame()
+        self.campos: Dict[str, Dict[str, np.ndarray]] = {}
+        self.criado_em: Optional[float] = None
+
+    # -------------------------------------------------------------------------
+    # Construção
+    # -------------------------------------------------------------------------
+
+    def _assinaturas(self, textos: List[str], linhas_por_bloco: int = 4000) -> np.ndarray:
+        """Calcula as assinaturas MinHash (n_textos x n_permutacoes) em blocos"""
+        assinaturas = np.full((len(textos), self.n_permutacoes), _VALOR_VAZIO, dtype=np.uint32)
+
+        for inicio in range(0, len(textos), linhas_por_bloco):
+            bloco = textos[inicio:inicio + linhas_por_bloco]
+            hashes, contagens = _ngramas_vetorizados(bloco, self.tamanho_ngram)
+            if hashes.size == 0:
+                continue
+
+            permutados = (hashes[:, None] * self._a[None, :] + self._b[None, :]) % _PRIMO_MERSENNE
+
+            com_ngramas = np.flatnonzero(contagens > 0)
+            offsets = (np.cumsum(contagens) - contagens)[com_ngramas]
+            assinaturas[inicio + com_ngramas] = np.minimum.reduceat(permutados, offsets, axis=0)
+
+        return assinaturas
+
+    def _chaves_bandas(self, assinaturas: np.ndarray) -> np.ndarray:
+        """Reduz cada banda da assinatura a uma chave uint64"""
+        linhas = self.n_permutacoes // self.n_bandas
+        bandas = assinaturas.reshape(len(assinaturas), self.n_bandas, linhas).astype(np.uint64)
+        return (bandas * self._mult_bandas[None, None, :]).sum(axis=2)
+
+    def construir(self, df: pd.DataFrame, coluna_cnpj: str = 'cnpj') -> 'IndiceSimilaridade':
+        """
+        Constrói o índice a partir da base cadastral
+
+        Args:
+            df: DataFrame com CNPJ, num_grupo e colunas de CAMPOS_SIMILARIDADE
+            coluna_cnpj: Nome da coluna de CNPJ
+
+        Returns:
+            O próprio índice (para encadeamento)
+        """
+        df = df.drop_duplicates(subset=[coluna_cnpj]).reset_index(drop=True)
+
+        self.registros = pd.DataFrame({
+            'cnpj': df[coluna_cnpj].astype(str).values,
+            'num_grupo': normalizar_grupo(df['num_grupo']).values if 'num_grupo' in df.columns else ''
+        })
+
+        for campo, colunas in CAMPOS_SIMILARIDADE.items():
+            colunas_presentes = [c for c in colunas if c in df.columns]
+            if not colunas_presentes:
+                continue
+
+            tipo = 'endereco' if campo == 'endereco' else 'nome'
+            brutos = df[colunas_presentes[0]].fillna('').astype(str)
+            for coluna in colunas_presentes[1:]:
+                brutos = brutos + ' ' + df[coluna].fillna('').astype(str)
+            textos = [normalizar_texto(t, tipo) for t in brutos]
+
+            assinaturas = self._assinaturas(textos)
+            validos = np.flatnonzero(assinaturas[:, 0] != _VALOR_VAZIO)
+            chaves = self._chaves_bandas(assinaturas[validos])
+
+            ordem = np.argsort(chaves, axis=0, kind='stable').T
+            chaves_ordenadas = np.take_along_axis(chaves.T, ordem, axis=1)
+
+            self.registros[campo] = brutos.str.strip().values
+            self.campos[campo] = {
+                'assinaturas': assinaturas,
+                'validos': validos.astype(np.int64),
+                'chaves_ordenadas': chaves_ordenadas,
+                'ordem': ordem.astype(np.int64)
+            }
+
+        self._posicao_cnpj = pd.Index(self.registros['cnpj'])
+        self.criado_em = time.time()
+        return self
+
+    # -------------------------------------------------------------------------
+    # Consulta
+    # -------------------------------------------------------------------------
+
+    def _candidatos(self, campo: str, assinatura: np.ndarray) -> np.ndarray:
+        """Retorna posições (nas linhas do índice) que colidem em alguma banda"""
+        dados = self.campos[campo]
+        chaves_consulta = self._chaves_bandas(assinatura[None, :])[0]
+
+        encontrados = []
+        for banda in range(self.n_bandas):
+            linha_chaves = dados['chaves_ordenadas'][banda]
+            esq = np.searchsorted(linha_chaves, chaves_consulta[banda], side='left')
+            dir_ = np.searchsorted(linha_chaves, chaves_consulta[banda], side='right')
+            if dir_ > esq:
+                encontrados.append(dados['ordem'][banda, esq:dir_])
+
+        if not encontrados:
+            return np.empty(0, dtype=np.int64)
+
+        return dados['validos'][np.unique(np.concatenate(encontrados))]
+
+    def _consultar_assinatura(
+        self,
+        campo: str,
+        assinatura: np.ndarray,
+        similaridade_minima: float
+    ) -> pd.DataFrame:
+        candidatos = self._candidatos(campo, assinatura)
+        if candidatos.size == 0:
+            return pd.DataFrame(columns=['cnpj', 'num_grupo', 'campo', 'texto', 'similaridade'])
+
+        assinaturas = np.asarray(self.campos[campo]['assinaturas'][candidatos])
+        similaridade = (assinaturas == assinatura[None, :]).mean(axis=1)
+
+        mask = similaridade >= similaridade_minima
+        resultado = self.registros.iloc[candidatos[mask]][['cnpj', 'num_grupo', campo]].copy()
+        resultado = resultado.rename(columns={campo: 'texto'})
+        resultado.insert(2, 'campo', campo)
+        resultado['similaridade'] = similaridade[mask]
+
+        return resultado
+
+    def consultar_texto(
+        self,
+        texto: str,
+        campo: str = 'razao_social',
+        limite: int = SIMILARIDADE_CONFIG['limite_resultados'],
+        similaridade_minima: float = SIMILARIDADE_CONFIG['similaridade_minima']
+    ) -> pd.DataFrame:
+        """
+        Busca CNPJs cujo campo se parece com um texto livre
+
+        Args:
+            texto: Texto a procurar
+            campo: 'razao_social', 'fantasia' ou 'endereco'
+            limite: Número máximo de resultados
+            similaridade_minima: Jaccard estimado mínimo (0 a 1)
+
+        Returns:
+            DataFrame (cnpj, num_grupo, campo, texto, similaridade)
+        """
+        if campo not in self.campos:
+            return pd.DataFrame(columns=['cnpj', 'num_grupo', 'campo', 'texto', 'similaridade'])
+
+        tipo = 'endereco' if campo == 'endereco' else 'nome'
+        assinatura = self._assinaturas([normalizar_texto(texto, tipo)])[0]
+        if assinatura[0] == _VALOR_VAZIO:
+            return pd.DataFrame(columns=['cnpj', 'num_grupo', 'campo', 'texto', 'similaridade'])
+
+        resultado = self._consultar_assinatura(campo, assinatura, similaridade_minima)
+        return resultado.nlargest(limite, 'similaridade').reset_index(drop=True)
+
+    def consultar_cnpj(
+        self,
+        cnpj: str,
+        limite: int = SIMILARIDADE_CONFIG['limite_resultados'],
+        similaridade_minima: float = SIMILARIDADE_CONFIG['similaridade_minima'],
+        excluir_cnpjs: Optional[Iterable[str]] = None,
+        excluir_grupo: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Busca CNPJs com cadastro semelhante ao de um CNPJ indexado
+
+        As exclusões são aplicadas antes do limite, para que CNPJs ignorados
+        não ocupem as vagas dos resultados.
+
+        Args:
+            cnpj: CNPJ de referência
+            limite: Número máximo de resultados
+            similaridade_minima: Jaccard estimado mínimo (0 a 1)
+            excluir_cnpjs: CNPJs a ignorar (além do próprio cnpj)
+            excluir_grupo: Número do grupo cujos CNPJs devem ser ignorados
+
+        Returns:
+            DataFrame com um registro por (CNPJ semelhante, campo)
+        """
+        posicao = self._posicao_cnpj.get_indexer([str(cnpj)])[0]
+        if posicao < 0:
+            return pd.DataFrame(columns=['cnpj', 'num_grupo', 'campo', 'texto', 'similaridade'])
+
+        resultados = []
+        for campo, dados in self.campos.items():
+            assinatura = np.asarray(dados['assinaturas'][posicao])
+            if assinatura[0] == _VALOR_VAZIO:
+                continue
+            resultados.append(self._consultar_assinatura(campo, assinatura, similaridade_minima))
+
+        if not resultados:
+            return pd.DataFrame(columns=['cnpj', 'num_grupo', 'campo', 'texto', 'similaridade'])
+
+        resultado = pd.concat(resultados, ignore_index=True)
+        ignorados = {str(cnpj)} | {str(c) for c in (excluir_cnpjs or [])}
+        resultado = resultado[~resultado['cnpj'].isin(ignorados)]
+        if excluir_grupo is not None:
+            grupo = normalizar_grupo(excluir_grupo).iloc[0]
+            resultado = resultado[normalizar_grupo(resultado['num_grupo']).values != grupo]
+
+        return resultado.sort_values('similaridade', ascending=False).head(limite).reset_index(drop=True)
+
+    # -------------------------------------------------------------------------
+    # Persistência
+    # -------------------------------------------------------------------------
+
+    def salvar(self, caminho: str) -> None:
+        """Persiste o índice em disco (arrays carregáveis via memory-map)"""
+        joblib.dump(self.__dict__, caminho)
+
+    @classmethod
+    def carregar(cls, caminho: str) -> 'IndiceSimilaridade':
+        """Carrega índice salvo, mapeando as assinaturas em memória (somente leitura)"""
+        indice = cls.__new__(cls)
+        indice.__dict__.update(joblib.load(caminho, mmap_mode='r'))
+        return indice
+
+# =============================================================================
+# CARREGAMENTO COM CACHE
+# =============================================================================
+
+def _caminho_indice() -> str:
+    return os.path.join(obter_diretorio_cache('similaridade'), 'indice_similaridade.joblib')
+
+@st.cache_resource(ttl=CACHE_TTL_INDICE_SIMILARIDADE, show_spinner="🔎 Carregando índice de similaridade cadastral...")
+def carregar_indice_similaridade(_engine, forcar_reconstrucao: bool = False) -> Optional[IndiceSimilaridade]:
+    """
+    Carrega o índice de similaridade do disco ou o reconstrói a partir do banco
+
+    O índice é reconstruído quando não existe, quando excede
+    CACHE_TTL_INDICE_SIMILARIDADE ou quando forcar_reconstrucao=True.
+
+    Args:
+        _engine: Engine SQLAlchemy
+        forcar_reconstrucao: Ignora o índice persistido
+
+    Returns:
+        IndiceSimilaridade ou None se a base não puder ser carregada
+    """
+    caminho = _caminho_indice()
+
+    if not forcar_reconstrucao and os.path.exists(caminho):
+        idade = time.time() - os.path.getmtime(caminho)
+        if idade < CACHE_TTL_INDICE_SIMILARIDADE:
+            return IndiceSimilaridade.carregar(caminho)
+
+    df_base = executar_query(_engine, Queries.get_base_similaridade(), show_error=False)
+    if df_base.empty:
+        return IndiceSimilaridade.carregar(caminho) if os.path.exists(caminho) else None
+
+    indice = IndiceSimilaridade().construir(df_base)
+
+    # Grava em arquivo temporário único por processo/thread e renomeia, para
+    # não expor índice incompleto quando duas sessões reconstroem ao mesmo tempo
+    caminho_tmp = f"{caminho}.tmp{os.getpid()}_{threading.get_ident()}"
+    indice.salvar(caminho_tmp)
+    os.replace(caminho_tmp, caminho)
+
+    return IndiceSimilaridade.carregar(caminho)
+
+def buscar_cnpjs_semelhantes(
+    indice: Optional[IndiceSimilaridade],
+    cnpjs: List[str],
+    excluir_grupo: Optional[str] = None,
+    limite: int = SIMILARIDADE_CONFIG['limite_resultados']
+) -> pd.DataFrame:
+    """
+    Busca CNPJs semelhantes a uma lista de CNPJs (ex.: todos de um grupo)
+
+    Args:
+        indice: Índice de similaridade carregado
+        cnpjs: CNPJs de referência
+        excluir_grupo: Número do grupo cujos CNPJs devem ser ignorados
+        limite: Número máximo de resultados
+
+    Returns:
+        DataFrame (cnpj_referencia, cnpj, num_grupo, campo, texto, similaridade)
+    """
+    if indice is None or not cnpjs:
+        return pd.DataFrame()
+
+    resultados = []
+    for cnpj in cnpjs:
+        df = indice.consultar_cnpj(cnpj, limite=limite, excluir_cnpjs=cnpjs, excluir_grupo=excluir_grupo)
+        if not df.empty:
+            df.insert(0, 'cnpj_referencia', str(cnpj))
+            resultados.append(df)
+
+    if not resultados:
+        return pd.DataFrame()
+
+    resultado = pd.concat(resultados, ignore_index=True)
+    resultado = resultado.sort_values('similaridade', ascending=False)
+    return resultado.drop_duplicates(subset=['cnpj', 'campo']).head(limite).reset_index(drop=True)
@@ -1,23 +1,57 @@
 """
 Pacote de Machine Learning
+Os submódulos (e o scikit-learn) são importados no primeiro uso de cada nome
 """
 
-from .clustering import (
-    preparar_dados_ml,
-    aplicar_pca,
-    kmeans_clustering,
-    dbscan_clustering,
-    hierarchical_clustering,
-    isolation_forest_anomalies,
-    local_outlier_factor_anomalies,
-    executar_consenso,
-    encontrar_melhor_k,
-    otimizar_dbscan,
-    visualizar_clusters_2d,
-    visualizar_clusters_3d,
-    grafico_elbow,
-    comparar_algoritmos
-)
+from ..utils.importacao import exportacoes_sob_demanda
+
+__getattr__, __dir__ = exportacoes_sob_demanda(__name__, {
+    '.clustering': [
+        'preparar_dados_ml',
+        'aplicar_pca',
+        'kmeans_clustering',
+        'dbscan_clustering',
+        'hierarchical_clustering',
+        'estimar_memoria_hierarquico',
+        'isolation_forest_anomalies',
+        'local_outlier_factor_anomalies',
+        'executar_consenso',
+        'encontrar_melhor_k',
+        'silhouette_amostrada',
+        'otimizar_dbscan',
+        'reduzir_pontos',
+        'visualizar_clusters_2d',
+        'visualizar_clusters_3d',
+        'grafico_elbow',
+        'comparar_algoritmos'
+    ],
+    '.vizinhanca': [
+        'GrafoVizinhanca',
+        'BuscaExata',
+        'BuscaFlorestaRP',
+        'criar_busca_vizinhos',
+        'estimar_recall'
+    ],
+    '.etapas': [
+        'padronizar_em_cache',
+        'pca_em_cache',
+        'executar_tarefas_em_cache',
+        'ajustar_estimadores_em_cache',
+        'limpar_cache_etapas'
+    ],
+    '.escala': [
+        'AmostraEstratificada',
+        'ajustar_e_pontuar_em_escala',
+        'pontuar_lote'
+    ],
+    '.registro': [
+        'PipelineML',
+        'RegistroModelos',
+        'ajustar_pipeline',
+        'calcular_versao_dados',
+        'obter_registro_modelos'
+    ]
+})
 
 __all__ = [
     'preparar_dados_ml',
@@ -25,13 +59,34 @@ __all__ = [
     'kmeans_clustering',
     'dbscan_clustering',
     'hierarchical_clustering',
+    'estimar_memoria_hierarquico',
     'isolation_forest_anomalies',
-    'local_outlier_factor_anomalias',
+    'local_outlier_factor_anomalies',
     'executar_consenso',
     'encontrar_melhor_k',
+    'silhouette_amostrada',
     'otimizar_dbscan',
+    'reduzir_pontos',
     'visualizar_clusters_2d',
     'visualizar_clusters_3d',
     'grafico_elbow',
-    'comparar_algoritmos'
+    'comparar_algoritmos',
+    'GrafoVizinhanca',
+    'BuscaExata',
+    'BuscaFlorestaRP',
+    'criar_busca_vizinhos',
+    'estimar_recall',
+    'padronizar_em_cache',
+    'pca_em_cache',
+    'executar_tarefas_em_cache',
+    'ajustar_estimadores_em_cache',
+    'limpar_cache_etapas',
+    'AmostraEstratificada',
+    'ajustar_e_pontuar_em_escala',
+    'pontuar_lote',
+    'PipelineML',
+    'RegistroModelos',
+    'ajustar_pipeline',
+    'calcular_versao_dados',
+    'obter_registro_modelos'
 ]
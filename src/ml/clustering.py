@@ -7,28 +7,39 @@ import pandas as pd
 import numpy as np
 import streamlit as st
 from typing import Dict, Tuple, Optional, List
-from sklearn.cluster import KMeans, DBSCAN, AgglomerativeClustering
+from sklearn.cluster import KMeans, MiniBatchKMeans, DBSCAN, AgglomerativeClustering, Birch
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA
-from sklearn.metrics import silhouette_score, davies_bouldin_score, calinski_harabasz_score
+from sklearn.metrics import silhouette_score, silhouette_samples, davies_bouldin_score, calinski_harabasz_score
 from sklearn.neighbors import LocalOutlierFactor
+from scipy.sparse import csr_matrix
 import plotly.graph_objects as go
 import plotly.express as px
 
-from ..config.settings import ML_FEATURES, CORES, PALETAS
+from ..config.settings import (
+    ML_FEATURES, CORES, PALETAS, SELECAO_K_CONFIG, HIERARQUICO_CONFIG, VISUALIZACAO_CLUSTERS_CONFIG
+)
+from .paralelo import executar_tarefas_paralelo
+from .vizinhanca import GrafoVizinhanca, criar_busca_vizinhos
+from .etapas import executar_tarefas_em_cache, padronizar_em_cache, pca_em_cache
 
 # =============================================================================
 # PREPARAÇÃO DE DADOS
 # =============================================================================
 
-def preparar_dados_ml(df: pd.DataFrame, features: Optional[List[str]] = None) -> Tuple[pd.DataFrame, np.ndarray, StandardScaler]:
+def preparar_dados_ml(
+    df: pd.DataFrame,
+    features: Optional[List[str]] = None,
+    em_cache: bool = True
+) -> Tuple[pd.DataFrame, np.ndarray, StandardScaler]:
     """
     Prepara dados para Machine Learning
 
     Args:
         df: DataFrame com dados
         features: Lista de features a usar (se None, usa ML_FEATURES)
+        em_cache: Reaproveita a padronização memorizada para os mesmos dados
 
     Returns:
         Tupla (df_clean, X_scaled, scaler)
@@ -40,24 +51,31 @@ def preparar_dados_ml(df: pd.DataFrame, features: Optional[List[str]] = None) ->
     df_clean = df[features].dropna()
 
     # Padronizar dados
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(df_clean)
+    if em_cache:
+        X_scaled, scaler = padronizar_em_cache(df_clean.to_numpy())
+    else:
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(df_clean)
 
     return df_clean, X_scaled, scaler
 
-def aplicar_pca(X: np.ndarray, n_components: int = 2) -> Tuple[np.ndarray, PCA, float]:
+def aplicar_pca(X: np.ndarray, n_components: int = 2, em_cache: bool = True) -> Tuple[np.ndarray, PCA, float]:
     """
     Aplica PCA para redução de dimensionalidade
 
     Args:
         X: Matriz de features
         n_components: Número de componentes principais
+        em_cache: Reaproveita o PCA memorizado para a mesma matriz e componentes
 
     Returns:
         Tupla (X_pca, modelo_pca, variancia_explicada)
     """
-    pca = PCA(n_components=n_components)
-    X_pca = pca.fit_transform(X)
+    if em_cache:
+        X_pca, pca = pca_em_cache(X, n_components)
+    else:
+        pca = PCA(n_components=n_components)
+        X_pca = pca.fit_transform(X)
 
     variancia_explicada = sum(pca.explained_variance_ratio_) * 100
 
@@ -99,7 +117,9 @@ def kmeans_clustering(
 def dbscan_clustering(
     X: np.ndarray,
     eps: float = 0.5,
-    min_samples: int = 5
+    min_samples: int = 5,
+    backend: Optional[str] = None,
+    n_arvores: Optional[int] = None
 ) -> Tuple[np.ndarray, DBSCAN, Dict[str, any]]:
     """
     Aplica algoritmo DBSCAN
@@ -108,16 +128,29 @@ def dbscan_clustering(
         X: Matriz de features
         eps: Raio de vizinhança
         min_samples: Número mínimo de amostras por cluster
+        backend: Busca de vizinhos ('exato', 'kd_tree', 'ball_tree', 'aproximado', 'auto');
+            None usa o DBSCAN do scikit-learn diretamente
+        n_arvores: Árvores da busca aproximada (recall x velocidade)
 
     Returns:
         Tupla (labels, modelo, metricas)
     """
-    model = DBSCAN(eps=eps, min_samples=min_samples)
-    labels = model.fit_predict(X)
+    if backend is None:
+        model = DBSCAN(eps=eps, min_samples=min_samples)
+        labels = model.fit_predict(X)
+    else:
+        busca = criar_busca_vizinhos(backend, len(X), n_arvores=n_arvores)
+        labels, core = GrafoVizinhanca(X, eps, busca=busca).dbscan(eps, min_samples)
+
+        # Modelo equivalente ao ajustado pelo scikit-learn (usado para pontuar novos pontos)
+        model = DBSCAN(eps=eps, min_samples=min_samples)
+        model.labels_ = labels
+        model.core_sample_indices_ = np.flatnonzero(core)
+        model.components_ = X[core]
 
     # Contar clusters e outliers
     n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
-    n_outliers = list(labels).count(-1)
+    n_outliers = int((labels == -1).sum())
 
     metricas = {
         'n_clusters': n_clusters,
@@ -130,33 +163,131 @@ def dbscan_clustering(
         # Remover outliers para cálculo
         mask = labels != -1
         if mask.sum() > 0:
-            metricas['silhouette'] = silhouette_score(X[mask], labels[mask])
+            if backend is None:
+                metricas['silhouette'] = silhouette_score(X[mask], labels[mask])
+            else:
+                metricas['silhouette'] = silhouette_amostrada(X[mask], labels[mask])['silhouette']
 
     return labels, model, metricas
 
+def estimar_memoria_hierarquico(
+    n_amostras: int,
+    n_features: int,
+    n_microclusters: int = HIERARQUICO_CONFIG['n_microclusters']
+) -> Dict[str, any]:
+    """
+    Estima a memória do clustering hierárquico antes de executá-lo
+
+    O modo direto guarda a matriz de distâncias condensada (n² / 2 valores
+    float64); o escalável guarda apenas os micro-clusters e a atribuição.
+
+    Args:
+        n_amostras: Número de linhas
+        n_features: Número de features
+        n_microclusters: Número de micro-clusters do modo escalável
+
+    Returns:
+        Dicionário com bytes_direto, bytes_escalavel e o modo escolhido no automático
+    """
+    m = min(n_microclusters, n_amostras)
+
+    return {
+        'bytes_direto': 8 * n_amostras * (n_amostras - 1) // 2,
+        'bytes_escalavel': 8 * (m * (m - 1) // 2 + m * n_features) + 8 * n_amostras,
+        'modo_automatico': 'escalavel' if n_amostras > HIERARQUICO_CONFIG['limite_direto'] else 'direto'
+    }
+
+def _comprimir_microclusters(
+    X: np.ndarray,
+    n_microclusters: int,
+    compressao: str,
+    random_state: int = 42
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compacta X em micro-clusters (BIRCH ou MiniBatchKMeans)
+
+    O número de micro-clusters nunca passa de n_microclusters, para que a
+    estimativa de memória seja respeitada mesmo quando o BIRCH fragmenta.
+
+    Returns:
+        Tupla (centroides, atribuicao) com o micro-cluster de cada linha
+    """
+    pesos = None
+    if compressao == 'birch':
+        birch = Birch(threshold=HIERARQUICO_CONFIG['threshold_birch'], n_clusters=None)
+        atribuicao = birch.fit_predict(X)
+        centroides = birch.subcluster_centers_
+
+        if len(centroides) <= n_microclusters:
+            return centroides, atribuicao
+
+        # Subclusters além do limite: reduz com K-Means ponderado pelo tamanho de cada um
+        X, pesos = centroides, np.bincount(atribuicao, minlength=len(centroides))
+    else:
+        atribuicao = None
+
+    modelo = MiniBatchKMeans(
+        n_clusters=min(n_microclusters, len(X)),
+        batch_size=SELECAO_K_CONFIG['batch_size'],
+        n_init=3,
+        random_state=random_state
+    )
+    rotulos = modelo.fit_predict(X, sample_weight=pesos)
+    atribuicao = rotulos if atribuicao is None else rotulos[atribuicao]
+    return modelo.cluster_centers_, atribuicao
+
 def hierarchical_clustering(
     X: np.ndarray,
     n_clusters: int = 3,
-    linkage: str = 'ward'
+    linkage: str = 'ward',
+    modo: str = 'auto',
+    n_microclusters: int = HIERARQUICO_CONFIG['n_microclusters'],
+    compressao: str = HIERARQUICO_CONFIG['compressao']
 ) -> Tuple[np.ndarray, AgglomerativeClustering, Dict[str, float]]:
     """
     Aplica clustering hierárquico
 
+    O modo direto precisa de memória O(n²). No modo escalável os dados são
+    primeiro compactados em micro-clusters (BIRCH ou K-Means), o linkage roda
+    sobre os centróides e cada linha herda o label do seu micro-cluster.
+
     Args:
         X: Matriz de features
         n_clusters: Número de clusters
         linkage: Método de linkage ('ward', 'complete', 'average')
+        modo: 'direto', 'escalavel' ou 'auto' (escalável acima de HIERARQUICO_CONFIG['limite_direto'])
+        n_microclusters: Número de micro-clusters (compressão K-Means)
+        compressao: 'kmeans' ou 'birch'
 
     Returns:
         Tupla (labels, modelo, metricas)
     """
-    model = AgglomerativeClustering(n_clusters=n_clusters, linkage=linkage)
-    labels = model.fit_predict(X)
+    if modo == 'auto':
+        modo = estimar_memoria_hierarquico(len(X), X.shape[1], n_microclusters)['modo_automatico']
+
+    if modo == 'direto':
+        model = AgglomerativeClustering(n_clusters=n_clusters, linkage=linkage)
+        labels = model.fit_predict(X)
+
+        metricas = {
+            'silhouette': silhouette_score(X, labels),
+            'davies_bouldin': davies_bouldin_score(X, labels),
+            'calinski_harabasz': calinski_harabasz_score(X, labels)
+        }
+
+        return labels, model, metricas
 
+    centroides, atribuicao = _comprimir_microclusters(X, n_microclusters, compressao)
+
+    model = AgglomerativeClustering(n_clusters=min(n_clusters, len(centroides)), linkage=linkage)
+    labels = model.fit_predict(centroides)[atribuicao]
+
+    # Silhouette completo seria O(n²): usa amostra estratificada
     metricas = {
-        'silhouette': silhouette_score(X, labels),
+        'silhouette': silhouette_amostrada(X, labels)['silhouette'],
         'davies_bouldin': davies_bouldin_score(X, labels),
-        'calinski_harabasz': calinski_harabasz_score(X, labels)
+        'calinski_harabasz': calinski_harabasz_score(X, labels),
+        'n_microclusters': len(centroides)
     }
 
     return labels, model, metricas
@@ -198,7 +329,9 @@ def isolation_forest_anomalies(
 def local_outlier_factor_anomalies(
     X: np.ndarray,
     n_neighbors: int = 20,
-    contamination: float = 0.1
+    contamination: float = 0.1,
+    backend: Optional[str] = None,
+    n_arvores: Optional[int] = None
 ) -> Tuple[np.ndarray, LocalOutlierFactor, Dict[str, any]]:
     """
     Detecta anomalias usando Local Outlier Factor
@@ -207,14 +340,33 @@ def local_outlier_factor_anomalies(
         X: Matriz de features
         n_neighbors: Número de vizinhos
         contamination: Proporção esperada de outliers
+        backend: Busca de vizinhos ('exato', 'kd_tree', 'ball_tree', 'aproximado', 'auto');
+            None usa a busca interna do scikit-learn
+        n_arvores: Árvores da busca aproximada (recall x velocidade)
 
     Returns:
         Tupla (labels, modelo, metricas)
     """
-    model = LocalOutlierFactor(n_neighbors=n_neighbors, contamination=contamination)
-    labels = model.fit_predict(X)
-
-    n_anomalias = list(labels).count(-1)
+    if backend is None:
+        model = LocalOutlierFactor(n_neighbors=n_neighbors, contamination=contamination)
+        labels = model.fit_predict(X)
+    else:
+        busca = criar_busca_vizinhos(backend, len(X), n_arvores=n_arvores).ajustar(X)
+        distancias, indices = busca.knn(n_neighbors)
+
+        # Grafo k-NN pré-computado com o próprio ponto (formato do KNeighborsTransformer)
+        n = len(X)
+        indices = np.hstack([np.arange(n)[:, None], indices])
+        distancias = np.hstack([np.zeros((n, 1)), distancias])
+        grafo = csr_matrix(
+            (distancias.ravel(), indices.ravel(), np.arange(0, n * (n_neighbors + 1) + 1, n_neighbors + 1)),
+            shape=(n, n)
+        )
+
+        model = LocalOutlierFactor(n_neighbors=n_neighbors, contamination=contamination, metric='precomputed')
+        labels = model.fit_predict(grafo)
+
+    n_anomalias = int((labels == -1).sum())
 
     metricas = {
         'n_anomalias': n_anomalias,
@@ -232,104 +384,321 @@ def executar_consenso(
     X: np.ndarray,
     n_clusters: int = 3,
     eps: float = 0.5,
-    contamination: float = 0.1
+    contamination: float = 0.1,
+    n_jobs: Optional[int] = None,
+    backend_vizinhos: Optional[str] = None,
+    n_arvores: Optional[int] = None,
+    em_cache: bool = True
 ) -> Dict[str, any]:
     """
     Executa múltiplos algoritmos e compara resultados (consenso)
 
+    Os algoritmos são independentes e rodam em um pool de processos que lê X
+    de memória compartilhada; cada resultado é exibido assim que fica pronto.
+    Com em_cache, só os algoritmos cujos parâmetros mudaram são reajustados.
+
     Args:
         X: Matriz de features
         n_clusters: Número de clusters para K-Means
         eps: Parâmetro eps para DBSCAN
         contamination: Proporção de outliers para Isolation Forest
+        n_jobs: Número de processos (None usa o padrão, 1 executa em série)
+        backend_vizinhos: Busca de vizinhos do DBSCAN (None usa o scikit-learn)
+        n_arvores: Árvores da busca aproximada (recall x velocidade)
+        em_cache: Reaproveita resultados memorizados por algoritmo
 
     Returns:
         Dicionário com resultados de todos os algoritmos
     """
-    resultados = {}
+    tarefas = {
+        'kmeans': (kmeans_clustering, {'n_clusters': n_clusters}),
+        'dbscan': (dbscan_clustering, {'eps': eps, 'backend': backend_vizinhos, 'n_arvores': n_arvores}),
+        'hierarchical': (hierarchical_clustering, {'n_clusters': n_clusters}),
+        'isolation_forest': (isolation_forest_anomalies, {'contamination': contamination})
+    }
 
-    # K-Means
-    with st.spinner("Executando K-Means..."):
-        labels_km, model_km, metricas_km = kmeans_clustering(X, n_clusters)
-        resultados['kmeans'] = {
-            'labels': labels_km,
-            'model': model_km,
-            'metricas': metricas_km,
-            'nome': 'K-Means'
-        }
+    nomes = {
+        'kmeans': 'K-Means',
+        'dbscan': 'DBSCAN',
+        'hierarchical': 'Hierárquico',
+        'isolation_forest': 'Isolation Forest'
+    }
 
-    # DBSCAN
-    with st.spinner("Executando DBSCAN..."):
-        labels_db, model_db, metricas_db = dbscan_clustering(X, eps)
-        resultados['dbscan'] = {
-            'labels': labels_db,
-            'model': model_db,
-            'metricas': metricas_db,
-            'nome': 'DBSCAN'
+    resultados = {}
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    status_text.text(f"Executando {len(tarefas)} algoritmos...")
+
+    def _ao_concluir(chave: str, resultado: Tuple) -> None:
+        labels, model, metricas = resultado
+        resultados[chave] = {
+            'labels': labels,
+            'model': model,
+            'metricas': metricas,
+            'nome': nomes[chave]
         }
+        status_text.text(f"✅ {nomes[chave]} concluído ({len(resultados)}/{len(tarefas)})")
+        progress_bar.progress(len(resultados) / len(tarefas))
 
-    # Hierarchical
-    with st.spinner("Executando Clustering Hierárquico..."):
-        labels_hc, model_hc, metricas_hc = hierarchical_clustering(X, n_clusters)
-        resultados['hierarchical'] = {
-            'labels': labels_hc,
-            'model': model_hc,
-            'metricas': metricas_hc,
-            'nome': 'Hierárquico'
-        }
+    executar = executar_tarefas_em_cache if em_cache else executar_tarefas_paralelo
+    executar(X, tarefas, n_jobs=n_jobs, ao_concluir=_ao_concluir)
 
-    # Isolation Forest
-    with st.spinner("Executando Isolation Forest..."):
-        labels_if, model_if, metricas_if = isolation_forest_anomalies(X, contamination)
-        resultados['isolation_forest'] = {
-            'labels': labels_if,
-            'model': model_if,
-            'metricas': metricas_if,
-            'nome': 'Isolation Forest'
-        }
+    progress_bar.empty()
+    status_text.empty()
 
-    return resultados
+    # Mantém a ordem original dos algoritmos (usada nos gráficos comparativos)
+    return {chave: resultados[chave] for chave in tarefas}
 
 # =============================================================================
 # OTIMIZAÇÃO DE HIPERPARÂMETROS
 # =============================================================================
 
-def encontrar_melhor_k(X: np.ndarray, k_range: range = range(2, 11)) -> Tuple[int, Dict]:
+def _amostra_estratificada(labels: np.ndarray, tamanho: int, random_state: int = 42) -> np.ndarray:
+    """
+    Sorteia índices preservando a proporção de cada cluster (mínimo de 2 por cluster)
+
+    Args:
+        labels: Labels dos clusters
+        tamanho: Tamanho desejado da amostra
+        random_state: Seed para reprodutibilidade
+
+    Returns:
+        Array de índices da amostra
+    """
+    rng = np.random.default_rng(random_state)
+    clusters, inversos, contagens = np.unique(labels, return_inverse=True, return_counts=True)
+
+    cotas = np.maximum(np.round(contagens * tamanho / len(labels)).astype(int), 2)
+    cotas = np.minimum(cotas, contagens)
+
+    ordem = np.argsort(inversos, kind='stable')
+    inicios = np.concatenate([[0], np.cumsum(contagens)[:-1]])
+
+    indices = [
+        rng.choice(ordem[inicio:inicio + contagem], size=cota, replace=False)
+        for inicio, contagem, cota in zip(inicios, contagens, cotas)
+    ]
+    return np.sort(np.concatenate(indices))
+
+def silhouette_amostrada(
+    X: np.ndarray,
+    labels: np.ndarray,
+    tamanho_amostra: Optional[int] = None,
+    random_state: int = 42
+) -> Dict[str, float]:
+    """
+    Calcula o silhouette em uma amostra estratificada por cluster
+
+    O silhouette completo é O(n²); na amostra o custo é O(m²) e a incerteza é
+    reportada como a meia-largura do intervalo de 95% da média dos valores.
+
+    Args:
+        X: Matriz de features
+        labels: Labels dos clusters
+        tamanho_amostra: Tamanho da amostra (None usa SELECAO_K_CONFIG)
+        random_state: Seed para reprodutibilidade
+
+    Returns:
+        Dicionário com silhouette, silhouette_ic (± IC 95%) e silhouette_amostra
+    """
+    tamanho_amostra = tamanho_amostra or SELECAO_K_CONFIG['tamanho_amostra_silhouette']
+
+    if len(np.unique(labels)) < 2:
+        return {'silhouette': np.nan, 'silhouette_ic': np.nan, 'silhouette_amostra': 0}
+
+    if len(labels) <= tamanho_amostra:
+        # Amostra cobre toda a base: valor exato
+        return {
+            'silhouette': silhouette_score(X, labels),
+            'silhouette_ic': 0.0,
+            'silhouette_amostra': len(labels)
+        }
+
+    indices = _amostra_estratificada(labels, tamanho_amostra, random_state)
+    valores = silhouette_samples(X[indices], labels[indices])
+
+    return {
+        'silhouette': float(valores.mean()),
+        'silhouette_ic': float(1.96 * valores.std(ddof=1) / np.sqrt(len(valores))),
+        'silhouette_amostra': len(indices)
+    }
+
+def _modelo_kmeans(k: int, usar_minibatch: bool, init, n_init: int, random_state: int):
+    """Instancia KMeans ou MiniBatchKMeans com a mesma interface"""
+    if usar_minibatch:
+        return MiniBatchKMeans(
+            n_clusters=k,
+            init=init,
+            n_init=n_init,
+            batch_size=SELECAO_K_CONFIG['batch_size'],
+            random_state=random_state
+        )
+    return KMeans(n_clusters=k, init=init, n_init=n_init, random_state=random_state)
+
+def _metricas_k(
+    X: np.ndarray,
+    labels: np.ndarray,
+    inertia: float,
+    tamanho_amostra: Optional[int],
+    random_state: int
+) -> Dict[str, float]:
+    """Métricas de qualidade de uma partição (silhouette amostrado; DB e CH são O(n·k))"""
+    return {
+        'inertia': inertia,
+        **silhouette_amostrada(X, labels, tamanho_amostra, random_state),
+        'davies_bouldin': davies_bouldin_score(X, labels),
+        'calinski_harabasz': calinski_harabasz_score(X, labels)
+    }
+
+def _avaliar_k(
+    X: np.ndarray,
+    k: int,
+    usar_minibatch: bool,
+    tamanho_amostra: Optional[int],
+    random_state: int
+) -> Dict[str, float]:
+    """Ajusta um K (executado em worker) e calcula suas métricas"""
+    modelo = _modelo_kmeans(k, usar_minibatch, 'k-means++', SELECAO_K_CONFIG['n_init_rapido'], random_state)
+    labels = modelo.fit_predict(X)
+    return _metricas_k(X, labels, modelo.inertia_, tamanho_amostra, random_state)
+
+def _varredura_warm_start(
+    X: np.ndarray,
+    k_range: range,
+    usar_minibatch: bool,
+    random_state: int
+) -> Dict[int, Tuple[np.ndarray, float]]:
+    """
+    Ajusta K crescentes iniciando cada um dos centróides do K anterior
+
+    O novo centróide é sorteado com probabilidade proporcional à distância²
+    ao centróide mais próximo (passo do k-means++), então cada ajuste parte
+    quase convergido e usa n_init=1.
+
+    Returns:
+        Dicionário {k: (labels, inertia)}
+    """
+    rng = np.random.default_rng(random_state)
+    normas = (X ** 2).sum(axis=1)
+    resultados = {}
+    centros = None
+
+    for k in sorted(k_range):
+        if centros is None or len(centros) >= k:
+            init, n_init = 'k-means++', SELECAO_K_CONFIG['n_init_rapido']
+        else:
+            while len(centros) < k:
+                distancias = normas[:, None] - 2 * X @ centros.T + (centros ** 2).sum(axis=1)
+                distancias = np.maximum(distancias.min(axis=1), 0)
+                probabilidades = distancias / distancias.sum() if distancias.sum() > 0 else None
+                centros = np.vstack([centros, X[rng.choice(len(X), p=probabilidades)]])
+            init, n_init = centros, 1
+
+        modelo = _modelo_kmeans(k, usar_minibatch, init, n_init, random_state)
+        labels = modelo.fit_predict(X)
+        centros = modelo.cluster_centers_
+        resultados[k] = (labels, modelo.inertia_)
+
+    return resultados
+
+def encontrar_melhor_k(
+    X: np.ndarray,
+    k_range: range = range(2, 11),
+    rapido: bool = False,
+    n_jobs: Optional[int] = None,
+    usar_minibatch: Optional[bool] = None,
+    tamanho_amostra: Optional[int] = None,
+    warm_start: bool = False,
+    random_state: int = 42
+) -> Tuple[int, Dict]:
     """
     Encontra melhor número de clusters usando método do cotovelo e silhouette
 
+    No modo rápido os K são ajustados em paralelo (ou em cadeia com warm start),
+    com MiniBatchKMeans opcional e silhouette calculado em amostra estratificada.
+
     Args:
         X: Matriz de features
         k_range: Range de valores de K a testar
+        rapido: Se True, usa a varredura rápida
+        n_jobs: Processos usados no modo rápido (None usa o padrão)
+        usar_minibatch: Usa MiniBatchKMeans (None decide pelo tamanho da base)
+        tamanho_amostra: Tamanho da amostra do silhouette (None usa SELECAO_K_CONFIG)
+        warm_start: Ajusta os K em cadeia, reaproveitando os centróides anteriores;
+            apenas as métricas são calculadas em paralelo
+        random_state: Seed para reprodutibilidade
 
     Returns:
-        Tupla (melhor_k, metricas_por_k)
+        Tupla (melhor_k, metricas_por_k); no modo rápido cada K também traz
+        silhouette_ic e silhouette_amostra
     """
     metricas_por_k = {}
 
-    for k in k_range:
-        labels, model, metricas = kmeans_clustering(X, k)
-
-        metricas_por_k[k] = {
-            'inertia': metricas['inertia'],
-            'silhouette': metricas['silhouette'],
-            'davies_bouldin': metricas['davies_bouldin'],
-            'calinski_harabasz': metricas['calinski_harabasz']
-        }
+    if not rapido:
+        for k in k_range:
+            labels, model, metricas = kmeans_clustering(X, k)
+
+            metricas_por_k[k] = {
+                'inertia': metricas['inertia'],
+                'silhouette': metricas['silhouette'],
+                'davies_bouldin': metricas['davies_bouldin'],
+                'calinski_harabasz': metricas['calinski_harabasz']
+            }
+    else:
+        if usar_minibatch is None:
+            usar_minibatch = len(X) >= SELECAO_K_CONFIG['minibatch_a_partir_de']
+
+        if warm_start:
+            ajustes = _varredura_warm_start(X, k_range, usar_minibatch, random_state)
+            tarefas = {
+                k: (_metricas_k, {
+                    'labels': labels,
+                    'inertia': inertia,
+                    'tamanho_amostra': tamanho_amostra,
+                    'random_state': random_state
+                })
+                for k, (labels, inertia) in ajustes.items()
+            }
+        else:
+            tarefas = {
+                k: (_avaliar_k, {
+                    'k': k,
+                    'usar_minibatch': usar_minibatch,
+                    'tamanho_amostra': tamanho_amostra,
+                    'random_state': random_state
+                })
+                for k in k_range
+            }
+
+        metricas_por_k = executar_tarefas_paralelo(X, tarefas, n_jobs=n_jobs)
 
     # Melhor K baseado em silhouette
-    melhor_k = max(metricas_por_k.keys(), key=lambda k: metricas_por_k[k]['silhouette'])
+    melhor_k = max(metricas_por_k.keys(), key=lambda k: np.nan_to_num(metricas_por_k[k]['silhouette'], nan=-1))
 
     return melhor_k, metricas_por_k
 
-def otimizar_dbscan(X: np.ndarray, eps_range: List[float], min_samples_range: List[int]) -> Dict:
+def otimizar_dbscan(
+    X: np.ndarray,
+    eps_range: List[float],
+    min_samples_range: List[int],
+    tamanho_amostra: Optional[int] = None,
+    backend: str = 'exato',
+    n_arvores: Optional[int] = None
+) -> Dict:
     """
     Otimiza parâmetros do DBSCAN
 
+    O grafo de vizinhança é construído uma única vez no maior eps; cada
+    combinação da grade é obtida filtrando esse grafo, e o silhouette é
+    calculado em amostra estratificada.
+
     Args:
         X: Matriz de features
         eps_range: Lista de valores eps a testar
         min_samples_range: Lista de valores min_samples a testar
+        tamanho_amostra: Tamanho da amostra do silhouette (None usa SELECAO_K_CONFIG)
+        backend: Busca de vizinhos usada para montar o grafo
+        n_arvores: Árvores da busca aproximada (recall x velocidade)
 
     Returns:
         Dicionário com melhores parâmetros e resultados
@@ -338,12 +707,28 @@ def otimizar_dbscan(X: np.ndarray, eps_range: List[float], min_samples_range: Li
     melhor_silhouette = -1
 
     resultados = []
+    grafo = GrafoVizinhanca(X, max(eps_range), busca=criar_busca_vizinhos(backend, len(X), n_arvores=n_arvores))
 
     for eps in eps_range:
         for min_samples in min_samples_range:
-            labels, model, metricas = dbscan_clustering(X, eps, min_samples)
+            labels, _ = grafo.dbscan(eps, min_samples)
+
+            n_clusters = len(np.unique(labels[labels != -1]))
+            n_outliers = int((labels == -1).sum())
+
+            metricas = {
+                'n_clusters': n_clusters,
+                'n_outliers': n_outliers,
+                'perc_outliers': (n_outliers / len(labels)) * 100
+            }
+
+            # Silhouette apenas com mais de 1 cluster, sem os outliers
+            if n_clusters > 1:
+                mask = labels != -1
+                amostrada = silhouette_amostrada(X[mask], labels[mask], tamanho_amostra)
+                metricas['silhouette'] = amostrada['silhouette']
+                metricas['silhouette_ic'] = amostrada['silhouette_ic']
 
-            if 'silhouette' in metricas:
                 sil = metricas['silhouette']
                 if sil > melhor_silhouette:
                     melhor_silhouette = sil
@@ -365,11 +750,122 @@ def otimizar_dbscan(X: np.ndarray, eps_range: List[float], min_samples_range: Li
 # VISUALIZAÇÕES
 # =============================================================================
 
+def reduzir_pontos(
+    X: np.ndarray,
+    labels: np.ndarray,
+    max_pontos: int = VISUALIZACAO_CLUSTERS_CONFIG['max_pontos'],
+    n_bins: int = VISUALIZACAO_CLUSTERS_CONFIG['n_bins'],
+    manter: Optional[np.ndarray] = None,
+    random_state: int = 42
+) -> np.ndarray:
+    """
+    Seleciona os pontos a desenhar preservando a densidade de cada cluster
+
+    O plano (PC1, PC2) é dividido em uma grade n_bins x n_bins; cada célula
+    de cada cluster recebe uma cota proporcional à sua contagem, com ao menos
+    um ponto, de modo que regiões esparsas continuam visíveis. Os pontos em
+    `manter` (por padrão, anomalias/ruído com label -1) são sempre mantidos.
+
+    Args:
+        X: Coordenadas (ao menos 2 colunas)
+        labels: Labels dos clusters
+        max_pontos: Número aproximado de pontos após a redução
+        n_bins: Divisões da grade por eixo
+        manter: Máscara booleana de pontos sempre exibidos
+        random_state: Seed para reprodutibilidade
+
+    Returns:
+        Índices (ordenados) dos pontos selecionados
+    """
+    n = len(X)
+    if n <= max_pontos:
+        return np.arange(n)
+
+    manter = (labels == -1) if manter is None else np.asarray(manter, dtype=bool)
+    candidatos = np.flatnonzero(~manter)
+    orcamento = max(max_pontos - int(manter.sum()), 0)
+
+    if orcamento == 0 or len(candidatos) == 0:
+        return np.flatnonzero(manter)
+
+    # Célula da grade de cada candidato, combinada ao cluster
+    coords = X[candidatos, :2]
+    minimo = coords.min(axis=0)
+    amplitude = np.maximum(coords.max(axis=0) - minimo, 1e-12)
+    grade = np.clip(((coords - minimo) / amplitude * n_bins).astype(np.int64), 0, n_bins - 1)
+    codigo_cluster = pd.factorize(labels[candidatos])[0]
+    celula = pd.factorize(codigo_cluster * n_bins * n_bins + grade[:, 0] * n_bins + grade[:, 1])[0]
+
+    # Ordem aleatória dentro de cada célula e posição de cada ponto nela
+    rng = np.random.default_rng(random_state)
+    ordem = np.lexsort((rng.random(len(candidatos)), celula))
+    contagem = np.bincount(celula)
+    inicio = np.concatenate([[0], np.cumsum(contagem)[:-1]])
+    posicao = np.empty(len(candidatos), dtype=np.int64)
+    posicao[ordem] = np.arange(len(candidatos)) - inicio[celula[ordem]]
+
+    cota = np.maximum(1, np.round(contagem * orcamento / len(candidatos))).astype(np.int64)
+    selecionados = candidatos[posicao < cota[celula]]
+
+    return np.sort(np.concatenate([np.flatnonzero(manter), selecionados]))
+
+def _usar_webgl(n_pontos: int, modo: str) -> bool:
+    """Decide entre Scattergl (WebGL) e Scatter (SVG)"""
+    if modo == 'auto':
+        return n_pontos >= VISUALIZACAO_CLUSTERS_CONFIG['webgl_a_partir_de']
+    return modo == 'webgl'
+
+def _cores_por_label(labels: np.ndarray, indices: np.ndarray, tamanho: int) -> Tuple[Dict, Dict]:
+    """
+    Marcador com cor por ponto e mapa {label: cor}
+
+    As cores seguem a ordem de np.unique (a mesma dos traces por cluster) e são
+    passadas como códigos numéricos com escala discreta, que o Plotly serializa
+    sem validar uma string por ponto.
+    """
+    cores = PALETAS['categorica']
+    unicos, codigos = np.unique(labels, return_inverse=True)
+    mapa = {label: cores[i % len(cores)] for i, label in enumerate(unicos)}
+
+    n_cores = len(unicos)
+    escala = []
+    for i, cor in enumerate(mapa.values()):
+        escala += [[i / n_cores, cor], [(i + 1) / n_cores, cor]]
+
+    marcador = dict(
+        size=tamanho,
+        color=codigos[indices],
+        colorscale=escala,
+        cmin=-0.5,
+        cmax=n_cores - 0.5,
+        showscale=False
+    )
+    return marcador, mapa
+
+def _titulo_reduzido(titulo: str, exibidos: int, total: int) -> str:
+    """Acrescenta ao título a indicação de amostragem, quando houver"""
+    if exibidos >= total:
+        return titulo
+    return f"{titulo}<br><sup>Exibindo {exibidos:,} de {total:,} pontos (amostra por densidade; anomalias completas)</sup>"
+
+def _legenda_clusters(fig: go.Figure, mapa_cores: Dict, **posicao) -> None:
+    """Entradas de legenda (traces vazios) para um trace único colorido por array"""
+    for label, cor in mapa_cores.items():
+        fig.add_trace(
+            go.Scattergl(
+                x=[None], y=[None], mode='markers',
+                name=f'Cluster {label}', marker=dict(size=8, color=cor)
+            ),
+            **posicao
+        )
+
 def visualizar_clusters_2d(
     X_pca: np.ndarray,
     labels: np.ndarray,
     df_original: pd.DataFrame,
-    titulo: str = "Visualização de Clusters"
+    titulo: str = "Visualização de Clusters",
+    modo: str = 'auto',
+    max_pontos: Optional[int] = VISUALIZACAO_CLUSTERS_CONFIG['max_pontos']
 ) -> go.Figure:
     """
     Visualiza clusters em 2D após PCA
@@ -379,32 +875,69 @@ def visualizar_clusters_2d(
         labels: Labels dos clusters
         df_original: DataFrame original com metadados
         titulo: Título do gráfico
+        modo: 'auto', 'webgl' (Scattergl em trace único) ou 'svg' (um trace por cluster)
+        max_pontos: Limite de pontos desenhados (None desenha todos)
 
     Returns:
         Figura Plotly
     """
-    df_plot = pd.DataFrame({
-        'PC1': X_pca[:, 0],
-        'PC2': X_pca[:, 1],
-        'Cluster': labels.astype(str)
-    })
-
-    # Adicionar coluna de identificação se disponível
-    if 'num_grupo' in df_original.columns:
-        df_plot['num_grupo'] = df_original['num_grupo'].values
-
-    fig = px.scatter(
-        df_plot,
-        x='PC1',
-        y='PC2',
-        color='Cluster',
-        title=titulo,
-        hover_data=['num_grupo'] if 'num_grupo' in df_plot.columns else None,
-        color_discrete_sequence=PALETAS['categorica']
-    )
+    labels = np.asarray(labels)
+    num_grupo = df_original['num_grupo'].to_numpy() if 'num_grupo' in df_original.columns else None
+
+    if not _usar_webgl(len(labels), modo):
+        df_plot = pd.DataFrame({
+            'PC1': X_pca[:, 0],
+            'PC2': X_pca[:, 1],
+            'Cluster': labels.astype(str)
+        })
+
+        # Adicionar coluna de identificação se disponível
+        if num_grupo is not None:
+            df_plot['num_grupo'] = num_grupo
+
+        fig = px.scatter(
+            df_plot,
+            x='PC1',
+            y='PC2',
+            color='Cluster',
+            title=titulo,
+            hover_data=['num_grupo'] if 'num_grupo' in df_plot.columns else None,
+            color_discrete_sequence=PALETAS['categorica']
+        )
+
+        fig.update_traces(marker=dict(size=8, line=dict(width=1, color='white')))
+        fig.update_layout(template='plotly_white')
+
+        return fig
+
+    # WebGL: trace único com cores por ponto, após redução por densidade
+    indices = reduzir_pontos(X_pca, labels, max_pontos) if max_pontos else np.arange(len(labels))
+    marcador, mapa_cores = _cores_por_label(labels, indices, tamanho=5)
+
+    fig = go.Figure(go.Scattergl(
+        x=X_pca[indices, 0],
+        y=X_pca[indices, 1],
+        mode='markers',
+        marker=marcador,
+        customdata=np.column_stack([
+            labels[indices],
+            num_grupo[indices] if num_grupo is not None else labels[indices]
+        ]),
+        hovertemplate=(
+            'Cluster %{customdata[0]}'
+            + ('<br>Grupo %{customdata[1]}' if num_grupo is not None else '')
+            + '<br>PC1=%{x:.2f} PC2=%{y:.2f}<extra></extra>'
+        ),
+        showlegend=False
+    ))
+    _legenda_clusters(fig, mapa_cores)
 
-    fig.update_traces(marker=dict(size=8, line=dict(width=1, color='white')))
-    fig.update_layout(template='plotly_white')
+    fig.update_layout(
+        title=_titulo_reduzido(titulo, len(indices), len(labels)),
+        xaxis_title='PC1',
+        yaxis_title='PC2',
+        template='plotly_white'
+    )
 
     return fig
 
@@ -412,52 +945,99 @@ def visualizar_clusters_3d(
     X_pca: np.ndarray,
     labels: np.ndarray,
     df_original: pd.DataFrame,
-    titulo: str = "Visualização 3D de Clusters"
+    titulo: str = "Visualização 3D de Clusters",
+    modo: str = 'auto',
+    max_pontos: Optional[int] = VISUALIZACAO_CLUSTERS_CONFIG['max_pontos']
 ) -> go.Figure:
     """
     Visualiza clusters em 3D após PCA
 
+    O scatter 3D já é desenhado em WebGL; para bases grandes, os pontos são
+    reduzidos por densidade e agrupados em um único trace.
+
     Args:
         X_pca: Dados após PCA (3 componentes)
         labels: Labels dos clusters
         df_original: DataFrame original
         titulo: Título do gráfico
+        modo: 'auto', 'webgl' (trace único reduzido) ou 'svg' (um trace por cluster)
+        max_pontos: Limite de pontos desenhados (None desenha todos)
 
     Returns:
         Figura Plotly
     """
-    df_plot = pd.DataFrame({
-        'PC1': X_pca[:, 0],
-        'PC2': X_pca[:, 1],
-        'PC3': X_pca[:, 2] if X_pca.shape[1] > 2 else 0,
-        'Cluster': labels.astype(str)
-    })
-
-    if 'num_grupo' in df_original.columns:
-        df_plot['num_grupo'] = df_original['num_grupo'].values
-
-    fig = px.scatter_3d(
-        df_plot,
-        x='PC1',
-        y='PC2',
-        z='PC3',
-        color='Cluster',
-        title=titulo,
-        hover_data=['num_grupo'] if 'num_grupo' in df_plot.columns else None,
-        color_discrete_sequence=PALETAS['categorica']
-    )
+    labels = np.asarray(labels)
+    num_grupo = df_original['num_grupo'].to_numpy() if 'num_grupo' in df_original.columns else None
+    pc3 = X_pca[:, 2] if X_pca.shape[1] > 2 else np.zeros(len(X_pca))
+
+    if not _usar_webgl(len(labels), modo):
+        df_plot = pd.DataFrame({
+            'PC1': X_pca[:, 0],
+            'PC2': X_pca[:, 1],
+            'PC3': pc3,
+            'Cluster': labels.astype(str)
+        })
+
+        if num_grupo is not None:
+            df_plot['num_grupo'] = num_grupo
+
+        fig = px.scatter_3d(
+            df_plot,
+            x='PC1',
+            y='PC2',
+            z='PC3',
+            color='Cluster',
+            title=titulo,
+            hover_data=['num_grupo'] if 'num_grupo' in df_plot.columns else None,
+            color_discrete_sequence=PALETAS['categorica']
+        )
+
+        fig.update_traces(marker=dict(size=5, line=dict(width=0.5, color='white')))
+        fig.update_layout(template='plotly_white')
+
+        return fig
+
+    indices = reduzir_pontos(X_pca, labels, max_pontos) if max_pontos else np.arange(len(labels))
+    marcador, mapa_cores = _cores_por_label(labels, indices, tamanho=3)
+
+    fig = go.Figure(go.Scatter3d(
+        x=X_pca[indices, 0],
+        y=X_pca[indices, 1],
+        z=pc3[indices],
+        mode='markers',
+        marker=marcador,
+        customdata=np.column_stack([
+            labels[indices],
+            num_grupo[indices] if num_grupo is not None else labels[indices]
+        ]),
+        hovertemplate=(
+            'Cluster %{customdata[0]}'
+            + ('<br>Grupo %{customdata[1]}' if num_grupo is not None else '')
+            + '<extra></extra>'
+        ),
+        showlegend=False
+    ))
+    for label, cor in mapa_cores.items():
+        fig.add_trace(go.Scatter3d(
+            x=[None], y=[None], z=[None], mode='markers',
+            name=f'Cluster {label}', marker=dict(size=5, color=cor)
+        ))
 
-    fig.update_traces(marker=dict(size=5, line=dict(width=0.5, color='white')))
-    fig.update_layout(template='plotly_white')
+    fig.update_layout(
+        title=_titulo_reduzido(titulo, len(indices), len(labels)),
+        scene=dict(xaxis_title='PC1', yaxis_title='PC2', zaxis_title='PC3'),
+        template='plotly_white'
+    )
 
     return fig
 
-def grafico_elbow(metricas_por_k: Dict) -> go.Figure:
+def grafico_elbow(metricas_por_k: Dict, melhor_k: Optional[int] = None) -> go.Figure:
     """
     Cria gráfico do método do cotovelo
 
     Args:
         metricas_por_k: Dicionário com métricas por valor de K
+        melhor_k: K sugerido, destacado com linha vertical (opcional)
 
     Returns:
         Figura Plotly
@@ -465,6 +1045,8 @@ def grafico_elbow(metricas_por_k: Dict) -> go.Figure:
     k_values = sorted(metricas_por_k.keys())
     inertias = [metricas_por_k[k]['inertia'] for k in k_values]
     silhouettes = [metricas_por_k[k]['silhouette'] for k in k_values]
+    intervalos = [metricas_por_k[k].get('silhouette_ic') for k in k_values]
+    amostras = [metricas_por_k[k].get('silhouette_amostra', '-') for k in k_values]
 
     fig = go.Figure()
 
@@ -473,34 +1055,61 @@ def grafico_elbow(metricas_por_k: Dict) -> go.Figure:
         y=inertias,
         name='Inércia',
         mode='lines+markers',
-        yaxis='y'
+        yaxis='y',
+        hovertemplate='K=%{x}<br>Inércia: %{y:,.0f}<extra></extra>'
     ))
 
+    # Silhouette amostrado: barra de erro com o IC de 95%
+    tem_intervalo = any(ic for ic in intervalos)
+
     fig.add_trace(go.Scatter(
         x=k_values,
         y=silhouettes,
         name='Silhouette Score',
         mode='lines+markers',
-        yaxis='y2'
+        yaxis='y2',
+        error_y=dict(type='data', array=[ic or 0 for ic in intervalos], visible=tem_intervalo),
+        customdata=amostras,
+        hovertemplate='K=%{x}<br>Silhouette: %{y:.3f}<br>Amostra: %{customdata}<extra></extra>'
     ))
 
+    if melhor_k is not None:
+        fig.add_vline(
+            x=melhor_k,
+            line_dash='dash',
+            line_color=CORES['sucesso'],
+            annotation_text=f'K sugerido = {melhor_k}'
+        )
+
     fig.update_layout(
         title='Método do Cotovelo - Seleção de K',
-        xaxis=dict(title='Número de Clusters (K)'),
+        xaxis=dict(title='Número de Clusters (K)', dtick=1),
         yaxis=dict(title='Inércia', side='left'),
         yaxis2=dict(title='Silhouette Score', overlaying='y', side='right'),
+        hovermode='x unified',
         template='plotly_white'
     )
 
     return fig
 
-def comparar_algoritmos(resultados_consenso: Dict, X_pca: np.ndarray) -> go.Figure:
+def comparar_algoritmos(
+    resultados_consenso: Dict,
+    X_pca: np.ndarray,
+    modo: str = 'auto',
+    max_pontos: Optional[int] = VISUALIZACAO_CLUSTERS_CONFIG['max_pontos']
+) -> go.Figure:
     """
     Cria visualização comparativa de múltiplos algoritmos
 
+    No modo WebGL, cada subplot é um único Scattergl colorido por array e
+    todos os subplots mostram o mesmo subconjunto de pontos, que inclui
+    todas as anomalias/ruídos (label -1) de qualquer algoritmo.
+
     Args:
         resultados_consenso: Resultados de todos os algoritmos
         X_pca: Dados após PCA
+        modo: 'auto', 'webgl' ou 'svg' (um trace por cluster por algoritmo)
+        max_pontos: Limite de pontos por subplot (None desenha todos)
 
     Returns:
         Figura Plotly com subplots
@@ -515,35 +1124,76 @@ def comparar_algoritmos(resultados_consenso: Dict, X_pca: np.ndarray) -> go.Figu
     )
 
     cores = PALETAS['categorica']
+    n_pontos = len(X_pca)
+
+    if not _usar_webgl(n_pontos, modo):
+        for idx, (nome, resultado) in enumerate(resultados_consenso.items()):
+            row = idx // 2 + 1
+            col = idx % 2 + 1
+
+            labels = resultado['labels']
+            unique_labels = np.unique(labels)
+
+            for label_idx, label in enumerate(unique_labels):
+                mask = labels == label
+                fig.add_trace(
+                    go.Scatter(
+                        x=X_pca[mask, 0],
+                        y=X_pca[mask, 1],
+                        mode='markers',
+                        name=f'Cluster {label}',
+                        marker=dict(
+                            size=6,
+                            color=cores[label_idx % len(cores)],
+                            line=dict(width=0.5, color='white')
+                        ),
+                        showlegend=(idx == 0)
+                    ),
+                    row=row,
+                    col=col
+                )
+
+        fig.update_layout(
+            title_text='Comparação de Algoritmos de Clustering',
+            template='plotly_white',
+            height=800
+        )
+
+        return fig
+
+    # Mesmo subconjunto em todos os subplots, com as anomalias de todos os algoritmos
+    todos_labels = [np.asarray(res['labels']) for res in resultados_consenso.values()]
+    anomalias = np.logical_or.reduce([labels == -1 for labels in todos_labels])
+    indices = (
+        reduzir_pontos(X_pca, todos_labels[0], max_pontos, manter=anomalias)
+        if max_pontos else np.arange(n_pontos)
+    )
 
-    for idx, (nome, resultado) in enumerate(resultados_consenso.items()):
+    for idx, labels in enumerate(todos_labels):
         row = idx // 2 + 1
         col = idx % 2 + 1
 
-        labels = resultado['labels']
-        unique_labels = np.unique(labels)
-
-        for label_idx, label in enumerate(unique_labels):
-            mask = labels == label
-            fig.add_trace(
-                go.Scatter(
-                    x=X_pca[mask, 0],
-                    y=X_pca[mask, 1],
-                    mode='markers',
-                    name=f'Cluster {label}',
-                    marker=dict(
-                        size=6,
-                        color=cores[label_idx % len(cores)],
-                        line=dict(width=0.5, color='white')
-                    ),
-                    showlegend=(idx == 0)
-                ),
-                row=row,
-                col=col
-            )
+        marcador, mapa_cores = _cores_por_label(labels, indices, tamanho=4)
+
+        fig.add_trace(
+            go.Scattergl(
+                x=X_pca[indices, 0],
+                y=X_pca[indices, 1],
+                mode='markers',
+                marker=marcador,
+                customdata=labels[indices],
+                hovertemplate='Cluster %{customdata}<extra></extra>',
+                showlegend=False
+            ),
+            row=row,
+            col=col
+        )
+
+        if idx == 0:
+            _legenda_clusters(fig, mapa_cores, row=row, col=col)
 
     fig.update_layout(
-        title_text='Comparação de Algoritmos de Clustering',
+        title_text=_titulo_reduzido('Comparação de Algoritmos de Clustering', len(indices), n_pontos),
         template='plotly_white',
         height=800
     )
@@ -0,0 +1,199 @@
+"""
+Módulo de ML em Escala
+Ajusta padronização, PCA, K-Means e Isolation Forest em uma amostra estratificada
+e pontua todos os grupos em lotes vetorizados, gerando uma tabela compacta de scores
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sklearn.cluster import KMeans
+from sklearn.ensemble import IsolationForest
+
+from ..config.settings import ESCALA_ML_CONFIG
+from .registro import PipelineML, ajustar_pipeline
+
+# =============================================================================
+# AMOSTRAGEM ESTRATIFICADA EM FLUXO
+# =============================================================================
+
+def calcular_estratos(valores: pd.Series, largura: float = ESCALA_ML_CONFIG['largura_estrato']) -> np.ndarray:
+    """Estrato de cada linha: faixa do score (0-10, 10-20, ..., 90-100)"""
+    maximo = int(np.ceil(100 / largura)) - 1
+    return np.clip(np.floor(valores.fillna(0).to_numpy() / largura), 0, maximo).astype(int)
+
+def calcular_cotas(contagens: Dict[int, int], tamanho_amostra: int) -> Dict[int, int]:
+    """
+    Distribui a amostra entre os estratos proporcionalmente ao tamanho de cada um
+
+    Args:
+        contagens: Dicionário {estrato: quantidade de grupos}
+        tamanho_amostra: Tamanho total da amostra
+
+    Returns:
+        Dicionário {estrato: cota}, com ao menos 1 grupo por estrato não vazio
+    """
+    total = sum(contagens.values())
+    if total <= tamanho_amostra:
+        return dict(contagens)
+
+    return {
+        estrato: min(qtd, max(1, int(round(qtd * tamanho_amostra / total))))
+        for estrato, qtd in contagens.items()
+        if qtd > 0
+    }
+
+class AmostraEstratificada:
+    """
+    Amostra uniforme por estrato mantida em uma única leitura dos lotes
+
+    Cada linha recebe uma chave aleatória; em cada estrato ficam as `cota`
+    linhas de menor chave (amostragem bottom-k), de modo que a memória é
+    limitada ao tamanho da amostra, independente do tamanho da tabela.
+    """
+
+    def __init__(self, cotas: Dict[int, int], random_state: int = 42):
+        self.cotas = cotas
+        self.rng = np.random.default_rng(random_state)
+        self._partes: Dict[int, pd.DataFrame] = {}
+
+    def adicionar(self, lote: pd.DataFrame, estratos: np.ndarray) -> None:
+        """Incorpora um lote, mantendo apenas as menores chaves de cada estrato"""
+        lote = lote.assign(_chave=self.rng.random(len(lote)), _estrato=estratos)
+
+        for estrato, parte in lote.groupby('_estrato', sort=False):
+            cota = self.cotas.get(estrato, 0)
+            if cota == 0:
+                continue
+
+            atual = self._partes.get(estrato)
+            if atual is not None:
+                parte = pd.concat([atual, parte], ignore_index=True)
+
+            self._partes[estrato] = parte.nsmallest(cota, '_chave')
+
+    def resultado(self) -> pd.DataFrame:
+        """Retorna a amostra acumulada"""
+        if not self._partes:
+            return pd.DataFrame()
+
+        amostra = pd.concat(self._partes.values(), ignore_index=True)
+        return amostra.drop(columns=['_chave', '_estrato'])
+
+# =============================================================================
+# PONTUAÇÃO EM LOTES
+# =============================================================================
+
+def pontuar_lote(pipeline: PipelineML, lote: pd.DataFrame, cluster_alvo: int) -> pd.DataFrame:
+    """
+    Pontua um lote de grupos com o pipeline ajustado (sem reajuste)
+
+    Args:
+        pipeline: Pipeline com modelos 'kmeans' e 'iforest'
+        lote: DataFrame com num_grupo e features
+        cluster_alvo: Cluster K-Means associado a grupo econômico
+
+    Returns:
+        Tabela compacta de scores do lote (tipos reduzidos)
+    """
+    X = pipeline.transformar(lote)
+
+    cluster = pipeline.modelos['kmeans'].predict(X)
+    score_iforest = pipeline.modelos['iforest'].score_samples(X)
+    anomalia = score_iforest < pipeline.modelos['iforest'].offset_
+
+    tabela = pd.DataFrame({
+        'num_grupo': lote['num_grupo'].to_numpy(),
+        'kmeans_cluster': cluster.astype(np.int8),
+        'kmeans_eh_grupo': (cluster == cluster_alvo).astype(np.int8),
+        'iforest_score': score_iforest.astype(np.float32),
+        'iforest_eh_grupo': anomalia.astype(np.int8)
+    })
+    tabela['votos_eh_grupo'] = (tabela['kmeans_eh_grupo'] + tabela['iforest_eh_grupo']).astype(np.int8)
+
+    return tabela
+
+# =============================================================================
+# FLUXO COMPLETO
+# =============================================================================
+
+def ajustar_e_pontuar_em_escala(
+    ler_lotes: Callable[[], Iterable[pd.DataFrame]],
+    contagens_estrato: Dict[int, int],
+    features: List[str],
+    coluna_estrato: str = ESCALA_ML_CONFIG['coluna_estrato'],
+    tamanho_amostra: int = ESCALA_ML_CONFIG['tamanho_amostra'],
+    n_components_pca: Optional[int] = None,
+    n_clusters: int = 2,
+    contamination: float = 0.3,
+    n_jobs: Optional[int] = None,
+    ao_progresso: Optional[Callable[[str, int], None]] = None
+) -> Tuple[PipelineML, pd.DataFrame]:
+    """
+    Ajusta os modelos em uma amostra estratificada e pontua todos os grupos
+
+    São duas leituras em lotes: a primeira monta a amostra, a segunda aplica
+    o pipeline ajustado a cada lote. Nenhum algoritmo O(n²) roda na base toda.
+
+    Args:
+        ler_lotes: Função que devolve um iterador de lotes (DataFrames) da tabela completa
+        contagens_estrato: Quantidade de grupos por estrato (para as cotas)
+        features: Lista de features
+        coluna_estrato: Coluna usada para estratificar (faixas de score)
+        tamanho_amostra: Tamanho da amostra de ajuste
+        n_components_pca: Componentes do PCA (None para não aplicar)
+        n_clusters: Número de clusters do K-Means
+        contamination: Proporção de anomalias do Isolation Forest
+        n_jobs: Processos para ajustar os modelos em paralelo
+        ao_progresso: Callback(mensagem, grupos_processados)
+
+    Returns:
+        Tupla (pipeline, tabela_scores) com uma linha por grupo
+    """
+    # 1ª leitura: amostra estratificada
+    amostragem = AmostraEstratificada(calcular_cotas(contagens_estrato, tamanho_amostra))
+    lidos = 0
+    for lote in ler_lotes():
+        amostragem.adicionar(lote, calcular_estratos(lote[coluna_estrato]))
+        lidos += len(lote)
+        if ao_progresso:
+            ao_progresso("Amostrando grupos...", lidos)
+
+    amostra = amostragem.resultado()
+    if amostra.empty:
+        raise ValueError("Nenhum grupo disponível para ajuste")
+
+    # Ajuste na amostra
+    if ao_progresso:
+        ao_progresso(f"Ajustando modelos em {len(amostra):,} grupos...", lidos)
+
+    pipeline = ajustar_pipeline(
+        amostra,
+        features,
+        {
+            'kmeans': KMeans(n_clusters=n_clusters, random_state=42, n_init=10),
+            'iforest': IsolationForest(contamination=contamination, random_state=42)
+        },
+        n_components_pca,
+        n_jobs=n_jobs
+    )
+
+    # Cluster K-Means com maior score médio na amostra = grupo econômico
+    cluster_alvo = int(
+        amostra.groupby(pipeline.labels_treino['kmeans'])[coluna_estrato].mean().idxmax()
+    )
+    pipeline.metadados.update({'cluster_alvo': cluster_alvo, 'tamanho_amostra': len(amostra)})
+
+    # 2ª leitura: pontuação de todos os grupos
+    tabelas = []
+    pontuados = 0
+    for lote in ler_lotes():
+        tabelas.append(pontuar_lote(pipeline, lote, cluster_alvo))
+        pontuados += len(lote)
+        if ao_progresso:
+            ao_progresso("Pontuando todos os grupos...", pontuados)
+
+    tabela = pd.concat(tabelas, ignore_index=True)
+    tabela['na_amostra'] = tabela['num_grupo'].isin(amostra['num_grupo'])
+
+    return pipeline, tabela
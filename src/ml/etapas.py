@@ -0,0 +1,148 @@
+"""
+Módulo de Cache por Etapa do Pipeline de ML
+Memoriza em disco (joblib.Memory) padronização, PCA e ajuste de cada modelo,
+com chave pelo hash do conteúdo das entradas e dos parâmetros da etapa: ao mudar
+um parâmetro, só a etapa afetada e as seguintes são recalculadas
+"""
+
+import numpy as np
+import streamlit as st
+from joblib import Memory
+from typing import Any, Callable, Dict, Optional, Tuple
+from sklearn.decomposition import PCA
+from sklearn.preprocessing import StandardScaler
+
+from ..config.settings import CACHE_ETAPAS_CONFIG, obter_diretorio_cache
+from .paralelo import Tarefa, _ajustar_estimador, executar_tarefas_paralelo
+
+# =============================================================================
+# ETAPAS (funções de nível de módulo, memorizadas pelo joblib)
+# =============================================================================
+
+def _padronizar(X: np.ndarray) -> Tuple[np.ndarray, StandardScaler]:
+    """Ajusta o StandardScaler e transforma X"""
+    scaler = StandardScaler()
+    return scaler.fit_transform(X), scaler
+
+def _reduzir_pca(X: np.ndarray, n_components: int) -> Tuple[np.ndarray, PCA]:
+    """Ajusta o PCA e projeta X"""
+    pca = PCA(n_components=n_components)
+    return pca.fit_transform(X), pca
+
+# =============================================================================
+# MEMÓRIA
+# =============================================================================
+
+@st.cache_resource
+def obter_memoria_etapas() -> Memory:
+    """Instância única do cache de etapas por processo"""
+    memoria = Memory(obter_diretorio_cache('etapas'), verbose=0)
+    memoria.reduce_size(bytes_limit=CACHE_ETAPAS_CONFIG['bytes_limite'])
+    return memoria
+
+def limpar_cache_etapas() -> None:
+    """Remove todos os resultados intermediários memorizados"""
+    obter_memoria_etapas().clear(warn=False)
+
+def _liberar_espaco() -> None:
+    """Mantém o cache dentro do limite, removendo os itens menos usados"""
+    obter_memoria_etapas().reduce_size(bytes_limit=CACHE_ETAPAS_CONFIG['bytes_limite'])
+
+# =============================================================================
+# ETAPAS EM CACHE
+# =============================================================================
+
+def padronizar_em_cache(X: np.ndarray) -> Tuple[np.ndarray, StandardScaler]:
+    """
+    Padronização memorizada pelo conteúdo de X
+
+    Args:
+        X: Matriz de features
+
+    Returns:
+        Tupla (X_padronizado, scaler)
+    """
+    resultado = obter_memoria_etapas().cache(_padronizar)(np.ascontiguousarray(X))
+    _liberar_espaco()
+    return resultado
+
+def pca_em_cache(X: np.ndarray, n_components: int) -> Tuple[np.ndarray, PCA]:
+    """
+    PCA memorizado pelo conteúdo de X e pelo número de componentes
+
+    Args:
+        X: Matriz padronizada
+        n_components: Número de componentes principais
+
+    Returns:
+        Tupla (X_pca, modelo_pca)
+    """
+    resultado = obter_memoria_etapas().cache(_reduzir_pca)(np.ascontiguousarray(X), n_components)
+    _liberar_espaco()
+    return resultado
+
+def executar_tarefas_em_cache(
+    X: np.ndarray,
+    tarefas: Dict[str, Tarefa],
+    n_jobs: Optional[int] = None,
+    ao_concluir: Optional[Callable[[str, Any], None]] = None
+) -> Dict[str, Any]:
+    """
+    Executa tarefas sobre X reaproveitando resultados memorizados
+
+    Tarefas já presentes no cache (mesmo X, mesma função, mesmos kwargs) são
+    lidas do disco; as demais vão para o pool de processos, cujos workers
+    gravam o resultado no mesmo cache.
+
+    Args:
+        X: Matriz de features
+        tarefas: Dicionário {nome: (função(X, **kwargs), kwargs)}
+        n_jobs: Número de processos para as tarefas pendentes
+        ao_concluir: Callback(nome, resultado) por tarefa concluída
+
+    Returns:
+        Dicionário {nome: resultado}, na ordem original das tarefas
+    """
+    X = np.ascontiguousarray(X)
+    memoria = obter_memoria_etapas()
+    resultados = {}
+    pendentes = {}
+
+    for nome, (funcao, kwargs) in tarefas.items():
+        memorizada = memoria.cache(funcao)
+        if memorizada.check_call_in_cache(X, **kwargs):
+            resultados[nome] = memorizada(X, **kwargs)
+            if ao_concluir:
+                ao_concluir(nome, resultados[nome])
+        else:
+            pendentes[nome] = (memorizada, kwargs)
+
+    if pendentes:
+        resultados.update(executar_tarefas_paralelo(X, pendentes, n_jobs=n_jobs, ao_concluir=ao_concluir))
+        _liberar_espaco()
+
+    return {nome: resultados[nome] for nome in tarefas}
+
+def ajustar_estimadores_em_cache(
+    X: np.ndarray,
+    estimadores: Dict[str, Any],
+    n_jobs: Optional[int] = None,
+    ao_concluir: Optional[Callable[[str, Any], None]] = None
+) -> Dict[str, Tuple[Any, np.ndarray]]:
+    """
+    Ajusta estimadores scikit-learn em paralelo, reaproveitando os já memorizados
+
+    Args:
+        X: Matriz de features
+        estimadores: Dicionário {nome: estimador não ajustado}
+        n_jobs: Número de processos
+        ao_concluir: Callback(nome, (modelo, labels)) por estimador concluído
+
+    Returns:
+        Dicionário {nome: (modelo_ajustado, labels)}
+    """
+    tarefas = {
+        nome: (_ajustar_estimador, {'estimador': estimador})
+        for nome, estimador in estimadores.items()
+    }
+    return executar_tarefas_em_cache(X, tarefas, n_jobs=n_jobs, ao_concluir=ao_concluir)
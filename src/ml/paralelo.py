@@ -0,0 +1,141 @@
+"""
+Módulo de Execução Paralela de Modelos
+Distribui ajustes independentes (K-Means, DBSCAN, Hierárquico, Isolation Forest)
+em um pool de processos, com a matriz X em memória compartilhada somente leitura
+"""
+
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Optional, Tuple
+from sklearn.base import clone
+from threadpoolctl import threadpool_limits
+
+from ..config.settings import ML_N_JOBS_PADRAO
+from ..utils.processos import contexto_processos
+
+# Tarefa: nome -> (função(X, **kwargs), kwargs)
+Tarefa = Tuple[Callable[..., Any], Dict[str, Any]]
+
+# =============================================================================
+# FUNÇÕES EXECUTADAS NOS WORKERS
+# =============================================================================
+
+def _ajustar_estimador(X: np.ndarray, estimador) -> Tuple[Any, np.ndarray]:
+    """Ajusta uma cópia do estimador e retorna (modelo, labels)"""
+    modelo = clone(estimador)
+    labels = modelo.fit_predict(X)
+    return modelo, labels
+
+def _executar_tarefa(
+    nome_shm: str,
+    shape: Tuple[int, ...],
+    dtype: str,
+    funcao: Callable[..., Any],
+    kwargs: Dict[str, Any],
+    threads: int
+) -> Any:
+    """Anexa a memória compartilhada e executa a função sobre X (sem cópia)"""
+    shm = shared_memory.SharedMemory(name=nome_shm)
+    X = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    X.flags.writeable = False
+
+    try:
+        # Evita sobrecarga de threads BLAS/OpenMP com vários processos simultâneos
+        with threadpool_limits(limits=threads):
+            return funcao(X, **kwargs)
+    finally:
+        del X
+        shm.close()
+
+# =============================================================================
+# EXECUÇÃO
+# =============================================================================
+
+def executar_tarefas_paralelo(
+    X: np.ndarray,
+    tarefas: Dict[str, Tarefa],
+    n_jobs: Optional[int] = None,
+    ao_concluir: Optional[Callable[[str, Any], None]] = None
+) -> Dict[str, Any]:
+    """
+    Executa tarefas independentes sobre a mesma matriz X em um pool de processos
+
+    A matriz é copiada uma única vez para um segmento de memória compartilhada,
+    lido pelos workers sem serialização. Os resultados são entregues à medida
+    que cada tarefa termina, de modo que o tempo total é o da tarefa mais lenta.
+
+    Args:
+        X: Matriz de features
+        tarefas: Dicionário {nome: (função(X, **kwargs), kwargs)}; as funções
+            devem ser de nível de módulo (serializáveis)
+        n_jobs: Número de processos (None usa ML_N_JOBS_PADRAO, 1 executa em série)
+        ao_concluir: Callback(nome, resultado) chamado no processo principal
+            assim que cada tarefa termina
+
+    Returns:
+        Dicionário {nome: resultado}, na ordem original das tarefas
+    """
+    n_jobs = ML_N_JOBS_PADRAO if n_jobs is None else n_jobs
+    n_jobs = max(1, min(n_jobs, len(tarefas)))
+    resultados = {}
+
+    if n_jobs == 1:
+        for nome, (funcao, kwargs) in tarefas.items():
+            resultados[nome] = funcao(X, **kwargs)
+            if ao_concluir:
+                ao_concluir(nome, resultados[nome])
+        return resultados
+
+    X = np.ascontiguousarray(X)
+    threads = max(1, (os.cpu_count() or 1) // n_jobs)
+
+    shm = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+    try:
+        compartilhado = np.ndarray(X.shape, dtype=X.dtype, buffer=shm.buf)
+        compartilhado[:] = X
+        del compartilhado
+
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=contexto_processos()) as executor:
+            futuros = {
+                executor.submit(
+                    _executar_tarefa, shm.name, X.shape, X.dtype.str, funcao, kwargs, threads
+                ): nome
+                for nome, (funcao, kwargs) in tarefas.items()
+            }
+
+            for futuro in as_completed(futuros):
+                nome = futuros[futuro]
+                resultados[nome] = futuro.result()
+                if ao_concluir:
+                    ao_concluir(nome, resultados[nome])
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return {nome: resultados[nome] for nome in tarefas}
+
+def ajustar_estimadores_paralelo(
+    X: np.ndarray,
+    estimadores: Dict[str, Any],
+    n_jobs: Optional[int] = None,
+    ao_concluir: Optional[Callable[[str, Any], None]] = None
+) -> Dict[str, Tuple[Any, np.ndarray]]:
+    """
+    Ajusta estimadores scikit-learn independentes em paralelo
+
+    Args:
+        X: Matriz de features
+        estimadores: Dicionário {nome: estimador não ajustado}
+        n_jobs: Número de processos
+        ao_concluir: Callback(nome, (modelo, labels)) por estimador concluído
+
+    Returns:
+        Dicionário {nome: (modelo_ajustado, labels)}
+    """
+    tarefas = {
+        nome: (_ajustar_estimador, {'estimador': estimador})
+        for nome, estimador in estimadores.items()
+    }
+    return executar_tarefas_paralelo(X, tarefas, n_jobs=n_jobs, ao_concluir=ao_concluir)
@@ -0,0 +1,359 @@
+"""
+Módulo de Registro de Modelos
+Persiste pipelines ajustados (padronização, PCA e modelos) em disco, versionados
+por dados, features e hiperparâmetros, para reutilização entre sessões
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import joblib
+import numpy as np
+import pandas as pd
+import streamlit as st
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sklearn.cluster import DBSCAN
+from sklearn.decomposition import PCA
+from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import StandardScaler
+
+from ..config.settings import REGISTRO_MODELOS_CONFIG, obter_diretorio_cache
+from .etapas import ajustar_estimadores_em_cache, padronizar_em_cache, pca_em_cache
+
+# =============================================================================
+# VERSIONAMENTO
+# =============================================================================
+
+def calcular_versao_dados(df: pd.DataFrame, colunas: Optional[List[str]] = None) -> str:
+    """
+    Calcula a versão (hash de conteúdo) de um DataFrame
+
+    Args:
+        df: DataFrame com dados
+        colunas: Colunas consideradas (se None, usa todas)
+
+    Returns:
+        Hash hexadecimal curto que muda sempre que os dados mudam
+    """
+    dados = df[colunas] if colunas else df
+    hashes = pd.util.hash_pandas_object(dados, index=False).values
+    return hashlib.sha256(hashes.tobytes()).hexdigest()[:16]
+
+def gerar_chave_modelo(versao_dados: str, features: List[str], hiperparametros: Dict[str, Any]) -> str:
+    """Gera a chave do registro a partir de (versão dos dados, features, hiperparâmetros)"""
+    payload = json.dumps(
+        {'dados': versao_dados, 'features': list(features), 'params': hiperparametros},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:20]
+
+def _assinatura_configuracao(features: List[str], hiperparametros: Dict[str, Any]) -> str:
+    """Identifica modelos compatíveis (mesmas features e hiperparâmetros) independente dos dados"""
+    return gerar_chave_modelo('', features, hiperparametros)
+
+# =============================================================================
+# PIPELINE AJUSTADO
+# =============================================================================
+
+def _prever_dbscan(modelo: DBSCAN, X: np.ndarray) -> np.ndarray:
+    """Atribui novos pontos ao cluster do core sample mais próximo (ou -1 se além de eps)"""
+    if len(modelo.core_sample_indices_) == 0:
+        return np.full(len(X), -1, dtype=int)
+
+    vizinhos = NearestNeighbors(n_neighbors=1).fit(modelo.components_)
+    distancias, indices = vizinhos.kneighbors(X)
+
+    labels = modelo.labels_[modelo.core_sample_indices_][indices[:, 0]]
+    labels[distancias[:, 0] > modelo.eps] = -1
+    return labels
+
+class PipelineML:
+    """Pipeline ajustado: padronização, PCA opcional e um ou mais modelos"""
+
+    def __init__(
+        self,
+        features: List[str],
+        scaler: StandardScaler,
+        pca: Optional[PCA] = None,
+        modelos: Optional[Dict[str, Any]] = None,
+        labels_treino: Optional[Dict[str, np.ndarray]] = None,
+        metadados: Optional[Dict[str, Any]] = None
+    ):
+        self.features = list(features)
+        self.scaler = scaler
+        self.pca = pca
+        self.modelos = modelos or {}
+        self.labels_treino = labels_treino or {}
+        self.metadados = metadados or {}
+
+    def transformar(self, df: pd.DataFrame) -> np.ndarray:
+        """Aplica padronização e PCA já ajustados"""
+        dados = df[self.features].fillna(0)
+        if getattr(self.scaler, 'feature_names_in_', None) is None:
+            # Scaler ajustado em matriz (cache por etapa), sem nomes de colunas
+            dados = dados.to_numpy()
+        X = self.scaler.transform(dados)
+        if self.pca is not None:
+            X = self.pca.transform(X)
+        return X
+
+    def prever(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Rotula novas linhas com os modelos ajustados, sem reajuste
+
+        Returns:
+            Dicionário {nome_modelo: labels}
+        """
+        X = self.transformar(df)
+        labels = {}
+
+        for nome, modelo in self.modelos.items():
+            if isinstance(modelo, DBSCAN):
+                labels[nome] = _prever_dbscan(modelo, X)
+            else:
+                labels[nome] = modelo.predict(X)
+
+        return labels
+
+    def score(self, novas_linhas: pd.DataFrame) -> pd.DataFrame:
+        """
+        Pontua grupos novos ou alterados com os modelos já ajustados
+
+        Args:
+            novas_linhas: DataFrame com as colunas de features (e opcionalmente num_grupo)
+
+        Returns:
+            DataFrame com uma coluna de label por modelo e, quando disponível,
+            o score de anomalia (quanto menor, mais anômalo)
+        """
+        resultado = pd.DataFrame(index=novas_linhas.index)
+        if 'num_grupo' in novas_linhas.columns:
+            resultado['num_grupo'] = novas_linhas['num_grupo']
+
+        for nome, labels in self.prever(novas_linhas).items():
+            resultado[f'{nome}_label'] = labels
+
+        X = self.transformar(novas_linhas)
+        for nome, modelo in self.modelos.items():
+            if hasattr(modelo, 'score_samples') and not isinstance(modelo, DBSCAN):
+                resultado[f'{nome}_score'] = modelo.score_samples(X)
+
+        return resultado
+
+def ajustar_pipeline(
+    df: pd.DataFrame,
+    features: List[str],
+    modelos: Dict[str, Any],
+    n_components_pca: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+    ao_concluir: Optional[Callable[[str, Any], None]] = None
+) -> PipelineML:
+    """
+    Ajusta padronização, PCA e modelos, guardando os labels de treino
+
+    Cada etapa é memorizada pelo conteúdo da sua entrada e pelos seus
+    parâmetros: mudar o PCA não refaz a padronização, e mudar um modelo
+    não refaz os demais.
+
+    Args:
+        df: DataFrame com dados de treino
+        features: Lista de features
+        modelos: Dicionário {nome: estimador não ajustado}
+        n_components_pca: Componentes do PCA (None para não aplicar)
+        n_jobs: Processos para ajustar os modelos em paralelo (1 = em série)
+        ao_concluir: Callback(nome, (modelo, labels)) chamado assim que cada
+            modelo termina (ou é lido do cache), para progresso por modelo
+
+    Returns:
+        PipelineML ajustado
+    """
+    X = df[features].fillna(0).to_numpy()
+
+    X_transformed, scaler = padronizar_em_cache(X)
+
+    pca = None
+    if n_components_pca:
+        X_transformed, pca = pca_em_cache(X_transformed, n_components_pca)
+
+    resultados = ajustar_estimadores_em_cache(X_transformed, modelos, n_jobs=n_jobs, ao_concluir=ao_concluir)
+    ajustados = {nome: modelo for nome, (modelo, _) in resultados.items()}
+    labels_treino = {nome: labels for nome, (_, labels) in resultados.items()}
+
+    return PipelineML(
+        features=features,
+        scaler=scaler,
+        pca=pca,
+        modelos=ajustados,
+        labels_treino=labels_treino,
+        metadados={'n_amostras': len(df)}
+    )
+
+# =============================================================================
+# REGISTRO EM DISCO
+# =============================================================================
+
+class RegistroModelos:
+    """Registro de pipelines persistidos com joblib, com cache em memória do processo"""
+
+    def __init__(self, diretorio: Optional[str] = None, max_modelos: int = REGISTRO_MODELOS_CONFIG['max_modelos']):
+        self.diretorio = diretorio or obter_diretorio_cache('modelos')
+        self.max_modelos = max_modelos
+        self._memoria: Dict[str, PipelineML] = {}
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, f"{chave}.joblib")
+
+    def _caminho_metadados(self, chave: str) -> str:
+        return os.path.join(self.diretorio, f"{chave}.json")
+
+    def existe(self, chave: str) -> bool:
+        """Verifica se há pipeline registrado para a chave"""
+        return chave in self._memoria or os.path.exists(self._caminho(chave))
+
+    def salvar(
+        self,
+        pipeline: PipelineML,
+        versao_dados: str,
+        hiperparametros: Dict[str, Any]
+    ) -> str:
+        """
+        Persiste um pipeline ajustado
+
+        Returns:
+            Chave do registro
+        """
+        chave = gerar_chave_modelo(versao_dados, pipeline.features, hiperparametros)
+
+        pipeline.metadados.update({
+            'chave': chave,
+            'versao_dados': versao_dados,
+            'configuracao': _assinatura_configuracao(pipeline.features, hiperparametros),
+            'features': pipeline.features,
+            'hiperparametros': hiperparametros,
+            'criado_em': time.time()
+        })
+
+        # Grava em arquivos temporários únicos por processo/thread e renomeia,
+        # para não expor modelo ou metadados incompletos
+        sufixo = f".tmp{os.getpid()}_{threading.get_ident()}"
+
+        caminho_tmp = f"{self._caminho(chave)}{sufixo}"
+        joblib.dump(pipeline, caminho_tmp)
+        os.replace(caminho_tmp, self._caminho(chave))
+
+        caminho_tmp = f"{self._caminho_metadados(chave)}{sufixo}"
+        with open(caminho_tmp, 'w', encoding='utf-8') as f:
+            json.dump(pipeline.metadados, f, default=str)
+        os.replace(caminho_tmp, self._caminho_metadados(chave))
+
+        self._memoria[chave] = pipeline
+        self._limpar_antigos()
+        return chave
+
+    def carregar(self, chave: str) -> Optional[PipelineML]:
+        """Carrega pipeline pela chave (memória do processo, depois disco)"""
+        if chave in self._memoria:
+            return self._memoria[chave]
+
+        caminho = self._caminho(chave)
+        if not os.path.exists(caminho):
+            return None
+
+        try:
+            pipeline = joblib.load(caminho)
+        except Exception:
+            return None
+
+        self._memoria[chave] = pipeline
+        return pipeline
+
+    def listar(self) -> pd.DataFrame:
+        """Lista os pipelines registrados (mais recentes primeiro)"""
+        registros = []
+        for arquivo in os.listdir(self.diretorio):
+            if not arquivo.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.diretorio, arquivo), encoding='utf-8') as f:
+                    registros.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+
+        if not registros:
+            return pd.DataFrame(columns=['chave', 'versao_dados', 'configuracao', 'n_amostras', 'criado_em'])
+
+        return pd.DataFrame(registros).sort_values('criado_em', ascending=False).reset_index(drop=True)
+
+    def remover(self, chave: str) -> None:
+        """Remove um pipeline do registro"""
+        self._memoria.pop(chave, None)
+        for caminho in (self._caminho(chave), self._caminho_metadados(chave)):
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+    def _limpar_antigos(self) -> None:
+        """Mantém apenas os max_modelos pipelines mais recentes"""
+        df = self.listar()
+        for chave in df['chave'].iloc[self.max_modelos:]:
+            self.remover(chave)
+
+    def ultimo_compativel(self, features: List[str], hiperparametros: Dict[str, Any]) -> Optional[PipelineML]:
+        """Retorna o pipeline mais recente com as mesmas features e hiperparâmetros, de qualquer versão dos dados"""
+        df = self.listar()
+        if df.empty:
+            return None
+
+        configuracao = _assinatura_configuracao(features, hiperparametros)
+        compativeis = df[df['configuracao'] == configuracao]
+        if compativeis.empty:
+            return None
+
+        return self.carregar(compativeis.iloc[0]['chave'])
+
+    def obter_ou_ajustar(
+        self,
+        df: pd.DataFrame,
+        features: List[str],
+        hiperparametros: Dict[str, Any],
+        ajustar: Callable[[], PipelineML],
+        reutilizar_compativel: bool = False
+    ) -> Tuple[PipelineML, Dict[str, np.ndarray], str]:
+        """
+        Obtém pipeline do registro ou ajusta e registra um novo
+
+        Args:
+            df: DataFrame a rotular (com num_grupo e features)
+            features: Lista de features
+            hiperparametros: Hiperparâmetros que identificam o pipeline
+            ajustar: Função que ajusta um novo PipelineML sobre df
+            reutilizar_compativel: Se True e os dados mudaram, pontua df com o
+                último pipeline compatível em vez de reajustar
+
+        Returns:
+            Tupla (pipeline, labels_por_modelo, origem) com origem em
+            'registro', 'compativel' ou 'ajustado'
+        """
+        colunas_versao = [c for c in ['num_grupo'] + list(features) if c in df.columns]
+        versao_dados = calcular_versao_dados(df, colunas_versao)
+        chave = gerar_chave_modelo(versao_dados, features, hiperparametros)
+
+        pipeline = self.carregar(chave)
+        if pipeline is not None:
+            return pipeline, pipeline.labels_treino, 'registro'
+
+        if reutilizar_compativel:
+            pipeline = self.ultimo_compativel(features, hiperparametros)
+            if pipeline is not None:
+                return pipeline, pipeline.prever(df), 'compativel'
+
+        pipeline = ajustar()
+        self.salvar(pipeline, versao_dados, hiperparametros)
+        return pipeline, pipeline.labels_treino, 'ajustado'
+
+@st.cache_resource
+def obter_registro_modelos() -> RegistroModelos:
+    """Instância única do registro por processo (mantém o cache em memória entre reruns)"""
+    return RegistroModelos()
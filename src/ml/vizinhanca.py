@@ -0,0 +1,411 @@
+"""
+Módulo de Busca e Grafo de Vizinhança
+Backends de busca de vizinhos (exato com KD/Ball tree ou aproximado com floresta
+de projeções aleatórias) e grafo de vizinhos por raio reutilizado pelo DBSCAN
+"""
+
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, Optional, Tuple
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.neighbors import NearestNeighbors
+
+from ..config.settings import VIZINHANCA_CONFIG
+
+# Vizinhos por raio em formato CSR: (indptr, indices, distancias), linhas ordenadas
+# por distância e incluindo o próprio ponto
+VizinhosRaio = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+# =============================================================================
+# BACKENDS DE BUSCA DE VIZINHOS
+# =============================================================================
+
+class BuscaVizinhos(ABC):
+    """
+    Interface dos backends de busca de vizinhos sobre os próprios pontos ajustados
+
+    knn() exclui o próprio ponto (como kneighbors() do scikit-learn);
+    raio() inclui o próprio ponto (como radius_neighbors(X)).
+    """
+
+    @abstractmethod
+    def ajustar(self, X: np.ndarray) -> 'BuscaVizinhos':
+        """Indexa os pontos X e retorna o próprio backend"""
+
+    @abstractmethod
+    def knn(self, n_vizinhos: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Retorna (distancias, indices) de shape (n, n_vizinhos), ordenados"""
+
+    @abstractmethod
+    def raio(self, raio: float) -> VizinhosRaio:
+        """Retorna os vizinhos até o raio em formato CSR"""
+
+class BuscaExata(BuscaVizinhos):
+    """Busca exata com as árvores do scikit-learn (KD tree, Ball tree ou força bruta)"""
+
+    def __init__(self, algoritmo: str = 'auto'):
+        self.algoritmo = algoritmo
+
+    def ajustar(self, X: np.ndarray) -> 'BuscaExata':
+        self.X = X
+        self.modelo = NearestNeighbors(algorithm=self.algoritmo).fit(X)
+        return self
+
+    def knn(self, n_vizinhos: int) -> Tuple[np.ndarray, np.ndarray]:
+        return self.modelo.kneighbors(n_neighbors=n_vizinhos)
+
+    def raio(self, raio: float) -> VizinhosRaio:
+        distancias, indices = self.modelo.radius_neighbors(self.X, radius=raio, sort_results=True)
+
+        tamanhos = np.fromiter((len(d) for d in distancias), dtype=np.int64, count=len(self.X))
+        indptr = np.concatenate([[0], np.cumsum(tamanhos)])
+        if not len(self.X):
+            return indptr, np.empty(0, dtype=np.int64), np.empty(0)
+
+        return indptr, np.concatenate(indices).astype(np.int64), np.concatenate(distancias)
+
+class BuscaFlorestaRP(BuscaVizinhos):
+    """
+    Busca aproximada com floresta de árvores de projeção aleatória (NumPy)
+
+    Cada árvore divide os pontos recursivamente pela mediana da projeção em
+    uma direção aleatória, até folhas de tamanho_folha a 2 * tamanho_folha
+    pontos. Os candidatos de um ponto são os que dividem folha com ele em
+    alguma árvore; as distâncias são exatas entre candidatos. No k-NN, os
+    vizinhos ainda são refinados com os vizinhos dos vizinhos (NN-descent).
+    Mais árvores e refinamentos aumentam o recall e o custo.
+    """
+
+    def __init__(
+        self,
+        n_arvores: int = VIZINHANCA_CONFIG['n_arvores'],
+        tamanho_folha: int = VIZINHANCA_CONFIG['tamanho_folha'],
+        n_refinamentos: int = VIZINHANCA_CONFIG['n_refinamentos'],
+        random_state: int = 42,
+        tamanho_bloco: int = 256
+    ):
+        self.n_arvores = n_arvores
+        self.tamanho_folha = tamanho_folha
+        self.n_refinamentos = n_refinamentos
+        self.random_state = random_state
+        self.tamanho_bloco = tamanho_bloco
+
+    def ajustar(self, X: np.ndarray) -> 'BuscaFlorestaRP':
+        # float32 reduz pela metade o tráfego de memória nas distâncias entre candidatos
+        self.X = np.ascontiguousarray(X, dtype=np.float32)
+        rng = np.random.default_rng(self.random_state)
+        self.folhas = [self._construir_arvore(rng) for _ in range(self.n_arvores)]
+        return self
+
+    def _construir_arvore(self, rng: np.random.Generator) -> np.ndarray:
+        """Divide todos os nós de um nível de uma vez; retorna a matriz de folhas"""
+        n, d = self.X.shape
+        niveis = int(np.floor(np.log2(max(n / self.tamanho_folha, 1))))
+        no = np.zeros(n, dtype=np.int64)
+
+        for nivel in range(niveis):
+            n_nos = 2 ** nivel
+            direcoes = rng.normal(size=(n_nos, d))
+            projecao = np.einsum('ij,ij->i', self.X, direcoes[no])
+
+            # Posição de cada ponto dentro do seu nó, ordenado pela projeção
+            ordem = np.lexsort((projecao, no))
+            contagens = np.bincount(no, minlength=n_nos)
+            inicios = np.concatenate([[0], np.cumsum(contagens)[:-1]])
+            posicao = np.empty(n, dtype=np.int64)
+            posicao[ordem] = np.arange(n) - inicios[no[ordem]]
+
+            no = 2 * no + (posicao >= contagens[no] // 2)
+
+        return self._agrupar_folhas(no)
+
+    @staticmethod
+    def _agrupar_folhas(no: np.ndarray) -> np.ndarray:
+        """Matriz (n_folhas x maior_folha) com os índices de cada folha (-1 = vazio)"""
+        ordem = np.argsort(no, kind='stable')
+        _, inversos, contagens = np.unique(no[ordem], return_inverse=True, return_counts=True)
+        inicios = np.concatenate([[0], np.cumsum(contagens)[:-1]])
+
+        folhas = np.full((len(contagens), contagens.max()), -1, dtype=np.int64)
+        folhas[inversos, np.arange(len(no)) - inicios[inversos]] = ordem
+        return folhas
+
+    def _candidatos(self) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Percorre as folhas de todas as árvores em blocos
+
+        Yields:
+            Tupla (pontos, vizinhos, distancias): para cada ponto, todos os
+            pontos da sua folha (-1 / inf nas posições vazias)
+        """
+        for folhas in self.folhas:
+            for inicio in range(0, len(folhas), self.tamanho_bloco):
+                bloco = folhas[inicio:inicio + self.tamanho_bloco]
+                validos = bloco >= 0
+
+                P = self.X[np.where(validos, bloco, 0)]
+                normas = np.einsum('bid,bid->bi', P, P)
+                distancias = normas[:, :, None] + normas[:, None, :] - 2 * np.einsum('bid,bjd->bij', P, P)
+                distancias = np.sqrt(np.maximum(distancias, 0))
+
+                diagonal = np.arange(bloco.shape[1])
+                distancias[:, diagonal, diagonal] = 0
+                distancias[~np.broadcast_to(validos[:, None, :], distancias.shape)] = np.inf
+
+                vizinhos = np.broadcast_to(bloco[:, None, :], distancias.shape)
+                yield bloco[validos], vizinhos[validos], distancias[validos]
+
+    @staticmethod
+    def _mesclar(
+        melhores_d: np.ndarray,
+        melhores_i: np.ndarray,
+        pontos: np.ndarray,
+        cand_i: np.ndarray,
+        cand_d: np.ndarray
+    ) -> None:
+        """Mescla candidatos nos k melhores vizinhos de cada ponto (in-place, sem repetidos)"""
+        k = melhores_i.shape[1]
+        cand_i = np.concatenate([melhores_i[pontos], cand_i], axis=1)
+        cand_d = np.concatenate([melhores_d[pontos], cand_d], axis=1)
+        cand_d[(cand_i == pontos[:, None]) | (cand_i < 0)] = np.inf
+
+        # Remove candidatos repetidos (mesmo vizinho visto mais de uma vez)
+        ordem = np.argsort(cand_i, axis=1, kind='stable')
+        cand_i = np.take_along_axis(cand_i, ordem, axis=1)
+        cand_d = np.take_along_axis(cand_d, ordem, axis=1)
+        cand_d[:, 1:][cand_i[:, 1:] == cand_i[:, :-1]] = np.inf
+
+        topo = np.argpartition(cand_d, k - 1, axis=1)[:, :k]
+        melhores_i[pontos] = np.take_along_axis(cand_i, topo, axis=1)
+        melhores_d[pontos] = np.take_along_axis(cand_d, topo, axis=1)
+
+    def knn(self, n_vizinhos: int) -> Tuple[np.ndarray, np.ndarray]:
+        if n_vizinhos >= self.tamanho_folha:
+            raise ValueError(f"n_vizinhos ({n_vizinhos}) deve ser menor que tamanho_folha ({self.tamanho_folha})")
+
+        n = len(self.X)
+        melhores_d = np.full((n, n_vizinhos), np.inf)
+        melhores_i = np.full((n, n_vizinhos), -1, dtype=np.int64)
+
+        for pontos, vizinhos, distancias in self._candidatos():
+            self._mesclar(melhores_d, melhores_i, pontos, vizinhos, distancias)
+
+        # Refinamento (NN-descent): vizinhos dos vizinhos costumam ser vizinhos
+        normas = np.einsum('ij,ij->i', self.X, self.X)
+        for _ in range(self.n_refinamentos):
+            atuais = melhores_i.copy()
+            for inicio in range(0, n, self.tamanho_bloco * 4):
+                pontos = np.arange(inicio, min(inicio + self.tamanho_bloco * 4, n))
+                candidatos = atuais[np.maximum(atuais[pontos], 0)].reshape(len(pontos), -1)
+
+                distancias = (
+                    normas[pontos, None] + normas[candidatos]
+                    - 2 * np.einsum('bd,bcd->bc', self.X[pontos], self.X[candidatos])
+                )
+                self._mesclar(melhores_d, melhores_i, pontos, candidatos, np.sqrt(np.maximum(distancias, 0)))
+
+        ordem = np.argsort(melhores_d, axis=1)
+        return np.take_along_axis(melhores_d, ordem, axis=1), np.take_along_axis(melhores_i, ordem, axis=1)
+
+    def raio(self, raio: float) -> VizinhosRaio:
+        n = len(self.X)
+        linhas, colunas, valores = [], [], []
+
+        for pontos, vizinhos, distancias in self._candidatos():
+            dentro = distancias <= raio
+            linhas.append(np.broadcast_to(pontos[:, None], dentro.shape)[dentro])
+            colunas.append(vizinhos[dentro])
+            valores.append(distancias[dentro])
+
+        linhas, colunas, valores = np.concatenate(linhas), np.concatenate(colunas), np.concatenate(valores)
+
+        # Pares repetidos entre árvores
+        _, unicos = np.unique(linhas * n + colunas, return_index=True)
+        linhas, colunas, valores = linhas[unicos], colunas[unicos], valores[unicos]
+
+        ordem = np.lexsort((valores, linhas))
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(linhas, minlength=n))])
+        return indptr, colunas[ordem], valores[ordem]
+
+def criar_busca_vizinhos(
+    backend: str = VIZINHANCA_CONFIG['backend'],
+    n_amostras: int = 0,
+    n_arvores: Optional[int] = None,
+    tamanho_folha: Optional[int] = None
+) -> BuscaVizinhos:
+    """
+    Cria o backend de busca de vizinhos
+
+    Args:
+        backend: 'exato', 'kd_tree', 'ball_tree', 'aproximado' ou 'auto'
+            (aproximado acima de VIZINHANCA_CONFIG['limite_exato'] amostras)
+        n_amostras: Número de linhas (usado no modo 'auto')
+        n_arvores: Árvores da floresta aproximada (mais árvores = maior recall)
+        tamanho_folha: Tamanho mínimo das folhas (deve exceder o número de vizinhos)
+
+    Returns:
+        Backend não ajustado
+    """
+    if backend == 'auto':
+        backend = 'aproximado' if n_amostras > VIZINHANCA_CONFIG['limite_exato'] else 'exato'
+
+    if backend == 'aproximado':
+        return BuscaFlorestaRP(
+            n_arvores=n_arvores or VIZINHANCA_CONFIG['n_arvores'],
+            tamanho_folha=tamanho_folha or VIZINHANCA_CONFIG['tamanho_folha']
+        )
+
+    if backend in ('kd_tree', 'ball_tree'):
+        return BuscaExata(backend)
+
+    return BuscaExata('auto')
+
+def estimar_recall(
+    busca: BuscaVizinhos,
+    X: np.ndarray,
+    n_vizinhos: int = 10,
+    tamanho_amostra: int = 500,
+    random_state: int = 42
+) -> float:
+    """
+    Mede o recall@k de um backend ajustado contra a busca exata, em uma amostra
+
+    Args:
+        busca: Backend já ajustado sobre X
+        X: Matriz de features
+        n_vizinhos: k usado na comparação
+        tamanho_amostra: Pontos consultados
+        random_state: Seed para reprodutibilidade
+
+    Returns:
+        Fração dos k vizinhos exatos encontrados pelo backend (0 a 1)
+    """
+    rng = np.random.default_rng(random_state)
+    amostra = rng.choice(len(X), size=min(tamanho_amostra, len(X)), replace=False)
+
+    _, aproximados = busca.knn(n_vizinhos)
+
+    # Vizinhos exatos por força bruta, em blocos de consultas
+    normas = (X ** 2).sum(axis=1)
+    acertos = []
+    for inicio in range(0, len(amostra), 50):
+        consulta = amostra[inicio:inicio + 50]
+        distancias = normas[consulta, None] + normas[None, :] - 2 * X[consulta] @ X.T
+        distancias[np.arange(len(consulta)), consulta] = np.inf
+        exatos = np.argpartition(distancias, n_vizinhos - 1, axis=1)[:, :n_vizinhos]
+        acertos.extend(len(np.intersect1d(e, aproximados[p])) for e, p in zip(exatos, consulta))
+
+    return float(np.mean(acertos) / n_vizinhos)
+
+# =============================================================================
+# GRAFO DE VIZINHANÇA POR RAIO
+# =============================================================================
+
+class GrafoVizinhanca:
+    """
+    Grafo esparso de vizinhos até eps_max (distâncias ordenadas por linha)
+
+    Cada eps <= eps_max é obtido filtrando as distâncias já calculadas, e cada
+    min_samples a partir da distância-core (distância ao min_samples-ésimo
+    vizinho, contando o próprio ponto), de modo que a grade inteira custa
+    aproximadamente um ajuste de DBSCAN.
+    """
+
+    def __init__(
+        self,
+        X: np.ndarray,
+        eps_max: float,
+        algoritmo: str = 'auto',
+        busca: Optional[BuscaVizinhos] = None
+    ):
+        """
+        Args:
+            X: Matriz de features
+            eps_max: Maior raio da grade
+            algoritmo: Estrutura de busca do scikit-learn ('auto', 'ball_tree', 'kd_tree')
+            busca: Backend de busca (não ajustado); se None, usa BuscaExata(algoritmo)
+        """
+        self.eps_max = eps_max
+        self.n = len(X)
+
+        busca = (busca or BuscaExata(algoritmo)).ajustar(X)
+        self.indptr, self.indices, self.distancias = busca.raio(eps_max)
+
+        self.tamanhos = np.diff(self.indptr)
+        self.linhas = np.repeat(np.arange(self.n), self.tamanhos)
+
+        self._distancias_core: Dict[int, np.ndarray] = {}
+
+    @property
+    def n_arestas(self) -> int:
+        """Número de pares (i, j) armazenados, incluindo o próprio ponto"""
+        return len(self.distancias)
+
+    def distancia_core(self, min_samples: int) -> np.ndarray:
+        """
+        Distância de cada ponto ao seu min_samples-ésimo vizinho (inf se além de eps_max)
+
+        Args:
+            min_samples: Número mínimo de amostras (inclui o próprio ponto)
+
+        Returns:
+            Array com a distância-core de cada ponto
+        """
+        if min_samples not in self._distancias_core:
+            validos = self.tamanhos >= min_samples
+            posicoes = self.indptr[:-1] + min_samples - 1
+
+            core = np.full(self.n, np.inf)
+            core[validos] = self.distancias[posicoes[validos]]
+            self._distancias_core[min_samples] = core
+
+        return self._distancias_core[min_samples]
+
+    def dbscan(self, eps: float, min_samples: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rotula os pontos como o DBSCAN, sem recalcular vizinhanças
+
+        Args:
+            eps: Raio de vizinhança (<= eps_max)
+            min_samples: Número mínimo de amostras por vizinhança
+
+        Returns:
+            Tupla (labels, mascara_core) com -1 para ruído; a numeração dos
+            clusters segue a do scikit-learn
+        """
+        if eps > self.eps_max:
+            raise ValueError(f"eps={eps} maior que o raio do grafo ({self.eps_max})")
+
+        labels = np.full(self.n, -1, dtype=np.int64)
+        core = self.distancia_core(min_samples) <= eps
+        if not core.any():
+            return labels, core
+
+        dentro = self.distancias <= eps
+        core_destino = core[self.indices]
+
+        # Componentes conexos entre pontos core
+        arestas = dentro & core[self.linhas] & core_destino
+        adjacencia = csr_matrix(
+            (np.ones(arestas.sum(), dtype=np.int8), (self.linhas[arestas], self.indices[arestas])),
+            shape=(self.n, self.n)
+        )
+        _, componentes = connected_components(adjacencia, directed=False)
+
+        # Numera os clusters pela ordem do primeiro ponto core (como o scikit-learn)
+        componentes_core = componentes[core]
+        _, primeiros = np.unique(componentes_core, return_index=True)
+        ordem = np.empty(componentes.max() + 1, dtype=np.int64)
+        ordem[componentes_core[np.sort(primeiros)]] = np.arange(len(primeiros))
+        labels[core] = ordem[componentes_core]
+
+        # Pontos de borda assumem o menor cluster entre seus vizinhos core
+        borda = dentro & core_destino & ~core[self.linhas]
+        if borda.any():
+            candidatos = np.full(self.n, np.iinfo(np.int64).max)
+            np.minimum.at(candidatos, self.linhas[borda], labels[self.indices[borda]])
+            atribuidos = candidatos != np.iinfo(np.int64).max
+            labels[atribuidos] = candidatos[atribuidos]
+
+        return labels, core
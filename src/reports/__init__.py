@@ -1,15 +1,47 @@
 """
 Pacote de Exportação de Relatórios
+Os submódulos (e ReportLab/openpyxl) são importados no primeiro uso de cada nome
 """
 
-from .export import (
-    exportar_para_excel,
-    exportar_para_csv,
-    criar_botao_download_excel,
-    criar_botao_download_csv,
-    gerar_dossie_pdf,
-    criar_botao_download_pdf
-)
+from ..utils.importacao import exportacoes_sob_demanda
+
+__getattr__, __dir__ = exportacoes_sob_demanda(__name__, {
+    '.export': [
+        'exportar_para_excel',
+        'exportar_para_csv',
+        'criar_botao_download_excel',
+        'criar_botao_download_csv',
+        'gerar_dossie_pdf',
+        'criar_botao_download_pdf'
+    ],
+    '.artefatos': [
+        'hash_entradas',
+        'obter_artefato',
+        'limpar_artefatos',
+        'botao_download_sob_demanda'
+    ],
+    '.fila': [
+        'FilaRelatorios',
+        'obter_fila_relatorios',
+        'chave_dossie',
+        'exibir_relatorio_em_segundo_plano'
+    ],
+    '.extracao': [
+        'iterar_lotes_query',
+        'exportar_query_para_arquivo',
+        'exibir_extracao_completa'
+    ],
+    '.tabelas_pdf': [
+        'estilos_pdf',
+        'criar_tabela_pdf',
+        'dataframe_para_tabela'
+    ],
+    '.lote': [
+        'selecionar_grupos_lote',
+        'gerar_lote_dossies',
+        'exibir_lote_dossies'
+    ]
+})
 
 __all__ = [
     'exportar_para_excel',
@@ -17,5 +49,22 @@ __all__ = [
     'criar_botao_download_excel',
     'criar_botao_download_csv',
     'gerar_dossie_pdf',
-    'criar_botao_download_pdf'
+    'criar_botao_download_pdf',
+    'hash_entradas',
+    'obter_artefato',
+    'limpar_artefatos',
+    'botao_download_sob_demanda',
+    'FilaRelatorios',
+    'obter_fila_relatorios',
+    'chave_dossie',
+    'exibir_relatorio_em_segundo_plano',
+    'iterar_lotes_query',
+    'exportar_query_para_arquivo',
+    'exibir_extracao_completa',
+    'estilos_pdf',
+    'criar_tabela_pdf',
+    'dataframe_para_tabela',
+    'selecionar_grupos_lote',
+    'gerar_lote_dossies',
+    'exibir_lote_dossies'
 ]
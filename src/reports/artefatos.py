@@ -0,0 +1,211 @@
+"""
+Módulo de Artefatos de Download
+Gera arquivos de download (Excel, CSV, PDF) só quando pedidos e os guarda em
+disco pelo hash do conteúdo de entrada: reruns do Streamlit não refazem o
+relatório, e o cache é limitado por idade e por tamanho total
+"""
+
+import os
+import time
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+from io import BytesIO
+from typing import Any, Callable, Optional, Union
+
+from ..config.settings import ARTEFATOS_CONFIG, obter_diretorio_cache
+
+# =============================================================================
+# HASH DAS ENTRADAS
+# =============================================================================
+
+def _hash_linhas(objeto: Union[pd.DataFrame, pd.Series]) -> bytes:
+    """Hash vetorizado de cada linha (valores não hasheáveis, como listas, viram texto)"""
+    try:
+        hashes = pd.util.hash_pandas_object(objeto, index=True)
+    except TypeError:
+        hashes = pd.util.hash_pandas_object(objeto.astype(str), index=True)
+    return hashes.to_numpy().tobytes()
+
+def _atualizar_hash(hash_conteudo, objeto: Any) -> None:
+    """Acrescenta um objeto (DataFrame, Série, dicionário, lista ou escalar) ao hash"""
+    if isinstance(objeto, pd.DataFrame):
+        hash_conteudo.update(repr((list(objeto.columns), [str(t) for t in objeto.dtypes])).encode())
+        hash_conteudo.update(_hash_linhas(objeto))
+    elif isinstance(objeto, pd.Series):
+        hash_conteudo.update(repr((objeto.name, str(objeto.dtype))).encode())
+        hash_conteudo.update(_hash_linhas(objeto))
+    elif isinstance(objeto, np.ndarray):
+        hash_conteudo.update(repr((objeto.dtype, objeto.shape)).encode())
+        hash_conteudo.update(np.ascontiguousarray(objeto).tobytes())
+    elif isinstance(objeto, dict):
+        for chave, valor in objeto.items():
+            hash_conteudo.update(repr(chave).encode())
+            _atualizar_hash(hash_conteudo, valor)
+    elif isinstance(objeto, (list, tuple)):
+        for valor in objeto:
+            _atualizar_hash(hash_conteudo, valor)
+    else:
+        hash_conteudo.update(repr(objeto).encode())
+
+def hash_entradas(*objetos: Any) -> str:
+    """
+    Hash do conteúdo das entradas de um artefato
+
+    DataFrames e Séries são resumidos de forma vetorizada (hash_pandas_object),
+    muito mais barato que gerar o arquivo.
+
+    Args:
+        *objetos: Tipo do artefato, DataFrames, dicionários de DataFrames, parâmetros...
+
+    Returns:
+        Hash hexadecimal (32 caracteres)
+    """
+    hash_conteudo = hashlib.sha256()
+    for objeto in objetos:
+        _atualizar_hash(hash_conteudo, objeto)
+    return hash_conteudo.hexdigest()[:32]
+
+# =============================================================================
+# CACHE EM DISCO
+# =============================================================================
+
+def _caminho_artefato(chave: str, extensao: str) -> str:
+    return os.path.join(obter_diretorio_cache('artefatos'), f"{chave}{extensao}")
+
+def artefato_em_cache(chave: str, extensao: str) -> bool:
+    """Indica se o artefato já foi gerado"""
+    return os.path.exists(_caminho_artefato(chave, extensao))
+
+def ler_artefato(chave: str, extensao: str) -> Optional[bytes]:
+    """Bytes do artefato já gerado (None se não existir)"""
+    caminho = _caminho_artefato(chave, extensao)
+    try:
+        with open(caminho, 'rb') as f:
+            conteudo = f.read()
+        os.utime(caminho)  # Marca como usado recentemente
+        return conteudo
+    except OSError:
+        return None
+
+def obter_artefato(
+    chave: str,
+    extensao: str,
+    gerar: Callable[[], Union[bytes, BytesIO]]
+) -> bytes:
+    """
+    Bytes do artefato, lidos do cache ou gerados (e gravados) agora
+
+    Args:
+        chave: Hash das entradas (hash_entradas)
+        extensao: Extensão do arquivo (ex.: '.xlsx')
+        gerar: Função sem argumentos que produz o arquivo
+
+    Returns:
+        Conteúdo do arquivo
+    """
+    conteudo = ler_artefato(chave, extensao)
+    if conteudo is not None:
+        return conteudo
+
+    caminho = _caminho_artefato(chave, extensao)
+    resultado = gerar()
+    conteudo = resultado.getvalue() if isinstance(resultado, BytesIO) else bytes(resultado)
+
+    # Temporário por processo e thread: o mesmo artefato pode ser gerado ao
+    # mesmo tempo pela sessão e por um worker da fila de relatórios
+    caminho_tmp = f"{caminho}.tmp{os.getpid()}_{threading.get_ident()}"
+    with open(caminho_tmp, 'wb') as f:
+        f.write(conteudo)
+    os.replace(caminho_tmp, caminho)
+
+    limpar_artefatos()
+    return conteudo
+
+def limpar_artefatos(
+    bytes_limite: int = ARTEFATOS_CONFIG['bytes_limite'],
+    max_idade: int = ARTEFATOS_CONFIG['max_idade']
+) -> None:
+    """
+    Remove artefatos vencidos e, acima do limite, os usados há mais tempo
+
+    Args:
+        bytes_limite: Tamanho máximo do cache
+        max_idade: Idade máxima (segundos desde o último uso)
+    """
+    diretorio = obter_diretorio_cache('artefatos')
+    agora = time.time()
+    arquivos = []
+
+    for nome in os.listdir(diretorio):
+        caminho = os.path.join(diretorio, nome)
+        try:
+            info = os.stat(caminho)
+        except OSError:
+            continue
+        if agora - info.st_mtime > max_idade:
+            _remover(caminho)
+        elif '.tmp' not in nome:
+            arquivos.append((info.st_mtime, info.st_size, caminho))
+
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= bytes_limite:
+            break
+        _remover(caminho)
+        total -= tamanho
+
+def _remover(caminho: str) -> None:
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+# =============================================================================
+# BOTÃO DE DOWNLOAD SOB DEMANDA
+# =============================================================================
+
+def botao_download_sob_demanda(
+    label: str,
+    gerar: Callable[[], Union[bytes, BytesIO]],
+    entradas: Any,
+    file_name: str,
+    mime: str,
+    extensao: Optional[str] = None
+) -> None:
+    """
+    Botão de download que só gera o arquivo quando o usuário pede
+
+    Enquanto o artefato não existe, é exibido um botão "Preparar"; ao clicar,
+    o arquivo é gerado e gravado no cache, e o botão de download aparece. Em
+    reruns com as mesmas entradas (nesta ou em outra sessão), o arquivo é lido
+    do disco em vez de ser gerado de novo.
+
+    Args:
+        label: Texto do botão de download
+        gerar: Função sem argumentos que produz o arquivo
+        entradas: Dados e parâmetros que determinam o conteúdo (para o hash)
+        file_name: Nome do arquivo baixado
+        mime: Tipo MIME
+        extensao: Extensão do cache (padrão: a de file_name)
+    """
+    extensao = extensao or os.path.splitext(file_name)[1]
+    chave = hash_entradas(extensao, entradas)
+
+    if not artefato_em_cache(chave, extensao):
+        if not st.button(f"⚙️ Preparar: {label}", key=f"preparar_{chave}_{label}"):
+            return
+        with st.spinner("Gerando arquivo..."):
+            conteudo = obter_artefato(chave, extensao, gerar)
+    else:
+        conteudo = obter_artefato(chave, extensao, gerar)
+
+    st.download_button(
+        label=label,
+        data=conteudo,
+        file_name=file_name,
+        mime=mime,
+        key=f"download_{chave}_{label}"
+    )
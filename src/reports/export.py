@@ -1,86 +1,192 @@
 """
 Módulo de Exportação de Relatórios
 Gera relatórios em PDF, Excel e CSV
+
+openpyxl e ReportLab são importados dentro das funções que geram os
+arquivos: os botões de download não carregam essas bibliotecas até que
+um arquivo seja de fato gerado
 """
 
 import pandas as pd
-import streamlit as st
+import itertools
+from copy import copy
 from io import BytesIO
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, Dict, List, Optional, Union
 from datetime import datetime
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
-    PageBreak, Image as RLImage
+
+from ..config.settings import (
+    EXCEL_CONFIG, PERFIS_RISCO, formatar_moeda, formatar_numero, formatar_percentual, classificar_risco,
+    formatar_numero_serie
 )
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from .artefatos import botao_download_sob_demanda
+from .fila import chave_dossie, exibir_relatorio_em_segundo_plano
 
-from ..config.settings import formatar_moeda, formatar_numero, formatar_percentual
+if TYPE_CHECKING:
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import PatternFill
+    from reportlab.platypus import SimpleDocTemplate
 
 # =============================================================================
 # EXPORTAÇÃO PARA EXCEL
 # =============================================================================
 
-def exportar_para_excel(
-    dados: Dict[str, pd.DataFrame],
-    nome_arquivo: str = "relatorio_gei"
-) -> BytesIO:
+@lru_cache(maxsize=None)
+def _estilos_excel() -> Dict[str, Any]:
+    """
+    Estilos do openpyxl criados uma vez por processo: cabeçalho e
+    preenchimento de cada nível de risco (reunindo todos os perfis)
     """
-    Exporta múltiplas tabelas para Excel com formatação
+    from openpyxl.styles import Font, PatternFill, Alignment
+
+    return {
+        'preenchimento_cabecalho': PatternFill(start_color='1F77B4', end_color='1F77B4', fill_type='solid'),
+        'fonte_cabecalho': Font(bold=True, color='FFFFFF'),
+        'alinhamento_cabecalho': Alignment(horizontal='center', vertical='center'),
+        'preenchimento_niveis': {
+            nivel: PatternFill(start_color=config['cor'].lstrip('#'), end_color=config['cor'].lstrip('#'), fill_type='solid')
+            for perfil in PERFIS_RISCO.values()
+            for nivel, config in perfil.items()
+        }
+    }
+
+def _larguras_colunas(df: pd.DataFrame) -> List[float]:
+    """
+    Largura de cada coluna pelo maior texto em uma amostra de linhas
 
     Args:
-        dados: Dicionário {nome_aba: dataframe}
-        nome_arquivo: Nome do arquivo (sem extensão)
+        df: DataFrame da aba
 
     Returns:
-        BytesIO com arquivo Excel
+        Lista de larguras (caracteres + margem, limitada a largura_maxima)
     """
-    output = BytesIO()
+    n_amostra = EXCEL_CONFIG['amostra_largura']
+    amostra = df.sample(n_amostra, random_state=0) if len(df) > n_amostra else df
+
+    larguras = []
+    for coluna in df.columns:
+        comprimento = amostra[coluna].astype(str).str.len().max() if len(amostra) else 0
+        comprimento = max(len(str(coluna)), 0 if pd.isna(comprimento) else int(comprimento))
+        larguras.append(min(comprimento + 2, EXCEL_CONFIG['largura_maxima']))
+    return larguras
+
+def _valores_lote(lote: pd.DataFrame) -> pd.DataFrame:
+    """Converte um lote para tipos aceitos pelo openpyxl (ausentes viram célula vazia)"""
+    lote = lote.astype(object)
+    return lote.where(lote.notna(), None)
+
+def _celula_nivel(worksheet, valor, preenchimento: 'PatternFill', modelos: Dict[int, 'WriteOnlyCell']) -> 'WriteOnlyCell':
+    """
+    Célula com a cor do nível de risco
 
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        for nome_aba, df in dados.items():
-            # Limitar nome da aba a 31 caracteres
-            nome_aba_clean = nome_aba[:31]
+    O estilo é registrado no workbook uma vez por cor (célula modelo) e copiado
+    nas demais, evitando recalcular o índice de estilos a cada linha.
+    """
+    from openpyxl.cell import WriteOnlyCell
 
-            df.to_excel(writer, sheet_name=nome_aba_clean, index=False)
+    modelo = modelos.get(id(preenchimento))
+    if modelo is None:
+        modelo = modelos[id(preenchimento)] = WriteOnlyCell(worksheet)
+        modelo.fill = preenchimento
 
-            # Aplicar formatação
-            workbook = writer.book
-            worksheet = writer.sheets[nome_aba_clean]
+    celula = WriteOnlyCell(worksheet, value=valor)
+    celula._style = copy(modelo._style)
+    return celula
 
-            # Formatar cabeçalho
-            header_fill = PatternFill(start_color='1F77B4', end_color='1F77B4', fill_type='solid')
-            header_font = Font(bold=True, color='FFFFFF')
+def _escrever_aba(workbook: 'openpyxl.Workbook', nome_aba: str, df: pd.DataFrame) -> None:
+    """
+    Grava uma aba em modo write-only, lote a lote
 
-            for cell in worksheet[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal='center', vertical='center')
+    Args:
+        workbook: Workbook criado com write_only=True
+        nome_aba: Nome da aba (até 31 caracteres)
+        df: Dados da aba
+    """
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import PatternFill
+    from openpyxl.utils import get_column_letter
+
+    estilos = _estilos_excel()
+    worksheet = workbook.create_sheet(title=nome_aba)
+
+    # Largura e congelamento precisam ser definidos antes da primeira linha
+    for posicao, largura in enumerate(_larguras_colunas(df), start=1):
+        worksheet.column_dimensions[get_column_letter(posicao)].width = largura
+    worksheet.freeze_panes = 'A2'
+
+    # Cabeçalho formatado
+    cabecalho = []
+    for coluna in df.columns:
+        celula = WriteOnlyCell(worksheet, value=str(coluna))
+        celula.fill = estilos['preenchimento_cabecalho']
+        celula.font = estilos['fonte_cabecalho']
+        celula.alignment = estilos['alinhamento_cabecalho']
+        cabecalho.append(celula)
+    worksheet.append(cabecalho)
+
+    # Colunas de nível de risco recebem a cor do nível
+    colunas_nivel = [
+        posicao for posicao, coluna in enumerate(df.columns)
+        if str(coluna).lower().startswith(('nivel_risco', 'nível'))
+    ]
+
+    modelos = {}
+    tamanho_lote = EXCEL_CONFIG['linhas_por_lote']
+    for inicio in range(0, len(df), tamanho_lote):
+        lote = df.iloc[inicio:inicio + tamanho_lote]
+
+        preenchimentos = {
+            posicao: lote.iloc[:, posicao].astype(str).str.upper().map(estilos['preenchimento_niveis']).tolist()
+            for posicao in colunas_nivel
+        }
 
-            # Ajustar largura das colunas
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
+        for i, linha in enumerate(_valores_lote(lote).itertuples(index=False, name=None)):
+            if preenchimentos:
+                linha = list(linha)
+                for posicao, cores in preenchimentos.items():
+                    if isinstance(cores[i], PatternFill):
+                        linha[posicao] = _celula_nivel(worksheet, linha[posicao], cores[i], modelos)
+            worksheet.append(linha)
 
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
+def exportar_para_excel(
+    dados: Dict[str, pd.DataFrame],
+    nome_arquivo: str = "relatorio_gei",
+    destino: Optional[Union[str, BinaryIO]] = None
+) -> Union[BytesIO, str]:
+    """
+    Exporta múltiplas tabelas para Excel com formatação, em modo streaming
 
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
+    O workbook é write-only: as linhas são convertidas e gravadas em lotes de
+    EXCEL_CONFIG['linhas_por_lote'], sem manter células em memória, e abas
+    maiores que o limite do Excel continuam em "nome (2)", "nome (3)"...
 
-            # Congelar primeira linha
-            worksheet.freeze_panes = 'A2'
+    Args:
+        dados: Dicionário {nome_aba: dataframe}
+        nome_arquivo: Nome do arquivo (sem extensão)
+        destino: Caminho ou arquivo binário de saída (None = BytesIO)
 
-    output.seek(0)
+    Returns:
+        BytesIO com arquivo Excel, ou o próprio destino
+    """
+    import openpyxl
+
+    output = BytesIO() if destino is None else destino
+    workbook = openpyxl.Workbook(write_only=True)
+    max_linhas = EXCEL_CONFIG['max_linhas_aba']
+
+    for nome_aba, df in dados.items():
+        partes = range(0, max(len(df), 1), max_linhas)
+        for parte, inicio in enumerate(partes, start=1):
+            # Limitar nome da aba a 31 caracteres
+            sufixo = f" ({parte})" if parte > 1 else ""
+            nome_aba_clean = nome_aba[:31 - len(sufixo)] + sufixo
+            _escrever_aba(workbook, nome_aba_clean, df.iloc[inicio:inicio + max_linhas])
+
+    workbook.save(output)
+
+    if destino is None:
+        output.seek(0)
     return output
 
 def criar_botao_download_excel(
@@ -96,11 +202,10 @@ def criar_botao_download_excel(
         nome_arquivo: Nome do arquivo
         label: Texto do botão
     """
-    excel_data = exportar_para_excel(dados, nome_arquivo)
-
-    st.download_button(
+    botao_download_sob_demanda(
         label=label,
-        data=excel_data,
+        gerar=lambda: exportar_para_excel(dados, nome_arquivo),
+        entradas=('excel', dados),
         file_name=f"{nome_arquivo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
     )
@@ -137,11 +242,10 @@ def criar_botao_download_csv(
         nome_arquivo: Nome do arquivo
         label: Texto do botão
     """
-    csv_data = exportar_para_csv(df)
-
-    st.download_button(
+    botao_download_sob_demanda(
         label=label,
-        data=csv_data,
+        gerar=lambda: exportar_para_csv(df),
+        entradas=('csv', df),
         file_name=f"{nome_arquivo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
         mime="text/csv"
     )
@@ -154,53 +258,33 @@ class PDFDossie:
     """Classe para geração de dossiê em PDF"""
 
     def __init__(self, num_grupo: str):
+        from .tabelas_pdf import estilos_pdf
+
         self.num_grupo = num_grupo
         self.story = []
-        self.styles = getSampleStyleSheet()
-        self._configurar_estilos()
-
-    def _configurar_estilos(self):
-        """Configura estilos personalizados"""
-        # Estilo de título
-        self.styles.add(ParagraphStyle(
-            name='TituloCustom',
-            parent=self.styles['Heading1'],
-            fontSize=18,
-            textColor=colors.HexColor('#1F77B4'),
-            spaceAfter=12,
-            alignment=TA_CENTER
-        ))
-
-        # Estilo de subtítulo
-        self.styles.add(ParagraphStyle(
-            name='SubtituloCustom',
-            parent=self.styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#2C3E50'),
-            spaceAfter=10,
-            spaceBefore=10
-        ))
-
-        # Estilo de texto normal
-        self.styles.add(ParagraphStyle(
-            name='NormalCustom',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            spaceAfter=6
-        ))
+        # Folha de estilos compartilhada pelo processo (TituloCustom, SubtituloCustom, NormalCustom)
+        self.styles = estilos_pdf()
 
     def adicionar_titulo_principal(self, titulo: str):
         """Adiciona título principal"""
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph, Spacer
+
         self.story.append(Paragraph(titulo, self.styles['TituloCustom']))
         self.story.append(Spacer(1, 0.3*inch))
 
     def adicionar_secao(self, titulo: str):
         """Adiciona título de seção"""
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Paragraph, Spacer
+
         self.story.append(Paragraph(titulo, self.styles['SubtituloCustom']))
         self.story.append(Spacer(1, 0.1*inch))
 
     def adicionar_paragrafo(self, texto: str):
         """Adiciona parágrafo de texto"""
+        from reportlab.platypus import Paragraph
+
         self.story.append(Paragraph(texto, self.styles['NormalCustom']))
 
     def adicionar_tabela(self, dados: List[List], larguras: Optional[List] = None):
@@ -208,29 +292,17 @@ class PDFDossie:
         if not dados:
             return
 
-        # Criar tabela
-        tabela = Table(dados, colWidths=larguras)
-
-        # Estilo da tabela
-        estilo = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1F77B4')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ])
-
-        tabela.setStyle(estilo)
-        self.story.append(tabela)
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Spacer
+        from .tabelas_pdf import criar_tabela_pdf
+
+        self.story.append(criar_tabela_pdf(dados, larguras, estilo='dossie'))
         self.story.append(Spacer(1, 0.2*inch))
 
     def adicionar_kpis(self, kpis: Dict[str, str]):
         """Adiciona KPIs em formato de tabela"""
+        from reportlab.lib.units import inch
+
         dados = [['Métrica', 'Valor']]
         dados.extend([[k, v] for k, v in kpis.items()])
 
@@ -238,19 +310,32 @@ class PDFDossie:
 
     def adicionar_quebra_pagina(self):
         """Adiciona quebra de página"""
+        from reportlab.platypus import PageBreak
+
         self.story.append(PageBreak())
 
-    def gerar_pdf(self, dados_grupo: pd.Series, dossie: Dict[str, pd.DataFrame]) -> BytesIO:
+    def gerar_pdf(
+        self,
+        dados_grupo: pd.Series,
+        dossie: Dict[str, pd.DataFrame],
+        ao_progredir: Optional[Callable[[float, str], None]] = None
+    ) -> BytesIO:
         """
         Gera PDF completo do dossiê
 
         Args:
             dados_grupo: Série com dados principais do grupo
             dossie: Dicionário com dados completos
+            ao_progredir: Callback(fração, mensagem) durante a montagem
 
         Returns:
             BytesIO com PDF
         """
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.units import inch
+        from reportlab.platypus import SimpleDocTemplate, Spacer
+        from .tabelas_pdf import dataframe_para_tabela
+
         output = BytesIO()
         doc = SimpleDocTemplate(output, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
 
@@ -271,7 +356,8 @@ class PDFDossie:
             'Número do Grupo': str(self.num_grupo),
             'Quantidade de CNPJs': formatar_numero(dados_grupo.get('qtd_cnpjs', 0)),
             'Score de Risco': f"{dados_grupo.get('score_final_percent', 0):.1f}%",
-            'Nível de Risco': dados_grupo.get('nivel_risco_final', 'N/A'),
+            'Nível de Risco': dados_grupo.get('nivel_risco_final')
+                              or classificar_risco(dados_grupo.get('score_final_percent'), 'percentual')['nivel'],
             'Receita Máxima': formatar_moeda(dados_grupo.get('receita_maxima', 0))
         }
 
@@ -283,13 +369,11 @@ class PDFDossie:
         if not dossie.get('cnpjs', pd.DataFrame()).empty:
             df_cnpjs = dossie['cnpjs'].head(20)  # Limitar a 20 CNPJs
 
-            dados_tabela = [['CNPJ', 'Razão Social', 'Município']]
-            for _, row in df_cnpjs.iterrows():
-                dados_tabela.append([
-                    str(row.get('cnpj', ''))[:18],
-                    str(row.get('nm_razao_social', ''))[:40],
-                    str(row.get('nm_municipio', ''))[:20]
-                ])
+            dados_tabela = dataframe_para_tabela(
+                df_cnpjs,
+                {'CNPJ': 'cnpj', 'Razão Social': 'nm_razao_social', 'Município': 'nm_municipio'},
+                truncar={'cnpj': 18, 'nm_razao_social': 40, 'nm_municipio': 20}
+            )
 
             self.adicionar_tabela(dados_tabela, larguras=[1.5*inch, 3*inch, 1.5*inch])
         else:
@@ -314,14 +398,11 @@ class PDFDossie:
         if not dossie.get('socios', pd.DataFrame()).empty:
             self.adicionar_secao("4. SÓCIOS COMPARTILHADOS")
 
-            df_socios = dossie['socios'].head(15)
-            dados_socios = [['CPF Sócio', 'Qtd Empresas']]
-
-            for _, row in df_socios.iterrows():
-                dados_socios.append([
-                    str(row.get('cpf_socio', '')),
-                    formatar_numero(row.get('qtd_empresas', 0))
-                ])
+            dados_socios = dataframe_para_tabela(
+                dossie['socios'].head(15),
+                {'CPF Sócio': 'cpf_socio', 'Qtd Empresas': 'qtd_empresas'},
+                formatos={'qtd_empresas': formatar_numero_serie}
+            )
 
             self.adicionar_tabela(dados_socios, larguras=[3*inch, 2*inch])
 
@@ -335,12 +416,12 @@ class PDFDossie:
             # Agrupar por tipo
             indicios_por_tipo = df_indicios.groupby('tx_descricao_indicio').size().reset_index(name='Quantidade')
 
-            dados_indicios = [['Tipo de Indício', 'Quantidade']]
-            for _, row in indicios_por_tipo.iterrows():
-                dados_indicios.append([
-                    str(row['tx_descricao_indicio'])[:40],
-                    formatar_numero(row['Quantidade'])
-                ])
+            dados_indicios = dataframe_para_tabela(
+                indicios_por_tipo,
+                {'Tipo de Indício': 'tx_descricao_indicio', 'Quantidade': 'Quantidade'},
+                truncar={'tx_descricao_indicio': 40},
+                formatos={'Quantidade': formatar_numero_serie}
+            )
 
             self.adicionar_tabela(dados_indicios, larguras=[4*inch, 1.5*inch])
 
@@ -349,16 +430,12 @@ class PDFDossie:
             self.adicionar_quebra_pagina()
             self.adicionar_secao("6. CONTAS BANCÁRIAS COMPARTILHADAS")
 
-            df_ccs = dossie['ccs_compartilhadas'].head(15)
-            dados_ccs = [['Banco', 'Agência', 'Conta', 'CNPJs']]
-
-            for _, row in df_ccs.iterrows():
-                dados_ccs.append([
-                    str(row.get('nm_banco', ''))[:15],
-                    str(row.get('cd_agencia', '')),
-                    str(row.get('nr_conta', ''))[:10],
-                    formatar_numero(row.get('qtd_cnpjs_usando_conta', 0))
-                ])
+            dados_ccs = dataframe_para_tabela(
+                dossie['ccs_compartilhadas'].head(15),
+                {'Banco': 'nm_banco', 'Agência': 'cd_agencia', 'Conta': 'nr_conta', 'CNPJs': 'qtd_cnpjs_usando_conta'},
+                truncar={'nm_banco': 15, 'nr_conta': 10},
+                formatos={'qtd_cnpjs_usando_conta': formatar_numero_serie}
+            )
 
             self.adicionar_tabela(dados_ccs, larguras=[1.5*inch, 1*inch, 1.5*inch, 1*inch])
 
@@ -384,12 +461,38 @@ class PDFDossie:
         self.adicionar_paragrafo("<i>As informações contidas neste dossiê são confidenciais e de uso exclusivo da Receita Estadual.</i>")
 
         # Construir PDF
-        doc.build(self.story)
+        construir_documento(doc, self.story, ao_progredir)
         output.seek(0)
 
         return output
 
-def gerar_dossie_pdf(num_grupo: str, dados_grupo: pd.Series, dossie: Dict[str, pd.DataFrame]) -> BytesIO:
+def construir_documento(
+    doc: 'SimpleDocTemplate',
+    story: List,
+    ao_progredir: Optional[Callable[[float, str], None]] = None
+) -> None:
+    """
+    Monta o PDF, informando o progresso pela fração de elementos já posicionados
+
+    Args:
+        doc: Documento ReportLab
+        story: Lista de flowables
+        ao_progredir: Callback(fração, mensagem)
+    """
+    if ao_progredir is not None:
+        total = max(len(story), 1)
+        posicionados = itertools.count(1)
+        doc.afterFlowable = lambda flowable: ao_progredir(
+            min(next(posicionados) / total, 1.0), "Renderizando páginas..."
+        )
+    doc.build(story)
+
+def gerar_dossie_pdf(
+    num_grupo: str,
+    dados_grupo: pd.Series,
+    dossie: Dict[str, pd.DataFrame],
+    ao_progredir: Optional[Callable[[float, str], None]] = None
+) -> BytesIO:
     """
     Função wrapper para gerar dossiê em PDF
 
@@ -397,12 +500,13 @@ def gerar_dossie_pdf(num_grupo: str, dados_grupo: pd.Series, dossie: Dict[str, p
         num_grupo: Número do grupo
         dados_grupo: Dados principais do grupo
         dossie: Dados completos do dossiê
+        ao_progredir: Callback(fração, mensagem) durante a montagem
 
     Returns:
         BytesIO com PDF
     """
     gerador = PDFDossie(num_grupo)
-    return gerador.gerar_pdf(dados_grupo, dossie)
+    return gerador.gerar_pdf(dados_grupo, dossie, ao_progredir)
 
 def criar_botao_download_pdf(
     num_grupo: str,
@@ -413,17 +517,19 @@ def criar_botao_download_pdf(
     """
     Cria botão de download para PDF do dossiê
 
+    O PDF é gerado em segundo plano (fila de relatórios) e fica disponível
+    para qualquer sessão enquanto os dados do grupo não mudarem.
+
     Args:
         num_grupo: Número do grupo
         dados_grupo: Dados do grupo
         dossie: Dossiê completo
         label: Texto do botão
     """
-    pdf_data = gerar_dossie_pdf(num_grupo, dados_grupo, dossie)
-
-    st.download_button(
+    exibir_relatorio_em_segundo_plano(
+        chave=chave_dossie(num_grupo, dados_grupo, dossie),
+        gerar=lambda ao_progredir: gerar_dossie_pdf(num_grupo, dados_grupo, dossie, ao_progredir),
         label=label,
-        data=pdf_data,
         file_name=f"dossie_grupo_{num_grupo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-        mime="application/pdf"
+        descricao=f"Dossiê do grupo {num_grupo}"
     )
@@ -0,0 +1,271 @@
+"""
+Módulo de Extração de Tabelas Grandes
+Lê o resultado de uma query do cursor do Impala em lotes e grava direto em
+arquivo CSV (gzip) ou Parquet no disco, com memória constante, qualquer que
+seja o tamanho da extração
+"""
+
+import os
+import gzip
+import time
+import hashlib
+import tempfile
+import importlib.util
+import pandas as pd
+import streamlit as st
+from typing import Callable, Dict, Iterator, Optional
+
+from ..config.settings import EXTRACAO_CONFIG, obter_diretorio_cache
+from ..config.database import Queries
+
+FORMATOS_EXTRACAO = {
+    'csv': {'extensao': '.csv.gz', 'mime': 'application/gzip', 'rotulo': 'CSV (gzip)'},
+    'parquet': {'extensao': '.parquet', 'mime': 'application/octet-stream', 'rotulo': 'Parquet'}
+}
+
+# =============================================================================
+# LEITURA EM LOTES
+# =============================================================================
+
+def iterar_lotes_query(
+    engine,
+    query: str,
+    tamanho_lote: int = EXTRACAO_CONFIG['linhas_por_lote']
+) -> Iterator[pd.DataFrame]:
+    """
+    Percorre o resultado de uma query em DataFrames de até tamanho_lote linhas
+
+    Usa o cursor DB-API direto (fetchmany): só um lote fica em memória por vez.
+
+    Args:
+        engine: Engine SQLAlchemy
+        query: Query SQL
+        tamanho_lote: Linhas por lote
+
+    Returns:
+        Iterador de DataFrames com colunas em minúsculas
+    """
+    conexao = engine.raw_connection()
+    try:
+        cursor = conexao.cursor()
+        cursor.arraysize = tamanho_lote
+        cursor.execute(query)
+        colunas = [descricao[0].split('.')[-1].lower() for descricao in cursor.description]
+
+        while True:
+            linhas = cursor.fetchmany(tamanho_lote)
+            if not linhas:
+                break
+            yield pd.DataFrame.from_records(linhas, columns=colunas)
+
+        cursor.close()
+    finally:
+        conexao.close()
+
+def parquet_disponivel() -> bool:
+    """Indica se o pyarrow (necessário para Parquet) está instalado"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+# =============================================================================
+# GRAVAÇÃO EM ARQUIVO
+# =============================================================================
+
+def _gravar_csv(lotes: Iterator[pd.DataFrame], caminho: str, ao_gravar_lote: Callable[[int], None]) -> None:
+    """Grava lotes em CSV comprimido (cabeçalho só no primeiro lote)"""
+    with gzip.open(caminho, 'wt', encoding='utf-8-sig', newline='', compresslevel=6) as arquivo:
+        for i, lote in enumerate(lotes):
+            lote.to_csv(arquivo, index=False, sep=';', header=(i == 0))
+            ao_gravar_lote(len(lote))
+
+def _gravar_parquet(lotes: Iterator[pd.DataFrame], caminho: str, ao_gravar_lote: Callable[[int], None]) -> None:
+    """
+    Grava lotes como row groups de um único arquivo Parquet
+
+    O schema vem do primeiro lote; colunas totalmente nulas nele viram texto,
+    e os lotes seguintes são convertidos para o mesmo schema.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    schema = None
+    try:
+        for lote in lotes:
+            if writer is None:
+                schema = pa.Table.from_pandas(lote, preserve_index=False).schema
+                schema = pa.schema([
+                    campo.with_type(pa.string()) if pa.types.is_null(campo.type) else campo
+                    for campo in schema
+                ]).remove_metadata()
+                writer = pq.ParquetWriter(caminho, schema, compression=EXTRACAO_CONFIG['compressao_parquet'])
+
+            writer.write_table(pa.Table.from_pandas(lote, schema=schema, preserve_index=False, safe=False))
+            ao_gravar_lote(len(lote))
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        # Query sem linhas: arquivo vazio, sem colunas
+        pq.write_table(pa.table({}), caminho)
+
+def exportar_query_para_arquivo(
+    engine,
+    query: str,
+    caminho: str,
+    formato: str = 'csv',
+    total_linhas: Optional[int] = None,
+    ao_progredir: Optional[Callable[[int, Optional[int]], None]] = None,
+    tamanho_lote: int = EXTRACAO_CONFIG['linhas_por_lote']
+) -> Dict[str, int]:
+    """
+    Executa a query e grava o resultado em arquivo, lote a lote
+
+    O arquivo é gravado com sufixo temporário e renomeado ao final, então um
+    caminho existente é sempre uma extração completa.
+
+    Args:
+        engine: Engine SQLAlchemy
+        query: Query SQL
+        caminho: Arquivo de destino
+        formato: 'csv' (gzip, separador ';') ou 'parquet'
+        total_linhas: Total esperado (só para o progresso)
+        ao_progredir: Callback(linhas_gravadas, total_linhas) a cada lote
+        tamanho_lote: Linhas por lote
+
+    Returns:
+        Dicionário com 'linhas' e 'bytes' gravados
+    """
+    if formato not in FORMATOS_EXTRACAO:
+        raise ValueError(f"Formato inválido: {formato}")
+    if formato == 'parquet' and not parquet_disponivel():
+        raise ImportError("pyarrow não está instalado; use o formato CSV")
+
+    gravadas = 0
+
+    def ao_gravar_lote(n_linhas: int) -> None:
+        nonlocal gravadas
+        gravadas += n_linhas
+        if ao_progredir:
+            ao_progredir(gravadas, total_linhas)
+
+    # Nome temporário único: sessões (threads do mesmo processo) podem gerar a mesma extração
+    descritor, caminho_tmp = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix='.tmp')
+    os.close(descritor)
+    gravar = _gravar_csv if formato == 'csv' else _gravar_parquet
+
+    try:
+        gravar(iterar_lotes_query(engine, query, tamanho_lote), caminho_tmp, ao_gravar_lote)
+        os.replace(caminho_tmp, caminho)
+    finally:
+        if os.path.exists(caminho_tmp):
+            os.remove(caminho_tmp)
+
+    return {'linhas': gravadas, 'bytes': os.path.getsize(caminho)}
+
+def contar_linhas_query(engine, query: str) -> Optional[int]:
+    """Total de linhas da query (None se a contagem falhar)"""
+    try:
+        return int(pd.read_sql(Queries.get_contagem(query), engine).iloc[0, 0])
+    except Exception:
+        return None
+
+def limpar_extracoes_antigas(max_idade: int = EXTRACAO_CONFIG['max_idade']) -> None:
+    """Remove extrações (e temporários abandonados) mais antigos que max_idade segundos"""
+    diretorio = obter_diretorio_cache('extracoes')
+    limite = time.time() - max_idade
+    for nome in os.listdir(diretorio):
+        caminho = os.path.join(diretorio, nome)
+        try:
+            if os.path.getmtime(caminho) < limite:
+                os.remove(caminho)
+        except OSError:
+            pass
+
+# =============================================================================
+# INTERFACE
+# =============================================================================
+
+def exibir_extracao_completa(
+    engine,
+    query: str,
+    nome_arquivo: str,
+    chave: str,
+    contar_linhas: bool = True
+) -> None:
+    """
+    Controles para gerar a extração completa em disco e baixá-la
+
+    A extração só roda quando o botão é clicado; o arquivo gerado fica
+    registrado na sessão. O arquivo só é lido para o download no clique em
+    "Preparar download": os demais reruns não o carregam na memória do servidor.
+
+    O st.download_button mantém o arquivo inteiro na memória do servidor
+    enquanto a sessão durar, então arquivos acima de
+    EXTRACAO_CONFIG['max_bytes_download'] não são oferecidos no navegador: o
+    caminho no servidor é exibido para cópia direta (até max_idade).
+
+    Args:
+        engine: Engine SQLAlchemy
+        query: Query SQL da extração (sem LIMIT)
+        nome_arquivo: Nome base do arquivo baixado
+        chave: Chave única dos widgets na página
+        contar_linhas: Executa COUNT(*) antes, para mostrar o progresso em %
+    """
+    formatos = ['csv', 'parquet'] if parquet_disponivel() else ['csv']
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        formato = st.selectbox(
+            "Formato",
+            formatos,
+            format_func=lambda f: FORMATOS_EXTRACAO[f]['rotulo'],
+            key=f"{chave}_formato"
+        )
+
+    identificador = hashlib.sha256(f"{query}|{formato}".encode()).hexdigest()[:16]
+    caminho = os.path.join(obter_diretorio_cache('extracoes'), identificador + FORMATOS_EXTRACAO[formato]['extensao'])
+    chave_sessao = f"{chave}_extracao"
+
+    with col2:
+        gerar = st.button("⚙️ Gerar extração completa", key=f"{chave}_gerar")
+
+    if gerar:
+        limpar_extracoes_antigas()
+        total = contar_linhas_query(engine, query) if contar_linhas else None
+        barra = st.progress(0.0, text="Iniciando extração...")
+
+        def ao_progredir(gravadas: int, total_linhas: Optional[int]) -> None:
+            if total_linhas:
+                barra.progress(min(gravadas / total_linhas, 1.0), text=f"{gravadas:,} de {total_linhas:,} linhas")
+            else:
+                barra.progress(0.0, text=f"{gravadas:,} linhas gravadas")
+
+        try:
+            resumo = exportar_query_para_arquivo(engine, query, caminho, formato, total, ao_progredir)
+            barra.progress(1.0, text=f"{resumo['linhas']:,} linhas gravadas")
+            st.session_state[chave_sessao] = {'caminho': caminho, 'formato': formato, **resumo}
+        except Exception as e:
+            barra.empty()
+            st.error(f"Erro na extração: {e}")
+
+    extracao = st.session_state.get(chave_sessao)
+    if extracao and extracao['formato'] == formato and os.path.exists(extracao['caminho']):
+        st.caption(f"{extracao['linhas']:,} linhas · {extracao['bytes'] / 1024 ** 2:,.1f} MB")
+        rotulo = FORMATOS_EXTRACAO[formato]['rotulo']
+        limite = EXTRACAO_CONFIG['max_bytes_download']
+        if extracao['bytes'] > limite:
+            st.warning(
+                f"⚠️ Arquivo acima de {limite / 1024 ** 2:,.0f} MB: o download pelo navegador "
+                "carregaria o arquivo inteiro na memória do servidor. Copie-o direto do "
+                f"servidor (disponível por {EXTRACAO_CONFIG['max_idade'] // 3600} horas) ou refine a consulta."
+            )
+            st.code(extracao['caminho'], language=None)
+        elif st.button(f"⚙️ Preparar download: {rotulo}", key=f"{chave}_preparar"):
+            with open(extracao['caminho'], 'rb') as arquivo:
+                st.download_button(
+                    label=f"📥 Download {rotulo}",
+                    data=arquivo,
+                    file_name=nome_arquivo + FORMATOS_EXTRACAO[formato]['extensao'],
+                    mime=FORMATOS_EXTRACAO[formato]['mime'],
+                    key=f"{chave}_download"
+                )
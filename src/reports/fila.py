@@ -0,0 +1,229 @@
+"""
+Módulo de Fila de Relatórios em Segundo Plano
+Gera dossiês em PDF em threads de trabalho, fora do script do Streamlit, com
+estado e progresso de cada tarefa gravados em disco; PDFs prontos ficam no
+cache de artefatos, indexados por (grupo, versão dos dados)
+"""
+
+import os
+import json
+import time
+import threading
+import streamlit as st
+from io import BytesIO
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Union
+
+from ..config.settings import FILA_RELATORIOS_CONFIG, obter_diretorio_cache
+from .artefatos import hash_entradas, ler_artefato, obter_artefato
+
+# Função de geração: recebe ao_progredir(fração, mensagem) e devolve o arquivo
+Gerador = Callable[[Callable[[float, str], None]], Union[bytes, BytesIO]]
+
+ESTADOS_ATIVOS = ('pendente', 'executando')
+
+# =============================================================================
+# FILA
+# =============================================================================
+
+class FilaRelatorios:
+    """
+    Fila local de geração de relatórios
+
+    Cada tarefa é identificada pela chave do artefato (hash das entradas):
+    pedidos repetidos da mesma chave reaproveitam a tarefa em andamento ou o
+    arquivo já pronto. O estado (status, progresso, mensagem) é um JSON por
+    tarefa, legível por qualquer sessão; tarefas ativas de um processo que não
+    existe mais aparecem como 'interrompido'.
+    """
+
+    def __init__(self, diretorio: str, n_workers: int = FILA_RELATORIOS_CONFIG['n_workers']):
+        self.diretorio = diretorio
+        self._executor = ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix='relatorio')
+        self._futuros: Dict[str, Future] = {}
+        self._trava = threading.Lock()
+
+    # -------------------------------------------------------------------------
+    # Estado em disco
+    # -------------------------------------------------------------------------
+
+    def _caminho_estado(self, chave: str) -> str:
+        return os.path.join(self.diretorio, f"{chave}.json")
+
+    def _gravar_estado(self, chave: str, **campos) -> None:
+        """Atualiza campos do estado (gravação atômica)"""
+        with self._trava:
+            estado = self._ler_estado(chave) or {'chave': chave, 'criado_em': time.time()}
+            estado.update(campos, pid=os.getpid(), atualizado_em=time.time())
+
+            caminho = self._caminho_estado(chave)
+            caminho_tmp = f"{caminho}.tmp{threading.get_ident()}"
+            with open(caminho_tmp, 'w', encoding='utf-8') as f:
+                json.dump(estado, f)
+            os.replace(caminho_tmp, caminho)
+
+    def _ler_estado(self, chave: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._caminho_estado(chave), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def estado(self, chave: str) -> Optional[Dict[str, Any]]:
+        """
+        Estado atual da tarefa
+
+        Returns:
+            Dicionário com 'status' (pendente, executando, concluido, erro ou
+            interrompido), 'progresso' (0 a 1) e 'mensagem', ou None
+        """
+        estado = self._ler_estado(chave)
+        if estado and estado['status'] in ESTADOS_ATIVOS and not self._em_andamento(chave, estado):
+            estado['status'] = 'interrompido'
+            estado['mensagem'] = 'Geração interrompida (processo reiniciado)'
+        return estado
+
+    def _em_andamento(self, chave: str, estado: Dict[str, Any]) -> bool:
+        """Tarefa ativa neste processo ou em outro processo ainda vivo"""
+        if estado.get('pid') == os.getpid():
+            return chave in self._futuros
+        try:
+            os.kill(estado.get('pid', -1), 0)
+            return True
+        except (OSError, TypeError):
+            return False
+
+    def limpar_estados_antigos(self, max_idade: int = FILA_RELATORIOS_CONFIG['max_idade_estado']) -> None:
+        """Remove estados de tarefas encerradas há mais de max_idade segundos"""
+        limite = time.time() - max_idade
+        for nome in os.listdir(self.diretorio):
+            caminho = os.path.join(self.diretorio, nome)
+            try:
+                if os.path.getmtime(caminho) < limite and nome[:-len('.json')] not in self._futuros:
+                    os.remove(caminho)
+            except OSError:
+                pass
+
+    # -------------------------------------------------------------------------
+    # Execução
+    # -------------------------------------------------------------------------
+
+    def enviar(self, chave: str, gerar: Gerador, extensao: str = '.pdf', descricao: str = '') -> Dict[str, Any]:
+        """
+        Enfileira a geração do artefato, se ainda não estiver pronto ou em andamento
+
+        Args:
+            chave: Chave do artefato (hash das entradas)
+            gerar: Função(ao_progredir) que produz o arquivo
+            extensao: Extensão do artefato
+            descricao: Texto exibido ao usuário
+
+        Returns:
+            Estado da tarefa
+        """
+        if ler_artefato(chave, extensao) is not None:
+            self._gravar_estado(chave, status='concluido', progresso=1.0, mensagem='Pronto', descricao=descricao)
+            return self.estado(chave)
+
+        with self._trava:
+            em_andamento = chave in self._futuros
+
+        if not em_andamento:
+            self.limpar_estados_antigos()
+            self._gravar_estado(chave, status='pendente', progresso=0.0, mensagem='Na fila', descricao=descricao)
+            with self._trava:
+                self._futuros[chave] = self._executor.submit(self._executar, chave, gerar, extensao)
+
+        return self.estado(chave)
+
+    def _executar(self, chave: str, gerar: Gerador, extensao: str) -> None:
+        """Roda a geração em uma thread de trabalho, registrando o progresso"""
+        intervalo = FILA_RELATORIOS_CONFIG['intervalo_atualizacao']
+        ultima_gravacao = 0.0
+
+        def ao_progredir(fracao: float, mensagem: str = '') -> None:
+            nonlocal ultima_gravacao
+            agora = time.time()
+            if agora - ultima_gravacao >= intervalo / 2:
+                ultima_gravacao = agora
+                self._gravar_estado(chave, progresso=min(max(fracao, 0.0), 0.99), mensagem=mensagem or 'Gerando...')
+
+        try:
+            self._gravar_estado(chave, status='executando', progresso=0.0, mensagem='Iniciando...')
+            obter_artefato(chave, extensao, lambda: gerar(ao_progredir))
+            self._gravar_estado(chave, status='concluido', progresso=1.0, mensagem='Pronto')
+        except Exception as e:
+            self._gravar_estado(chave, status='erro', mensagem=str(e))
+        finally:
+            with self._trava:
+                self._futuros.pop(chave, None)
+
+@st.cache_resource
+def obter_fila_relatorios() -> FilaRelatorios:
+    """Instância única da fila por processo (compartilhada entre sessões)"""
+    return FilaRelatorios(obter_diretorio_cache('fila_relatorios'))
+
+def chave_dossie(num_grupo: str, *dados: Any) -> str:
+    """Chave do dossiê: número do grupo + versão (hash) dos dados usados no PDF"""
+    return hash_entradas('dossie', str(num_grupo), dados)
+
+# =============================================================================
+# INTERFACE
+# =============================================================================
+
+def _acompanhar_tarefa(chave: str) -> None:
+    """Barra de progresso da tarefa; ao terminar, recarrega a página"""
+    estado = obter_fila_relatorios().estado(chave)
+    if estado is None or estado['status'] not in ESTADOS_ATIVOS:
+        st.rerun()
+
+    st.progress(estado.get('progresso', 0.0), text=f"{estado.get('descricao', '')} — {estado.get('mensagem', '')}")
+
+    if not hasattr(st, 'fragment'):
+        st.button("🔄 Atualizar status", key=f"atualizar_{chave}")
+
+if hasattr(st, 'fragment'):
+    # Atualiza só a barra de progresso, sem reexecutar a página inteira
+    _acompanhar_tarefa = st.fragment(run_every=FILA_RELATORIOS_CONFIG['intervalo_atualizacao'])(_acompanhar_tarefa)
+
+def exibir_relatorio_em_segundo_plano(
+    chave: str,
+    gerar: Gerador,
+    label: str,
+    file_name: str,
+    mime: str = 'application/pdf',
+    extensao: str = '.pdf',
+    descricao: str = 'Relatório'
+) -> None:
+    """
+    Controles de geração em segundo plano e download do relatório
+
+    Se o arquivo já existe (gerado por esta ou outra sessão), o download é
+    imediato; se está em geração, mostra o progresso; senão, oferece o botão
+    que enfileira a tarefa. A sessão continua livre durante a geração.
+
+    Args:
+        chave: Chave do artefato (ex.: chave_dossie)
+        gerar: Função(ao_progredir) que produz o arquivo
+        label: Texto do botão de download
+        file_name: Nome do arquivo baixado
+        mime: Tipo MIME
+        extensao: Extensão do artefato
+        descricao: Descrição exibida no progresso
+    """
+    conteudo = ler_artefato(chave, extensao)
+    if conteudo is not None:
+        st.download_button(label=label, data=conteudo, file_name=file_name, mime=mime, key=f"download_{chave}")
+        return
+
+    fila = obter_fila_relatorios()
+    estado = fila.estado(chave)
+
+    if estado is None or estado['status'] not in ESTADOS_ATIVOS:
+        if estado and estado['status'] in ('erro', 'interrompido'):
+            st.error(f"Falha na geração anterior: {estado.get('mensagem', '')}")
+        if not st.button(f"⚙️ Gerar {descricao.lower()}", key=f"gerar_{chave}"):
+            return
+        fila.enviar(chave, gerar, extensao, descricao)
+
+    _acompanhar_tarefa(chave)
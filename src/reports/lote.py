@@ -0,0 +1,322 @@
+"""
+Módulo de Dossiês em Lote
+Gera os dossiês em PDF de vários grupos (filtro por nível de risco, faixa de
+score ou top N): seções buscadas em blocos de grupos, PDFs renderizados em um
+pool de processos com PDFDossie e reunidos em um zip com planilha de índice.
+Disponível na interface e pela linha de comando (python -m src.reports.lote)
+"""
+
+import os
+import sys
+import time
+import zipfile
+import argparse
+import pandas as pd
+import streamlit as st
+from io import BytesIO
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import BinaryIO, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from ..config.settings import (
+    LOTE_DOSSIES_CONFIG, PERFIS_RISCO, classificar_risco_serie
+)
+from ..config.database import executar_query, get_impala_engine, Queries
+from ..data.loader import carregar_dossies_em_lote
+from ..components.insights import avaliar_regras_insights, resumir_insights_por_grupo
+from .export import PDFDossie, exportar_para_excel
+from .artefatos import hash_entradas
+from .fila import exibir_relatorio_em_segundo_plano
+from ..utils.processos import contexto_processos
+
+COLUNAS_INDICE = ['ranking', 'num_grupo', 'qtd_cnpjs', 'score_final_percent', 'nivel_risco_final']
+
+# =============================================================================
+# SELEÇÃO DOS GRUPOS
+# =============================================================================
+
+def selecionar_grupos_lote(
+    df: pd.DataFrame,
+    niveis: Optional[List[str]] = None,
+    score_min: Optional[float] = None,
+    score_max: Optional[float] = None,
+    top_n: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Grupos do lote, do maior para o menor score_final_percent
+
+    Args:
+        df: DataFrame de gei_percent
+        niveis: Níveis de risco aceitos (None = todos)
+        score_min: Score mínimo (inclusivo)
+        score_max: Score máximo (inclusivo)
+        top_n: Mantém só os N primeiros após os demais filtros
+
+    Returns:
+        DataFrame filtrado com a coluna 'ranking'
+    """
+    if df.empty or 'score_final_percent' not in df.columns:
+        return df.iloc[0:0]
+
+    score = pd.to_numeric(df['score_final_percent'], errors='coerce')
+    if 'nivel_risco_final' not in df.columns:
+        df = df.assign(nivel_risco_final=classificar_risco_serie(score, 'percentual')['nivel'].astype(str))
+
+    mascara = score.notna()
+    if niveis:
+        mascara &= df['nivel_risco_final'].isin(niveis)
+    if score_min is not None:
+        mascara &= score >= score_min
+    if score_max is not None:
+        mascara &= score <= score_max
+
+    selecionados = df[mascara].assign(score_final_percent=score[mascara])
+    selecionados = selecionados.sort_values('score_final_percent', ascending=False, kind='stable')
+    if top_n:
+        selecionados = selecionados.head(top_n)
+
+    return selecionados.assign(ranking=range(1, len(selecionados) + 1)).reset_index(drop=True)
+
+# =============================================================================
+# RENDERIZAÇÃO (executada nos workers)
+# =============================================================================
+
+def _nome_arquivo_dossie(num_grupo: str) -> str:
+    return f"dossie_grupo_{num_grupo}.pdf"
+
+def _renderizar_dossie(
+    num_grupo: str,
+    dados_grupo: pd.Series,
+    dossie: Dict[str, pd.DataFrame]
+) -> Tuple[str, Optional[bytes], str]:
+    """Gera o PDF de um grupo; erros voltam como mensagem para não derrubar o lote"""
+    try:
+        return num_grupo, PDFDossie(num_grupo).gerar_pdf(dados_grupo, dossie).getvalue(), ''
+    except Exception as e:
+        return num_grupo, None, str(e)
+
+def _recolher_concluidos(
+    pendentes: Set[Future],
+    registrar: Callable[[str, Optional[bytes], str], None],
+    limite: int
+) -> Set[Future]:
+    """
+    Registra os PDFs já renderizados e espera os workers enquanto houver mais
+    de `limite` pendentes; os futuros concluídos são descartados, de modo que
+    cada PDF deixa a memória assim que vai para o zip
+
+    Returns:
+        Futuros ainda pendentes
+    """
+    concluidos, pendentes = wait(pendentes, timeout=0)
+    while True:
+        for futuro in concluidos:
+            registrar(*futuro.result())
+        if len(pendentes) <= limite:
+            return pendentes
+        concluidos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+
+# =============================================================================
+# GERAÇÃO DO LOTE
+# =============================================================================
+
+def gerar_lote_dossies(
+    engine,
+    grupos: pd.DataFrame,
+    destino: Union[str, BinaryIO],
+    n_workers: Optional[int] = None,
+    ao_progredir: Optional[Callable[[float, str], None]] = None
+) -> pd.DataFrame:
+    """
+    Gera o zip com um PDF por grupo e a planilha indice.xlsx
+
+    As seções de cada bloco de grupos são buscadas no processo principal
+    enquanto os workers renderizam os blocos anteriores; cada worker monta seus
+    PDFs de forma independente, então a vazão cresce com o número de núcleos.
+    Os PDFs são gravados no zip à medida que ficam prontos, e a busca espera
+    os workers quando há mais de um bloco pendente.
+
+    Args:
+        engine: Engine SQLAlchemy
+        grupos: Grupos selecionados (saída de selecionar_grupos_lote)
+        destino: Caminho ou arquivo binário do zip
+        n_workers: Processos de renderização (None usa LOTE_DOSSIES_CONFIG, 1 executa em série)
+        ao_progredir: Callback(fração, mensagem)
+
+    Returns:
+        DataFrame do índice (uma linha por grupo, com selos de insights, arquivo e status)
+    """
+    n_workers = LOTE_DOSSIES_CONFIG['n_workers'] if n_workers is None else n_workers
+    n_workers = max(1, min(n_workers, len(grupos)))
+    ao_progredir = ao_progredir or (lambda fracao, mensagem='': None)
+
+    linhas = {str(linha['num_grupo']): linha for _, linha in grupos.iterrows()}
+    total = max(len(linhas), 1)
+    resultados: Dict[str, Tuple[str, str]] = {}
+
+    with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_DEFLATED) as arquivo_zip:
+
+        def registrar(num_grupo: str, pdf: Optional[bytes], erro: str) -> None:
+            if pdf is not None:
+                arquivo_zip.writestr(_nome_arquivo_dossie(num_grupo), pdf)
+                resultados[num_grupo] = ('ok', '')
+            else:
+                resultados[num_grupo] = ('erro', erro)
+            ao_progredir(len(resultados) / total, f"{len(resultados):,} de {len(linhas):,} dossiês gerados")
+
+        blocos = carregar_dossies_em_lote(engine, list(linhas))
+
+        if n_workers == 1:
+            for dossies in blocos:
+                for num_grupo, dossie in dossies.items():
+                    registrar(*_renderizar_dossie(num_grupo, linhas[num_grupo], dossie))
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=contexto_processos()) as executor:
+                pendentes: Set[Future] = set()
+                enviados = 0
+                for dossies in blocos:
+                    pendentes.update(
+                        executor.submit(_renderizar_dossie, num_grupo, linhas[num_grupo], dossie)
+                        for num_grupo, dossie in dossies.items()
+                    )
+                    enviados += len(dossies)
+                    ao_progredir(len(resultados) / total, f"Dados de {enviados:,} de {len(linhas):,} grupos carregados")
+                    pendentes = _recolher_concluidos(pendentes, registrar, LOTE_DOSSIES_CONFIG['grupos_por_consulta'])
+
+                _recolher_concluidos(pendentes, registrar, 0)
+
+        colunas = [c for c in COLUNAS_INDICE if c in grupos.columns]
+        indice = grupos[colunas].merge(
+            resumir_insights_por_grupo(avaliar_regras_insights(grupos))[['num_grupo', 'insights']],
+            on='num_grupo', how='left'
+        )
+        chaves = indice['num_grupo'].astype(str)
+        indice['arquivo'] = chaves.map(lambda g: _nome_arquivo_dossie(g) if resultados.get(g, ('',))[0] == 'ok' else '')
+        indice['status'] = chaves.map(lambda g: resultados.get(g, ('erro', ''))[0])
+        indice['erro'] = chaves.map(lambda g: resultados.get(g, ('', 'Grupo não processado'))[1])
+
+        arquivo_zip.writestr('indice.xlsx', exportar_para_excel({'Índice': indice}, 'indice').getvalue())
+
+    return indice
+
+# =============================================================================
+# INTERFACE
+# =============================================================================
+
+def exibir_lote_dossies(engine, df: pd.DataFrame, chave: str = 'lote_dossies') -> None:
+    """
+    Filtros do lote, prévia dos grupos selecionados e geração em segundo plano
+
+    Args:
+        engine: Engine SQLAlchemy
+        df: DataFrame de gei_percent
+        chave: Prefixo das chaves dos widgets
+    """
+    max_grupos = LOTE_DOSSIES_CONFIG['max_grupos_interface']
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        niveis = st.multiselect(
+            "Níveis de risco",
+            options=list(PERFIS_RISCO['percentual']),
+            default=['CRÍTICO'],
+            key=f"{chave}_niveis"
+        )
+    with col2:
+        score_min, score_max = st.slider(
+            "Faixa de score (%)", 0.0, 100.0, (0.0, 100.0), step=1.0, key=f"{chave}_score"
+        )
+    with col3:
+        top_n = st.number_input(
+            "Top N (0 = todos)", min_value=0, max_value=max_grupos, value=50, step=10, key=f"{chave}_top"
+        )
+
+    grupos = selecionar_grupos_lote(df, niveis or None, score_min, score_max, int(top_n) or None)
+
+    if grupos.empty:
+        st.info("Nenhum grupo atende aos filtros.")
+        return
+
+    if len(grupos) > max_grupos:
+        st.warning(
+            f"{len(grupos):,} grupos selecionados; pela interface o lote é limitado aos {max_grupos:,} "
+            f"de maior score. Para lotes maiores, use: python -m src.reports.lote"
+        )
+        grupos = grupos.head(max_grupos)
+
+    st.caption(f"{len(grupos):,} grupos no lote")
+    st.dataframe(grupos[[c for c in COLUNAS_INDICE if c in grupos.columns]], height=250, hide_index=True)
+
+    def gerar(ao_progredir: Callable[[float, str], None]) -> BytesIO:
+        saida = BytesIO()
+        gerar_lote_dossies(engine, grupos, saida, ao_progredir=ao_progredir)
+        saida.seek(0)
+        return saida
+
+    exibir_relatorio_em_segundo_plano(
+        chave=hash_entradas('lote_dossies', grupos),
+        gerar=gerar,
+        label=f"📦 Download {len(grupos):,} Dossiês (ZIP)",
+        file_name=f"dossies_lote_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+        mime='application/zip',
+        extensao='.zip',
+        descricao=f"Lote de {len(grupos):,} dossiês"
+    )
+
+# =============================================================================
+# LINHA DE COMANDO
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Gera um lote de dossiês pela linha de comando
+
+    Exemplo:
+        python -m src.reports.lote --nivel CRÍTICO --top 200 --saida dossies.zip
+    """
+    parser = argparse.ArgumentParser(description="Gera dossiês em PDF em lote (zip com índice)")
+    parser.add_argument('--nivel', action='append', choices=list(PERFIS_RISCO['percentual']),
+                        help="Nível de risco (pode repetir)")
+    parser.add_argument('--score-min', type=float, help="Score mínimo (%%)")
+    parser.add_argument('--score-max', type=float, help="Score máximo (%%)")
+    parser.add_argument('--top', type=int, help="Apenas os N grupos de maior score")
+    parser.add_argument('--workers', type=int, default=LOTE_DOSSIES_CONFIG['n_workers'],
+                        help="Processos de renderização")
+    parser.add_argument('--saida', default=f"dossies_lote_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                        help="Arquivo zip de saída")
+    args = parser.parse_args(argv)
+
+    engine = get_impala_engine()
+    if engine is None:
+        print("Erro ao conectar ao banco de dados.", file=sys.stderr)
+        return 1
+
+    grupos = selecionar_grupos_lote(
+        executar_query(engine, Queries.get_extracao_percent(), show_error=False),
+        args.nivel, args.score_min, args.score_max, args.top
+    )
+    if grupos.empty:
+        print("Nenhum grupo atende aos filtros.", file=sys.stderr)
+        return 1
+
+    print(f"{len(grupos):,} grupos selecionados; gerando com {args.workers} processos...")
+    inicio = time.time()
+
+    def ao_progredir(fracao: float, mensagem: str = '') -> None:
+        print(f"\r[{fracao:6.1%}] {mensagem}", end='', flush=True)
+
+    # Grava em arquivo temporário e renomeia para não expor um zip incompleto
+    caminho_tmp = f"{args.saida}.tmp{os.getpid()}"
+    try:
+        indice = gerar_lote_dossies(engine, grupos, caminho_tmp, n_workers=args.workers, ao_progredir=ao_progredir)
+        os.replace(caminho_tmp, args.saida)
+    finally:
+        if os.path.exists(caminho_tmp):
+            os.remove(caminho_tmp)
+
+    erros = int((indice['status'] != 'ok').sum())
+    print(f"\n{len(indice) - erros:,} dossiês em {args.saida} ({time.time() - inicio:.1f}s, {erros:,} erros)")
+    return 0 if erros == 0 else 2
+
+if __name__ == '__main__':
+    sys.exit(main())
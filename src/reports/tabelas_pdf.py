@@ -0,0 +1,269 @@
+"""
+Módulo de Tabelas para PDF
+Converte DataFrames em dados de tabela do ReportLab com truncamento e
+formatação vetorizados (texto longo vira célula com quebra de linha), e compartilha folhas de estilo e estilos de tabela
+(criados uma vez por processo) entre todos os relatórios
+"""
+
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.styles import StyleSheet1, getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import Paragraph, Table, TableStyle
+
+from ..config.settings import PDF_CONFIG
+
+# Formatação de coluna: recebe a série inteira e devolve a série de textos
+Formato = Callable[[pd.Series], pd.Series]
+
+# =============================================================================
+# ESTILOS COMPARTILHADOS
+# =============================================================================
+
+_CABECALHO_CINZA = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+]
+
+ESTILOS_TABELA_PDF = {
+    # Tabelas do PDFDossie: cabeçalho azul, corpo bege, centralizado
+    'dossie': [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1F77B4')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), PDF_CONFIG['table_font_size']),
+    ],
+    # Tabelas dos relatórios do GEI.py: cabeçalho cinza, alinhado à esquerda
+    'cinza': _CABECALHO_CINZA + [
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ],
+    # Resumos (Métrica x Valor) em destaque
+    'cinza_destaque': _CABECALHO_CINZA + [
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ],
+}
+
+@lru_cache(maxsize=None)
+def estilos_pdf() -> StyleSheet1:
+    """
+    Folha de estilos única por processo: estilos padrão do ReportLab mais
+    os estilos personalizados dos relatórios (não deve ser alterada)
+    """
+    styles = getSampleStyleSheet()
+
+    # PDFDossie
+    styles.add(ParagraphStyle(
+        name='TituloCustom',
+        parent=styles['Heading1'],
+        fontSize=18,
+        textColor=colors.HexColor('#1F77B4'),
+        spaceAfter=12,
+        alignment=TA_CENTER
+    ))
+    styles.add(ParagraphStyle(
+        name='SubtituloCustom',
+        parent=styles['Heading2'],
+        fontSize=14,
+        textColor=colors.HexColor('#2C3E50'),
+        spaceAfter=10,
+        spaceBefore=10
+    ))
+    styles.add(ParagraphStyle(
+        name='NormalCustom',
+        parent=styles['Normal'],
+        fontSize=10,
+        spaceAfter=6
+    ))
+
+    # Relatórios do GEI.py
+    styles.add(ParagraphStyle(
+        name='TituloRelatorio',
+        parent=styles['Heading1'],
+        fontSize=20,
+        textColor=colors.HexColor('#1f77b4'),
+        spaceAfter=20,
+        alignment=TA_CENTER
+    ))
+    styles.add(ParagraphStyle(name='Recuo', parent=styles['Normal'], leftIndent=20))
+    styles.add(ParagraphStyle(name='Rodape', parent=styles['Normal'], fontSize=10, alignment=TA_CENTER))
+    styles.add(ParagraphStyle(
+        name='RodapeDiscreto', parent=styles['Normal'], fontSize=9, alignment=TA_CENTER, textColor=colors.grey
+    ))
+
+    return styles
+
+@lru_cache(maxsize=None)
+def estilo_tabela_pdf(nome: str = 'cinza', tamanho_fonte: Optional[float] = None) -> TableStyle:
+    """TableStyle compartilhado (um objeto por estilo e tamanho de fonte)"""
+    comandos = list(ESTILOS_TABELA_PDF[nome])
+    if tamanho_fonte is not None:
+        comandos.append(('FONTSIZE', (0, 0), (-1, -1), tamanho_fonte))
+    return TableStyle(comandos)
+
+@lru_cache(maxsize=None)
+def estilo_celula_pdf(tamanho_fonte: float = PDF_CONFIG['table_font_size']) -> ParagraphStyle:
+    """Estilo das células com quebra de linha (um objeto por tamanho de fonte)"""
+    return ParagraphStyle(
+        name=f'CelulaTabela{tamanho_fonte}',
+        parent=estilos_pdf()['Normal'],
+        fontSize=tamanho_fonte,
+        leading=tamanho_fonte * 1.2
+    )
+
+# =============================================================================
+# CONVERSÃO DE DATAFRAMES
+# =============================================================================
+
+def texto_coluna(serie: pd.Series, max_caracteres: Optional[int] = None, vazio: str = '') -> pd.Series:
+    """
+    Converte uma coluna em texto de uma vez (nulos viram `vazio`) e trunca
+
+    Args:
+        serie: Coluna de qualquer tipo
+        max_caracteres: Limite de caracteres (None = sem limite)
+        vazio: Texto para valores nulos
+
+    Returns:
+        Série de textos
+    """
+    texto = serie.astype(object).where(serie.notna(), vazio).astype(str)
+    if max_caracteres is not None:
+        texto = texto.str.slice(0, max_caracteres)
+    return texto
+
+def paragrafos_coluna(textos: pd.Series, tamanho_fonte: float = PDF_CONFIG['table_font_size']) -> np.ndarray:
+    """
+    Células com quebra de linha: o texto inteiro, ajustado à largura da coluna
+
+    O escape de XML e a troca de '\\n' por <br/> são feitos na coluna inteira;
+    só a criação dos Paragraph é por célula.
+
+    Args:
+        textos: Série de textos (saída de texto_coluna)
+        tamanho_fonte: Fonte das células
+
+    Returns:
+        Array de Paragraph
+    """
+    marcados = (
+        textos.str.replace('&', '&amp;', regex=False)
+        .str.replace('<', '&lt;', regex=False)
+        .str.replace('>', '&gt;', regex=False)
+        .str.replace('\n', '<br/>', regex=False)
+    )
+    estilo = estilo_celula_pdf(tamanho_fonte)
+
+    celulas = np.empty(len(marcados), dtype=object)
+    celulas[:] = [Paragraph(texto, estilo) for texto in marcados]
+    return celulas
+
+def dataframe_para_tabela(
+    df: pd.DataFrame,
+    colunas: Dict[str, str],
+    truncar: Optional[Dict[str, int]] = None,
+    formatos: Optional[Dict[str, Formato]] = None,
+    vazio: str = '',
+    quebrar: Optional[Sequence[str]] = None,
+    tamanho_fonte: float = PDF_CONFIG['table_font_size']
+) -> List[List]:
+    """
+    Dados de tabela do ReportLab (cabeçalho + linhas) a partir de um DataFrame
+
+    Cada coluna é formatada e truncada como um todo (sem laço por linha).
+
+    Args:
+        df: Dados
+        colunas: {cabeçalho: coluna do DataFrame}; colunas ausentes ficam vazias
+        truncar: {coluna: máximo de caracteres}
+        formatos: {coluna: função(série) -> série de textos}, p.ex. formatar_moeda_serie
+        vazio: Texto para valores nulos
+        quebrar: Colunas de texto longo, exibidas inteiras com quebra de linha
+        tamanho_fonte: Fonte das células de `quebrar`
+
+    Returns:
+        Lista de linhas, a primeira com os cabeçalhos
+    """
+    truncar = truncar or {}
+    formatos = formatos or {}
+    quebrar = set(quebrar or [])
+    textos = []
+
+    for coluna in colunas.values():
+        if coluna not in df.columns:
+            textos.append(np.full(len(df), vazio, dtype=object))
+            continue
+
+        serie = df[coluna]
+        if coluna in formatos:
+            serie = formatos[coluna](serie)
+        texto = texto_coluna(serie, truncar.get(coluna), vazio)
+        if coluna in quebrar:
+            textos.append(paragrafos_coluna(texto, tamanho_fonte))
+        else:
+            textos.append(texto.to_numpy(dtype=object))
+
+    linhas = np.column_stack(textos).tolist() if len(df) else []
+    return [list(colunas)] + linhas
+
+def criar_tabela_pdf(
+    dados: List[List],
+    larguras: Optional[Sequence[float]] = None,
+    estilo: str = 'cinza',
+    tamanho_fonte: Optional[float] = None,
+    comandos_extras: Optional[List[tuple]] = None
+) -> Table:
+    """
+    Tabela com estilo compartilhado e quebra automática entre páginas
+
+    Tabelas maiores que o espaço restante são divididas por linha
+    (splitByRow) e o cabeçalho é repetido em cada página (repeatRows).
+
+    Args:
+        dados: Linhas (a primeira é o cabeçalho)
+        larguras: Largura de cada coluna
+        estilo: Nome em ESTILOS_TABELA_PDF
+        tamanho_fonte: Fonte de todas as células (None = a do estilo)
+        comandos_extras: Comandos de TableStyle próprios desta tabela
+
+    Returns:
+        Table do ReportLab
+    """
+    tabela = Table(dados, colWidths=larguras, repeatRows=1, splitByRow=1)
+    tabela.setStyle(estilo_tabela_pdf(estilo, tamanho_fonte))
+    if comandos_extras:
+        tabela.setStyle(TableStyle(comandos_extras))
+    return tabela
+
+def tabela_de_dataframe(
+    df: pd.DataFrame,
+    colunas: Dict[str, str],
+    larguras: Optional[Sequence[float]] = None,
+    estilo: str = 'cinza',
+    tamanho_fonte: Optional[float] = None,
+    truncar: Optional[Dict[str, int]] = None,
+    formatos: Optional[Dict[str, Formato]] = None,
+    vazio: str = '',
+    quebrar: Optional[Sequence[str]] = None
+) -> Table:
+    """Atalho: dataframe_para_tabela + criar_tabela_pdf"""
+    return criar_tabela_pdf(
+        dataframe_para_tabela(
+            df, colunas, truncar, formatos, vazio, quebrar,
+            tamanho_fonte or PDF_CONFIG['table_font_size']
+        ),
+        larguras, estilo, tamanho_fonte
+    )
@@ -0,0 +1,44 @@
+"""
+Módulo de Importação sob Demanda
+Exportações preguiçosas para os __init__ dos pacotes (PEP 562): o submódulo
+só é importado, com suas bibliotecas pesadas (scikit-learn, SciPy, ReportLab,
+openpyxl), quando um dos seus nomes é usado pela primeira vez
+"""
+
+import sys
+import importlib
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+def exportacoes_sob_demanda(
+    pacote: str,
+    modulos: Dict[str, Iterable[str]]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Funções __getattr__ e __dir__ de um pacote com exportações preguiçosas
+
+    Uso no __init__.py:
+        __getattr__, __dir__ = exportacoes_sob_demanda(__name__, {
+            '.clustering': ['preparar_dados_ml', ...],
+        })
+
+    Args:
+        pacote: __name__ do pacote
+        modulos: {submódulo relativo: nomes exportados}
+
+    Returns:
+        Tupla (__getattr__, __dir__)
+    """
+    origem = {nome: modulo for modulo, nomes in modulos.items() for nome in nomes}
+
+    def __getattr__(nome: str) -> Any:
+        if nome not in origem:
+            raise AttributeError(f"module {pacote!r} has no attribute {nome!r}")
+        valor = getattr(importlib.import_module(origem[nome], pacote), nome)
+        # Próximos acessos vão direto ao atributo, sem passar por aqui
+        setattr(sys.modules[pacote], nome, valor)
+        return valor
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[pacote])) | set(origem))
+
+    return __getattr__, __dir__
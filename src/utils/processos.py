@@ -0,0 +1,64 @@
+"""
+Módulo de Pools de Processos
+Contexto de multiprocessing dos pools de modelos de ML e de dossiês em lote:
+forkserver (ou spawn) em vez de fork, que pode copiar travas mantidas por
+outras threads do servidor do Streamlit, e workers que não re-executam o
+script do app ao iniciar
+"""
+
+import sys
+import threading
+import multiprocessing
+import importlib.machinery
+from contextlib import contextmanager
+from typing import Iterator
+
+from ..config.settings import METODO_INICIO_PROCESSOS
+
+_trava_main = threading.Lock()
+
+@contextmanager
+def _sem_reexecutar_script() -> Iterator[None]:
+    """
+    Enquanto um worker é criado, faz o __main__ parecer um módulo sem arquivo
+
+    Com forkserver/spawn, cada worker re-executa o __main__ a partir do
+    __file__ quando ele não tem __spec__. É o caso do módulo em que o
+    Streamlit executa o app.py/GEI.py: sem isto, cada worker rodaria o app
+    inteiro (login, conexão com o banco...). As tarefas dos pools são
+    funções de src/, então os workers não precisam do script.
+    """
+    with _trava_main:
+        principal = sys.modules['__main__']
+        if getattr(principal, '__spec__', None) is not None or not hasattr(principal, '__file__'):
+            yield
+            return
+
+        principal.__spec__ = importlib.machinery.ModuleSpec('__main__', None)
+        try:
+            yield
+        finally:
+            principal.__spec__ = None
+
+_base = multiprocessing.get_context(METODO_INICIO_PROCESSOS)
+
+# Em nível de módulo: o worker recebe o objeto do processo serializado
+class _Processo(_base.Process):
+    @staticmethod
+    def _Popen(process_obj):
+        with _sem_reexecutar_script():
+            return _base.Process._Popen(process_obj)
+
+class _Contexto(type(_base)):
+    Process = _Processo
+
+_CONTEXTO = _Contexto()
+
+def contexto_processos() -> multiprocessing.context.BaseContext:
+    """
+    Contexto para ProcessPoolExecutor(mp_context=...) com METODO_INICIO_PROCESSOS
+
+    Returns:
+        Contexto de multiprocessing
+    """
+    return _CONTEXTO
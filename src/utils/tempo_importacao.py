@@ -0,0 +1,208 @@
+"""
+Módulo de Tempo de Importação
+Mede, como `python -X importtime`, o custo das importações feitas no topo do
+app (as que todo worker do Streamlit paga ao iniciar) e verifica o orçamento
+de TEMPO_IMPORTACAO_CONFIG: tempo total, bibliotecas que só devem ser
+carregadas sob demanda e regressão em relação a um relatório salvo
+
+Uso:
+    python -m src.utils.tempo_importacao                       # app.py
+    python -m src.utils.tempo_importacao --script GEI.py
+    python -m src.utils.tempo_importacao --salvar base.json    # guarda a medição
+    python -m src.utils.tempo_importacao --base base.json      # compara com ela
+"""
+
+import os
+import re
+import ast
+import sys
+import json
+import argparse
+import subprocess
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from ..config.settings import TEMPO_IMPORTACAO_CONFIG
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Linha do -X importtime: "import time:   self |   cumulative | [espaços]módulo"
+_LINHA_IMPORTTIME = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)')
+
+# =============================================================================
+# MEDIÇÃO
+# =============================================================================
+
+def importacoes_iniciais(caminho_script: str) -> str:
+    """
+    Código com as importações de nível de módulo de um script
+
+    Só os `import`/`from ... import` do corpo principal entram (os de dentro
+    de funções e de páginas são sob demanda); o restante do script não é executado.
+
+    Args:
+        caminho_script: Caminho do script (p.ex. app.py)
+
+    Returns:
+        Código Python com uma importação por linha
+    """
+    with open(caminho_script, encoding='utf-8') as arquivo:
+        arvore = ast.parse(arquivo.read(), filename=caminho_script)
+
+    return '\n'.join(
+        ast.unparse(no) for no in arvore.body
+        if isinstance(no, (ast.Import, ast.ImportFrom))
+    )
+
+def medir_importacao(codigo: str) -> Dict:
+    """
+    Executa o código em um novo interpretador com -X importtime
+
+    Args:
+        codigo: Código com as importações
+
+    Returns:
+        Dicionário com total_ms, por_pacote (ms, pelo pacote raiz) e modulos
+    """
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', codigo],
+        cwd=RAIZ_PROJETO, capture_output=True, text=True
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(f"Falha ao importar:\n{resultado.stderr[-2000:]}")
+
+    por_pacote: Dict[str, float] = {}
+    modulos: List[str] = []
+    for linha in resultado.stderr.splitlines():
+        encontrado = _LINHA_IMPORTTIME.match(linha)
+        if encontrado is None:
+            continue
+        proprio_us, modulo = int(encontrado.group(1)), encontrado.group(3)
+        raiz = modulo.split('.')[0]
+        por_pacote[raiz] = por_pacote.get(raiz, 0.0) + proprio_us / 1000
+        modulos.append(modulo)
+
+    return {
+        'total_ms': sum(por_pacote.values()),
+        'por_pacote': dict(sorted(por_pacote.items(), key=lambda item: -item[1])),
+        'modulos': modulos
+    }
+
+def relatorio_inicializacao(
+    caminho_script: str,
+    repeticoes: int = TEMPO_IMPORTACAO_CONFIG['repeticoes']
+) -> Dict:
+    """
+    Relatório de importação do script: a execução mais rápida de `repeticoes`
+    (cada uma em processo novo, sem módulos já carregados)
+
+    Args:
+        caminho_script: Caminho do script
+        repeticoes: Número de medições
+
+    Returns:
+        Dicionário com script, data, python, total_ms, por_pacote e sob_demanda_carregados
+    """
+    codigo = importacoes_iniciais(caminho_script)
+    medicao = min((medir_importacao(codigo) for _ in range(max(1, repeticoes))), key=lambda m: m['total_ms'])
+
+    carregados = sorted(
+        biblioteca for biblioteca in TEMPO_IMPORTACAO_CONFIG['modulos_sob_demanda']
+        if any(modulo == biblioteca or modulo.startswith(biblioteca + '.') for modulo in medicao['modulos'])
+    )
+
+    return {
+        'script': os.path.relpath(caminho_script, RAIZ_PROJETO),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'total_ms': round(medicao['total_ms'], 1),
+        'por_pacote': {pacote: round(ms, 1) for pacote, ms in medicao['por_pacote'].items()},
+        'sob_demanda_carregados': carregados
+    }
+
+# =============================================================================
+# VERIFICAÇÃO
+# =============================================================================
+
+def verificar_orcamento(relatorio: Dict, base: Optional[Dict] = None) -> List[str]:
+    """
+    Problemas do relatório frente ao orçamento e, se houver, à medição base
+
+    Args:
+        relatorio: Saída de relatorio_inicializacao
+        base: Relatório salvo anteriormente (mesmo formato)
+
+    Returns:
+        Lista de mensagens (vazia quando tudo está dentro do orçamento)
+    """
+    problemas = []
+
+    orcamento = TEMPO_IMPORTACAO_CONFIG['orcamento_ms']
+    if relatorio['total_ms'] > orcamento:
+        problemas.append(f"Importação inicial de {relatorio['total_ms']:.0f} ms excede o orçamento de {orcamento} ms")
+
+    if relatorio['sob_demanda_carregados']:
+        problemas.append(
+            "Bibliotecas sob demanda carregadas na inicialização: " + ', '.join(relatorio['sob_demanda_carregados'])
+        )
+
+    if base is not None:
+        limite = base['total_ms'] * (1 + TEMPO_IMPORTACAO_CONFIG['tolerancia_regressao'])
+        if relatorio['total_ms'] > limite:
+            problemas.append(
+                f"Regressão: {relatorio['total_ms']:.0f} ms contra {base['total_ms']:.0f} ms da base "
+                f"({base.get('data', '?')}, limite {limite:.0f} ms)"
+            )
+
+    return problemas
+
+def formatar_relatorio(relatorio: Dict, n_pacotes: int = 12) -> str:
+    """Texto do relatório: total e os pacotes mais caros"""
+    linhas = [
+        f"Importações iniciais de {relatorio['script']}: {relatorio['total_ms']:.0f} ms "
+        f"(orçamento {TEMPO_IMPORTACAO_CONFIG['orcamento_ms']} ms, Python {relatorio['python']})"
+    ]
+    for pacote, ms in list(relatorio['por_pacote'].items())[:n_pacotes]:
+        linhas.append(f"  {pacote:<24}{ms:>9.1f} ms")
+    return '\n'.join(linhas)
+
+# =============================================================================
+# LINHA DE COMANDO
+# =============================================================================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Mede as importações iniciais e verifica o orçamento
+
+    Returns:
+        0 dentro do orçamento, 1 caso contrário
+    """
+    parser = argparse.ArgumentParser(description="Tempo de importação na inicialização do app")
+    parser.add_argument('--script', default='app.py', help="Script de entrada (relativo à raiz do projeto)")
+    parser.add_argument('--repeticoes', type=int, default=TEMPO_IMPORTACAO_CONFIG['repeticoes'],
+                        help="Medições (vale a mais rápida)")
+    parser.add_argument('--base', help="Relatório JSON salvo para comparação")
+    parser.add_argument('--salvar', help="Grava o relatório JSON desta medição")
+    args = parser.parse_args(argv)
+
+    relatorio = relatorio_inicializacao(os.path.join(RAIZ_PROJETO, args.script), args.repeticoes)
+    print(formatar_relatorio(relatorio))
+
+    base = None
+    if args.base:
+        with open(args.base, encoding='utf-8') as arquivo:
+            base = json.load(arquivo)
+
+    if args.salvar:
+        with open(args.salvar, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+
+    problemas = verificar_orcamento(relatorio, base)
+    for problema in problemas:
+        print(f"❌ {problema}", file=sys.stderr)
+    if not problemas:
+        print("✅ Dentro do orçamento")
+    return 1 if problemas else 0
+
+if __name__ == '__main__':
+    sys.exit(main())